@@ -18,12 +18,133 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ALGORITHM: str = "HS256"
 
+    # Cache do usuário autenticado (0 desativa)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+
+    # Embute email/nome no token: autenticação sem consultar o banco
+    AUTH_TOKEN_EMBED_CLAIMS: bool = False
+
     # =========================================================
     # Mapbox
     # =========================================================
     MAPBOX_TOKEN: str | None = None
     MAPBOX_STYLE_URL: str | None = None
 
+    # =========================================================
+    # GEOMETRIA
+    # =========================================================
+    # Máximo de Transformers pyproj mantidos em cache (LRU)
+    PROJECAO_CACHE_MAX_TRANSFORMERS: int = 64
+
+    # Cache de geometrias parseadas (0 desativa)
+    GEOMETRIA_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Diretório compartilhado entre workers do mesmo host (opcional)
+    GEOMETRIA_CACHE_DIR: str | None = None
+    GEOMETRIA_CACHE_DIR_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # =========================================================
+    # CROQUI
+    # =========================================================
+    # Croquis renderizados (SVG/PNG/PDF), compartilhados entre workers
+    CROQUI_CACHE_DIR: str = "app/uploads/cache/croqui"
+    CROQUI_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # =========================================================
+    # MEMORIAL (LOTE)
+    # =========================================================
+    # Processos do pool de parse em lote (0 = número de CPUs)
+    MEMORIAL_LOTE_MAX_WORKERS: int = 0
+    MEMORIAL_LOTE_MAX_ITENS: int = 500
+
+    # =========================================================
+    # EXPORTAÇÃO (PACOTE ZIP)
+    # =========================================================
+    # Threads que geram os formatos do pacote (0 = um por formato)
+    EXPORTACAO_PACOTE_MAX_WORKERS: int = 0
+
+    # Nível do deflate no ZIP (0 = apenas armazenar)
+    EXPORTACAO_PACOTE_COMPRESSAO: int = 6
+
+    # =========================================================
+    # PDF (RENDERIZAÇÃO)
+    # =========================================================
+    # Processos de renderização aquecidos (0 = renderiza em thread local)
+    PDF_RENDER_MAX_WORKERS: int = 2
+    # Tempo de uma renderização no pool
+    PDF_RENDER_TIMEOUT_SEGUNDOS: float = 120.0
+    # Espera de quem pediu o PDF de forma síncrona: inclui a fila das
+    # threads de coordenação, por isso bem maior que a de uma renderização
+    PDF_RENDER_ESPERA_SEGUNDOS: float = 600.0
+
+    # PDFs por (tipo, versão do template, hash dos dados), compartilhados
+    # entre workers do host; manifestos dos jobs ficam em jobs/
+    PDF_CACHE_DIR: str = "app/uploads/cache/pdf"
+    PDF_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    PDF_JOB_TTL_SEGUNDOS: int = 24 * 3600
+
+    # =========================================================
+    # SNAPSHOTS (PARÂMETROS DE CÁLCULO / MUNICÍPIOS)
+    # =========================================================
+    # Por quanto tempo um worker confia no snapshot sem consultar a
+    # versão no banco (0 = consulta uma vez por transação)
+    SNAPSHOT_VERSAO_TTL_SEGUNDOS: float = 0.0
+
+    # =========================================================
+    # SIMULAÇÃO DE ORÇAMENTOS (LOTE)
+    # =========================================================
+    # Máximo de cenários por chamada (itens + produto das variações)
+    SIMULACAO_LOTE_MAX_ITENS: int = 20000
+
+    # =========================================================
+    # STATUS DO PROJETO (RECÁLCULO)
+    # =========================================================
+    # Janela para coalescer gatilhos fora de um escopo adiar()
+    # (0 = avalia na hora, na mesma requisição)
+    PROJETO_RECALCULO_DEBOUNCE_MS: int = 0
+
+    # =========================================================
+    # UPLOADS
+    # =========================================================
+    UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+    # Uploads retomáveis sem atividade por mais tempo são descartados
+    UPLOAD_SESSAO_TTL_HORAS: int = 24
+
+    # =========================================================
+    # DOWNLOADS
+    # =========================================================
+    # Arquivos sem hash armazenado maiores que isto usam ETag fraca
+    DOWNLOAD_ETAG_HASH_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Quando definido (ex.: "/_protegido"), a aplicação só autoriza e o
+    # nginx entrega o arquivo via X-Accel-Redirect (location internal).
+    DOWNLOAD_X_ACCEL_PREFIX: str | None = None
+    DOWNLOAD_X_ACCEL_ROOT: str = "/app/app/uploads"
+
+    # =========================================================
+    # OCR PIPELINE
+    # =========================================================
+    OCR_PIPELINE_MAX_WORKERS: int = 4
+
+    # Quando True, /internal/ocr/pipeline/jobs apenas enfileira o job
+    # e o worker (app/workers/automation_worker.py) o executa.
+    OCR_PIPELINE_USE_WORKER: bool = False
+
+    # =========================================================
+    # WORKER DE AUTOMAÇÕES
+    # =========================================================
+    WORKER_POLL_INTERVAL_SECONDS: float = 2.0
+    WORKER_BATCH_SIZE: int = 5
+    WORKER_LEASE_SECONDS: int = 120
+    WORKER_HEARTBEAT_SECONDS: int = 30
+    WORKER_MAX_ATTEMPTS: int = 3
+    WORKER_RETRY_BASE_SECONDS: int = 30
+
+    # Formato: "OCR_DOCUMENT=2,RI_DIGITAL_MATRICULA=1"
+    WORKER_CONCURRENCY: str = "OCR_DOCUMENT=2"
+
     # =========================================================
     # CORS
     # =========================================================
@@ -3,14 +3,74 @@ from fastapi import Depends, HTTPException, status, Header
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 from app.core.config import settings
+from app.core.principal_cache import Principal, PrincipalCache
 from app.models.user import User
 
 ALGORITHM = settings.ALGORITHM
 
 
-def _decode_token(token: str, db: Session) -> User:
+def _principal_do_token(user_id: int, payload: dict) -> Principal | None:
+    """
+    Tokens emitidos com AUTH_TOKEN_EMBED_CLAIMS carregam email/nome;
+    dispensam o banco enquanto o usuário não mudar depois da emissão.
+    """
+    if not settings.AUTH_TOKEN_EMBED_CLAIMS:
+        return None
+
+    email = payload.get("email")
+    nome = payload.get("name")
+    if not email or not nome:
+        return None
+
+    if PrincipalCache.alterado_apos(user_id, payload.get("iat")):
+        return None
+
+    return Principal(
+        id=user_id,
+        email=email,
+        full_name=nome,
+        claims=dict(payload.get("claims") or {}),
+    )
+
+
+def _carregar_principal(user_id: int, db: Session | None) -> Principal | None:
+    sessao_propria = db is None
+    sessao = SessionLocal() if sessao_propria else db
+
+    try:
+        # Só colunas escalares: o model carrega projects via selectin
+        row = (
+            sessao.query(
+                User.id,
+                User.email,
+                User.full_name,
+                User.phone,
+                User.created_at,
+                User.updated_at,
+            )
+            .filter(User.id == user_id)
+            .first()
+        )
+    finally:
+        if sessao_propria:
+            sessao.close()
+
+    if not row:
+        return None
+
+    return Principal(
+        id=int(row.id),
+        email=row.email,
+        full_name=row.full_name,
+        phone=row.phone,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+def _decode_token(token: str, db: Session | None = None) -> Principal:
     try:
         payload = jwt.decode(
             token,
@@ -20,29 +80,39 @@ def _decode_token(token: str, db: Session) -> User:
         user_id = payload.get("sub")
         if not user_id:
             raise ValueError()
+        user_id = int(user_id)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
+    principal = _principal_do_token(user_id, payload)
+    if principal:
+        return principal
+
+    principal = PrincipalCache.obter(user_id)
+    if principal:
+        return principal
+
+    principal = _carregar_principal(user_id, db)
+    if not principal:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário não encontrado",
         )
 
-    return user
+    PrincipalCache.guardar(principal)
+    return principal
 
 
 # =========================================================
 # AUTENTICAÇÃO OBRIGATÓRIA (Bearer <token>)
+# Sessão de banco só é aberta quando o principal não está em cache.
 # =========================================================
 def get_current_user_required(
     authorization: str = Header(..., alias="Authorization"),
-    db: Session = Depends(get_db),
-) -> User:
+) -> Principal:
     if not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,7 +120,7 @@ def get_current_user_required(
         )
 
     token = authorization.replace("Bearer ", "").strip()
-    return _decode_token(token, db)
+    return _decode_token(token)
 
 
 # =========================================================
@@ -58,14 +128,13 @@ def get_current_user_required(
 # =========================================================
 def get_current_user_optional(
     authorization: str | None = Header(None, alias="Authorization"),
-    db: Session = Depends(get_db),
-) -> User | None:
+) -> Principal | None:
     if not authorization or not authorization.startswith("Bearer "):
         return None
 
     token = authorization.replace("Bearer ", "").strip()
     try:
-        return _decode_token(token, db)
+        return _decode_token(token)
     except HTTPException:
         return None
 
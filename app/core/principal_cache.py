@@ -0,0 +1,136 @@
+# app/core/principal_cache.py
+"""
+Cache do usuário autenticado (principal) para as dependências de auth.
+
+Evita um SELECT em users a cada requisição autenticada. Entradas vivem
+AUTH_PRINCIPAL_CACHE_TTL_SECONDS e são descartadas neste processo assim
+que o usuário é alterado ou removido via ORM; em outros processos o TTL
+curto limita a janela de dados antigos.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Dados escalares do usuário autenticado.
+
+    Rotas usam apenas os atributos (id, email, ...); relacionamentos
+    como `projects` não fazem parte do principal.
+    """
+
+    id: int
+    email: str
+    full_name: str
+    phone: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    # Claims extras vindas do token (ex.: papel), quando embutidas
+    claims: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=int(user.id),
+            email=user.email,
+            full_name=user.full_name,
+            phone=user.phone,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class PrincipalCache:
+    MAX_ENTRADAS = 10000
+
+    _lock = threading.Lock()
+    _entradas: dict[int, tuple[Principal, float]] = {}
+
+    # user_id -> instante (epoch) da última alteração vista neste processo
+    _alterados: dict[int, float] = {}
+
+    @classmethod
+    def obter(cls, user_id: int) -> Optional[Principal]:
+        ttl = settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+        if ttl <= 0:
+            return None
+
+        with cls._lock:
+            item = cls._entradas.get(user_id)
+            if not item:
+                return None
+
+            principal, expira_em = item
+            if expira_em < time.monotonic():
+                cls._entradas.pop(user_id, None)
+                return None
+
+            return principal
+
+    @classmethod
+    def guardar(cls, principal: Principal) -> None:
+        ttl = settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+        if ttl <= 0:
+            return
+
+        with cls._lock:
+            if len(cls._entradas) >= cls.MAX_ENTRADAS:
+                agora = time.monotonic()
+                for user_id in [k for k, (_, exp) in cls._entradas.items() if exp < agora]:
+                    cls._entradas.pop(user_id, None)
+
+                if len(cls._entradas) >= cls.MAX_ENTRADAS:
+                    cls._entradas.clear()
+
+            cls._entradas[principal.id] = (principal, time.monotonic() + ttl)
+
+    @classmethod
+    def invalidar(cls, user_id: int) -> None:
+        with cls._lock:
+            cls._entradas.pop(user_id, None)
+            cls._alterados[user_id] = time.time()
+
+    @classmethod
+    def alterado_apos(cls, user_id: int, emitido_em: Optional[float]) -> bool:
+        """
+        True se o usuário mudou (neste processo) depois da emissão do
+        token; claims embutidas nele não são mais confiáveis.
+        """
+        with cls._lock:
+            alterado_em = cls._alterados.get(user_id)
+
+        if alterado_em is None:
+            return False
+
+        return emitido_em is None or alterado_em >= float(emitido_em)
+
+    @classmethod
+    def limpar(cls) -> None:
+        with cls._lock:
+            cls._entradas.clear()
+            cls._alterados.clear()
+
+
+# =========================================================
+# INVALIDAÇÃO AUTOMÁTICA
+# =========================================================
+@event.listens_for(User, "after_update")
+def _usuario_alterado(mapper, connection, target: User) -> None:
+    PrincipalCache.invalidar(int(target.id))
+
+
+@event.listens_for(User, "after_delete")
+def _usuario_removido(mapper, connection, target: User) -> None:
+    PrincipalCache.invalidar(int(target.id))
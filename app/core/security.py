@@ -27,6 +27,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def create_access_token(
     subject: str | int,
     expires_delta: Optional[timedelta] = None,
+    claims: Optional[dict] = None,
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -36,8 +37,10 @@ def create_access_token(
         )
 
     to_encode = {
+        **(claims or {}),
         "sub": str(subject),  # JWT exige string
         "exp": expire,
+        "iat": datetime.utcnow(),
     }
 
     encoded_jwt = jwt.encode(
@@ -46,3 +49,17 @@ def create_access_token(
         algorithm=ALGORITHM,
     )
     return encoded_jwt
+
+
+def user_token_claims(user) -> dict:
+    """
+    Claims do usuário embutidas no token quando AUTH_TOKEN_EMBED_CLAIMS
+    está ativo; permitem autenticar sem consultar o banco.
+    """
+    if not settings.AUTH_TOKEN_EMBED_CLAIMS:
+        return {}
+
+    return {
+        "email": user.email,
+        "name": user.full_name,
+    }
@@ -1,6 +1,10 @@
+from typing import Any
+
 from sqlalchemy.orm import Session
 
 from app.models.automation_job import AutomationJob
+from app.models.document import Document
+from app.models.project import Project
 
 
 def create_ocr_job(
@@ -29,4 +33,42 @@ def create_ocr_job(
     db.commit()
     db.refresh(job)
 
-    return job
\ No newline at end of file
+    return job
+
+def create_ocr_pipeline_job(
+    db: Session,
+    document_id: int,
+    ocr_result_id: int | None,
+    categoria: str,
+    dados: dict[str, Any],
+) -> AutomationJob:
+    doc = db.query(Document).filter(Document.id == document_id).first()
+    if not doc:
+        raise ValueError("Documento não encontrado.")
+
+    project = db.query(Project).filter(Project.id == doc.project_id).first()
+    if not project:
+        raise ValueError("Projeto do documento não encontrado.")
+
+    payload = {
+        "origem": "OCR_PIPELINE",
+        "document_id": document_id,
+        "ocr_result_id": ocr_result_id,
+        "categoria": categoria,
+        "dados": dados,
+        "pipeline_stages": {},
+    }
+
+    job = AutomationJob(
+        user_id=project.owner_id,
+        project_id=project.id,
+        type="OCR_DOCUMENT",
+        status="PENDING",
+        payload_json=payload,
+    )
+
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    return job
@@ -4,6 +4,11 @@ from app.schemas.calculation_parameter import (
     CalculationParameterCreate,
     CalculationParameterUpdate,
 )
+from app.services.snapshot_cache_service import SnapshotCacheService
+
+
+def _invalidar_snapshot(db: Session) -> None:
+    SnapshotCacheService.incrementar(db, SnapshotCacheService.PARAMETROS_CALCULO)
 
 
 def get_all_parameters(db: Session):
@@ -22,6 +27,7 @@ def create_parameter(db: Session, data: CalculationParameterCreate):
     param = CalculationParameter(**data.model_dump())
     db.add(param)
     db.commit()
+    _invalidar_snapshot(db)
     db.refresh(param)
     return param
 
@@ -39,6 +45,7 @@ def update_parameter(
         setattr(param, field, value)
 
     db.commit()
+    _invalidar_snapshot(db)
     db.refresh(param)
     return param
 
@@ -50,4 +57,5 @@ def delete_parameter(db: Session, parameter_id: int):
 
     db.delete(param)
     db.commit()
+    _invalidar_snapshot(db)
     return True
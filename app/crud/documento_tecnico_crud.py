@@ -11,8 +11,7 @@ from app.schemas.documento_tecnico import (
     DocumentoTecnicoNovaVersaoRequest,
 )
 
-from app.services.project_fluxo_service import ProjectFluxoService
-from app.services.project_automacao_service import ProjectAutomacaoService
+from app.services.project_recalculo_service import ProjectRecalculoService
 
 
 # =========================================================
@@ -67,25 +66,11 @@ def _executar_automacoes_pos_documento(
     project_id: int,
 ) -> None:
     """
-    Automações de fluxo não podem derrubar a criação do documento técnico.
+    Marca o projeto para recálculo de status. Dentro de um escopo
+    ProjectRecalculoService.adiar() (ex.: pipeline de OCR) os vários
+    documentos criados geram uma única avaliação.
     """
-    try:
-        ProjectFluxoService.avaliar_fluxo_projeto(db, project_id)
-    except Exception as exc:
-        try:
-            db.rollback()
-        except Exception:
-            pass
-        print(f"⚠️ Falha ao atualizar fluxo do projeto {project_id}: {str(exc)}")
-
-    try:
-        ProjectAutomacaoService.aplicar_status_automatico(db, project_id)
-    except Exception as exc:
-        try:
-            db.rollback()
-        except Exception:
-            pass
-        print(f"⚠️ Falha ao aplicar automação do projeto {project_id}: {str(exc)}")
+    ProjectRecalculoService.marcar(db, project_id)
 
 
 # =========================================================
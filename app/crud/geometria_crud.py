@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.geometria import Geometria
 from app.schemas.geometria import GeometriaCreate, GeometriaUpdate
+from app.services.geometria_persistencia_service import GeometriaPersistenciaService
 from app.services.geometria_service import GeometriaService
 
 
@@ -66,6 +67,15 @@ def update_geometria(db: Session, geometria_id: int, data: GeometriaUpdate) -> G
         obj.area_hectares = area_ha
         obj.perimetro_m = perimetro_m
 
+    if geojson_new is not None:
+        # Regrava só os vértices/segmentos que mudaram
+        GeometriaPersistenciaService.persistir_estrutura(
+            db=db,
+            geometria_id=obj.id,
+            geojson=obj.geojson,
+            modo="diff",
+        )
+
     if "nome" in payload:
         obj.nome = payload["nome"]
     if "observacoes" in payload:
@@ -1,8 +1,17 @@
-from sqlalchemy.orm import Session, selectinload
+import base64
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, aliased
 from app.models.project import Project
 from app.schemas.project import ProjectCreate, ProjectUpdate
+from app.models.document import Document
 from app.models.imovel import Imovel
 from app.models.matricula import Matricula
+from app.models.proposal import Proposal
 from app.models.proprietario import Proprietario
 
 from app.schemas.project_status import ProjectStatusCreate
@@ -107,51 +116,242 @@ def list_projects(db: Session, owner_id: int):
         .all()
     )
 
-def list_projects_card(db: Session, owner_id: int):
-    projects = (
-        db.query(Project)
-        .options(
-            selectinload(Project.documents),
-            selectinload(Project.proposals),
-            selectinload(Project.imoveis).selectinload(Imovel.proprietarios),
+# ===================================
+# CARDS (PROJEÇÃO + PAGINAÇÃO POR CURSOR)
+# ===================================
+# Ordenações aceitas: coluna de ordenação (sem NULL, para o cursor)
+CARD_ORDENACOES = {
+    "created_at": Project.created_at,
+    "name": Project.name,
+    "status": Project.status,
+    "municipio": func.coalesce(Project.municipio, ""),
+}
+
+CARD_LIMITE_MAXIMO = 100
+
+# create_all não cria índices em tabelas existentes
+DDL_CARDS = [
+    "CREATE INDEX IF NOT EXISTS ix_proposals_project_id ON proposals (project_id)",
+    (
+        "CREATE INDEX IF NOT EXISTS ix_projects_owner_created "
+        "ON projects (owner_id, created_at, id)"
+    ),
+]
+
+
+def garantir_indices_cards(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for ddl in DDL_CARDS:
+            conn.execute(text(ddl))
+
+
+def _filtros_cards(
+    owner_id: int,
+    status: Optional[str] = None,
+    municipio: Optional[str] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+) -> list:
+    filtros = [Project.owner_id == owner_id]
+
+    if status and status.strip():
+        filtros.append(func.upper(Project.status) == status.strip().upper())
+    if municipio and municipio.strip():
+        filtros.append(func.lower(Project.municipio) == municipio.strip().lower())
+    if created_from:
+        filtros.append(Project.created_at >= datetime.combine(created_from, datetime.min.time()))
+    if created_to:
+        # Data final inclusiva
+        filtros.append(
+            Project.created_at < datetime.combine(created_to + timedelta(days=1), datetime.min.time())
         )
-        .filter(Project.owner_id == owner_id)
-        .all()
+
+    return filtros
+
+
+def _query_cards(db: Session, filtros: list):
+    """
+    Só as colunas do card. Contagens e "primeiro" imóvel/proprietário
+    são subconsultas correlacionadas: rodam apenas para as linhas
+    devolvidas, sem carregar documentos/propostas como objetos.
+    """
+    imovel_interno = aliased(Imovel)
+    proprietario_interno = aliased(Proprietario)
+
+    primeiro_imovel_id = (
+        select(func.min(imovel_interno.id))
+        .where(imovel_interno.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    primeiro_proprietario_id = (
+        select(func.min(proprietario_interno.id))
+        .where(proprietario_interno.imovel_id == Imovel.id)
+        .correlate(Imovel)
+        .scalar_subquery()
+    )
+    total_documents = (
+        select(func.count(Document.id))
+        .where(Document.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    total_proposals = (
+        select(func.count(Proposal.id))
+        .where(Proposal.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+
+    return (
+        db.query(
+            Project.id,
+            Project.name,
+            Project.descricao_simplificada,
+            Project.municipio,
+            Project.uf,
+            Project.status,
+            Project.created_at,
+            Imovel.area_hectares,
+            Imovel.ccir,
+            Proprietario.nome_completo,
+            Proprietario.cpf,
+            total_documents.label("total_documents"),
+            total_proposals.label("total_proposals"),
+        )
+        .select_from(Project)
+        .outerjoin(Imovel, Imovel.id == primeiro_imovel_id)
+        .outerjoin(Proprietario, Proprietario.id == primeiro_proprietario_id)
+        .filter(*filtros)
     )
 
-    result = []
 
-    for p in projects:
-        imovel = p.imoveis[0] if p.imoveis else None
-        proprietario = (
-            imovel.proprietarios[0]
-            if imovel and imovel.proprietarios
-            else None
+def _card(row: Any) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+
+        # ALINHAMENTO COM FRONTEND
+        "description": row.descricao_simplificada,
+
+        "area_hectares": row.area_hectares,
+        "property_ccir": row.ccir,
+
+        "owner_name": row.nome_completo,
+        "owner_cpf": row.cpf,
+
+        "municipio": row.municipio,
+        "uf": row.uf,
+        "status": row.status,
+        "created_at": row.created_at,
+
+        "total_documents": row.total_documents or 0,
+        "total_proposals": row.total_proposals or 0,
+    }
+
+
+def _gerar_cursor(sort: str, order: str, valor: Any, project_id: int) -> str:
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    bruto = json.dumps([sort, order, valor, project_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii")
+
+
+def _ler_cursor(cursor: str, sort: str, order: str) -> tuple[Any, int]:
+    try:
+        cursor_sort, cursor_order, valor, project_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
         )
+    except Exception:
+        raise ValueError("Cursor inválido.")
 
-        result.append({
-            "id": p.id,
-            "name": p.name,
+    if cursor_sort != sort or cursor_order != order:
+        raise ValueError("Cursor não corresponde à ordenação informada.")
 
-            # ALINHAMENTO COM FRONTEND
-            "description": p.descricao_simplificada,
+    # Cursor bem formado com valores de outro tipo também é inválido
+    try:
+        if sort == "created_at":
+            valor = datetime.fromisoformat(valor)
+        elif not isinstance(valor, str):
+            raise TypeError(valor)
 
-            "area_hectares": imovel.area_hectares if imovel else None,
-            "property_ccir": imovel.ccir if imovel else None,
+        project_id = int(project_id)
+    except (TypeError, ValueError):
+        raise ValueError("Cursor inválido.")
 
-            "owner_name": proprietario.nome_completo if proprietario else None,
-            "owner_cpf": proprietario.cpf if proprietario else None,
+    return valor, project_id
 
-            "municipio": p.municipio,
-            "uf": p.uf,
-            "status": p.status,
-            "created_at": p.created_at,
 
-            "total_documents": len(p.documents),
-            "total_proposals": len(p.proposals),
-        })
+def list_projects_card(db: Session, owner_id: int):
+    rows = (
+        _query_cards(db, _filtros_cards(owner_id))
+        .order_by(Project.id.asc())
+        .all()
+    )
 
-    return result
+    return [_card(row) for row in rows]
+
+
+def list_projects_card_page(
+    db: Session,
+    owner_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    status: Optional[str] = None,
+    municipio: Optional[str] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+) -> dict:
+    """
+    Página de cards por cursor (keyset em (sort, id)): o custo não cresce
+    com a profundidade da página. "total" vem de um COUNT sem carregar
+    linhas; "next_cursor" é None na última página.
+    """
+    if sort not in CARD_ORDENACOES:
+        raise ValueError(f"Ordenação inválida: {sort} (use {', '.join(CARD_ORDENACOES)})")
+    if order not in ("asc", "desc"):
+        raise ValueError("Direção inválida (use asc ou desc).")
+
+    limit = min(max(int(limit), 1), CARD_LIMITE_MAXIMO)
+    filtros = _filtros_cards(owner_id, status, municipio, created_from, created_to)
+
+    total = (
+        db.query(func.count(Project.id))
+        .filter(*filtros)
+        .scalar()
+    ) or 0
+
+    chave = CARD_ORDENACOES[sort]
+    query = _query_cards(db, filtros).add_columns(chave.label("sort_key"))
+
+    if cursor:
+        valor, ultimo_id = _ler_cursor(cursor, sort, order)
+        posicao = tuple_(chave, Project.id)
+        if order == "desc":
+            query = query.filter(posicao < tuple_(valor, ultimo_id))
+        else:
+            query = query.filter(posicao > tuple_(valor, ultimo_id))
+
+    if order == "desc":
+        query = query.order_by(chave.desc(), Project.id.desc())
+    else:
+        query = query.order_by(chave.asc(), Project.id.asc())
+
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        ultimo = rows[-1]
+        next_cursor = _gerar_cursor(sort, order, ultimo.sort_key, ultimo.id)
+
+    return {
+        "items": [_card(row) for row in rows],
+        "total": int(total),
+        "next_cursor": next_cursor,
+    }
 
 
 def get_project(db: Session, project_id: int):
@@ -1,9 +1,12 @@
 # app/crud/sobreposicao_crud.py
 
+import time
+
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
 from app.models.sobreposicao import Sobreposicao
 from app.models.geometria import Geometria
-from app.services.geometria_service import GeometriaService
+from app.services.indice_espacial_service import IndiceEspacialService
 from app.services.sobreposicao_service import SobreposicaoService
 
 
@@ -27,24 +30,155 @@ def analisar_sobreposicao(
     if not resultado:
         return None
 
-    # Converter interseção para hectares reais (UTM)
-    intersecao_geojson = base.geojson
-
-    calculo = GeometriaService.calcular_area_perimetro(intersecao_geojson)
-
-    area_ha = calculo["area_hectares"]
+    # Métricas da interseção real, reprojetada na zona UTM da base
+    metricas = SobreposicaoService.calcular_metricas(
+        base_geom=resultado["geom_base"],
+        afetada_geom=resultado["geom_afetada"],
+        intersecao=resultado["intersecao"],
+        epsg_origem=base.epsg_origem,
+    )
 
-    percentual = (area_ha / base.area_hectares) * 100
+    if metricas["area_ha"] <= 0:
+        return None
 
     obj = Sobreposicao(
         geometria_base_id=geometria_base_id,
         geometria_afetada_id=geometria_afetada_id,
-        area_sobreposta_ha=area_ha,
-        percentual_sobreposicao=percentual,
+        area_sobreposta_ha=metricas["area_ha"],
+        percentual_sobreposicao=metricas["percentual_base"],
         tipo=tipo,
     )
 
     db.add(obj)
     db.commit()
     db.refresh(obj)
+
+    # Não persistidos; expostos na resposta
+    obj.percentual_afetada = metricas["percentual_afetada"]
+    obj.perimetro_intersecao_m = metricas["perimetro_m"]
     return obj
+
+
+# =========================================================
+# DETECÇÃO EM LOTE (ÍNDICE ESPACIAL)
+# =========================================================
+def detectar_sobreposicoes(
+    db: Session,
+    geometria_base_id: int,
+    tipo: str,
+    persistir: bool = True,
+) -> dict | None:
+    t0 = time.perf_counter()
+
+    # Só colunas escalares: evita os joins/selectin do model completo
+    base = (
+        db.query(Geometria.id, Geometria.imovel_id)
+        .filter(Geometria.id == geometria_base_id)
+        .first()
+    )
+    if not base:
+        return None
+
+    IndiceEspacialService.sincronizar(db)
+
+    entrada_base = IndiceEspacialService.carregar(db, base.id)
+    if not entrada_base:
+        return {
+            "geometria_base_id": base.id,
+            "total_candidatos": 0,
+            "total_sobreposicoes": 0,
+            "tempo_ms": round((time.perf_counter() - t0) * 1000, 2),
+            "sobreposicoes": [],
+        }
+
+    # O índice só tem a versão atual de cada imóvel. Geometrias do
+    # próprio imóvel e em outro referencial (ex.: LOCAL_CARTESIANA)
+    # não são comparáveis.
+    candidatos = [
+        c
+        for c in IndiceEspacialService.candidatos_intersectando(entrada_base.geom)
+        if c.imovel_id != base.imovel_id
+        and c.epsg_origem == entrada_base.epsg_origem
+    ]
+
+    intersecoes = IndiceEspacialService.intersecoes(entrada_base.geom, candidatos)
+
+    linhas = []
+    if intersecoes:
+        metricas = SobreposicaoService.calcular_metricas_lote(
+            base_geom=entrada_base.geom,
+            afetadas=[candidato.geom for candidato, _ in intersecoes],
+            intersecoes=[intersecao for _, intersecao in intersecoes],
+            epsg_origem=entrada_base.epsg_origem,
+        )
+
+        for (candidato, _), item in zip(intersecoes, metricas["itens"]):
+            if item["area_ha"] <= 0:
+                continue
+
+            linhas.append(
+                {
+                    "geometria_base_id": base.id,
+                    "geometria_afetada_id": candidato.geometria_id,
+                    "imovel_afetado_id": candidato.imovel_id,
+                    "area_sobreposta_ha": item["area_ha"],
+                    "percentual_sobreposicao": item["percentual_base"],
+                    "percentual_afetada": item["percentual_afetada"],
+                    "perimetro_intersecao_m": item["perimetro_m"],
+                }
+            )
+
+    if persistir:
+        db.execute(
+            delete(Sobreposicao).where(
+                Sobreposicao.geometria_base_id == base.id,
+                Sobreposicao.tipo == tipo,
+            )
+        )
+
+        if linhas:
+            db.execute(
+                insert(Sobreposicao),
+                [
+                    {
+                        "geometria_base_id": linha["geometria_base_id"],
+                        "geometria_afetada_id": linha["geometria_afetada_id"],
+                        "area_sobreposta_ha": linha["area_sobreposta_ha"],
+                        "percentual_sobreposicao": linha["percentual_sobreposicao"],
+                        "tipo": tipo,
+                    }
+                    for linha in linhas
+                ],
+            )
+
+        db.commit()
+
+    return {
+        "geometria_base_id": base.id,
+        "total_candidatos": len(candidatos),
+        "total_sobreposicoes": len(linhas),
+        "tempo_ms": round((time.perf_counter() - t0) * 1000, 2),
+        "sobreposicoes": linhas,
+    }
+
+
+def detectar_sobreposicoes_imovel(
+    db: Session,
+    imovel_id: int,
+    tipo: str,
+    persistir: bool = True,
+) -> dict | None:
+    """
+    Usa a geometria atual do imóvel (a mesma que o índice guarda);
+    versões anteriores são histórico e gerariam sobreposições duplicadas.
+    """
+    atual_id = IndiceEspacialService.geometria_atual_id(db, imovel_id)
+    if not atual_id:
+        return None
+
+    return detectar_sobreposicoes(
+        db=db,
+        geometria_base_id=atual_id,
+        tipo=tipo,
+        persistir=persistir,
+    )
@@ -6,6 +6,7 @@ from app.core.database import Base
 
 from app.models.audit_log import AuditLog
 from app.models.avaliacao_profissional import AvaliacaoProfissional
+from app.models.cache_versao import CacheVersao
 from app.models.calculation_parameter import CalculationParameter
 from app.models.cartorio import Cartorio
 from app.models.confrontante import Confrontante
@@ -37,6 +38,7 @@ __all__ = [
     "Base",
     "AuditLog",
     "AvaliacaoProfissional",
+    "CacheVersao",
     "CalculationParameter",
     "Cartorio",
     "Confrontante",
@@ -1,5 +1,5 @@
 # geoincra_backend/app/models/automation_job.py
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text, text
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.types import Enum as SAEnum
@@ -73,3 +73,16 @@ class AutomationJob(Base):
         nullable=False,
         server_default=func.now(),
     )
+
+    # =========================================================
+    # FILA / LEASE (app/workers/automation_worker.py)
+    # =========================================================
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+
+    locked_by = Column(String(120), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Backoff: job PENDING só é elegível a partir deste instante
+    next_run_at = Column(DateTime(timezone=True), nullable=True)
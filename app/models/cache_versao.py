@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, String
+
+from app.core.database import Base
+
+
+class CacheVersao(Base):
+    """
+    Versão de cada conjunto cacheado em memória (parâmetros de cálculo,
+    municípios, ...). Incrementada a cada escrita: os workers comparam
+    com a versão do snapshot local para saber se precisam recarregar.
+    """
+
+    __tablename__ = "cache_versoes"
+
+    nome = Column(String(64), primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=0)
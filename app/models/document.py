@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -7,6 +7,10 @@ from app.core.database import Base
 class Document(Base):
     __tablename__ = "documents"
 
+    __table_args__ = (
+        Index("ix_documents_project_sha256", "project_id", "sha256"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
 
     project_id = Column(
@@ -33,6 +37,9 @@ class Document(Base):
     # Caminho absoluto/relativo no servidor (necessário p/ servir/baixar corretamente)
     file_path = Column(String(512), nullable=True)
 
+    # SHA-256 do conteúdo: reenvio do mesmo arquivo reaproveita o documento
+    sha256 = Column(String(64), nullable=True)
+
     uploaded_at = Column(
         DateTime(timezone=True),
         default=datetime.utcnow,
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -7,6 +7,11 @@ from app.core.database import Base
 class Project(Base):
     __tablename__ = "projects"
 
+    __table_args__ = (
+        # Cards do dono ordenados por data (paginação por cursor)
+        Index("ix_projects_owner_created", "owner_id", "created_at", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
 
     # Identificação do processo
@@ -13,6 +13,7 @@ class Proposal(Base):
         Integer,
         ForeignKey("projects.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
 
     area = Column(Float, nullable=False)
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
-from app.core.security import create_access_token
+from app.core.security import create_access_token, user_token_claims
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.crud.user_crud import create_user, authenticate_user, get_user_by_email
 
@@ -18,7 +18,10 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 
     db_user = create_user(db, user)
 
-    token = create_access_token(subject=str(db_user.id))
+    token = create_access_token(
+        subject=str(db_user.id),
+        claims=user_token_claims(db_user),
+    )
 
 
 
@@ -37,7 +40,10 @@ def login(payload: UserLogin, db: Session = Depends(get_db)):
             detail="E-mail ou senha inválidos.",
         )
 
-    token = create_access_token(subject=str(user.id))
+    token = create_access_token(
+        subject=str(user.id),
+        claims=user_token_claims(user),
+    )
 
     return {
         "access_token": token,
@@ -4,8 +4,7 @@ from pathlib import Path
 from typing import Any, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
@@ -17,6 +16,7 @@ from app.models.external_credential import ExternalCredential
 from app.models.ocr_result import OcrResult
 from app.models.project import Project
 from app.models.user import User
+from app.services.artefato_download_service import ArtefatoDownloadService
 from app.services.timeline_service import TimelineService
 
 router = APIRouter(prefix="/automacoes")
@@ -594,6 +594,7 @@ def detalhe_job(
 @router.get("/results/{result_id}/download")
 def download_resultado(
     result_id: UUID,
+    request: Request,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
@@ -635,8 +636,9 @@ def download_resultado(
     elif suffix == ".kmz":
         media_type = "application/vnd.google-earth.kmz"
 
-    return FileResponse(
-        path=str(file_path),
+    return ArtefatoDownloadService.responder(
+        request,
+        file_path,
         media_type=media_type,
         filename=file_path.name,
     )
\ No newline at end of file
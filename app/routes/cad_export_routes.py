@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pathlib import Path
 
@@ -7,15 +9,32 @@ from app.core.deps import get_db
 from app.models.geometria import Geometria
 from app.models.confrontante import Confrontante
 
+from app.services.artefato_download_service import ArtefatoDownloadService
 from app.services.cad_export_service import CadExportService
 from app.services.confrontante_output_adapter import ConfrontanteOutputAdapter
+from app.services.exportacao_pacote_service import ExportacaoPacoteService
 
 router = APIRouter()
 
 
+def _confrontantes_formatados(db: Session, geometria_id: int) -> list:
+    confrontantes_db = (
+        db.query(Confrontante)
+        .filter(Confrontante.geometria_id == geometria_id)
+        .order_by(
+            Confrontante.ordem_segmento.asc().nullslast(),
+            Confrontante.id.asc(),
+        )
+        .all()
+    )
+
+    return ConfrontanteOutputAdapter.from_models(confrontantes_db)
+
+
 @router.post("/cad/export/scr/{geometria_id}")
 def export_cad_scr(
     geometria_id: int,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     geom = db.query(Geometria).get(geometria_id)
@@ -29,19 +48,7 @@ def export_cad_scr(
     # =========================================================
     # CONFRONTANTES DO BANCO (FONTE DA VERDADE)
     # =========================================================
-    confrontantes_db = (
-        db.query(Confrontante)
-        .filter(Confrontante.geometria_id == geom.id)
-        .order_by(
-            Confrontante.ordem_segmento.asc().nullslast(),
-            Confrontante.id.asc(),
-        )
-        .all()
-    )
-
-    confrontantes_formatados = ConfrontanteOutputAdapter.from_models(
-        confrontantes_db
-    )
+    confrontantes_formatados = _confrontantes_formatados(db, geom.id)
 
     # =========================================================
     # GERAÇÃO DO SCR
@@ -61,8 +68,57 @@ def export_cad_scr(
     if not file_path.exists():
         raise HTTPException(status_code=500, detail="Erro ao gerar arquivo SCR")
 
-    return FileResponse(
-        path=file_path,
+    return ArtefatoDownloadService.responder(
+        request,
+        file_path,
         filename=file_path.name,
         media_type="text/plain",
-    )
\ No newline at end of file
+    )
+
+
+# =========================================================
+# PACOTE COMPLETO (ZIP EM STREAMING)
+# =========================================================
+@router.post("/cad/export/pacote/{geometria_id}")
+def export_pacote(
+    geometria_id: int,
+    formatos: Optional[str] = Query(
+        None,
+        description="Lista separada por vírgula (dxf,shp,csv,txt,kml,scr,ods); vazio = todos",
+    ),
+    db: Session = Depends(get_db),
+):
+    try:
+        formatos_pedidos = ExportacaoPacoteService.normalizar_formatos(formatos)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    geom = db.query(Geometria).get(geometria_id)
+
+    if not geom:
+        raise HTTPException(status_code=404, detail="Geometria não encontrada")
+
+    if not geom.geojson:
+        raise HTTPException(status_code=400, detail="Geometria sem GeoJSON")
+
+    nome_base = f"geometria_{geom.id}"
+
+    try:
+        pacote = ExportacaoPacoteService.iniciar(
+            geojson=geom.geojson,
+            confrontantes=_confrontantes_formatados(db, geom.id),
+            formatos=formatos_pedidos,
+            nome_base=nome_base,
+            epsg_origem=geom.epsg_origem,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return StreamingResponse(
+        ExportacaoPacoteService.stream(pacote),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_base}.zip"',
+            "Cache-Control": "no-store",
+        },
+    )
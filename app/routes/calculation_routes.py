@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.deps import get_db
 from app.schemas.calculation import (
     CalculationBase,
     CalculationResult,
     ProposalRequest,
+    SimulacaoLoteRequest,
+    SimulacaoLoteResponse,
 )
 from app.services.calculation_service import CalculationService
 from app.services.proposal_service import generate_full_proposal
+from app.services.simulacao_lote_service import SimulacaoLoteService
 
 router = APIRouter(prefix="/calculos", tags=["Cálculos"])
 
@@ -24,6 +29,66 @@ def calcular_preview(
         raise HTTPException(400, str(e))
 
 
+@router.post("/lote", response_model=SimulacaoLoteResponse)
+def simular_lote(
+    payload: SimulacaoLoteRequest,
+    formato: str = Query("tabela", pattern="^(tabela|csv)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Orçamento em lote (portfólio e/ou tabela de sensibilidade), sem PDF.
+
+    Os cenários são os "itens" seguidos do produto cartesiano de
+    "variacoes" sobre "base". Resposta compacta: colunas + linhas
+    (formato=tabela) ou CSV em streaming (formato=csv). Cenários
+    inválidos não derrubam o lote: vêm com a mensagem na coluna "erro".
+    O PDF de um cenário escolhido continua em /orcamentos/preview.
+    """
+    if payload.variacoes and payload.base is None:
+        raise HTTPException(400, "Informe o cenário base para as variações.")
+
+    total = len(payload.itens)
+    if payload.base is not None:
+        total += SimulacaoLoteService.contar_cenarios(payload.variacoes)
+
+    if not total:
+        raise HTTPException(400, "Nenhum cenário informado.")
+
+    if total > settings.SIMULACAO_LOTE_MAX_ITENS:
+        raise HTTPException(
+            400,
+            f"Lote excede o limite de {settings.SIMULACAO_LOTE_MAX_ITENS} cenários.",
+        )
+
+    itens: list[CalculationBase] = list(payload.itens)
+    ids = [item.id for item in payload.itens]
+
+    if payload.base is not None:
+        try:
+            cenarios = SimulacaoLoteService.expandir(payload.base, payload.variacoes)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+        itens.extend(cenarios)
+        ids.extend([None] * len(cenarios))
+
+    colunas = SimulacaoLoteService.calcular(db, itens)
+    linhas = SimulacaoLoteService.linhas(itens, colunas, ids)
+
+    if formato == "csv":
+        return StreamingResponse(
+            SimulacaoLoteService.stream_csv(linhas),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="simulacao_orcamentos.csv"'},
+        )
+
+    return {
+        "colunas": list(SimulacaoLoteService.COLUNAS),
+        "linhas": list(linhas),
+        "resumo": SimulacaoLoteService.resumo(colunas),
+    }
+
+
 @router.post("/proposta")
 def gerar_proposta(
     payload: ProposalRequest,
@@ -1,21 +1,29 @@
 # app/routes/croqui_routes.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
 from app.models.geometria import Geometria
 from app.models.confrontante import Confrontante
 
-from app.services.croqui_service import CroquiService
+from app.services.artefato_download_service import ArtefatoDownloadService
+from app.services.croqui_artefato_service import CroquiArtefatoService
 from app.services.confrontante_output_adapter import ConfrontanteOutputAdapter
 
 router = APIRouter()
 
 
 @router.get("/croqui/{geometria_id}")
-def gerar_croqui_svg(geometria_id: int, db: Session = Depends(get_db)):
+def gerar_croqui_svg(
+    geometria_id: int,
+    request: Request,
+    formato: str = Query("svg", description="svg | png | pdf"),
+    dpi: Optional[int] = Query(None, description="Resolução do PNG (96, 150 ou 300)"),
+    db: Session = Depends(get_db),
+):
     geom = db.query(Geometria).get(geometria_id)
 
     if not geom:
@@ -39,11 +47,24 @@ def gerar_croqui_svg(geometria_id: int, db: Session = Depends(get_db)):
     confrontantes_formatados = ConfrontanteOutputAdapter.from_models(confrontantes_db)
 
     # =========================================================
-    # 🔥 GERAR SVG COM DADOS CORRETOS
+    # 🔥 CROQUI RENDERIZADO (REAPROVEITADO SE NADA MUDOU)
     # =========================================================
-    svg = CroquiService.gerar_svg(
-        geom.geojson,
-        confrontantes=confrontantes_formatados
-    )
+    try:
+        caminho = CroquiArtefatoService.obter(
+            geom.geojson,
+            confrontantes=confrontantes_formatados,
+            formato=formato,
+            dpi=dpi,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    formato = formato.lower()
 
-    return Response(content=svg, media_type="image/svg+xml")
\ No newline at end of file
+    return ArtefatoDownloadService.responder(
+        request,
+        caminho,
+        media_type=CroquiArtefatoService.MEDIA_TYPES[formato],
+        filename=f"croqui_{geometria_id}.{formato}",
+        inline=True,
+    )
\ No newline at end of file
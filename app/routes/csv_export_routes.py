@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from pathlib import Path
 
 from app.core.deps import get_db
 from app.models.geometria import Geometria
+from app.services.artefato_download_service import ArtefatoDownloadService
 from app.services.csv_export_service import CsvExportService
 
 router = APIRouter()
@@ -13,6 +13,7 @@ router = APIRouter()
 @router.post("/cad/export/csv/{geometria_id}")
 def export_csv(
     geometria_id: int,
+    request: Request,
     db: Session = Depends(get_db),
 ):
 
@@ -36,8 +37,9 @@ def export_csv(
     if not file_path.exists():
         raise HTTPException(status_code=500, detail="Erro ao gerar CSV")
 
-    return FileResponse(
-        path=file_path,
+    return ArtefatoDownloadService.responder(
+        request,
+        file_path,
         filename=file_path.name,
-        media_type="text/csv"
+        media_type="text/csv",
     )
\ No newline at end of file
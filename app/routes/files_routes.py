@@ -1,5 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from pathlib import Path
 
@@ -7,6 +6,7 @@ from app.core.deps import get_db, get_current_user_required
 from app.models.document import Document
 from app.models.project import Project
 from app.models.user import User
+from app.services.artefato_download_service import ArtefatoDownloadService
 
 router = APIRouter(prefix="/files", tags=["Arquivos"])
 
@@ -20,6 +20,7 @@ BASE_UPLOAD_PATH = Path("/app/app/uploads").resolve()
 @router.get("/documents/{document_id}")
 def download_document(
     document_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required),
 ):
@@ -35,10 +36,12 @@ def download_document(
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Arquivo não encontrado no servidor")
 
-    return FileResponse(
-        path=file_path,
+    return ArtefatoDownloadService.responder(
+        request,
+        file_path,
         media_type=doc.content_type or "application/octet-stream",
         filename=doc.original_filename or file_path.name,
+        sha256=doc.sha256,
     )
 
 
@@ -47,6 +50,7 @@ def download_document(
 # =========================================================
 @router.get("/pdf")
 def download_pdf(
+    request: Request,
     path: str = Query(...),
     db: Session = Depends(get_db),
 ):
@@ -107,8 +111,9 @@ def download_pdf(
     # =========================================================
     # 📄 RETORNO DO ARQUIVO
     # =========================================================
-    return FileResponse(
-        path=str(file_path),
+    return ArtefatoDownloadService.responder(
+        request,
+        file_path,
         media_type="application/pdf",
         filename=file_path.name,
     )
\ No newline at end of file
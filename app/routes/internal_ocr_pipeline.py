@@ -2,12 +2,16 @@ from __future__ import annotations
 
 import logging
 from typing import Any, Dict, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.crud.automation_job_crud import create_ocr_pipeline_job
+from app.models.automation_job import AutomationJob
 from app.services.ocr_pipeline_service import OcrPipelineService
 
 logger = logging.getLogger("geoincra.ocr_pipeline")
@@ -33,6 +37,22 @@ class OcrPipelineResponse(BaseModel):
     pipeline_details: Dict[str, Any]
 
 
+class OcrPipelineJobResponse(BaseModel):
+    job_id: UUID
+    status: str
+    document_id: int
+    ocr_result_id: Optional[int] = None
+
+
+class OcrPipelineJobStatusResponse(BaseModel):
+    job_id: UUID
+    status: str
+    pipeline_stages: Dict[str, Any]
+    pipeline_success: Optional[bool] = None
+    pipeline_details: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+
+
 @router.post(
     "/pipeline",
     response_model=OcrPipelineResponse,
@@ -88,4 +108,71 @@ def executar_pipeline_ocr(
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao executar pipeline OCR: {str(exc)}",
-        )
\ No newline at end of file
+        )
+
+
+# =========================================================
+# EXECUÇÃO ASSÍNCRONA — RETORNA HANDLE DO JOB
+# =========================================================
+@router.post(
+    "/pipeline/jobs",
+    response_model=OcrPipelineJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def agendar_pipeline_ocr(
+    payload: OcrPipelineRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    try:
+        job = create_ocr_pipeline_job(
+            db=db,
+            document_id=payload.document_id,
+            ocr_result_id=payload.ocr_result_id,
+            categoria=payload.categoria or "",
+            dados=payload.dados or {},
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+    # Com worker ativo o job fica PENDING até ser reservado pela fila.
+    if not settings.OCR_PIPELINE_USE_WORKER:
+        background_tasks.add_task(OcrPipelineService.executar_job, job.id)
+
+    logger.info(
+        "OCR pipeline agendado job_id=%s document_id=%s ocr_result_id=%s",
+        job.id,
+        payload.document_id,
+        payload.ocr_result_id,
+    )
+
+    return OcrPipelineJobResponse(
+        job_id=job.id,
+        status=str(job.status),
+        document_id=payload.document_id,
+        ocr_result_id=payload.ocr_result_id,
+    )
+
+
+@router.get(
+    "/pipeline/jobs/{job_id}",
+    response_model=OcrPipelineJobStatusResponse,
+)
+def status_pipeline_ocr(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+):
+    job = db.query(AutomationJob).filter(AutomationJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    payload_json = job.payload_json or {}
+
+    return OcrPipelineJobStatusResponse(
+        job_id=job.id,
+        status=str(job.status),
+        pipeline_stages=payload_json.get("pipeline_stages") or {},
+        pipeline_success=payload_json.get("pipeline_success"),
+        pipeline_details=payload_json.get("pipeline_details"),
+        error_message=job.error_message,
+    )
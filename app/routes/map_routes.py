@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import json
 
 from app.core.deps import get_db
 from app.models.imovel import Imovel
-from app.models.geometria import Geometria
+from app.services.map_service import (
+    MAP_FEED_MAX_LIMIT,
+    estado_geometrias,
+    formatar_last_modified,
+    gerar_etag,
+    nao_modificado,
+    parse_bbox,
+    stream_feature_collection,
+)
 
 router = APIRouter()
 
@@ -21,52 +29,67 @@ def map_config():
 
 
 @router.get("/imoveis/{imovel_id}/map")
-def get_imovel_map(imovel_id: int, db: Session = Depends(get_db)):
+def get_imovel_map(
+    imovel_id: int,
+    bbox: str | None = Query(None, description="minx,miny,maxx,maxy"),
+    zoom: int | None = Query(None, ge=0, le=24),
+    limit: int | None = Query(None, ge=1, le=MAP_FEED_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+    if_modified_since: str | None = Header(None, alias="If-Modified-Since"),
+    db: Session = Depends(get_db),
+):
     """
     Retorna todas as geometrias do imóvel no formato GeoJSON FeatureCollection.
     Endpoint oficial para renderização de mapas (Mapbox / Leaflet / SIGEF).
+
+    - bbox: só geometrias que intersectam a janela
+    - zoom: simplificação no servidor (meio pixel no zoom informado)
+    - limit/offset: paginação; a resposta inclui "next_offset"
+    - ETag / Last-Modified a partir de max(updated_at): 304 quando inalterado
     """
 
-    imovel = db.query(Imovel).filter(Imovel.id == imovel_id).first()
+    imovel = db.query(Imovel.id).filter(Imovel.id == imovel_id).first()
     if not imovel:
         raise HTTPException(status_code=404, detail="Imóvel não encontrado.")
 
-    geometrias = (
-        db.query(Geometria)
-        .filter(Geometria.imovel_id == imovel_id)
-        .order_by(Geometria.created_at.asc())
-        .all()
-    )
+    try:
+        janela = parse_bbox(bbox)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    features = []
-
-    for geom in geometrias:
-        try:
-            geometry = json.loads(geom.geojson)
-        except Exception:
-            # GeoJSON inválido não deve quebrar o mapa inteiro
-            continue
-
-        features.append(
-            {
-                "type": "Feature",
-                "id": geom.id,
-                "geometry": geometry,
-                "properties": {
-                    "geometria_id": geom.id,
-                    "imovel_id": geom.imovel_id,
-                    "nome": geom.nome,
-                    "area_hectares": geom.area_hectares,
-                    "perimetro_m": geom.perimetro_m,
-                    "epsg_origem": geom.epsg_origem,
-                    "epsg_utm": geom.epsg_utm,
-                    "created_at": geom.created_at.isoformat(),
-                    "updated_at": geom.updated_at.isoformat(),
-                },
-            }
-        )
+    total, ultima = estado_geometrias(db, imovel_id)
 
-    return {
-        "type": "FeatureCollection",
-        "features": features,
+    etag = gerar_etag(
+        imovel_id,
+        total,
+        ultima,
+        {"bbox": janela, "zoom": zoom, "limit": limit, "offset": offset},
+    )
+
+    headers = {
+        "ETag": etag,
+        # Sempre revalidar: o cliente reaproveita a cópia via 304
+        "Cache-Control": "private, no-cache",
     }
+    last_modified = formatar_last_modified(ultima)
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+
+    if nao_modificado(etag, ultima, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+
+    # Libera a conexão antes do stream (que usa sessão própria)
+    db.close()
+
+    return StreamingResponse(
+        stream_feature_collection(
+            imovel_id=imovel_id,
+            bbox=janela,
+            zoom=zoom,
+            limit=limit,
+            offset=offset,
+        ),
+        media_type="application/json",
+        headers=headers,
+    )
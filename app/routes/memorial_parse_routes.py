@@ -1,6 +1,13 @@
+import json
+import time
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from app.core.config import settings
+from app.services.memorial_lote_service import MemorialLoteService
 from app.services.memorial_parser_service import MemorialParserService
 
 router = APIRouter()
@@ -10,6 +17,16 @@ class MemorialParseRequest(BaseModel):
     texto: str
 
 
+class MemorialLoteItem(BaseModel):
+    id: Optional[str] = None
+    texto: str
+
+
+class MemorialLoteRequest(BaseModel):
+    itens: list[MemorialLoteItem]
+    incluir_segmentos: bool = False
+
+
 @router.post("/memorial/parse")
 def parse_memorial(req: MemorialParseRequest):
 
@@ -24,4 +41,48 @@ def parse_memorial(req: MemorialParseRequest):
         raise HTTPException(
             status_code=400,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/memorial/parse/lote")
+def parse_memorial_lote(req: MemorialLoteRequest):
+    """
+    Gera a geometria de vários memoriais em paralelo (pool de processos).
+
+    Resposta em NDJSON: uma linha por memorial assim que fica pronto
+    (campo "indice" = posição na entrada), com geojson, erro de fechamento
+    e warnings; a última linha traz o resumo do lote.
+    """
+
+    if not req.itens:
+        raise HTTPException(status_code=400, detail="Nenhum memorial informado.")
+
+    if len(req.itens) > settings.MEMORIAL_LOTE_MAX_ITENS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Lote excede o limite de {settings.MEMORIAL_LOTE_MAX_ITENS} memoriais.",
+        )
+
+    itens = [(item.id, item.texto) for item in req.itens]
+
+    def gerar():
+        t0 = time.perf_counter()
+        sucesso = 0
+
+        for resultado in MemorialLoteService.processar(itens, req.incluir_segmentos):
+            sucesso += 1 if resultado["ok"] else 0
+            yield json.dumps(resultado, ensure_ascii=False) + "\n"
+
+        yield json.dumps(
+            {
+                "resumo": {
+                    "total": len(itens),
+                    "sucesso": sucesso,
+                    "falhas": len(itens) - sucesso,
+                    "tempo_ms": round((time.perf_counter() - t0) * 1000, 2),
+                }
+            },
+            ensure_ascii=False,
+        ) + "\n"
+
+    return StreamingResponse(gerar(), media_type="application/x-ndjson")
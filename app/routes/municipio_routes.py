@@ -11,6 +11,7 @@ from app.schemas.municipio import (
     MunicipioUpdate,
     MunicipioResponse,
 )
+from app.services.snapshot_cache_service import SnapshotCacheService
 
 router = APIRouter(tags=["Municípios"])
 
@@ -63,6 +64,7 @@ def create_municipio(payload: MunicipioCreate, db: Session = Depends(get_db)):
     municipio = Municipio(**payload.model_dump())
     db.add(municipio)
     db.commit()
+    SnapshotCacheService.incrementar(db, SnapshotCacheService.MUNICIPIOS)
     db.refresh(municipio)
     return municipio
 
@@ -84,6 +86,7 @@ def update_municipio(
         setattr(municipio, field, value)
 
     db.commit()
+    SnapshotCacheService.incrementar(db, SnapshotCacheService.MUNICIPIOS)
     db.refresh(municipio)
     return municipio
 
@@ -99,4 +102,5 @@ def delete_municipio(municipio_id: int, db: Session = Depends(get_db)):
 
     db.delete(municipio)
     db.commit()
+    SnapshotCacheService.incrementar(db, SnapshotCacheService.MUNICIPIOS)
     return {"detail": "Município removido com sucesso."}
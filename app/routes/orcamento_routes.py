@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, get_current_user_required
 from app.schemas.orcamento import OrcamentoRequest
 from app.services.calculation_service import CalculationService
-from app.services.pdf_service import gerar_pdf_orcamento
+from app.services.pdf_service import agendar_pdf_orcamento, gerar_pdf_orcamento
 
 router = APIRouter(prefix="/orcamentos", tags=["Orçamentos"])
 
@@ -12,13 +12,18 @@ router = APIRouter(prefix="/orcamentos", tags=["Orçamentos"])
 @router.post("/preview")
 def gerar_orcamento(
     payload: OrcamentoRequest,
+    pdf_assincrono: bool = Query(False),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user_required),
 ):
+    """
+    pdf_assincrono=true: responde com os valores sem esperar o PDF;
+    "pdf_job_id" acompanha a renderização em /api/pdf/jobs/{id}.
+    """
     try:
         resultado = CalculationService.calcular(db, payload)
 
-        pdf_relative_path = gerar_pdf_orcamento(
+        dados_pdf = dict(
             project_id=payload.project_id,
             calculation=resultado,
             cliente=payload.cliente,
@@ -26,6 +31,15 @@ def gerar_orcamento(
             descricao=payload.descricao_imovel,
         )
 
+        pdf_job_id = None
+        if pdf_assincrono:
+            pdf_job_id, pdf_relative_path = agendar_pdf_orcamento(
+                **dados_pdf,
+                owner_id=current_user.id,
+            )
+        else:
+            pdf_relative_path = gerar_pdf_orcamento(**dados_pdf)
+
         pdf_url = f"/api/files/pdf?path={pdf_relative_path}"
 
         return {
@@ -39,6 +53,7 @@ def gerar_orcamento(
             "total_final": resultado.total_final,
             "pdf_orcamento_path": pdf_relative_path,
             "pdf_url": pdf_url,
+            "pdf_job_id": pdf_job_id,
         }
 
     except Exception as e:
@@ -7,7 +7,7 @@ from datetime import datetime
 from app.core.deps import get_db
 from app.models.pagamento import Pagamento
 from app.services.pagamento_service import PagamentoService
-from app.services.project_automacao_service import ProjectAutomacaoService
+from app.services.project_recalculo_service import ProjectRecalculoService
 
 router = APIRouter(prefix="/pagamentos", tags=["Webhook"])
 
@@ -77,21 +77,22 @@ async def mercadopago_webhook(
     # =====================================================
     if status_mp == "approved":
 
-        # 🔒 Idempotência: só paga o que ainda não foi pago
-        for parcela in pagamento.parcelas:
-            if parcela.status != PagamentoService.PARCELA_PAGA:
-                PagamentoService.marcar_parcela_paga(
-                    db=db,
-                    parcela_id=parcela.id,
-                    forma_pagamento="MERCADO_PAGO",
-                    observacoes="Pagamento confirmado via webhook",
-                    pago_em=datetime.utcnow(),
-                )
-
-        # 🔄 Atualiza status do projeto
-        ProjectAutomacaoService.aplicar_status_automatico(
-            db,
-            pagamento.project_id,
-        )
+        # 🔄 Baixa de todas as parcelas: o status do projeto é
+        # recalculado uma vez, ao final
+        with ProjectRecalculoService.adiar(db, pagamento.project_id):
+
+            # 🔒 Idempotência: só paga o que ainda não foi pago
+            for parcela in pagamento.parcelas:
+                if parcela.status != PagamentoService.PARCELA_PAGA:
+                    PagamentoService.marcar_parcela_paga(
+                        db=db,
+                        parcela_id=parcela.id,
+                        forma_pagamento="MERCADO_PAGO",
+                        observacoes="Pagamento confirmado via webhook",
+                        pago_em=datetime.utcnow(),
+                    )
+
+            # 🔄 Atualiza status do projeto
+            ProjectRecalculoService.marcar(db, pagamento.project_id, fluxo=False)
 
     return {"status": "ok"}
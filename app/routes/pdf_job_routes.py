@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+
+from app.core.deps import get_current_user_required
+from app.services.artefato_download_service import ArtefatoDownloadService
+from app.services.pdf_render_service import PdfRenderService
+
+router = APIRouter(prefix="/pdf", tags=["PDF"])
+
+
+def _publico(job: dict) -> dict:
+    # O caminho absoluto no servidor não sai da API
+    return {chave: valor for chave, valor in job.items() if chave != "destino"}
+
+
+def _check_job_owner(job: dict | None, user_id: int) -> dict:
+    # Job de outro usuário (ou sem dono registrado) responde como inexistente
+    if not job or job.get("owner_id") != user_id:
+        raise HTTPException(status_code=404, detail="Job de PDF não encontrado")
+
+    return job
+
+
+# =========================================================
+# STATUS DO JOB
+# GET /api/pdf/jobs/{job_id}
+# =========================================================
+@router.get("/jobs/{job_id}")
+def status_job_pdf(
+    job_id: str,
+    current_user=Depends(get_current_user_required),
+):
+    job = _check_job_owner(PdfRenderService.status_job(job_id), current_user.id)
+
+    return _publico(job)
+
+
+# =========================================================
+# ARQUIVO DO JOB (ESPERA ATÉ "aguardar" SEGUNDOS)
+# GET /api/pdf/jobs/{job_id}/arquivo?aguardar=30
+# =========================================================
+@router.get("/jobs/{job_id}/arquivo")
+def arquivo_job_pdf(
+    job_id: str,
+    request: Request,
+    aguardar: float = Query(30.0, ge=0, le=120),
+    current_user=Depends(get_current_user_required),
+):
+    # Confere o dono antes de esperar pela renderização
+    _check_job_owner(PdfRenderService.status_job(job_id), current_user.id)
+
+    job = _check_job_owner(PdfRenderService.aguardar_job(job_id, aguardar), current_user.id)
+
+    if job["status"] == PdfRenderService.ERRO:
+        raise HTTPException(status_code=500, detail=job.get("erro") or "Falha ao gerar PDF")
+
+    if job["status"] != PdfRenderService.PRONTO:
+        # Ainda renderizando: o cliente tenta de novo
+        return JSONResponse(status_code=202, content=_publico(job))
+
+    destino = Path(job["destino"])
+
+    return ArtefatoDownloadService.responder(
+        request,
+        destino,
+        media_type="application/pdf",
+        filename=destino.name,
+    )
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.core.deps import (
@@ -12,6 +15,7 @@ from app.schemas.project import (
     ProjectUpdate,
     ProjectResponse,
     ProjectCardResponse,
+    ProjectCardPageResponse,
 )
 from app.crud.project_crud import (
     create_project,
@@ -20,6 +24,8 @@ from app.crud.project_crud import (
     update_project,
     delete_project,
     list_projects_card,
+    list_projects_card_page,
+    CARD_LIMITE_MAXIMO,
 )
 
 from app.services.project_dashboard_service import ProjectDashboardService
@@ -61,6 +67,45 @@ def list_projects_cards(
     return list_projects_card(db, owner_id=current_user.id)
 
 
+# ============================================================
+# 🔒 CARDS PAGINADOS (CURSOR) → exige login
+# GET /projects/cards/page?limit=20&sort=created_at&order=desc
+#     &status=&municipio=&created_from=&created_to=&cursor=
+# ============================================================
+@router.get("/cards/page", response_model=ProjectCardPageResponse)
+def list_projects_cards_page(
+    limit: int = Query(20, ge=1, le=CARD_LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    sort: str = Query("created_at", pattern="^(created_at|name|status|municipio)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    status: Optional[str] = None,
+    municipio: Optional[str] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_required),
+):
+    """
+    Cards por página (cursor opaco em "next_cursor"), com filtros por
+    status, município e data de criação e o total sem carregar linhas.
+    """
+    try:
+        return list_projects_card_page(
+            db,
+            owner_id=current_user.id,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            order=order,
+            status=status,
+            municipio=municipio,
+            created_from=created_from,
+            created_to=created_to,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ============================================================
 # 🔓 DETALHAR PROJETO → visitante ou usuário
 # (Se logado, valida dono; se visitante, retorna se existir)
@@ -1,5 +1,5 @@
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db, get_current_user_required
@@ -46,6 +46,7 @@ def _check_project_owner(db: Session, project_id: int, user_id: int):
 def generate_proposal(
     project_id: int,
     payload: ProposalRequest,
+    pdf_assincrono: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required),
 ):
@@ -57,6 +58,7 @@ def generate_proposal(
             payload=payload,
             project_id=project_id,
             user_id=current_user.id,
+            pdf_assincrono=pdf_assincrono,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -99,6 +101,8 @@ def generate_proposal(
             f"/api/files/pdf?path=propostas/project_{project_id}/{contrato_filename}"
             if contrato_filename else None
         ),
+        # Com pdf_assincrono: acompanhar em /api/pdf/jobs/{id}
+        "pdf_jobs": generated.get("pdf_jobs"),
     }
 
 
@@ -2,14 +2,14 @@ from __future__ import annotations
 
 import os
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
 from app.schemas.sigef_export import SigefCsvExportRequest, SigefCsvExportResponse
 from app.crud.sigef_export_crud import exportar_sigef_csv
 from app.models.documento_tecnico import DocumentoTecnico
+from app.services.artefato_download_service import ArtefatoDownloadService
 
 router = APIRouter()
 
@@ -40,6 +40,7 @@ def export_sigef_csv_route(
 )
 def download_sigef_csv(
     documento_tecnico_id: int,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """
@@ -73,8 +74,9 @@ def download_sigef_csv(
 
     filename = os.path.basename(path)
 
-    return FileResponse(
-        path=path,
+    return ArtefatoDownloadService.responder(
+        request,
+        path,
         media_type="text/csv",
         filename=filename,
     )
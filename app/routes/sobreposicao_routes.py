@@ -4,12 +4,62 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
-from app.schemas.sobreposicao import SobreposicaoResponse
-from app.crud.sobreposicao_crud import analisar_sobreposicao
+from app.schemas.sobreposicao import SobreposicaoDeteccaoResponse, SobreposicaoResponse
+from app.crud.sobreposicao_crud import (
+    analisar_sobreposicao,
+    detectar_sobreposicoes,
+    detectar_sobreposicoes_imovel,
+)
 
 router = APIRouter()
 
 
+@router.post(
+    "/sobreposicao/detectar/geometria/{geometria_id}",
+    response_model=SobreposicaoDeteccaoResponse,
+)
+def detectar_por_geometria(
+    geometria_id: int,
+    tipo: str = "IMOVEL_INTERNO",
+    persistir: bool = True,
+    db: Session = Depends(get_db),
+):
+    result = detectar_sobreposicoes(
+        db=db,
+        geometria_base_id=geometria_id,
+        tipo=tipo,
+        persistir=persistir,
+    )
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Geometria não encontrada.")
+
+    return result
+
+
+@router.post(
+    "/sobreposicao/detectar/imovel/{imovel_id}",
+    response_model=SobreposicaoDeteccaoResponse,
+)
+def detectar_por_imovel(
+    imovel_id: int,
+    tipo: str = "IMOVEL_INTERNO",
+    persistir: bool = True,
+    db: Session = Depends(get_db),
+):
+    result = detectar_sobreposicoes_imovel(
+        db=db,
+        imovel_id=imovel_id,
+        tipo=tipo,
+        persistir=persistir,
+    )
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="Imóvel sem geometria.")
+
+    return result
+
+
 @router.post(
     "/sobreposicao/{base_id}/{afetada_id}",
     response_model=SobreposicaoResponse,
@@ -2,18 +2,21 @@
 
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from fastapi import (
     APIRouter,
-    UploadFile,
-    File,
+    Header,
     HTTPException,
     Query,
+    Request,
     Depends,
+    Response,
     status,
 )
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.deps import get_db, get_current_user_required
 from app.models.document import Document
@@ -21,6 +24,15 @@ from app.models.project import Project
 from app.models.user import User
 
 from app.services.document_folder_resolver import resolve_project_folder
+from app.services.pipeline_cache_service import PipelineCacheService
+from app.services.upload_service import (
+    SessaoUpload,
+    UploadEmUso,
+    UploadLimiteExcedido,
+    UploadMultipartInvalido,
+    UploadOffsetInvalido,
+    UploadService,
+)
 
 
 router = APIRouter(
@@ -35,6 +47,15 @@ router = APIRouter(
 DOCKER_BASE_UPLOAD = Path("/app/app/uploads")
 LOCAL_BASE_UPLOAD = Path("app/uploads")
 
+ALLOWED_EXT = {
+    "pdf",
+    "jpg",
+    "jpeg",
+    "png",
+    "doc",
+    "docx",
+}
+
 
 def _resolve_base_upload_dir() -> Path:
     """
@@ -53,27 +74,18 @@ def _resolve_base_upload_dir() -> Path:
 
 
 # ==========================================================
-# UPLOAD GENÉRICO DE DOCUMENTO
+# HELPERS
 # ==========================================================
 
-@router.post("/document")
-async def upload_document(
-    project_id: int = Query(...),
-    doc_type: str = Query(..., description="Categoria do documento"),
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_required),
-):
-
-    # ======================================================
-    # VALIDAÇÃO MULTIUSUÁRIO
-    # ======================================================
-
+def _obter_projeto(db: Session, project_id: int, user: User) -> Project:
+    """
+    Validação multiusuário: o projeto precisa pertencer ao usuário.
+    """
     project = (
         db.query(Project)
         .filter(
             Project.id == project_id,
-            Project.owner_id == current_user.id,
+            Project.owner_id == user.id,
         )
         .first()
     )
@@ -84,119 +96,416 @@ async def upload_document(
             detail="Projeto não encontrado ou acesso negado",
         )
 
-    # ======================================================
-    # VALIDAÇÃO DO ARQUIVO
-    # ======================================================
+    return project
 
-    if not file.filename or "." not in file.filename:
+
+def _validar_extensao(filename: Optional[str]) -> str:
+    if not filename or "." not in filename:
         raise HTTPException(
             status_code=400,
             detail="Arquivo inválido.",
         )
 
-    allowed_ext = {
-        "pdf",
-        "jpg",
-        "jpeg",
-        "png",
-        "doc",
-        "docx",
-    }
-
-    ext = file.filename.rsplit(".", 1)[-1].lower()
+    ext = filename.rsplit(".", 1)[-1].lower()
 
-    if ext not in allowed_ext:
+    if ext not in ALLOWED_EXT:
         raise HTTPException(
             status_code=400,
             detail="Tipo de arquivo não permitido.",
         )
 
-    # ======================================================
-    # RESOLVER DIRETÓRIO BASE
-    # ======================================================
-
-    base_dir = _resolve_base_upload_dir()
+    return ext
 
-    # ======================================================
-    # RESOLVER PASTA DO DOCUMENTO
-    # ======================================================
 
+def _destino_documento(
+    base_dir: Path,
+    project_id: int,
+    doc_type: str,
+    ext: str,
+) -> tuple[Path, str, str]:
+    """
+    Retorna (caminho absoluto, nome armazenado, caminho relativo p/ banco).
+    """
     folder = resolve_project_folder(doc_type)
 
-    project_dir = (
-        base_dir
-        / "projects"
-        / f"project_{project_id}"
-        / folder
+    timestamp = int(datetime.utcnow().timestamp())
+    stored_filename = f"{doc_type}_{timestamp}.{ext}"
+
+    relative_path = (
+        f"projects/project_{project_id}/{folder}/{stored_filename}"
     )
 
-    project_dir.mkdir(parents=True, exist_ok=True)
+    return base_dir / relative_path, stored_filename, relative_path
+
+
+def _resposta_documento(document: Document, sha256: str, duplicado: bool) -> dict:
+    return {
+        "message": (
+            "Documento já enviado anteriormente"
+            if duplicado
+            else "Documento enviado com sucesso"
+        ),
+        "document_id": document.id,
+        "doc_type": document.doc_type,
+        "file_path": document.file_path,
+        "download_url": f"/api/files/documents/{document.id}",
+        "sha256": sha256,
+        "duplicado": duplicado,
+    }
 
-    # ======================================================
-    # GERAR NOME DO ARQUIVO
-    # ======================================================
 
-    timestamp = int(datetime.utcnow().timestamp())
+def _registrar_documento(
+    db: Session,
+    base_dir: Path,
+    project_id: int,
+    doc_type: str,
+    original_filename: str,
+    content_type: Optional[str],
+    absolute_file_path: Path,
+    stored_filename: str,
+    relative_path: str,
+    sha256: str,
+) -> dict:
+    """
+    Registra o arquivo já gravado em disco. Se o mesmo conteúdo já foi
+    enviado para o projeto, descarta a cópia nova e devolve o existente.
+    """
+    existente = PipelineCacheService.documento_por_hash(
+        db,
+        project_id=project_id,
+        doc_type=doc_type,
+        sha256=sha256,
+    )
 
-    stored_filename = f"{doc_type}_{timestamp}.{ext}"
+    if existente and existente.file_path and (base_dir / existente.file_path).exists():
+        if absolute_file_path != base_dir / existente.file_path:
+            absolute_file_path.unlink(missing_ok=True)
+        return _resposta_documento(existente, sha256, duplicado=True)
+
+    document = Document(
+        project_id=project_id,
+        doc_type=doc_type,
+        stored_filename=stored_filename,
+        original_filename=original_filename,
+        content_type=content_type,
+        description=f"Documento do tipo {doc_type}",
+        file_path=relative_path,
+        sha256=sha256,
+        uploaded_at=datetime.utcnow(),
+    )
+
+    db.add(document)
+    db.commit()
+    db.refresh(document)
 
-    absolute_file_path = project_dir / stored_filename
+    return _resposta_documento(document, sha256, duplicado=False)
 
-    # ======================================================
-    # SALVAR ARQUIVO
-    # ======================================================
+
+def _limite_excedido(exc: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=str(exc),
+    )
+
+
+def _sessao_em_uso(exc: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_423_LOCKED,
+        detail=str(exc),
+    )
+
+
+# ==========================================================
+# UPLOAD GENÉRICO DE DOCUMENTO
+# ==========================================================
+
+# O corpo é lido pela própria rota (limite aplicado ao stream cru),
+# então o schema multipart é declarado à mão para a documentação.
+SCHEMA_UPLOAD_DOCUMENTO = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/document", openapi_extra=SCHEMA_UPLOAD_DOCUMENTO)
+async def upload_document(
+    request: Request,
+    project_id: int = Query(...),
+    doc_type: str = Query(..., description="Categoria do documento"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_required),
+):
+
+    _obter_projeto(db, project_id, current_user)
+
+    # Limite aplicado ao corpo cru: o excesso não chega ao arquivo temporário
+    try:
+        file, form = await UploadService.ler_multipart(
+            request.headers,
+            request.stream(),
+        )
+    except UploadLimiteExcedido as e:
+        raise _limite_excedido(e)
+    except UploadMultipartInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     try:
 
-        content = await file.read()
+        ext = _validar_extensao(file.filename)
 
-        with open(absolute_file_path, "wb") as f:
-            f.write(content)
+        base_dir = _resolve_base_upload_dir()
 
-    except Exception as e:
+        absolute_file_path, stored_filename, relative_path = _destino_documento(
+            base_dir,
+            project_id,
+            doc_type,
+            ext,
+        )
+
+        # ======================================================
+        # SALVAR ARQUIVO (STREAMING + SHA-256 INCREMENTAL)
+        # ======================================================
+
+        try:
+
+            _, sha256 = await UploadService.gravar_stream(
+                UploadService.blocos_upload(file),
+                absolute_file_path,
+            )
+
+        except UploadLimiteExcedido as e:
+            raise _limite_excedido(e)
 
+        except Exception as e:
+
+            raise HTTPException(
+                status_code=500,
+                detail=f"Falha ao salvar arquivo: {str(e)}",
+            )
+
+    finally:
+        await form.close()
+
+    return JSONResponse(
+        _registrar_documento(
+            db,
+            base_dir=base_dir,
+            project_id=project_id,
+            doc_type=doc_type,
+            original_filename=file.filename,
+            content_type=file.content_type,
+            absolute_file_path=absolute_file_path,
+            stored_filename=stored_filename,
+            relative_path=relative_path,
+            sha256=sha256,
+        )
+    )
+
+
+# ==========================================================
+# UPLOAD RETOMÁVEL (ESTILO TUS)
+# ==========================================================
+#
+# 1. POST   /uploads/sessions            -> cria a sessão (Upload-Length)
+# 2. PATCH  /uploads/sessions/{id}       -> envia bytes a partir de Upload-Offset
+# 3. HEAD   /uploads/sessions/{id}       -> consulta o offset após queda
+#
+# O último PATCH (offset == tamanho) registra o documento.
+
+def _obter_sessao(
+    base_dir: Path,
+    sessao_id: str,
+    user: User,
+) -> SessaoUpload:
+    sessao = UploadService.obter_sessao(base_dir, sessao_id)
+
+    if not sessao or sessao.owner_id != user.id:
         raise HTTPException(
-            status_code=500,
-            detail=f"Falha ao salvar arquivo: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sessão de upload não encontrada",
         )
 
-    # ======================================================
-    # CAMINHO RELATIVO PARA BANCO
-    # ======================================================
+    return sessao
 
-    relative_path = (
-        f"projects/project_{project_id}/{folder}/{stored_filename}"
+
+def _headers_sessao(base_dir: Path, sessao: SessaoUpload) -> dict[str, str]:
+    return {
+        "Upload-Offset": str(UploadService.offset(base_dir, sessao)),
+        "Upload-Length": str(sessao.tamanho_total),
+        "Cache-Control": "no-store",
+    }
+
+
+@router.post("/sessions", status_code=status.HTTP_201_CREATED)
+def criar_sessao_upload(
+    project_id: int = Query(...),
+    doc_type: str = Query(..., description="Categoria do documento"),
+    filename: str = Query(..., description="Nome original do arquivo"),
+    content_type: Optional[str] = Query(None),
+    upload_length: int = Header(..., alias="Upload-Length", ge=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_required),
+):
+    _obter_projeto(db, project_id, current_user)
+
+    ext = _validar_extensao(filename)
+
+    try:
+        sessao = UploadService.criar_sessao(
+            _resolve_base_upload_dir(),
+            project_id=project_id,
+            owner_id=current_user.id,
+            doc_type=doc_type,
+            original_filename=filename,
+            content_type=content_type,
+            ext=ext,
+            tamanho_total=upload_length,
+        )
+    except UploadLimiteExcedido as e:
+        raise _limite_excedido(e)
+
+    location = f"/api/uploads/sessions/{sessao.id}"
+
+    return JSONResponse(
+        {
+            "sessao_id": sessao.id,
+            "upload_url": location,
+            "offset": 0,
+            "tamanho_total": sessao.tamanho_total,
+        },
+        status_code=status.HTTP_201_CREATED,
+        headers={
+            "Location": location,
+            "Upload-Offset": "0",
+            "Upload-Length": str(sessao.tamanho_total),
+        },
     )
 
-    # ======================================================
-    # REGISTRAR DOCUMENTO NO BANCO
-    # ======================================================
 
-    document = Document(
-        project_id=project_id,
-        doc_type=doc_type,
-        stored_filename=stored_filename,
-        original_filename=file.filename,
-        content_type=file.content_type,
-        description=f"Documento do tipo {doc_type}",
-        file_path=relative_path,
-        uploaded_at=datetime.utcnow(),
+@router.head("/sessions/{sessao_id}")
+def consultar_sessao_upload(
+    sessao_id: str,
+    current_user: User = Depends(get_current_user_required),
+):
+    base_dir = _resolve_base_upload_dir()
+    sessao = _obter_sessao(base_dir, sessao_id, current_user)
+
+    return Response(
+        status_code=status.HTTP_200_OK,
+        headers=_headers_sessao(base_dir, sessao),
     )
 
-    db.add(document)
-    db.commit()
-    db.refresh(document)
+
+@router.patch("/sessions/{sessao_id}")
+async def enviar_bloco_upload(
+    sessao_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_required),
+):
+    """
+    Corpo cru (application/offset+octet-stream), lido em streaming.
+    Em caso de queda, o cliente consulta o offset (HEAD) e continua dali.
+    """
+    base_dir = _resolve_base_upload_dir()
+    sessao = _obter_sessao(base_dir, sessao_id, current_user)
+
+    try:
+        offset = await UploadService.anexar(
+            base_dir,
+            sessao,
+            upload_offset,
+            request.stream(),
+        )
+
+    except UploadOffsetInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers=_headers_sessao(base_dir, sessao),
+        )
+
+    except UploadEmUso as e:
+        raise _sessao_em_uso(e)
+
+    except UploadLimiteExcedido as e:
+        raise _limite_excedido(e)
+
+    if offset < sessao.tamanho_total:
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers=_headers_sessao(base_dir, sessao),
+        )
 
     # ======================================================
-    # RESPOSTA
+    # ÚLTIMO BLOCO: MOVER PARA A PASTA DO PROJETO
     # ======================================================
 
+    absolute_file_path, stored_filename, relative_path = _destino_documento(
+        base_dir,
+        sessao.project_id,
+        sessao.doc_type,
+        sessao.ext,
+    )
+
+    try:
+        sha256 = await run_in_threadpool(
+            UploadService.concluir_sessao,
+            base_dir,
+            sessao,
+            absolute_file_path,
+        )
+    except UploadOffsetInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    except UploadEmUso as e:
+        raise _sessao_em_uso(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Falha ao salvar arquivo: {str(e)}",
+        )
+
     return JSONResponse(
-        {
-            "message": "Documento enviado com sucesso",
-            "document_id": document.id,
-            "doc_type": document.doc_type,
-            "file_path": document.file_path,
-            "download_url": f"/api/files/documents/{document.id}",
-        }
-    )
\ No newline at end of file
+        _registrar_documento(
+            db,
+            base_dir=base_dir,
+            project_id=sessao.project_id,
+            doc_type=sessao.doc_type,
+            original_filename=sessao.original_filename,
+            content_type=sessao.content_type,
+            absolute_file_path=absolute_file_path,
+            stored_filename=stored_filename,
+            relative_path=relative_path,
+            sha256=sha256,
+        ),
+        headers={"Upload-Offset": str(offset)},
+    )
+
+
+@router.delete("/sessions/{sessao_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancelar_sessao_upload(
+    sessao_id: str,
+    current_user: User = Depends(get_current_user_required),
+):
+    base_dir = _resolve_base_upload_dir()
+    sessao = _obter_sessao(base_dir, sessao_id, current_user)
+
+    UploadService.cancelar_sessao(base_dir, sessao)
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
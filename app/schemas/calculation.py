@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Optional
 
 
 class CalculationBase(BaseModel):
@@ -31,6 +31,26 @@ class CalculationResult(BaseModel):
     total_final: float
 
 
+class SimulacaoLoteItem(CalculationBase):
+    # Identificador do imóvel no portfólio (volta na coluna "id")
+    id: Optional[str] = None
+
+
+class SimulacaoLoteRequest(BaseModel):
+    # Portfólio: um cenário por imóvel
+    itens: list[SimulacaoLoteItem] = []
+
+    # Sensibilidade: produto cartesiano das variações sobre "base"
+    base: Optional[CalculationBase] = None
+    variacoes: dict[str, list[Any]] = {}
+
+
+class SimulacaoLoteResponse(BaseModel):
+    colunas: list[str]
+    linhas: list[list[Any]]
+    resumo: dict[str, Any]
+
+
 class ProposalRequest(CalculationBase):
     cliente: str
     descricao_imovel: str
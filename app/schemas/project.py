@@ -91,4 +91,10 @@ class ProjectCardResponse(BaseModel):
     total_proposals: int = 0
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ProjectCardPageResponse(BaseModel):
+    items: list[ProjectCardResponse]
+    total: int
+    next_cursor: Optional[str] = None
@@ -16,5 +16,26 @@ class SobreposicaoResponse(SobreposicaoBase):
     percentual_sobreposicao: float
     created_at: datetime
 
+    # Calculados na análise (não persistidos)
+    percentual_afetada: float | None = None
+    perimetro_intersecao_m: float | None = None
+
     class Config:
         from_attributes = True
+
+
+class SobreposicaoDetectada(BaseModel):
+    geometria_afetada_id: int
+    imovel_afetado_id: int
+    area_sobreposta_ha: float
+    percentual_sobreposicao: float
+    percentual_afetada: float
+    perimetro_intersecao_m: float
+
+
+class SobreposicaoDeteccaoResponse(BaseModel):
+    geometria_base_id: int
+    total_candidatos: int
+    total_sobreposicoes: int
+    tempo_ms: float
+    sobreposicoes: list[SobreposicaoDetectada]
@@ -2,6 +2,7 @@
 
 from app.core.database import SessionLocal
 from app.models.calculation_parameter import CalculationParameter
+from app.services.snapshot_cache_service import SnapshotCacheService
 
 
 """
@@ -240,6 +241,7 @@ def seed_calculation_parameters():
             db.add(CalculationParameter(**item))
 
         db.commit()
+        SnapshotCacheService.incrementar(db, SnapshotCacheService.PARAMETROS_CALCULO)
 
         print(f"✅ Seeder concluído! {len(PARAMETERS)} parâmetros inseridos!")
 
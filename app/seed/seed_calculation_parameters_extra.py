@@ -2,6 +2,7 @@
 
 from app.core.database import SessionLocal
 from app.models.calculation_parameter import CalculationParameter
+from app.services.snapshot_cache_service import SnapshotCacheService
 
 PARAMS = [
 
@@ -97,6 +98,7 @@ def seed_extra():
             db.add(param)
 
         db.commit()
+        SnapshotCacheService.incrementar(db, SnapshotCacheService.PARAMETROS_CALCULO)
         print("✅ Seeder EXTRA concluído! Parâmetros adicionais inseridos!")
 
     except Exception as e:
@@ -2,6 +2,7 @@
 
 from app.core.database import SessionLocal
 from app.models.municipio import Municipio
+from app.services.snapshot_cache_service import SnapshotCacheService
 
 MUNICIPIOS_DATA = [
     {"nome": "Alta Floresta d'Oeste", "estado": "RO", "vti_min": 6095.33, "vtn_min": 4266.73},
@@ -81,6 +82,7 @@ def seed_municipios():
 
         if novos:
             db.commit()
+            SnapshotCacheService.incrementar(db, SnapshotCacheService.MUNICIPIOS)
 
         print(f"Seed municipios concluído. Inseridos: {novos}")
 
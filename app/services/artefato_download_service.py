@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+
+
+class ArtefatoDownloadService:
+    """
+    Entrega de arquivos gerados/enviados (PDF, DXF, CSV, SCR, ...).
+
+    Sobre o FileResponse do Starlette (que já atende Range/If-Range e usa
+    http.response.pathsend quando o servidor ASGI oferece envio zero-copy):
+    - ETag forte a partir do SHA-256 do conteúdo (armazenado ou calculado
+      uma vez por mtime/tamanho);
+    - If-None-Match → 304 sem ler o arquivo;
+    - modo X-Accel-Redirect: o nginx entrega os bytes (e os ranges).
+    """
+
+    # Blocos maiores que os 64 KiB padrão: menos mensagens ASGI por arquivo
+    TAMANHO_BLOCO = 1024 * 1024
+
+    MAX_HASHES = 4096
+
+    # (caminho, mtime_ns, tamanho) -> sha256
+    _hashes: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    # =========================================================
+    # ETAG
+    # =========================================================
+    @classmethod
+    def _sha256_arquivo(cls, caminho: Path, info: os.stat_result) -> Optional[str]:
+        """
+        SHA-256 do arquivo, memoizado pela identidade (mtime/tamanho).
+        Acima de DOWNLOAD_ETAG_HASH_MAX_BYTES não calcula (retorna None).
+        """
+        chave = (str(caminho), info.st_mtime_ns, info.st_size)
+
+        with cls._lock:
+            sha256 = cls._hashes.get(chave)
+            if sha256 is not None:
+                cls._hashes.move_to_end(chave)
+                cls._hits += 1
+                return sha256
+            cls._misses += 1
+
+        if info.st_size > int(settings.DOWNLOAD_ETAG_HASH_MAX_BYTES):
+            return None
+
+        hasher = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(cls.TAMANHO_BLOCO), b""):
+                hasher.update(bloco)
+
+        sha256 = hasher.hexdigest()
+
+        with cls._lock:
+            cls._hashes[chave] = sha256
+            cls._hashes.move_to_end(chave)
+            while len(cls._hashes) > cls.MAX_HASHES:
+                cls._hashes.popitem(last=False)
+
+        return sha256
+
+    @staticmethod
+    def _etag_fraca(info: os.stat_result) -> str:
+        base = f"{info.st_mtime_ns}-{info.st_size}"
+        return f'W/"{hashlib.md5(base.encode(), usedforsecurity=False).hexdigest()}"'
+
+    @staticmethod
+    def _etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+        """Comparação fraca (RFC 9110 §13.1.2), como exige If-None-Match."""
+        if not if_none_match:
+            return False
+
+        if if_none_match.strip() == "*":
+            return True
+
+        alvo = etag.removeprefix("W/")
+        return any(
+            candidato.strip().removeprefix("W/") == alvo
+            for candidato in if_none_match.split(",")
+        )
+
+    # =========================================================
+    # RESPOSTA
+    # =========================================================
+    @staticmethod
+    def _content_disposition(filename: str, tipo: str) -> str:
+        codificado = quote(filename)
+        if codificado != filename:
+            return f"{tipo}; filename*=utf-8''{codificado}"
+        return f'{tipo}; filename="{filename}"'
+
+    @staticmethod
+    def _x_accel(caminho: Path) -> Optional[str]:
+        prefixo = settings.DOWNLOAD_X_ACCEL_PREFIX
+        if not prefixo:
+            return None
+
+        try:
+            relativo = caminho.relative_to(Path(settings.DOWNLOAD_X_ACCEL_ROOT).resolve())
+        except ValueError:
+            # Fora da raiz servida pelo proxy: entrega pela aplicação
+            return None
+
+        return prefixo.rstrip("/") + "/" + quote(relativo.as_posix())
+
+    @classmethod
+    def responder(
+        cls,
+        request: Request,
+        caminho: str | Path,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        sha256: Optional[str] = None,
+        inline: bool = False,
+    ) -> Response:
+        """
+        sha256: hash do conteúdo já conhecido (ex.: Document.sha256);
+        quando ausente é calculado e memoizado.
+        """
+        caminho = Path(caminho).resolve()
+
+        try:
+            info = caminho.stat()
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Arquivo não encontrado no servidor")
+
+        if not stat.S_ISREG(info.st_mode):
+            raise HTTPException(status_code=404, detail="Arquivo não encontrado no servidor")
+
+        sha256 = sha256 or cls._sha256_arquivo(caminho, info)
+        etag = f'"{sha256}"' if sha256 else cls._etag_fraca(info)
+
+        filename = filename or caminho.name
+        headers = {
+            "ETag": etag,
+            # Autenticado: cache só no navegador, sempre revalidando (304)
+            "Cache-Control": "private, no-cache",
+        }
+
+        if cls._etag_confere(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        disposicao = cls._content_disposition(filename, "inline" if inline else "attachment")
+
+        destino_interno = cls._x_accel(caminho)
+        if destino_interno:
+            return Response(
+                status_code=200,
+                media_type=media_type or "application/octet-stream",
+                headers={
+                    **headers,
+                    "X-Accel-Redirect": destino_interno,
+                    "Content-Disposition": disposicao,
+                },
+            )
+
+        resposta = FileResponse(
+            path=caminho,
+            media_type=media_type,
+            filename=filename,
+            headers={**headers, "Content-Disposition": disposicao},
+            stat_result=info,
+        )
+        resposta.chunk_size = cls.TAMANHO_BLOCO
+
+        return resposta
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @classmethod
+    def estatisticas(cls) -> dict[str, int]:
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "entradas": len(cls._hashes),
+            }
+
+    @classmethod
+    def limpar(cls) -> None:
+        with cls._lock:
+            cls._hashes.clear()
+            cls._hits = 0
+            cls._misses = 0
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy import or_, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.automation_job import AutomationJob
+
+
+class AutomationQueueService:
+    """
+    Fila persistente sobre automation_jobs.
+
+    Reserva (lease) com FOR UPDATE SKIP LOCKED: vários workers podem
+    consultar a mesma tabela sem disputar as mesmas linhas.
+    """
+
+    # Colunas de lease adicionadas depois da criação da tabela.
+    # create_all não altera tabelas existentes, então API e worker
+    # garantem o schema na inicialização (idempotente).
+    DDL_FILA = [
+        "ALTER TABLE automation_jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE automation_jobs ADD COLUMN IF NOT EXISTS locked_by VARCHAR(120)",
+        "ALTER TABLE automation_jobs ADD COLUMN IF NOT EXISTS locked_at TIMESTAMPTZ",
+        "ALTER TABLE automation_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ",
+        "ALTER TABLE automation_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ",
+        "ALTER TABLE automation_jobs ADD COLUMN IF NOT EXISTS next_run_at TIMESTAMPTZ",
+        (
+            "CREATE INDEX IF NOT EXISTS ix_automation_jobs_fila "
+            "ON automation_jobs (type, status, next_run_at, created_at)"
+        ),
+    ]
+
+    @staticmethod
+    def _agora() -> datetime:
+        return datetime.now(timezone.utc)
+
+    @staticmethod
+    def garantir_schema(engine: Engine) -> None:
+        with engine.begin() as conn:
+            for ddl in AutomationQueueService.DDL_FILA:
+                conn.execute(text(ddl))
+
+    # =========================================================
+    # RESERVA EM LOTE
+    # =========================================================
+    @staticmethod
+    def reservar_lote(
+        db: Session,
+        worker_id: str,
+        tipo: str,
+        limite: int,
+        filtros: Optional[list[Any]] = None,
+    ) -> list[AutomationJob]:
+        if limite <= 0:
+            return []
+
+        agora = AutomationQueueService._agora()
+
+        ids = (
+            db.execute(
+                select(AutomationJob.id)
+                .where(
+                    AutomationJob.type == tipo,
+                    AutomationJob.status == "PENDING",
+                    or_(
+                        AutomationJob.next_run_at.is_(None),
+                        AutomationJob.next_run_at <= agora,
+                    ),
+                    *(filtros or []),
+                )
+                .order_by(AutomationJob.created_at.asc())
+                .limit(limite)
+                .with_for_update(skip_locked=True)
+            )
+            .scalars()
+            .all()
+        )
+
+        if not ids:
+            db.rollback()
+            return []
+
+        db.execute(
+            update(AutomationJob)
+            .where(AutomationJob.id.in_(ids))
+            .values(
+                status="PROCESSING",
+                locked_by=worker_id,
+                locked_at=agora,
+                heartbeat_at=agora,
+                lease_expires_at=agora + timedelta(seconds=settings.WORKER_LEASE_SECONDS),
+                attempts=AutomationJob.attempts + 1,
+                started_at=agora,
+                finished_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        return (
+            db.query(AutomationJob)
+            .filter(AutomationJob.id.in_(ids))
+            .order_by(AutomationJob.created_at.asc())
+            .all()
+        )
+
+    @staticmethod
+    def reservar(
+        db: Session,
+        job_id: UUID,
+        worker_id: str,
+    ) -> Optional[AutomationJob]:
+        """
+        Reserva um job específico (execução fora do worker). O UPDATE
+        condicional é atômico: entre concorrentes (BackgroundTasks da API
+        e workers da fila) só um sai com o job; os demais recebem None.
+        """
+        agora = AutomationQueueService._agora()
+
+        result = db.execute(
+            update(AutomationJob)
+            .where(
+                AutomationJob.id == job_id,
+                AutomationJob.status == "PENDING",
+                or_(
+                    AutomationJob.next_run_at.is_(None),
+                    AutomationJob.next_run_at <= agora,
+                ),
+            )
+            .values(
+                status="PROCESSING",
+                locked_by=worker_id,
+                locked_at=agora,
+                heartbeat_at=agora,
+                lease_expires_at=agora + timedelta(seconds=settings.WORKER_LEASE_SECONDS),
+                attempts=AutomationJob.attempts + 1,
+                started_at=agora,
+                finished_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        if not result.rowcount:
+            return None
+
+        return db.query(AutomationJob).filter(AutomationJob.id == job_id).first()
+
+    # =========================================================
+    # HEARTBEAT
+    # =========================================================
+    @staticmethod
+    def renovar_leases(
+        db: Session,
+        worker_id: str,
+        job_ids: list[UUID],
+    ) -> int:
+        if not job_ids:
+            return 0
+
+        agora = AutomationQueueService._agora()
+
+        result = db.execute(
+            update(AutomationJob)
+            .where(
+                AutomationJob.id.in_(job_ids),
+                AutomationJob.locked_by == worker_id,
+                AutomationJob.status == "PROCESSING",
+            )
+            .values(
+                heartbeat_at=agora,
+                lease_expires_at=agora + timedelta(seconds=settings.WORKER_LEASE_SECONDS),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        return int(result.rowcount or 0)
+
+    @staticmethod
+    @contextmanager
+    def manter_lease(job_id: UUID, worker_id: str) -> Iterator[None]:
+        """
+        Renova o lease do job enquanto o bloco roda (sessão própria), para
+        que recuperar_leases_expirados não o devolva à fila no meio.
+        """
+        parar = threading.Event()
+
+        def renovar() -> None:
+            while not parar.wait(settings.WORKER_HEARTBEAT_SECONDS):
+                db = SessionLocal()
+                try:
+                    AutomationQueueService.renovar_leases(db, worker_id, [job_id])
+                except Exception as exc:
+                    print(f"⚠️ Falha no heartbeat do job {job_id}: {str(exc)}")
+                finally:
+                    db.close()
+
+        heartbeat = threading.Thread(
+            target=renovar,
+            name=f"lease-{job_id}",
+            daemon=True,
+        )
+        heartbeat.start()
+
+        try:
+            yield
+        finally:
+            parar.set()
+            heartbeat.join(timeout=5)
+
+    # =========================================================
+    # FINALIZAÇÃO
+    # =========================================================
+    @staticmethod
+    def concluir(
+        db: Session,
+        job_id: UUID,
+        worker_id: str,
+        status: str = "COMPLETED",
+        error_message: Optional[str] = None,
+    ) -> bool:
+        """
+        Só finaliza se o lease ainda pertence a este worker; um lease
+        recuperado por outro worker não pode ser sobrescrito.
+        """
+        result = db.execute(
+            update(AutomationJob)
+            .where(
+                AutomationJob.id == job_id,
+                AutomationJob.locked_by == worker_id,
+            )
+            .values(
+                status=status,
+                error_message=error_message,
+                finished_at=AutomationQueueService._agora(),
+                locked_by=None,
+                lease_expires_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        return bool(result.rowcount)
+
+    @staticmethod
+    def calcular_backoff(tentativa: int) -> timedelta:
+        base = settings.WORKER_RETRY_BASE_SECONDS * (2 ** max(tentativa - 1, 0))
+        return timedelta(seconds=base + random.uniform(0, base * 0.1))
+
+    @staticmethod
+    def falhar_com_retry(
+        db: Session,
+        job_id: UUID,
+        worker_id: str,
+        erro: str,
+    ) -> str:
+        job = (
+            db.query(AutomationJob)
+            .filter(
+                AutomationJob.id == job_id,
+                AutomationJob.locked_by == worker_id,
+            )
+            .with_for_update()
+            .first()
+        )
+
+        if not job:
+            db.rollback()
+            return "LOST"
+
+        tentativas = int(job.attempts or 0)
+
+        job.locked_by = None
+        job.lease_expires_at = None
+        job.error_message = erro
+
+        if tentativas >= settings.WORKER_MAX_ATTEMPTS:
+            job.status = "FAILED"
+            job.finished_at = AutomationQueueService._agora()
+        else:
+            job.status = "PENDING"
+            job.next_run_at = (
+                AutomationQueueService._agora()
+                + AutomationQueueService.calcular_backoff(tentativas)
+            )
+
+        db.commit()
+        return str(job.status)
+
+    # =========================================================
+    # RECUPERAÇÃO DE WORKERS MORTOS
+    # =========================================================
+    @staticmethod
+    def recuperar_leases_expirados(db: Session) -> int:
+        """
+        Jobs PROCESSING cujo lease expirou (worker morto ou travado)
+        voltam para PENDING, ou FAILED se esgotaram as tentativas.
+
+        Jobs PROCESSING sem lease pertencem a executores externos e
+        não são tocados.
+        """
+        agora = AutomationQueueService._agora()
+
+        expirados = (
+            db.query(AutomationJob)
+            .filter(
+                AutomationJob.status == "PROCESSING",
+                AutomationJob.lease_expires_at.isnot(None),
+                AutomationJob.lease_expires_at < agora,
+            )
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        for job in expirados:
+            mensagem = f"Lease expirado (worker {job.locked_by})"
+
+            job.locked_by = None
+            job.lease_expires_at = None
+            job.error_message = mensagem
+
+            if int(job.attempts or 0) >= settings.WORKER_MAX_ATTEMPTS:
+                job.status = "FAILED"
+                job.finished_at = agora
+            else:
+                job.status = "PENDING"
+                job.next_run_at = agora
+
+        db.commit()
+        return len(expirados)
@@ -2,18 +2,38 @@
 from sqlalchemy.orm import Session
 from app.models.calculation_parameter import CalculationParameter
 from app.schemas.calculation import CalculationBase, CalculationResult
+from app.services.snapshot_cache_service import SnapshotCacheService
 
 
 class CalculationService:
 
     @staticmethod
-    def param(db: Session, name: str) -> float:
-        param = (
-            db.query(CalculationParameter)
-            .filter(CalculationParameter.nome == name)
-            .first()
+    def _carregar_parametros(db: Session) -> dict[str, float]:
+        parametros: dict[str, float] = {}
+        linhas = (
+            db.query(CalculationParameter.nome, CalculationParameter.valor)
+            .order_by(CalculationParameter.id.asc())
         )
-        return float(param.valor) if param else 0.0
+        for nome, valor in linhas:
+            # Nome repetido: vale o primeiro cadastrado
+            parametros.setdefault(nome, float(valor or 0.0))
+        return parametros
+
+    @staticmethod
+    def parametros(db: Session) -> dict[str, float]:
+        """
+        Todos os parâmetros {nome: valor}, do snapshot versionado:
+        um cálculo inteiro custa no máximo uma consulta de versão.
+        """
+        return SnapshotCacheService.obter(
+            db,
+            SnapshotCacheService.PARAMETROS_CALCULO,
+            CalculationService._carregar_parametros,
+        )
+
+    @staticmethod
+    def param(db: Session, name: str) -> float:
+        return float(CalculationService.parametros(db).get(name, 0.0))
 
     @staticmethod
     def calcular_valor_base(db: Session, area: float) -> float:
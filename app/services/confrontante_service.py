@@ -1,17 +1,19 @@
 from __future__ import annotations
 
 import json
-import math
 import re
 from typing import Any, Optional
 
+import numpy as np
 from shapely.geometry import Polygon
 from sqlalchemy.orm import Session
 
 from app.models.confrontante import Confrontante
 from app.models.geometria import Geometria
 from app.models.imovel import Imovel
+from app.services.geometria_kernel import GeometriaKernel
 from app.services.geometria_service import GeometriaService
+from app.services.texto_canonico import TextoCanonico
 
 
 class ConfrontanteService:
@@ -26,6 +28,29 @@ class ConfrontanteService:
         "SW",
     }
 
+    MAPA_DIRECOES = {
+        "N": "N",
+        "NORTE": "N",
+        "S": "S",
+        "SUL": "S",
+        "L": "E",
+        "LESTE": "E",
+        "E": "E",
+        "O": "W",
+        "OESTE": "W",
+        "W": "W",
+        "NE": "NE",
+        "NORDESTE": "NE",
+        "NO": "NW",
+        "NOROESTE": "NW",
+        "NW": "NW",
+        "SE": "SE",
+        "SUDESTE": "SE",
+        "SO": "SW",
+        "SUDOESTE": "SW",
+        "SW": "SW",
+    }
+
     TERMOS_INSTITUCIONAIS_INVALIDOS = {
         "CARTORIO",
         "CARTÓRIO",
@@ -49,7 +74,7 @@ class ConfrontanteService:
         if not texto:
             return None
 
-        texto = " ".join(texto.split())
+        texto = TextoCanonico.espacos(texto)
 
         # limpeza leve para OCR real
         texto = (
@@ -67,38 +92,11 @@ class ConfrontanteService:
         if not texto:
             return None
 
-        return (
-            texto.upper()
-            .replace("-", " ")
-            .replace("_", " ")
-            .replace("Ç", "C")
-            .replace("Ã", "A")
-            .replace("Á", "A")
-            .replace("À", "A")
-            .replace("Â", "A")
-            .replace("Ä", "A")
-            .replace("É", "E")
-            .replace("È", "E")
-            .replace("Ê", "E")
-            .replace("Ë", "E")
-            .replace("Í", "I")
-            .replace("Ì", "I")
-            .replace("Î", "I")
-            .replace("Ï", "I")
-            .replace("Ó", "O")
-            .replace("Ò", "O")
-            .replace("Ô", "O")
-            .replace("Õ", "O")
-            .replace("Ö", "O")
-            .replace("Ú", "U")
-            .replace("Ù", "U")
-            .replace("Û", "U")
-            .replace("Ü", "U")
-        )
+        return TextoCanonico.upper_sem_acentos(texto)
 
     @staticmethod
     def _somente_digitos(valor: Any) -> str:
-        return re.sub(r"\D", "", str(valor or ""))
+        return TextoCanonico.somente_digitos(valor)
 
     @staticmethod
     def _normalizar_matricula(valor: Any) -> Optional[str]:
@@ -160,48 +158,9 @@ class ConfrontanteService:
         if not texto:
             return None
 
-        texto_upper = (
-            texto.upper()
-            .replace("-", " ")
-            .replace("_", " ")
-            .replace("Ç", "C")
-            .replace("Ã", "A")
-            .replace("Á", "A")
-            .replace("À", "A")
-            .replace("Â", "A")
-            .replace("É", "E")
-            .replace("Ê", "E")
-            .replace("Í", "I")
-            .replace("Ó", "O")
-            .replace("Ô", "O")
-            .replace("Õ", "O")
-            .replace("Ú", "U")
-        )
+        texto_upper = TextoCanonico.upper_sem_acentos(texto)
 
-        mapa = {
-            "N": "N",
-            "NORTE": "N",
-            "S": "S",
-            "SUL": "S",
-            "L": "E",
-            "LESTE": "E",
-            "E": "E",
-            "O": "W",
-            "OESTE": "W",
-            "W": "W",
-            "NE": "NE",
-            "NORDESTE": "NE",
-            "NO": "NW",
-            "NOROESTE": "NW",
-            "NW": "NW",
-            "SE": "SE",
-            "SUDESTE": "SE",
-            "SO": "SW",
-            "SUDOESTE": "SW",
-            "SW": "SW",
-        }
-
-        return mapa.get(
+        return ConfrontanteService.MAPA_DIRECOES.get(
             texto_upper,
             texto_upper if texto_upper in ConfrontanteService.DIRECOES_VALIDAS else None
         )
@@ -242,42 +201,20 @@ class ConfrontanteService:
         centerx: float,
         centery: float,
     ) -> str:
-        dx = midx - centerx
-        dy = midy - centery
-
-        abs_dx = abs(dx)
-        abs_dy = abs(dy)
-
-        tolerancia = 0.15
-
-        if abs_dx == 0 and abs_dy == 0:
-            return "N"
-
-        if abs_dx > 0 and abs_dy > 0:
-            rel = min(abs_dx, abs_dy) / max(abs_dx, abs_dy)
-            if rel >= tolerancia:
-                if dx >= 0 and dy >= 0:
-                    return "NE"
-                if dx < 0 and dy >= 0:
-                    return "NW"
-                if dx >= 0 and dy < 0:
-                    return "SE"
-                return "SW"
-
-        if abs_dx >= abs_dy:
-            return "E" if dx >= 0 else "W"
-
-        return "N" if dy >= 0 else "S"
+        return GeometriaKernel.direcoes_cardeais(
+            midx=np.array([midx]),
+            midy=np.array([midy]),
+            centerx=centerx,
+            centery=centery,
+        )[0]
 
     @staticmethod
     def _distancia(
         p1: tuple[float, float],
         p2: tuple[float, float],
     ) -> float:
-        dx = float(p2[0]) - float(p1[0])
-        dy = float(p2[1]) - float(p1[1])
-        return math.sqrt((dx * dx) + (dy * dy))
-    
+        return GeometriaKernel.distancia(p1, p2)
+
     @staticmethod
     def _extrair_segmentos_geometria(geometria: Geometria) -> list[dict[str, Any]]:
 
@@ -298,7 +235,8 @@ class ConfrontanteService:
             centerx = 0.0
             centery = 0.0
 
-        segmentos: list[dict[str, Any]] = []
+        indices: list[int] = []
+        pontos: list[tuple[float, float, float, float]] = []
 
         for seg in segmentos_base:
 
@@ -311,32 +249,44 @@ class ConfrontanteService:
             except Exception:
                 continue
 
-            midx = (x1 + x2) / 2.0
-            midy = (y1 + y2) / 2.0
+            indices.append(indice)
+            pontos.append((x1, y1, x2, y2))
 
-            direcao = ConfrontanteService._segmento_direcao(
-                midx=midx,
-                midy=midy,
-                centerx=centerx,
-                centery=centery,
-            )
+        if not pontos:
+            return []
 
-            comprimento = ConfrontanteService._distancia(
-                (x1, y1),
-                (x2, y2),
-            )
+        # Pontos médios, comprimentos e direções de todos os lados de uma vez
+        arr = np.asarray(pontos, dtype=np.float64)
+        midx = (arr[:, 0] + arr[:, 2]) / 2.0
+        midy = (arr[:, 1] + arr[:, 3]) / 2.0
+        comprimentos = np.hypot(arr[:, 2] - arr[:, 0], arr[:, 3] - arr[:, 1])
+
+        direcoes = GeometriaKernel.direcoes_cardeais(
+            midx=midx,
+            midy=midy,
+            centerx=centerx,
+            centery=centery,
+        )
 
-            segmentos.append(
-                {
-                    "ordem_segmento": indice,
-                    "lado_label": f"LADO_{indice:02d}",
-                    "direcao_normalizada": direcao,
-                    "p1": (x1, y1),
-                    "p2": (x2, y2),
-                    "midpoint": (midx, midy),
-                    "comprimento": float(comprimento),
-                }
+        segmentos: list[dict[str, Any]] = [
+            {
+                "ordem_segmento": indice,
+                "lado_label": f"LADO_{indice:02d}",
+                "direcao_normalizada": direcao,
+                "p1": (x1, y1),
+                "p2": (x2, y2),
+                "midpoint": (mx, my),
+                "comprimento": comprimento,
+            }
+            for indice, (x1, y1, x2, y2), mx, my, comprimento, direcao in zip(
+                indices,
+                pontos,
+                midx.tolist(),
+                midy.tolist(),
+                comprimentos.tolist(),
+                direcoes,
             )
+        ]
 
         # 🔥 garantir ordem consistente
         segmentos.sort(key=lambda s: s["ordem_segmento"])
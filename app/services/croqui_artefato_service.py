@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.services.croqui_service import CroquiService
+
+
+class CroquiArtefatoService:
+    """
+    Repositório de croquis renderizados, endereçado por conteúdo.
+
+    A chave é o hash de (geometria, confrontantes, versão do desenho);
+    cada chave tem um diretório com as variantes geradas sob demanda:
+    croqui.svg, croqui_<dpi>.png e croqui.pdf. Gravações atômicas
+    (tmp + rename) permitem que vários workers do host compartilhem o
+    diretório. Despejo LRU por tamanho total, usando o mtime (tocado a
+    cada acesso) como instante do último uso.
+    """
+
+    # Incrementar quando CroquiService.gerar_svg mudar o desenho
+    VERSAO_RENDER = 1
+
+    DPI_PADRAO = 96
+    DPIS = (96, 150, 300)
+
+    FORMATOS = ("svg", "png", "pdf")
+
+    MEDIA_TYPES = {
+        "svg": "image/svg+xml",
+        "png": "image/png",
+        "pdf": "application/pdf",
+    }
+
+    # Travas por chave em faixas fixas: memória constante, e duas chaves
+    # só disputam a mesma trava quando caem na mesma faixa
+    FAIXAS_LOCK = 64
+
+    # Chaves usadas há menos que isso não são despejadas: o caminho pode
+    # ter acabado de ser devolvido por obter()
+    CARENCIA_DESPEJO_SEGUNDOS = 60
+
+    _lock = threading.Lock()
+    _locks_chave: tuple[threading.Lock, ...] = tuple(
+        threading.Lock() for _ in range(FAIXAS_LOCK)
+    )
+
+    # Tamanho em disco estimado (None = ainda não varrido)
+    _bytes: Optional[int] = None
+
+    _hits = 0
+    _misses = 0
+
+    # =========================================================
+    # CHAVE
+    # =========================================================
+    @staticmethod
+    def _geojson_canonico(geojson: Any) -> Any:
+        if isinstance(geojson, str):
+            try:
+                return json.loads(geojson)
+            except ValueError:
+                return geojson
+        return geojson
+
+    @classmethod
+    def chave(cls, geojson: Any, confrontantes: Optional[list[dict[str, Any]]] = None) -> str:
+        """
+        Mesma geometria e mesmos confrontantes → mesma chave, venha o
+        GeoJSON como texto (pipeline) ou dict (payload do PDF).
+        """
+        canonico = json.dumps(
+            [
+                cls.VERSAO_RENDER,
+                CroquiService.SVG_SIZE,
+                cls._geojson_canonico(geojson),
+                confrontantes or [],
+            ],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+    # =========================================================
+    # DISCO
+    # =========================================================
+    @staticmethod
+    def _raiz() -> str:
+        return settings.CROQUI_CACHE_DIR
+
+    @classmethod
+    def _diretorio(cls, chave: str) -> str:
+        return os.path.join(cls._raiz(), chave[:2], chave)
+
+    @staticmethod
+    def _nome(formato: str, dpi: int) -> str:
+        if formato == "png":
+            return f"croqui_{dpi}.png"
+        return f"croqui.{formato}"
+
+    @classmethod
+    def _lock_chave(cls, chave: str) -> threading.Lock:
+        return cls._locks_chave[int(chave[:8], 16) % len(cls._locks_chave)]
+
+    @staticmethod
+    def _gravar(caminho: str, conteudo: bytes) -> None:
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+
+    @staticmethod
+    def _tocar(caminho: str) -> None:
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+
+    # =========================================================
+    # RENDERIZAÇÃO
+    # =========================================================
+    @classmethod
+    def _renderizar(
+        cls,
+        formato: str,
+        dpi: int,
+        geojson: Any,
+        confrontantes: Optional[list[dict[str, Any]]],
+        diretorio: str,
+    ) -> bytes:
+        if formato == "svg":
+            return CroquiService.gerar_svg(
+                geojson,
+                confrontantes=confrontantes or [],
+            ).encode("utf-8")
+
+        # PNG/PDF partem do SVG já em cache
+        svg = cls._obter_em(diretorio, "svg", cls.DPI_PADRAO, geojson, confrontantes)
+
+        import cairosvg
+
+        with open(svg, "rb") as f:
+            conteudo_svg = f.read()
+
+        if formato == "png":
+            # SVG em px: a escala define a resolução
+            return cairosvg.svg2png(
+                bytestring=conteudo_svg,
+                scale=dpi / cls.DPI_PADRAO,
+            )
+
+        return cairosvg.svg2pdf(bytestring=conteudo_svg)
+
+    @classmethod
+    def _obter_em(
+        cls,
+        diretorio: str,
+        formato: str,
+        dpi: int,
+        geojson: Any,
+        confrontantes: Optional[list[dict[str, Any]]],
+    ) -> str:
+        caminho = os.path.join(diretorio, cls._nome(formato, dpi))
+
+        if os.path.exists(caminho):
+            cls._tocar(caminho)
+            with cls._lock:
+                cls._hits += 1
+            return caminho
+
+        with cls._lock:
+            cls._misses += 1
+
+        conteudo = cls._renderizar(formato, dpi, geojson, confrontantes, diretorio)
+
+        os.makedirs(diretorio, exist_ok=True)
+        cls._gravar(caminho, conteudo)
+        cls._contabilizar(len(conteudo))
+
+        return caminho
+
+    @classmethod
+    def obter(
+        cls,
+        geojson: Any,
+        confrontantes: Optional[list[dict[str, Any]]] = None,
+        formato: str = "svg",
+        dpi: Optional[int] = None,
+    ) -> str:
+        """
+        Caminho da variante pedida, renderizada apenas se ainda não
+        existir. PNG aceita os DPIs de DPIS.
+        """
+        formato = (formato or "svg").lower()
+        if formato not in cls.FORMATOS:
+            raise ValueError(f"Formato de croqui não suportado: {formato}")
+
+        dpi = int(dpi or cls.DPI_PADRAO)
+        if formato == "png" and dpi not in cls.DPIS:
+            raise ValueError(f"DPI não suportado: {dpi} (use {', '.join(map(str, cls.DPIS))})")
+
+        chave = cls.chave(geojson, confrontantes)
+        diretorio = cls._diretorio(chave)
+
+        # Uma renderização por chave neste processo; entre processos a
+        # gravação atômica garante que ninguém lê arquivo pela metade.
+        with cls._lock_chave(chave):
+            caminho = cls._obter_em(diretorio, formato, dpi, geojson, confrontantes)
+            cls._tocar(diretorio)
+
+        return caminho
+
+    @classmethod
+    def svg(
+        cls,
+        geojson: Any,
+        confrontantes: Optional[list[dict[str, Any]]] = None,
+    ) -> str:
+        """Conteúdo SVG (texto) do croqui."""
+        with open(cls.obter(geojson, confrontantes, "svg"), "r", encoding="utf-8") as f:
+            return f.read()
+
+    # =========================================================
+    # DESPEJO (LRU EM DISCO)
+    # =========================================================
+    @classmethod
+    def _varrer(cls) -> list[tuple[float, int, str]]:
+        """(último uso, bytes, diretório) de cada chave em disco."""
+        raiz = cls._raiz()
+        entradas: list[tuple[float, int, str]] = []
+
+        if not os.path.isdir(raiz):
+            return entradas
+
+        for prefixo in os.scandir(raiz):
+            if not prefixo.is_dir():
+                continue
+            for item in os.scandir(prefixo.path):
+                if not item.is_dir():
+                    continue
+                try:
+                    arquivos = [a.stat() for a in os.scandir(item.path) if a.is_file()]
+                    uso = max([item.stat().st_mtime, *(a.st_mtime for a in arquivos)])
+                except FileNotFoundError:
+                    continue
+                entradas.append((uso, sum(a.st_size for a in arquivos), item.path))
+
+        return entradas
+
+    @classmethod
+    def _contabilizar(cls, novos_bytes: int) -> None:
+        limite = int(settings.CROQUI_CACHE_MAX_BYTES)
+        if limite <= 0:
+            return
+
+        with cls._lock:
+            if cls._bytes is not None:
+                cls._bytes += novos_bytes
+                if cls._bytes <= limite:
+                    return
+
+        cls.despejar(limite)
+
+    @classmethod
+    def despejar(cls, limite: Optional[int] = None) -> int:
+        """
+        Remove as chaves menos usadas até caber no limite; retorna quantas.
+        Chaves dentro da carência ficam, mesmo que o limite estoure.
+        """
+        limite = int(settings.CROQUI_CACHE_MAX_BYTES) if limite is None else limite
+
+        entradas = sorted(cls._varrer())
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        removidas = 0
+        recentes = time.time() - cls.CARENCIA_DESPEJO_SEGUNDOS
+
+        for uso, tamanho, diretorio in entradas:
+            if total <= limite or uso >= recentes:
+                break
+            shutil.rmtree(diretorio, ignore_errors=True)
+            total -= tamanho
+            removidas += 1
+
+        with cls._lock:
+            cls._bytes = total
+
+        if removidas:
+            print(f"🧹 Croquis removidos do cache: {removidas}")
+
+        return removidas
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @classmethod
+    def estatisticas(cls) -> dict[str, Any]:
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "bytes": cls._bytes,
+                "limite_bytes": int(settings.CROQUI_CACHE_MAX_BYTES),
+            }
+
+    @classmethod
+    def limpar(cls) -> None:
+        shutil.rmtree(cls._raiz(), ignore_errors=True)
+
+        with cls._lock:
+            cls._bytes = 0
+            cls._hits = 0
+            cls._misses = 0
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from shapely.geometry import Polygon
+from app.services.geometria_kernel import GeometriaKernel
 from app.services.geometria_service import GeometriaService
 
 
@@ -32,33 +33,21 @@ class CroquiService:
 
     @staticmethod
     def _distancia(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
-        dx = float(p2[0]) - float(p1[0])
-        dy = float(p2[1]) - float(p1[1])
-        return math.sqrt((dx * dx) + (dy * dy))
+        return GeometriaKernel.distancia(p1, p2)
 
     @staticmethod
     def _polygon_area(coords: List[Tuple[float, float]]) -> float:
         if len(coords) < 4:
             return 0.0
 
-        area = 0.0
-        for i in range(len(coords) - 1):
-            x1, y1 = coords[i]
-            x2, y2 = coords[i + 1]
-            area += (x1 * y2) - (x2 * y1)
-
-        return abs(area) / 2.0
+        return GeometriaKernel.calcular_anel(coords).area
 
     @staticmethod
     def _polygon_perimeter(coords: List[Tuple[float, float]]) -> float:
         if len(coords) < 2:
             return 0.0
 
-        total = 0.0
-        for i in range(len(coords) - 1):
-            total += CroquiService._distancia(coords[i], coords[i + 1])
-
-        return total
+        return GeometriaKernel.calcular_anel(coords).perimetro
 
     @staticmethod
     def _format_num(value: float, decimals: int = 2) -> str:
@@ -199,13 +188,6 @@ class CroquiService:
             "offset_y": offset_y,
         }
 
-    @staticmethod
-    def _segment_midpoint(p1: Tuple[float, float], p2: Tuple[float, float]) -> Tuple[float, float]:
-        return (
-            (float(p1[0]) + float(p2[0])) / 2.0,
-            (float(p1[1]) + float(p2[1])) / 2.0
-        )
-
     @staticmethod
     def _render_grid(size: int) -> str:
         draw = CroquiService._drawing_bounds(size)
@@ -399,24 +381,24 @@ class CroquiService:
 
         labels = []
 
+        # Pontos médios e normais de todos os lados de uma vez
+        anel = GeometriaKernel.calcular_anel(norm)
+        midx = anel.midx.tolist()
+        midy = anel.midy.tolist()
+        normal_x = anel.normal_x.tolist()
+        normal_y = anel.normal_y.tolist()
+        comprimentos = anel.distancias.tolist()
+
         for i, seg in enumerate(segmentos):
 
             if i >= len(norm) - 1:
                 continue
 
-            x1, y1 = norm[i]
-            x2, y2 = norm[i + 1]
-
-            mx, my = CroquiService._segment_midpoint((x1, y1), (x2, y2))
-
-            dx = float(x2) - float(x1)
-            dy = float(y2) - float(y1)
+            mx, my = midx[i], midy[i]
 
-            comprimento = math.sqrt((dx * dx) + (dy * dy))
-
-            if comprimento > 0:
-                nx = -dy / comprimento
-                ny = dx / comprimento
+            if comprimentos[i] > 0:
+                nx = normal_x[i]
+                ny = normal_y[i]
             else:
                 nx = 0.0
                 ny = -1.0
@@ -532,26 +514,22 @@ class CroquiService:
 
         total = len(norm)
 
+        # =========================================================
+        # 🔥 DIREÇÃO DO VÉRTICE (BASEADO NO SEGMENTO)
+        # =========================================================
+        anel = GeometriaKernel.calcular_anel(norm)
+        normal_x = anel.normal_x.tolist()
+        normal_y = anel.normal_y.tolist()
+        comprimentos = anel.distancias.tolist()
+
         for i, (x, y) in enumerate(norm[:-1], start=1):
 
             x = CroquiService._safe_float(x)
             y = CroquiService._safe_float(y)
 
-            # =========================================================
-            # 🔥 DIREÇÃO DO VÉRTICE (BASEADO NO SEGMENTO)
-            # =========================================================
-            try:
-                x2, y2 = norm[i]
-                dx = float(x2) - float(x)
-                dy = float(y2) - float(y)
-            except Exception:
-                dx, dy = 1.0, 0.0
-
-            comprimento = math.sqrt((dx * dx) + (dy * dy))
-
-            if comprimento > 0:
-                nx = -dy / comprimento
-                ny = dx / comprimento
+            if comprimentos[i - 1] > 0:
+                nx = normal_x[i - 1]
+                ny = normal_y[i - 1]
             else:
                 nx = 1.0
                 ny = -1.0
@@ -711,6 +689,13 @@ class CroquiService:
 
         total_segmentos = max(1, len(norm) - 1)
 
+        anel = GeometriaKernel.calcular_anel(norm)
+        midx = anel.midx.tolist()
+        midy = anel.midy.tolist()
+        normal_x = anel.normal_x.tolist()
+        normal_y = anel.normal_y.tolist()
+        comprimentos = anel.distancias.tolist()
+
         for idx, c in enumerate(confrontantes, start=1):
 
             if not isinstance(c, dict):
@@ -736,22 +721,15 @@ class CroquiService:
 
             segmento_index = max(0, min(segmento_index, total_segmentos - 1))
 
-            p1 = norm[segmento_index]
-            p2 = norm[(segmento_index + 1) % len(norm)]
-
-            mx, my = CroquiService._segment_midpoint(p1, p2)
+            mx = midx[segmento_index]
+            my = midy[segmento_index]
 
             # =========================================================
             # NORMAL DO SEGMENTO (DESLOCAMENTO PARA FORA)
             # =========================================================
-            dx = float(p2[0]) - float(p1[0])
-            dy = float(p2[1]) - float(p1[1])
-
-            norm_len = math.sqrt((dx * dx) + (dy * dy))
-
-            if norm_len > 0:
-                nx = -dy / norm_len
-                ny = dx / norm_len
+            if comprimentos[segmento_index] > 0:
+                nx = normal_x[segmento_index]
+                ny = normal_y[segmento_index]
             else:
                 nx = 0.0
                 ny = -1.0
@@ -5,8 +5,10 @@ from datetime import datetime
 from typing import Any, List, Tuple
 
 import ezdxf
+import numpy as np
 from shapely.geometry import Polygon
 
+from app.services.geometria_kernel import GeometriaKernel
 from app.services.geometria_service import GeometriaService
 
 
@@ -220,35 +222,15 @@ class DxfExportService:
 
         return radius
 
-    @staticmethod
-    def _calc_midpoint(
-        p1: Tuple[float, float],
-        p2: Tuple[float, float],
-    ) -> Tuple[float, float]:
-        x1 = DxfExportService._safe_float(p1[0])
-        y1 = DxfExportService._safe_float(p1[1])
-        x2 = DxfExportService._safe_float(p2[0])
-        y2 = DxfExportService._safe_float(p2[1])
-
-        return (
-            (x1 + x2) / 2.0,
-            (y1 + y2) / 2.0,
-        )
-
     @staticmethod
     def _calc_distance(
         p1: Tuple[float, float],
         p2: Tuple[float, float],
     ) -> float:
-        x1 = DxfExportService._safe_float(p1[0])
-        y1 = DxfExportService._safe_float(p1[1])
-        x2 = DxfExportService._safe_float(p2[0])
-        y2 = DxfExportService._safe_float(p2[1])
-
-        dx = x2 - x1
-        dy = y2 - y1
-
-        return (dx * dx + dy * dy) ** 0.5
+        return GeometriaKernel.distancia(
+            (DxfExportService._safe_float(p1[0]), DxfExportService._safe_float(p1[1])),
+            (DxfExportService._safe_float(p2[0]), DxfExportService._safe_float(p2[1])),
+        )
 
     @staticmethod
     def _calc_north_arrow_position(
@@ -469,16 +451,6 @@ class DxfExportService:
         if not coords or len(coords) < 2:
             return
 
-        def _format_azimute_dms_local(az: float) -> str:
-            az = DxfExportService._safe_float(az) % 360.0
-
-            graus = int(az)
-            minutos_float = (az - graus) * 60.0
-            minutos = int(minutos_float)
-            segundos = (minutos_float - minutos) * 60.0
-
-            return f"{graus:03d}°{minutos:02d}'{segundos:05.2f}\""
-
         try:
             # =========================================================
             # BASE GEOMÉTRICA
@@ -527,6 +499,18 @@ class DxfExportService:
 
             total_vertices = max(0, len(coords) - 1)
 
+            # Azimutes em DMS de toda a tabela numa única passada
+            azimutes_dms: list[str] = []
+            if segmentos:
+                azimutes_dms = GeometriaKernel.formatar_dms(
+                    [
+                        DxfExportService._safe_float(
+                            seg.get("azimute_graus", seg.get("azimute", 0))
+                        )
+                        for seg in segmentos
+                    ]
+                )
+
             # =========================================================
             # LINHAS DA TABELA
             # =========================================================
@@ -544,15 +528,8 @@ class DxfExportService:
                             segmentos[i].get("distancia", 0)
                         )
 
-                        azimute_val = DxfExportService._safe_float(
-                            segmentos[i].get(
-                                "azimute_graus",
-                                segmentos[i].get("azimute", 0),
-                            )
-                        )
-
                         distancia_str = f"{distancia_val:.3f}"
-                        azimute_str = _format_azimute_dms_local(azimute_val)
+                        azimute_str = azimutes_dms[i]
 
                     except Exception:
                         pass
@@ -585,14 +562,7 @@ class DxfExportService:
     # =========================================================
     @staticmethod
     def _format_azimute_dms(az: float) -> str:
-        az = DxfExportService._safe_float(az) % 360
-
-        graus = int(az)
-        minutos_float = (az - graus) * 60
-        minutos = int(minutos_float)
-        segundos = (minutos_float - minutos) * 60
-
-        return f"{graus:03d}°{minutos:02d}'{segundos:05.2f}\""
+        return GeometriaKernel.formatar_dms([DxfExportService._safe_float(az)])[0]
 
     # =========================================================
     # RENDERIZADOR INTERNO (BASE ÚNICA)
@@ -610,8 +580,6 @@ class DxfExportService:
         if not coords or len(coords) < 4:
             raise ValueError("Coordenadas insuficientes para geração do DXF")
 
-        import math
-
         doc = ezdxf.new(dxfversion="R2010")
         msp = doc.modelspace()
 
@@ -666,53 +634,50 @@ class DxfExportService:
 
         # =========================================================
         # SEGMENTOS + CONFRONTANTES
+        # Pontos médios, ângulos, normais e azimutes DMS calculados
+        # para o anel inteiro de uma vez.
         # =========================================================
+        anel = GeometriaKernel.calcular_anel(coords)
+        midx = anel.midx.tolist()
+        midy = anel.midy.tolist()
+        normal_x = anel.normal_x.tolist()
+        normal_y = anel.normal_y.tolist()
+
+        # 🔥 NORMALIZAÇÃO DE LEITURA (evita texto invertido)
+        angulos = np.where(
+            anel.degenerados,
+            0.0,
+            GeometriaKernel.angulos_leitura(anel.angulos_x),
+        ).tolist()
+
+        azimutes_dms = GeometriaKernel.formatar_dms(
+            [
+                DxfExportService._safe_float(
+                    seg.get("azimute_graus", seg.get("azimute", 0))
+                )
+                for seg in segmentos
+            ]
+        )
+
         for index, seg in enumerate(segmentos):
 
             if index >= len(coords) - 1:
                 continue
 
             try:
-                p1 = coords[index]
-                p2 = coords[index + 1]
-
-                mx, my = DxfExportService._calc_midpoint(p1, p2)
+                mx, my = midx[index], midy[index]
 
                 distancia = DxfExportService._safe_float(seg.get("distancia", 0))
-                az = DxfExportService._safe_float(
-                    seg.get("azimute_graus", seg.get("azimute", 0))
-                )
-
-                az_dms = DxfExportService._format_azimute_dms(az)
+                az_dms = azimutes_dms[index]
 
                 texto_segmento = f"L{index + 1} = {distancia:.2f} m | Az: {az_dms}"
 
                 # =========================================================
-                # DIREÇÃO DO SEGMENTO
-                # =========================================================
-                dx = float(p2[0]) - float(p1[0])
-                dy = float(p2[1]) - float(p1[1])
-
-                angle = 0.0
-                if dx != 0 or dy != 0:
-                    angle = math.degrees(math.atan2(dy, dx))
-
-                # 🔥 NORMALIZAÇÃO DE LEITURA (evita texto invertido)
-                if angle > 90:
-                    angle -= 180
-                elif angle < -90:
-                    angle += 180
-
-                # =========================================================
-                # NORMAL UNITÁRIO
+                # DIREÇÃO DO SEGMENTO + NORMAL UNITÁRIO
                 # =========================================================
-                nx = -dy
-                ny = dx
-
-                norm = math.sqrt((nx * nx) + (ny * ny))
-                if norm != 0:
-                    nx /= norm
-                    ny /= norm
+                angle = angulos[index]
+                nx = normal_x[index]
+                ny = normal_y[index]
 
                 # =========================================================
                 # TEXTO DO SEGMENTO
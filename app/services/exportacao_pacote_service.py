@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import io
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from shapely.geometry import Polygon
+
+from app.core.config import settings
+from app.services.cad_export_service import CadExportService
+from app.services.csv_export_service import CsvExportService
+from app.services.dxf_export_service import DxfExportService
+from app.services.geometria_service import GeometriaService
+from app.services.shp_export_service import ShpExportService
+from app.services.sigef_ods_service import SigefOdsService
+from app.services.txt_lisp_service import TxtLispService
+
+
+# =========================================================
+# PACOTE EM ANDAMENTO
+# =========================================================
+@dataclass
+class PacoteExportacao:
+    """
+    Formatos já submetidos ao pool; o ZIP é montado conforme cada um
+    termina (o primeiro a ficar pronto é o primeiro a ir para a rede).
+    """
+
+    nome_base: str
+    futuros: dict[Future, str] = field(default_factory=dict)
+    iniciado_em: float = field(default_factory=time.perf_counter)
+
+
+class _SaidaZip:
+    """
+    Destino não-seekable do ZipFile: acumula os bytes escritos até o
+    gerador drená-los. O zipfile usa data descriptors nesse modo.
+    """
+
+    def __init__(self) -> None:
+        self._partes: list[bytes] = []
+        self._posicao = 0
+
+    def write(self, dados: bytes) -> int:
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def flush(self) -> None:
+        pass
+
+    def drenar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+class ExportacaoPacoteService:
+    """
+    Pacote de exportação de uma geometria (DXF, SHP, CSV, TXT, KML, SCR
+    e a planilha SIGEF em ODS) num único ZIP transmitido em streaming.
+
+    O GeoJSON é normalizado uma única vez: o polígono fica no cache por
+    texto (GeometriaCacheService) e todos os exportadores o reaproveitam.
+    Os formatos são gerados em paralelo num pool de threads, em memória,
+    sem passar pela pasta do imóvel.
+    """
+
+    FORMATOS = ("dxf", "shp", "csv", "txt", "kml", "scr", "ods")
+
+    ARQUIVO_ERROS = "ERROS.txt"
+
+    _lock = threading.Lock()
+    _pool: Optional[ThreadPoolExecutor] = None
+
+    # =========================================================
+    # POOL
+    # =========================================================
+    @classmethod
+    def _max_workers(cls) -> int:
+        configurado = int(settings.EXPORTACAO_PACOTE_MAX_WORKERS or 0)
+        return configurado if configurado > 0 else len(cls.FORMATOS)
+
+    @classmethod
+    def _executor(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(
+                    max_workers=cls._max_workers(),
+                    thread_name_prefix="exportacao_pacote",
+                )
+            return cls._pool
+
+    @classmethod
+    def encerrar(cls) -> None:
+        with cls._lock:
+            pool, cls._pool = cls._pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # =========================================================
+    # FORMATOS
+    # =========================================================
+    @classmethod
+    def normalizar_formatos(cls, formatos: Optional[str]) -> tuple[str, ...]:
+        """
+        "dxf, SHP,csv" -> ("dxf", "shp", "csv"); vazio -> todos.
+        """
+        if not formatos or not formatos.strip():
+            return cls.FORMATOS
+
+        pedidos: list[str] = []
+        for formato in formatos.split(","):
+            formato = formato.strip().lower()
+            if not formato or formato in pedidos:
+                continue
+            if formato not in cls.FORMATOS:
+                raise ValueError(
+                    f"Formato não suportado: {formato} (use {', '.join(cls.FORMATOS)})"
+                )
+            pedidos.append(formato)
+
+        if not pedidos:
+            return cls.FORMATOS
+
+        return tuple(pedidos)
+
+    @staticmethod
+    def _gerar_dxf(geojson: str, confrontantes: list[dict[str, Any]]) -> dict[str, bytes]:
+        doc = DxfExportService.gerar_dxf(geojson, confrontantes=confrontantes)
+
+        saida = io.StringIO()
+        doc.write(saida)
+
+        return {"perimetro.dxf": doc.encode(saida.getvalue())}
+
+    @staticmethod
+    def _gerar_shp(geojson: str, confrontantes: list[dict[str, Any]]) -> dict[str, bytes]:
+        return {
+            f"shp/{nome}": conteudo
+            for nome, conteudo in ShpExportService.gerar_shp_arquivos(geojson).items()
+        }
+
+    @staticmethod
+    def _gerar_csv(geojson: str, confrontantes: list[dict[str, Any]]) -> dict[str, bytes]:
+        return {"vertices.csv": CsvExportService.gerar_csv(geojson).encode("utf-8")}
+
+    @staticmethod
+    def _gerar_txt(geojson: str, confrontantes: list[dict[str, Any]]) -> dict[str, bytes]:
+        return {"coordenadas.txt": TxtLispService.gerar_txt(geojson).encode("utf-8")}
+
+    @staticmethod
+    def _gerar_scr(geojson: str, confrontantes: list[dict[str, Any]]) -> dict[str, bytes]:
+        scr = CadExportService.gerar_scr(geojson=geojson, confrontantes=confrontantes)
+        return {"perimetro.scr": scr.encode("utf-8")}
+
+    @staticmethod
+    def gerar_kml(geom: Polygon, nome: str = "Perímetro") -> str:
+        """
+        KML 2.2 do perímetro. Exige lon/lat (EPSG:4326): geometrias em
+        coordenadas locais não têm como ser posicionadas no globo.
+        """
+        if not GeometriaService._coordenadas_parecem_geograficas(geom):
+            raise ValueError("KML exige coordenadas geográficas (EPSG:4326)")
+
+        def anel(coords: Any) -> str:
+            return " ".join(f"{float(x):.8f},{float(y):.8f},0" for x, y, *_ in coords)
+
+        interiores = "".join(
+            "<innerBoundaryIs><LinearRing><coordinates>"
+            f"{anel(interior.coords)}"
+            "</coordinates></LinearRing></innerBoundaryIs>"
+            for interior in geom.interiors
+        )
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<kml xmlns="http://www.opengis.net/kml/2.2">\n'
+            "<Document>\n"
+            f"<name>{escape(nome)}</name>\n"
+            "<Placemark>\n"
+            f"<name>{escape(nome)}</name>\n"
+            "<Polygon>"
+            "<outerBoundaryIs><LinearRing><coordinates>"
+            f"{anel(geom.exterior.coords)}"
+            "</coordinates></LinearRing></outerBoundaryIs>"
+            f"{interiores}"
+            "</Polygon>\n"
+            "</Placemark>\n"
+            "</Document>\n"
+            "</kml>\n"
+        )
+
+    @classmethod
+    def _gerar_kml(cls, geom: Polygon, nome: str) -> dict[str, bytes]:
+        return {"perimetro.kml": cls.gerar_kml(geom, nome).encode("utf-8")}
+
+    @staticmethod
+    def _gerar_ods(geojson: str, epsg_origem: int) -> dict[str, bytes]:
+        ods, _, _ = SigefOdsService.gerar_ods_sigef(
+            geojson=geojson,
+            epsg_origem=epsg_origem,
+        )
+
+        saida = io.BytesIO()
+        ods.write(saida)
+
+        return {"planilha_sigef.ods": saida.getvalue()}
+
+    @classmethod
+    def _geradores(cls) -> dict[str, Callable[[str, list[dict[str, Any]]], dict[str, bytes]]]:
+        return {
+            "dxf": cls._gerar_dxf,
+            "shp": cls._gerar_shp,
+            "csv": cls._gerar_csv,
+            "txt": cls._gerar_txt,
+            "scr": cls._gerar_scr,
+        }
+
+    # =========================================================
+    # PACOTE
+    # =========================================================
+    @classmethod
+    def iniciar(
+        cls,
+        geojson: str,
+        confrontantes: Optional[list[dict[str, Any]]] = None,
+        formatos: tuple[str, ...] = FORMATOS,
+        nome_base: str = "pacote",
+        epsg_origem: int = 4326,
+    ) -> PacoteExportacao:
+        """
+        Normaliza o polígono (uma vez) e submete os formatos ao pool.
+        Geometria inválida levanta ValueError antes de qualquer envio.
+        """
+        try:
+            geom = GeometriaService.normalizar_para_polygon(geojson)
+        except Exception as exc:
+            raise ValueError("GeoJSON inválido para exportação") from exc
+
+        confrontantes = confrontantes or []
+        pacote = PacoteExportacao(nome_base=nome_base)
+        geradores = cls._geradores()
+        executor = cls._executor()
+
+        for formato in formatos:
+            if formato == "kml":
+                futuro = executor.submit(cls._gerar_kml, geom, nome_base)
+            elif formato == "ods":
+                futuro = executor.submit(cls._gerar_ods, geojson, epsg_origem)
+            else:
+                futuro = executor.submit(geradores[formato], geojson, confrontantes)
+
+            pacote.futuros[futuro] = formato
+
+        return pacote
+
+    @classmethod
+    def stream(cls, pacote: PacoteExportacao) -> Iterator[bytes]:
+        """
+        Bytes do ZIP, entregues à medida que cada formato fica pronto.
+        Um formato que falha não derruba o pacote: o motivo vai para
+        ERROS.txt dentro do próprio ZIP.
+        """
+        saida = _SaidaZip()
+        erros: dict[str, str] = {}
+        nivel = min(max(int(settings.EXPORTACAO_PACOTE_COMPRESSAO), 0), 9)
+
+        try:
+            with zipfile.ZipFile(
+                saida,
+                "w",
+                compression=zipfile.ZIP_DEFLATED if nivel else zipfile.ZIP_STORED,
+                compresslevel=nivel or None,
+            ) as zf:
+                for futuro in as_completed(pacote.futuros):
+                    formato = pacote.futuros[futuro]
+
+                    try:
+                        arquivos = futuro.result()
+                    except Exception as exc:
+                        erros[formato] = str(exc) or exc.__class__.__name__
+                        print(f"⚠️ Pacote {pacote.nome_base}: falha ao gerar {formato}: {erros[formato]}")
+                        continue
+
+                    for nome, conteudo in arquivos.items():
+                        zf.writestr(f"{pacote.nome_base}/{nome}", conteudo)
+                        yield saida.drenar()
+
+                if erros:
+                    zf.writestr(
+                        f"{pacote.nome_base}/{cls.ARQUIVO_ERROS}",
+                        "\n".join(f"{f.upper()}: {m}" for f, m in sorted(erros.items())),
+                    )
+
+            yield saida.drenar()
+
+        finally:
+            # Cliente desconectou: o que ainda não começou não roda à toa
+            for futuro in pacote.futuros:
+                futuro.cancel()
+
+        duracao = time.perf_counter() - pacote.iniciado_em
+        print(
+            f"📦 Pacote {pacote.nome_base}: {len(pacote.futuros) - len(erros)}/"
+            f"{len(pacote.futuros)} formatos em {duracao:.2f}s"
+        )
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+import shapely
+from shapely.geometry import Polygon
+
+from app.core.config import settings
+
+
+@dataclass
+class EntradaGeometria:
+    """
+    Polígono já normalizado (GeometriaService.normalizar_para_polygon)
+    e artefatos derivados, calculados sob demanda.
+    """
+
+    geom: Polygon
+    tamanho_bytes: int
+    geometria_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+    _derivados: dict[Any, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def bbox(self) -> tuple[float, float, float, float]:
+        if "bbox" not in self._derivados:
+            self._derivados["bbox"] = tuple(float(v) for v in self.geom.bounds)
+        return self._derivados["bbox"]
+
+    def epsg_utm(self, epsg_origem: int = 4326) -> Optional[int]:
+        """Zona UTM da geometria; None para LOCAL_CARTESIANA."""
+        from app.services.geometria_service import GeometriaService
+
+        chave = ("epsg_utm", int(epsg_origem or 0))
+        if chave not in self._derivados:
+            minx, miny, maxx, maxy = self.bbox
+            geografica = (
+                int(epsg_origem or 0) > 0
+                and GeometriaService._coordenadas_parecem_geograficas(self.geom)
+                and (maxx - minx) < 5
+                and (maxy - miny) < 5
+            )
+
+            epsg_utm = None
+            if geografica:
+                centroide = self.geom.centroid
+                epsg_utm = GeometriaService._utm_epsg_from_lonlat(centroide.x, centroide.y)
+
+            self._derivados[chave] = epsg_utm
+
+        return self._derivados[chave]
+
+
+class GeometriaCacheService:
+    """
+    Cache em processo de geometrias parseadas.
+
+    - por (geometria_id, updated_at): consultas a partir do banco
+    - pelo próprio texto GeoJSON: serviços que recebem só a string
+      (exportadores, croqui, memorial) reaproveitam o mesmo parse
+
+    Os dois índices dividem uma única ordem LRU, com despejo por tamanho
+    estimado em memória. Opcionalmente grava WKB num diretório local
+    (GEOMETRIA_CACHE_DIR) para que outros workers uvicorn do mesmo host
+    reaproveitem o parse; o diretório também tem despejo LRU por tamanho
+    (mtime tocado a cada leitura).
+    """
+
+    POR_ID = "id"
+    POR_TEXTO = "texto"
+
+    _lock = threading.Lock()
+
+    # (POR_ID, (geometria_id, updated_at)) ou (POR_TEXTO, geojson)
+    _entradas: OrderedDict[tuple[str, Any], EntradaGeometria] = OrderedDict()
+    _bytes = 0
+
+    # Tamanho do diretório estimado (None = ainda não varrido)
+    _bytes_disco: Optional[int] = None
+
+    _hits = 0
+    _misses = 0
+    _hits_disco = 0
+
+    # =========================================================
+    # TAMANHO / DESPEJO
+    # =========================================================
+    @staticmethod
+    def _estimar_bytes(geom: Polygon, texto: Optional[str] = None) -> int:
+        # Coordenadas (x, y) em float64 + derivados (anel UTM) + overhead
+        return int(shapely.get_num_coordinates(geom)) * 16 * 2 + len(texto or "") + 512
+
+    @classmethod
+    def _limite(cls) -> int:
+        return max(int(settings.GEOMETRIA_CACHE_MAX_BYTES), 0)
+
+    @classmethod
+    def _despejar(cls) -> None:
+        limite = cls._limite()
+
+        while cls._bytes > limite and cls._entradas:
+            # Menos usada entre os dois índices
+            _, entrada = cls._entradas.popitem(last=False)
+            cls._bytes -= entrada.tamanho_bytes
+
+    @classmethod
+    def _guardar(cls, chave: tuple[str, Any], entrada: EntradaGeometria) -> None:
+        with cls._lock:
+            anterior = cls._entradas.pop(chave, None)
+            if anterior is not None:
+                cls._bytes -= anterior.tamanho_bytes
+
+            cls._entradas[chave] = entrada
+            cls._bytes += entrada.tamanho_bytes
+            cls._despejar()
+
+    # =========================================================
+    # POR TEXTO GEOJSON
+    # =========================================================
+    @classmethod
+    def obter_por_texto(cls, geojson: str) -> Optional[Polygon]:
+        chave = (cls.POR_TEXTO, geojson)
+
+        with cls._lock:
+            entrada = cls._entradas.get(chave)
+            if entrada is None:
+                cls._misses += 1
+                return None
+
+            cls._entradas.move_to_end(chave)
+            cls._hits += 1
+            return entrada.geom
+
+    @classmethod
+    def registrar_texto(cls, geojson: str, geom: Polygon) -> None:
+        if cls._limite() <= 0:
+            return
+
+        entrada = EntradaGeometria(
+            geom=geom,
+            tamanho_bytes=cls._estimar_bytes(geom, geojson),
+        )
+
+        cls._guardar((cls.POR_TEXTO, geojson), entrada)
+
+    # =========================================================
+    # POR (geometria_id, updated_at)
+    # =========================================================
+    @staticmethod
+    def _arquivo(geometria_id: int, updated_at: Any) -> Optional[str]:
+        diretorio = settings.GEOMETRIA_CACHE_DIR
+        if not diretorio:
+            return None
+
+        versao = updated_at.timestamp() if isinstance(updated_at, datetime) else 0
+        return os.path.join(diretorio, f"{geometria_id}_{versao:.6f}.wkb")
+
+    @staticmethod
+    def _ler_disco(caminho: Optional[str]) -> Optional[Polygon]:
+        if not caminho or not os.path.exists(caminho):
+            return None
+
+        try:
+            with open(caminho, "rb") as f:
+                geom = shapely.from_wkb(f.read())
+            os.utime(caminho)
+        except Exception:
+            return None
+
+        return geom if isinstance(geom, Polygon) and not geom.is_empty else None
+
+    @classmethod
+    def _gravar_disco(cls, caminho: Optional[str], geom: Polygon) -> None:
+        if not caminho:
+            return
+
+        try:
+            conteudo = shapely.to_wkb(geom)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(conteudo)
+            os.replace(temporario, caminho)
+        except Exception as exc:
+            print(f"⚠️ Falha ao gravar cache de geometria em disco: {str(exc)}")
+            return
+
+        cls._contabilizar_disco(len(conteudo))
+
+    @classmethod
+    def _contabilizar_disco(cls, novos_bytes: int) -> None:
+        limite = int(settings.GEOMETRIA_CACHE_DIR_MAX_BYTES)
+        if limite <= 0:
+            return
+
+        with cls._lock:
+            if cls._bytes_disco is not None:
+                cls._bytes_disco += novos_bytes
+                if cls._bytes_disco <= limite:
+                    return
+
+        cls.despejar_disco(limite)
+
+    @classmethod
+    def despejar_disco(cls, limite: Optional[int] = None) -> int:
+        """
+        Remove os WKB menos usados até caber no limite (versões antigas
+        de uma geometria deixam de ser lidas e saem primeiro).
+        """
+        diretorio = settings.GEOMETRIA_CACHE_DIR
+        if not diretorio or not os.path.isdir(diretorio):
+            return 0
+
+        limite = int(settings.GEOMETRIA_CACHE_DIR_MAX_BYTES) if limite is None else limite
+
+        arquivos = []
+        for item in os.scandir(diretorio):
+            if not item.name.endswith(".wkb"):
+                continue
+            try:
+                info = item.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, item.path))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        removidos = 0
+
+        for _, tamanho, arquivo in sorted(arquivos):
+            if total <= limite:
+                break
+            try:
+                os.remove(arquivo)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+            removidos += 1
+
+        with cls._lock:
+            cls._bytes_disco = total
+
+        return removidos
+
+    @classmethod
+    def obter(
+        cls,
+        geometria_id: int,
+        updated_at: Any,
+        geojson: Optional[str] = None,
+    ) -> Optional[EntradaGeometria]:
+        """
+        Entrada da geometria; `geojson` só é necessário em caso de miss.
+        Retorna None quando não está em cache e o texto não foi informado.
+        """
+        chave = (cls.POR_ID, (int(geometria_id), updated_at))
+
+        with cls._lock:
+            entrada = cls._entradas.get(chave)
+            if entrada is not None:
+                cls._entradas.move_to_end(chave)
+                cls._hits += 1
+                return entrada
+
+        caminho = cls._arquivo(geometria_id, updated_at)
+        geom = cls._ler_disco(caminho)
+
+        if geom is not None:
+            with cls._lock:
+                cls._hits_disco += 1
+        else:
+            if geojson is None:
+                return None
+
+            with cls._lock:
+                cls._misses += 1
+
+            from app.services.geometria_service import GeometriaService
+
+            geom = GeometriaService.normalizar_para_polygon(geojson)
+            cls._gravar_disco(caminho, geom)
+
+        entrada = EntradaGeometria(
+            geom=geom,
+            tamanho_bytes=cls._estimar_bytes(geom),
+            geometria_id=int(geometria_id),
+            updated_at=updated_at,
+        )
+
+        if cls._limite() <= 0:
+            return entrada
+
+        cls._guardar(chave, entrada)
+
+        return entrada
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @classmethod
+    def estatisticas(cls) -> dict[str, int]:
+        with cls._lock:
+            por_id = sum(1 for tipo, _ in cls._entradas if tipo == cls.POR_ID)
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "hits_disco": cls._hits_disco,
+                "entradas_id": por_id,
+                "entradas_texto": len(cls._entradas) - por_id,
+                "bytes": cls._bytes,
+                "limite_bytes": cls._limite(),
+                "bytes_disco": cls._bytes_disco,
+            }
+
+    @classmethod
+    def limpar(cls) -> None:
+        with cls._lock:
+            cls._entradas.clear()
+            cls._bytes = 0
+            cls._bytes_disco = None
+            cls._hits = 0
+            cls._misses = 0
+            cls._hits_disco = 0
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AnelCalculado:
+    """
+    Métricas de um anel fechado, todas em arrays (um item por lado).
+
+    O lado i vai do vértice i ao vértice i + 1 do anel fechado.
+    """
+
+    coords: np.ndarray          # (N, 2) anel fechado
+    dx: np.ndarray
+    dy: np.ndarray
+    distancias: np.ndarray
+    azimutes: np.ndarray        # graus, 0° = Norte, sentido horário
+    angulos_x: np.ndarray       # graus a partir do eixo X (anti-horário)
+    midx: np.ndarray
+    midy: np.ndarray
+    normal_x: np.ndarray        # normal unitária à esquerda do lado
+    normal_y: np.ndarray
+    area: float
+    area_assinada: float        # > 0 quando anti-horário
+    perimetro: float
+    erro_fechamento: float      # distância entre o primeiro e o último ponto informados
+
+    @property
+    def total_lados(self) -> int:
+        return int(self.distancias.shape[0])
+
+    @property
+    def degenerados(self) -> np.ndarray:
+        return (self.dx == 0) & (self.dy == 0)
+
+
+class GeometriaKernel:
+    """
+    Núcleo vetorizado (NumPy) de cálculos sobre anéis de polígono:
+    distâncias, azimutes (decimal e DMS), pontos médios, normais,
+    erro de fechamento e área.
+
+    Serviços de geometria, croqui, DXF e confrontantes calculam o anel
+    inteiro de uma vez aqui, em vez de percorrer os lados em Python.
+    """
+
+    # =========================================================
+    # COORDENADAS
+    # =========================================================
+    @staticmethod
+    def sanear(coords: Any) -> np.ndarray:
+        """
+        Array (N, 2) float64; NaN/Inf viram 0.0 (mesma regra de _safe_float).
+        """
+        arr = np.asarray(coords, dtype=np.float64)
+        if arr.size == 0:
+            return np.empty((0, 2), dtype=np.float64)
+
+        arr = arr.reshape(arr.shape[0], -1)[:, :2].copy()
+        arr[~np.isfinite(arr)] = 0.0
+        return arr
+
+    @staticmethod
+    def fechar(coords: np.ndarray) -> np.ndarray:
+        if coords.shape[0] and not np.array_equal(coords[0], coords[-1]):
+            return np.vstack((coords, coords[:1]))
+        return coords
+
+    # =========================================================
+    # ANEL COMPLETO
+    # =========================================================
+    @staticmethod
+    def calcular_anel(coords: Any, sanear: bool = True) -> AnelCalculado:
+        arr = (
+            GeometriaKernel.sanear(coords)
+            if sanear
+            else np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        )
+
+        erro_fechamento = (
+            float(np.hypot(*(arr[-1] - arr[0]))) if arr.shape[0] >= 2 else 0.0
+        )
+
+        anel = GeometriaKernel.fechar(arr)
+
+        p1 = anel[:-1]
+        p2 = anel[1:]
+
+        dx = p2[:, 0] - p1[:, 0]
+        dy = p2[:, 1] - p1[:, 1]
+
+        distancias = np.hypot(dx, dy)
+
+        azimutes = np.degrees(np.arctan2(dx, dy))
+        azimutes = np.mod(azimutes + 360.0, 360.0)
+        azimutes[(dx == 0) & (dy == 0)] = 0.0
+
+        angulos_x = np.degrees(np.arctan2(dy, dx))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            normal_x = np.where(distancias > 0, -dy / distancias, 0.0)
+            normal_y = np.where(distancias > 0, dx / distancias, 0.0)
+
+        # Fórmula do laço (shoelace)
+        area_assinada = float(np.sum(p1[:, 0] * p2[:, 1] - p2[:, 0] * p1[:, 1]) / 2.0)
+
+        return AnelCalculado(
+            coords=anel,
+            dx=dx,
+            dy=dy,
+            distancias=distancias,
+            azimutes=azimutes,
+            angulos_x=angulos_x,
+            midx=(p1[:, 0] + p2[:, 0]) / 2.0,
+            midy=(p1[:, 1] + p2[:, 1]) / 2.0,
+            normal_x=normal_x,
+            normal_y=normal_y,
+            area=abs(area_assinada),
+            area_assinada=area_assinada,
+            perimetro=float(np.sum(distancias)),
+            erro_fechamento=erro_fechamento,
+        )
+
+    # =========================================================
+    # AZIMUTE EM DMS
+    # =========================================================
+    @staticmethod
+    def decompor_dms(azimutes: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        az = np.mod(np.asarray(azimutes, dtype=np.float64), 360.0)
+
+        graus = np.floor(az)
+        minutos_float = (az - graus) * 60.0
+        minutos = np.floor(minutos_float)
+        segundos = (minutos_float - minutos) * 60.0
+
+        return graus.astype(np.int64), minutos.astype(np.int64), segundos
+
+    @staticmethod
+    def formatar_dms(azimutes: Any, digitos_graus: int = 3) -> list[str]:
+        graus, minutos, segundos = GeometriaKernel.decompor_dms(azimutes)
+
+        return [
+            f"{g:0{digitos_graus}d}°{m:02d}'{s:05.2f}\""
+            for g, m, s in zip(graus.tolist(), minutos.tolist(), segundos.tolist())
+        ]
+
+    # =========================================================
+    # AUXILIARES
+    # =========================================================
+    @staticmethod
+    def angulos_leitura(angulos_x: np.ndarray) -> np.ndarray:
+        """Ângulo de rotação de texto sem inverter a leitura (-90° a 90°)."""
+        angulos = np.asarray(angulos_x, dtype=np.float64).copy()
+        angulos[angulos > 90] -= 180
+        angulos[angulos < -90] += 180
+        return angulos
+
+    @staticmethod
+    def direcoes_cardeais(
+        midx: np.ndarray,
+        midy: np.ndarray,
+        centerx: float,
+        centery: float,
+        tolerancia: float = 0.15,
+    ) -> list[str]:
+        """
+        Direção (N, NE, E, ...) de cada ponto médio em relação ao centro.
+        Diagonal quando o menor deslocamento é ao menos `tolerancia` do maior.
+        """
+        dx = np.asarray(midx, dtype=np.float64) - centerx
+        dy = np.asarray(midy, dtype=np.float64) - centery
+
+        abs_dx = np.abs(dx)
+        abs_dy = np.abs(dy)
+
+        maior = np.maximum(abs_dx, abs_dy)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.where(maior > 0, np.minimum(abs_dx, abs_dy) / maior, 0.0)
+
+        diagonal = (abs_dx > 0) & (abs_dy > 0) & (rel >= tolerancia)
+
+        diagonais = np.where(
+            dy >= 0,
+            np.where(dx >= 0, "NE", "NW"),
+            np.where(dx >= 0, "SE", "SW"),
+        )
+        ortogonais = np.where(
+            abs_dx >= abs_dy,
+            np.where(dx >= 0, "E", "W"),
+            np.where(dy >= 0, "N", "S"),
+        )
+
+        direcoes = np.where(diagonal, diagonais, ortogonais)
+        direcoes[(abs_dx == 0) & (abs_dy == 0)] = "N"
+
+        return direcoes.tolist()
+
+    @staticmethod
+    def distancia(p1: Any, p2: Any) -> float:
+        return math.hypot(float(p2[0]) - float(p1[0]), float(p2[1]) - float(p1[1]))
@@ -1,84 +1,231 @@
 from __future__ import annotations
 
+import io
+import time
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
 
+from app.models.segmento import Segmento
+from app.models.vertice import Vertice
 from app.services.geometria_service import GeometriaService
 
 
 class GeometriaPersistenciaService:
+    """
+    Persistência em lote de vértices e segmentos de uma geometria.
+
+    - modo "completo": apaga e regrava tudo
+    - modo "diff": compara com o que já está gravado (por índice) e só
+      insere, atualiza ou remove as linhas que mudaram
+
+    Inserções grandes em PostgreSQL usam COPY; nos demais casos um único
+    executemany por tabela.
+    """
+
+    MODOS = {"completo", "diff"}
+
+    # A partir de quantas linhas vale abrir um COPY
+    LIMIAR_COPY = 500
+
+    # =========================================================
+    # LINHAS A PARTIR DOS SEGMENTOS
+    # =========================================================
+    @staticmethod
+    def _linhas(geometria_id: int, segmentos: list[dict[str, Any]]) -> tuple[dict, dict]:
+        vertices = {
+            int(seg["indice"]): {
+                "geometria_id": geometria_id,
+                "indice": int(seg["indice"]),
+                "x": float(seg["ponto_inicial"]["x"]),
+                "y": float(seg["ponto_inicial"]["y"]),
+            }
+            for seg in segmentos
+        }
+
+        segs = {
+            int(seg["indice"]): {
+                "geometria_id": geometria_id,
+                "indice": int(seg["indice"]),
+                "distancia": float(seg["distancia"]),
+                "azimute": float(seg["azimute_graus"]),
+            }
+            for seg in segmentos
+        }
+
+        return vertices, segs
+
+    # =========================================================
+    # INSERÇÃO EM LOTE
+    # =========================================================
+    @staticmethod
+    def _copy(db: Session, tabela: str, colunas: list[str], linhas: list[dict]) -> None:
+        agora = datetime.utcnow().isoformat()
+
+        buffer = io.StringIO()
+        for linha in linhas:
+            valores = [repr(linha[c]) if isinstance(linha[c], float) else str(linha[c]) for c in colunas]
+            buffer.write("\t".join(valores + [agora]) + "\n")
+        buffer.seek(0)
+
+        # Mesma conexão/transação da sessão
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {tabela} ({', '.join(colunas)}, created_at) FROM STDIN",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _inserir(db: Session, model, colunas: list[str], linhas: list[dict]) -> str | None:
+        if not linhas:
+            return None
+
+        if (
+            db.get_bind().dialect.name == "postgresql"
+            and len(linhas) >= GeometriaPersistenciaService.LIMIAR_COPY
+        ):
+            GeometriaPersistenciaService._copy(db, model.__tablename__, colunas, linhas)
+            return "COPY"
+
+        db.execute(insert(model), linhas)
+        return "EXECUTEMANY"
+
+    # =========================================================
+    # DIFF POR ÍNDICE
+    # =========================================================
+    @staticmethod
+    def _diff(
+        db: Session,
+        model,
+        geometria_id: int,
+        campos: tuple[str, ...],
+        novas: dict[int, dict],
+    ) -> dict[str, Any]:
+        atuais = db.execute(
+            select(model.id, model.indice, *(getattr(model, c) for c in campos))
+            .where(model.geometria_id == geometria_id)
+        ).all()
+
+        por_indice: dict[int, Any] = {}
+        duplicados: list[int] = []
+        for row in atuais:
+            if row.indice in por_indice:
+                duplicados.append(row.id)
+            else:
+                por_indice[row.indice] = row
+
+        remover = duplicados + [
+            row.id for indice, row in por_indice.items() if indice not in novas
+        ]
+
+        atualizar = []
+        inserir = []
+        for indice, linha in novas.items():
+            row = por_indice.get(indice)
+            if row is None:
+                inserir.append(linha)
+            elif any(getattr(row, c) != linha[c] for c in campos):
+                atualizar.append({"id": row.id, **{c: linha[c] for c in campos}})
+
+        if remover:
+            db.execute(delete(model).where(model.id.in_(remover)))
+
+        if atualizar:
+            # UPDATE em lote por chave primária (executemany)
+            db.execute(update(model), atualizar)
+
+        metodo = GeometriaPersistenciaService._inserir(
+            db,
+            model,
+            ["geometria_id", "indice", *campos],
+            inserir,
+        )
+
+        return {
+            "inseridos": len(inserir),
+            "atualizados": len(atualizar),
+            "removidos": len(remover),
+            "inalterados": len(novas) - len(inserir) - len(atualizar),
+            "metodo_insercao": metodo,
+        }
 
+    # =========================================================
+    # API
+    # =========================================================
     @staticmethod
     def persistir_estrutura(
         db: Session,
         geometria_id: int,
-        geojson
-    ) -> None:
+        geojson,
+        modo: str = "completo",
+    ) -> dict[str, Any] | None:
 
         if not geometria_id or not geojson:
-            return
+            return None
 
-        # =========================================================
-        # 🔥 LIMPEZA PRÉVIA (IDEMPOTÊNCIA)
-        # =========================================================
-        db.execute(
-            "DELETE FROM segmentos WHERE geometria_id = :gid",
-            {"gid": geometria_id}
-        )
+        if modo not in GeometriaPersistenciaService.MODOS:
+            raise ValueError(f"Modo de persistência inválido: {modo}")
 
-        db.execute(
-            "DELETE FROM vertices WHERE geometria_id = :gid",
-            {"gid": geometria_id}
-        )
+        t0 = time.perf_counter()
 
         # =========================================================
         # 🔥 EXTRAÇÃO DE ENGENHARIA
         # =========================================================
         segmentos = GeometriaService.extract_segmentos(geojson)
+        vertices, segs = GeometriaPersistenciaService._linhas(geometria_id, segmentos)
 
-        if not segmentos:
-            return
+        if modo == "completo":
+            # =========================================================
+            # 🔥 LIMPEZA PRÉVIA (IDEMPOTÊNCIA)
+            # =========================================================
+            removidos_seg = db.execute(
+                delete(Segmento).where(Segmento.geometria_id == geometria_id)
+            ).rowcount
+            removidos_vert = db.execute(
+                delete(Vertice).where(Vertice.geometria_id == geometria_id)
+            ).rowcount
 
-        # =========================================================
-        # 🔥 INSERÇÃO DE VÉRTICES
-        # =========================================================
-        vertices_ids = []
-
-        for seg in segmentos:
-            result = db.execute(
-                """
-                INSERT INTO vertices (geometria_id, indice, x, y)
-                VALUES (:gid, :indice, :x, :y)
-                RETURNING id
-                """,
-                {
-                    "gid": geometria_id,
-                    "indice": seg["indice"],
-                    "x": float(seg["ponto_inicial"]["x"]),
-                    "y": float(seg["ponto_inicial"]["y"]),
-                }
+            resultado_vertices = {
+                "inseridos": len(vertices),
+                "atualizados": 0,
+                "removidos": int(removidos_vert or 0),
+                "inalterados": 0,
+                "metodo_insercao": GeometriaPersistenciaService._inserir(
+                    db, Vertice, ["geometria_id", "indice", "x", "y"], list(vertices.values())
+                ),
+            }
+            resultado_segmentos = {
+                "inseridos": len(segs),
+                "atualizados": 0,
+                "removidos": int(removidos_seg or 0),
+                "inalterados": 0,
+                "metodo_insercao": GeometriaPersistenciaService._inserir(
+                    db, Segmento, ["geometria_id", "indice", "distancia", "azimute"], list(segs.values())
+                ),
+            }
+        else:
+            resultado_vertices = GeometriaPersistenciaService._diff(
+                db, Vertice, geometria_id, ("x", "y"), vertices
+            )
+            resultado_segmentos = GeometriaPersistenciaService._diff(
+                db, Segmento, geometria_id, ("distancia", "azimute"), segs
             )
 
-            vertex_id = result.fetchone()[0]
-            vertices_ids.append(vertex_id)
+        linhas_escritas = sum(
+            r["inseridos"] + r["atualizados"] + r["removidos"]
+            for r in (resultado_vertices, resultado_segmentos)
+        )
 
-        # =========================================================
-        # 🔥 INSERÇÃO DE SEGMENTOS
-        # =========================================================
-        for seg in segmentos:
-            db.execute(
-                """
-                INSERT INTO segmentos (
-                    geometria_id,
-                    indice,
-                    distancia,
-                    azimute
-                )
-                VALUES (:gid, :indice, :dist, :az)
-                """,
-                {
-                    "gid": geometria_id,
-                    "indice": seg["indice"],
-                    "dist": float(seg["distancia"]),
-                    "az": float(seg["azimute_graus"]),
-                }
-            )
\ No newline at end of file
+        return {
+            "geometria_id": geometria_id,
+            "modo": modo,
+            "vertices": resultado_vertices,
+            "segmentos": resultado_segmentos,
+            "linhas_escritas": linhas_escritas,
+            "tempo_ms": round((time.perf_counter() - t0) * 1000, 2),
+        }
@@ -8,9 +8,13 @@ from math import floor
 from typing import Any
 
 from fastapi import HTTPException
-from pyproj import CRS, Transformer
+import numpy as np
 from shapely.geometry import MultiPolygon, Polygon, shape
 
+from app.services.geometria_cache_service import GeometriaCacheService
+from app.services.geometria_kernel import GeometriaKernel
+from app.services.projecao_service import ProjecaoService
+
 
 class GeometriaService:
 
@@ -196,6 +200,20 @@ class GeometriaService:
 
     @staticmethod
     def normalizar_para_polygon(geojson: Any) -> Polygon:
+        # O mesmo texto é normalizado por vários serviços no mesmo fluxo
+        if isinstance(geojson, str):
+            geom = GeometriaCacheService.obter_por_texto(geojson)
+            if geom is not None:
+                return geom
+
+            geom = GeometriaService._normalizar_para_polygon(geojson)
+            GeometriaCacheService.registrar_texto(geojson, geom)
+            return geom
+
+        return GeometriaService._normalizar_para_polygon(geojson)
+
+    @staticmethod
+    def _normalizar_para_polygon(geojson: Any) -> Polygon:
         geom = GeometriaService.parse_geometry_or_raise(geojson)
 
         if isinstance(geom, MultiPolygon):
@@ -331,11 +349,22 @@ class GeometriaService:
 
         epsg_utm = GeometriaService._utm_epsg_from_lonlat(lon, lat)
 
+        coords = np.asarray(geom.exterior.coords, dtype=np.float64)[:, :2]
+
+        # Descarta coordenadas fora da faixa geográfica antes de projetar
+        dentro = (
+            np.isfinite(coords).all(axis=1)
+            & (coords[:, 0] >= GeometriaService.GEO_LON_MIN)
+            & (coords[:, 0] <= GeometriaService.GEO_LON_MAX)
+            & (coords[:, 1] >= GeometriaService.GEO_LAT_MIN)
+            & (coords[:, 1] <= GeometriaService.GEO_LAT_MAX)
+        )
+
         try:
-            transformer = Transformer.from_crs(
-                CRS.from_epsg(epsg_origem),
-                CRS.from_epsg(epsg_utm),
-                always_xy=True,
+            projetadas = ProjecaoService.transformar_coords(
+                coords[dentro],
+                epsg_origem,
+                epsg_utm,
             )
         except Exception:
             return (
@@ -344,30 +373,10 @@ class GeometriaService:
                 GeometriaService._safe_float(geom.length),
             )
 
-        proj_coords: list[tuple[float, float]] = []
-
-        for x, y in geom.exterior.coords:
-            x = GeometriaService._safe_float(x)
-            y = GeometriaService._safe_float(y)
-
-            if not (
-                GeometriaService.GEO_LON_MIN <= x <= GeometriaService.GEO_LON_MAX
-                and GeometriaService.GEO_LAT_MIN <= y <= GeometriaService.GEO_LAT_MAX
-            ):
-                continue
-
-            try:
-                X, Y = transformer.transform(x, y)
-            except Exception:
-                continue
-
-            X = GeometriaService._safe_float(X)
-            Y = GeometriaService._safe_float(Y)
-
-            if math.isnan(X) or math.isnan(Y) or math.isinf(X) or math.isinf(Y):
-                continue
-
-            proj_coords.append((X, Y))
+        projetadas = projetadas[np.isfinite(projetadas).all(axis=1)]
+        proj_coords: list[tuple[float, float]] = [
+            (float(X), float(Y)) for X, Y in projetadas
+        ]
 
         if len(proj_coords) < 4:
             return (
@@ -444,9 +453,7 @@ class GeometriaService:
 
     @staticmethod
     def _calcular_distancia(x1: float, y1: float, x2: float, y2: float) -> float:
-        dx = x2 - x1
-        dy = y2 - y1
-        return math.sqrt(dx * dx + dy * dy)
+        return GeometriaKernel.distancia((x1, y1), (x2, y2))
 
     # =========================================================
     # EXTRAÇÃO DE SEGMENTOS (NÍVEL ENGENHARIA)
@@ -464,21 +471,9 @@ class GeometriaService:
             )
 
         # =========================================================
-        # 🔥 SANEAR COORDENADAS
+        # 🔥 SANEAR COORDENADAS + GARANTIR FECHAMENTO
         # =========================================================
-        coords = [
-            (
-                GeometriaService._safe_float(x),
-                GeometriaService._safe_float(y),
-            )
-            for x, y in coords
-        ]
-
-        # =========================================================
-        # 🔥 GARANTIR FECHAMENTO
-        # =========================================================
-        if coords[0] != coords[-1]:
-            coords.append(coords[0])
+        coords_arr = GeometriaKernel.fechar(GeometriaKernel.sanear(coords))
 
         # =========================================================
         # 🔥 NORMALIZAÇÃO DE ORIENTAÇÃO (CRÍTICO)
@@ -486,48 +481,38 @@ class GeometriaService:
         # =========================================================
         try:
             if not geom.exterior.is_ccw:
-                coords = list(reversed(coords))
+                coords_arr = coords_arr[::-1]
         except Exception:
             pass  # fallback seguro sem quebrar execução
 
-        segmentos: list[dict[str, Any]] = []
-
         # =========================================================
-        # EXTRAÇÃO SEGMENTADA
+        # EXTRAÇÃO VETORIZADA (anel inteiro de uma vez)
         # =========================================================
-        for i in range(len(coords) - 1):
-
-            x1, y1 = coords[i]
-            x2, y2 = coords[i + 1]
-
-            # proteção adicional
-            if (
-                math.isnan(x1) or math.isnan(y1)
-                or math.isnan(x2) or math.isnan(y2)
-                or math.isinf(x1) or math.isinf(y1)
-                or math.isinf(x2) or math.isinf(y2)
-            ):
-                continue
-
-            dx = x2 - x1
-            dy = y2 - y1
+        anel = GeometriaKernel.calcular_anel(coords_arr, sanear=False)
 
-            # =====================================================
-            # 🔥 EVITA SEGMENTOS DEGENERADOS
-            # =====================================================
-            if dx == 0 and dy == 0:
-                continue
+        # 🔥 EVITA SEGMENTOS DEGENERADOS
+        validos = ~anel.degenerados
 
-            distancia = GeometriaService._calcular_distancia(x1, y1, x2, y2)
-            azimute = GeometriaService._calcular_azimute(dx, dy)
+        x1s = anel.coords[:-1, 0][validos].tolist()
+        y1s = anel.coords[:-1, 1][validos].tolist()
+        x2s = anel.coords[1:, 0][validos].tolist()
+        y2s = anel.coords[1:, 1][validos].tolist()
+        distancias = anel.distancias[validos].tolist()
+        azimutes = anel.azimutes[validos].tolist()
 
-            segmentos.append({
-                "indice": len(segmentos) + 1,
+        segmentos: list[dict[str, Any]] = [
+            {
+                "indice": i,
                 "ponto_inicial": {"x": x1, "y": y1},
                 "ponto_final": {"x": x2, "y": y2},
-                "distancia": GeometriaService._safe_float(distancia),
-                "azimute_graus": GeometriaService._safe_float(azimute),
-            })
+                "distancia": distancia,
+                "azimute_graus": azimute,
+            }
+            for i, (x1, y1, x2, y2, distancia, azimute) in enumerate(
+                zip(x1s, y1s, x2s, y2s, distancias, azimutes),
+                start=1,
+            )
+        ]
 
         if not segmentos:
             raise HTTPException(
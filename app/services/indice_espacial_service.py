@@ -0,0 +1,254 @@
+# app/services/indice_espacial_service.py
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import shape
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.geometria import Geometria
+
+
+@dataclass(frozen=True)
+class EntradaIndice:
+    geometria_id: int
+    imovel_id: int
+    epsg_origem: int
+    updated_at: Optional[datetime]
+    geom: Any
+
+
+class IndiceEspacialService:
+    """
+    Índice espacial (STRtree) em memória sobre a geometria atual de cada
+    imóvel (a de maior id); versões anteriores são histórico e ficam de
+    fora, saindo do índice assim que uma versão nova é carregada.
+
+    O índice guarda as geometrias já parseadas e só relê do banco as
+    linhas novas ou alteradas (comparando updated_at). A árvore é
+    reconstruída apenas quando o conjunto muda.
+    """
+
+    CHUNK_CARGA = 500
+
+    _lock = threading.Lock()
+    _entradas: dict[int, EntradaIndice] = {}
+    _assinatura: Optional[tuple] = None
+
+    _arvore: Optional[STRtree] = None
+    _ids_arvore: np.ndarray = np.array([], dtype=np.int64)
+
+    # =========================================================
+    # PARSE
+    # =========================================================
+    @staticmethod
+    def _parse(geojson: str) -> Any:
+        try:
+            geom = shape(json.loads(geojson))
+        except Exception:
+            return None
+
+        if geom.is_empty:
+            return None
+
+        if not geom.is_valid:
+            geom = geom.buffer(0)
+            if geom.is_empty:
+                return None
+
+        return geom
+
+    # =========================================================
+    # VERSÃO ATUAL POR IMÓVEL
+    # =========================================================
+    @staticmethod
+    def _ids_atuais():
+        return (
+            select(func.max(Geometria.id))
+            .group_by(Geometria.imovel_id)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def geometria_atual_id(db: Session, imovel_id: int) -> Optional[int]:
+        return (
+            db.query(func.max(Geometria.id))
+            .filter(Geometria.imovel_id == imovel_id)
+            .scalar()
+        )
+
+    # =========================================================
+    # SINCRONIZAÇÃO COM O BANCO
+    # =========================================================
+    @staticmethod
+    def _assinatura_banco(db: Session) -> tuple:
+        total, max_id, max_updated = db.query(
+            func.count(Geometria.id),
+            func.max(Geometria.id),
+            func.max(Geometria.updated_at),
+        ).one()
+        return (int(total or 0), max_id, max_updated)
+
+    @classmethod
+    def sincronizar(cls, db: Session) -> dict[str, int]:
+        assinatura = cls._assinatura_banco(db)
+
+        with cls._lock:
+            if assinatura == cls._assinatura and cls._arvore is not None:
+                return {"carregadas": 0, "removidas": 0, "total": len(cls._entradas)}
+
+            linhas = (
+                db.query(
+                    Geometria.id,
+                    Geometria.imovel_id,
+                    Geometria.epsg_origem,
+                    Geometria.updated_at,
+                )
+                .filter(Geometria.id.in_(cls._ids_atuais()))
+                .all()
+            )
+
+            vistos: set[int] = set()
+            pendentes: dict[int, tuple] = {}
+
+            for gid, imovel_id, epsg_origem, updated_at in linhas:
+                vistos.add(gid)
+                atual = cls._entradas.get(gid)
+                if atual is None or atual.updated_at != updated_at:
+                    pendentes[gid] = (imovel_id, epsg_origem, updated_at)
+
+            # Inclui as versões substituídas por uma mais nova
+            removidos = [gid for gid in cls._entradas if gid not in vistos]
+            for gid in removidos:
+                cls._entradas.pop(gid, None)
+
+            ids_pendentes = list(pendentes)
+            for i in range(0, len(ids_pendentes), cls.CHUNK_CARGA):
+                chunk = ids_pendentes[i:i + cls.CHUNK_CARGA]
+                rows = (
+                    db.query(Geometria.id, Geometria.geojson)
+                    .filter(Geometria.id.in_(chunk))
+                    .all()
+                )
+                for gid, geojson in rows:
+                    geom = cls._parse(geojson)
+                    if geom is None:
+                        cls._entradas.pop(gid, None)
+                        continue
+
+                    imovel_id, epsg_origem, updated_at = pendentes[gid]
+                    cls._entradas[gid] = EntradaIndice(
+                        geometria_id=gid,
+                        imovel_id=imovel_id,
+                        epsg_origem=int(epsg_origem or 0),
+                        updated_at=updated_at,
+                        geom=geom,
+                    )
+
+            if pendentes or removidos or cls._arvore is None:
+                cls._reconstruir_arvore()
+
+            cls._assinatura = assinatura
+
+            return {
+                "carregadas": len(pendentes),
+                "removidas": len(removidos),
+                "total": len(cls._entradas),
+            }
+
+    @classmethod
+    def _reconstruir_arvore(cls) -> None:
+        entradas = list(cls._entradas.values())
+        cls._ids_arvore = np.array([e.geometria_id for e in entradas], dtype=np.int64)
+        cls._arvore = STRtree([e.geom for e in entradas]) if entradas else None
+
+    @classmethod
+    def invalidar(cls) -> None:
+        with cls._lock:
+            cls._entradas = {}
+            cls._assinatura = None
+            cls._arvore = None
+            cls._ids_arvore = np.array([], dtype=np.int64)
+
+    # =========================================================
+    # CONSULTAS
+    # =========================================================
+    @classmethod
+    def obter(cls, geometria_id: int) -> Optional[EntradaIndice]:
+        return cls._entradas.get(geometria_id)
+
+    @classmethod
+    def carregar(cls, db: Session, geometria_id: int) -> Optional[EntradaIndice]:
+        """
+        Entrada do índice ou, para uma versão histórica (fora do índice),
+        parseada na hora sem entrar nele.
+        """
+        entrada = cls.obter(geometria_id)
+        if entrada is not None:
+            return entrada
+
+        linha = (
+            db.query(
+                Geometria.imovel_id,
+                Geometria.epsg_origem,
+                Geometria.updated_at,
+                Geometria.geojson,
+            )
+            .filter(Geometria.id == geometria_id)
+            .first()
+        )
+        if not linha:
+            return None
+
+        geom = cls._parse(linha.geojson)
+        if geom is None:
+            return None
+
+        return EntradaIndice(
+            geometria_id=geometria_id,
+            imovel_id=linha.imovel_id,
+            epsg_origem=int(linha.epsg_origem or 0),
+            updated_at=linha.updated_at,
+            geom=geom,
+        )
+
+    @classmethod
+    def candidatos_intersectando(cls, geom: Any) -> list[EntradaIndice]:
+        """
+        Filtro por bounding box na árvore + predicado exato (GEOS),
+        ambos vetorizados pelo STRtree.
+        """
+        with cls._lock:
+            arvore = cls._arvore
+            ids = cls._ids_arvore
+            entradas = cls._entradas
+
+        if arvore is None:
+            return []
+
+        indices = arvore.query(geom, predicate="intersects")
+        return [entradas[int(gid)] for gid in ids[indices] if int(gid) in entradas]
+
+    @staticmethod
+    def intersecoes(geom: Any, candidatos: list[EntradaIndice]) -> list[tuple[EntradaIndice, Any]]:
+        if not candidatos:
+            return []
+
+        geoms = np.array([c.geom for c in candidatos], dtype=object)
+        intersecoes = shapely.intersection(geoms, geom)
+        areas = shapely.area(intersecoes)
+
+        return [
+            (candidato, intersecao)
+            for candidato, intersecao, area in zip(candidatos, intersecoes, areas)
+            if area > 0
+        ]
@@ -1,4 +1,18 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterator, Optional
+
+import shapely
+from shapely.geometry import box, mapping
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.geometria import Geometria
+from app.services.geometria_cache_service import GeometriaCacheService
 
 
 def is_mapbox_configured() -> bool:
@@ -13,3 +27,251 @@ def get_mapbox_config():
         "token": settings.MAPBOX_TOKEN,
         "style": settings.MAPBOX_STYLE_URL or "mapbox://styles/mapbox/satellite-v9",
     }
+
+
+# =========================================================
+# FEED DE GEOMETRIAS DO IMÓVEL (FeatureCollection em stream)
+# =========================================================
+MAP_FEED_CHUNK = 200
+MAP_FEED_MAX_LIMIT = 1000
+
+
+def parse_bbox(valor: Optional[str]) -> Optional[tuple[float, float, float, float]]:
+    if not valor:
+        return None
+
+    partes = [p.strip() for p in valor.split(",")]
+    if len(partes) != 4:
+        raise ValueError("bbox deve ter o formato minx,miny,maxx,maxy")
+
+    minx, miny, maxx, maxy = (float(p) for p in partes)
+    if minx > maxx or miny > maxy:
+        raise ValueError("bbox com limites invertidos")
+
+    return minx, miny, maxx, maxy
+
+
+def tolerancia_por_zoom(zoom: Optional[int]) -> float:
+    """
+    Meio pixel (tiles de 256 px) em graus no nível de zoom informado.
+    Abaixo disso a simplificação não é visível no mapa.
+    """
+    if zoom is None:
+        return 0.0
+
+    return (360.0 / (256 * (2 ** max(int(zoom), 0)))) / 2.0
+
+
+def estado_geometrias(db: Session, imovel_id: int) -> tuple[int, Optional[datetime]]:
+    total, ultima = (
+        db.query(func.count(Geometria.id), func.max(Geometria.updated_at))
+        .filter(Geometria.imovel_id == imovel_id)
+        .one()
+    )
+    return int(total or 0), ultima
+
+
+def gerar_etag(
+    imovel_id: int,
+    total: int,
+    ultima: Optional[datetime],
+    parametros: dict,
+) -> str:
+    base = json.dumps(
+        {
+            "imovel_id": imovel_id,
+            "total": total,
+            "ultima": ultima.isoformat() if ultima else None,
+            "parametros": parametros,
+        },
+        sort_keys=True,
+    )
+    return '"' + hashlib.sha256(base.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def formatar_last_modified(ultima: Optional[datetime]) -> Optional[str]:
+    if not ultima:
+        return None
+
+    if ultima.tzinfo is None:
+        ultima = ultima.replace(tzinfo=timezone.utc)
+
+    return format_datetime(ultima.astimezone(timezone.utc), usegmt=True)
+
+
+def nao_modificado(
+    etag: str,
+    ultima: Optional[datetime],
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+) -> bool:
+    # If-None-Match tem precedência sobre If-Modified-Since (RFC 9110)
+    if if_none_match:
+        candidatos = [c.strip() for c in if_none_match.split(",")]
+        return "*" in candidatos or etag in candidatos or f"W/{etag}" in candidatos
+
+    if if_modified_since and ultima:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        if ultima.tzinfo is None:
+            ultima = ultima.replace(tzinfo=timezone.utc)
+
+        # Cabeçalhos HTTP têm resolução de segundos
+        return ultima.replace(microsecond=0) <= desde
+
+    return False
+
+
+def _geometry_json(
+    row,
+    entrada,
+    geojson: Optional[str],
+    filtro_bbox,
+    tolerancia: float,
+) -> Optional[str]:
+    if entrada is None:
+        # Não é um polígono válido: sem bbox/simplificação, segue o texto bruto
+        if filtro_bbox is not None or not geojson:
+            return None
+        try:
+            return json.dumps(json.loads(geojson), ensure_ascii=False)
+        except Exception:
+            # GeoJSON inválido não deve quebrar o mapa inteiro
+            return None
+
+    if filtro_bbox is not None and not filtro_bbox.intersects(box(*entrada.bbox)):
+        return None
+
+    if tolerancia > 0 and entrada.epsg_utm(row.epsg_origem):
+        return json.dumps(
+            mapping(shapely.simplify(entrada.geom, tolerancia, preserve_topology=True))
+        )
+
+    # Texto já validado pelo parse em cache: segue sem novo json.loads
+    return geojson.strip() if geojson else None
+
+
+def _feature(row, geometry_json: str) -> str:
+    properties = {
+        "geometria_id": row.id,
+        "imovel_id": row.imovel_id,
+        "nome": row.nome,
+        "area_hectares": row.area_hectares,
+        "perimetro_m": row.perimetro_m,
+        "epsg_origem": row.epsg_origem,
+        "epsg_utm": row.epsg_utm,
+        "created_at": row.created_at.isoformat(),
+        "updated_at": row.updated_at.isoformat(),
+    }
+
+    return (
+        '{"type": "Feature", "id": ' + json.dumps(row.id)
+        + ', "geometry": ' + geometry_json
+        + ', "properties": ' + json.dumps(properties, ensure_ascii=False)
+        + "}"
+    )
+
+
+def stream_feature_collection(
+    imovel_id: int,
+    bbox: Optional[tuple[float, float, float, float]] = None,
+    zoom: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Iterator[str]:
+    """
+    Gera a FeatureCollection em pedaços, lendo só as colunas usadas.
+
+    Metadados vêm primeiro; o geojson só é lido do banco para o pedaço
+    corrente. Com `limit`, o objeto termina com "next_offset".
+    """
+    filtro_bbox = box(*bbox) if bbox else None
+    tolerancia = tolerancia_por_zoom(zoom)
+
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(
+                Geometria.id,
+                Geometria.imovel_id,
+                Geometria.nome,
+                Geometria.area_hectares,
+                Geometria.perimetro_m,
+                Geometria.epsg_origem,
+                Geometria.epsg_utm,
+                Geometria.created_at,
+                Geometria.updated_at,
+            )
+            .filter(Geometria.imovel_id == imovel_id)
+            .order_by(Geometria.created_at.asc(), Geometria.id.asc())
+        )
+
+        if offset:
+            query = query.offset(offset)
+        if limit:
+            query = query.limit(limit + 1)
+
+        linhas = query.all()
+
+        tem_mais = bool(limit) and len(linhas) > limit
+        if tem_mais:
+            linhas = linhas[:limit]
+
+        yield '{"type": "FeatureCollection", "features": ['
+
+        primeira = True
+        for i in range(0, len(linhas), MAP_FEED_CHUNK):
+            chunk = linhas[i:i + MAP_FEED_CHUNK]
+
+            entradas = {
+                row.id: GeometriaCacheService.obter(row.id, row.updated_at)
+                for row in chunk
+            }
+
+            # Simplificado a partir do cache dispensa o texto
+            precisam_texto = [
+                row.id
+                for row in chunk
+                if entradas[row.id] is None
+                or tolerancia <= 0
+                or not entradas[row.id].epsg_utm(row.epsg_origem)
+            ]
+
+            textos = (
+                dict(
+                    db.query(Geometria.id, Geometria.geojson)
+                    .filter(Geometria.id.in_(precisam_texto))
+                    .all()
+                )
+                if precisam_texto
+                else {}
+            )
+
+            for row in chunk:
+                geojson = textos.get(row.id)
+                entrada = entradas[row.id]
+
+                if entrada is None and geojson:
+                    try:
+                        entrada = GeometriaCacheService.obter(row.id, row.updated_at, geojson)
+                    except Exception:
+                        entrada = None
+
+                geometry_json = _geometry_json(row, entrada, geojson, filtro_bbox, tolerancia)
+                if geometry_json is None:
+                    continue
+
+                feature = _feature(row, geometry_json)
+                yield feature if primeira else ", " + feature
+                primeira = False
+
+        if limit:
+            proximo = offset + len(linhas) if tem_mais else None
+            yield '], "next_offset": ' + json.dumps(proximo) + "}"
+        else:
+            yield "]}"
+    finally:
+        db.close()
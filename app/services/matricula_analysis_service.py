@@ -1,8 +1,47 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+from app.services.texto_canonico import TextoCanonico
+
+
+@dataclass(frozen=True)
+class AtoMatricula:
+    """
+    Ato (R-x / AV-x) localizado no texto normalizado da matrícula.
+    O ato vai do seu marcador até o marcador seguinte.
+    """
+
+    tipo: str                       # "R" | "AV"
+    numero: str
+    inicio: int
+    fim: int
+    classificacao: Optional[str]
+    onus: tuple[str, ...]
+    riscos: tuple[str, ...]
+
+    @property
+    def codigo(self) -> str:
+        return f"{self.tipo}-{self.numero}"
+
+
+@dataclass(frozen=True)
+class VarreduraMatricula:
+    """Tudo o que a análise extrai apenas do texto (cacheado por hash)."""
+
+    hash_conteudo: str
+    atos: tuple[AtoMatricula, ...]
+    averbacoes: tuple[str, ...]
+    registros: tuple[str, ...]
+    onus: tuple[str, ...]
+    riscos: tuple[str, ...]
+    proprietarios: tuple[Dict[str, Any], ...]
+
 
 class MatriculaAnalysisService:
     """
@@ -21,8 +60,14 @@ class MatriculaAnalysisService:
     REGEX_CNPJ = r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}"
 
     REGEX_MATRICULA = r"\bmatr[íi]cula\s*n?[ºo]?\s*\d+"
-    REGEX_AVERBACAO = r"\bav[-/\s]?\d+\b"
-    REGEX_REGISTRO = r"\br[-/\s]?\d+\b"
+
+    # Marcador de ato no texto normalizado (minúsculo): r-1, av 2, av/3
+    REGEX_ATO = r"\b(r|av)[-/\s]?(\d+)\b"
+
+    _RE_CPF = re.compile(REGEX_CPF)
+    _RE_CNPJ = re.compile(REGEX_CNPJ)
+    _RE_ATO = re.compile(REGEX_ATO)
+    _RE_CODIGO_SEM_HIFEN = re.compile(r"^(R|AV)(\d+)$")
 
     PALAVRAS_ONUS = [
         "hipoteca",
@@ -116,6 +161,25 @@ class MatriculaAnalysisService:
         ],
     }
 
+    # Todas as palavras procuradas na varredura (ônus, riscos e tipos de ato)
+    PALAVRAS_VARREDURA = tuple(
+        dict.fromkeys(
+            PALAVRAS_ONUS
+            + PALAVRAS_RISCO
+            + [p for palavras in TIPOS_ATO_KEYWORDS.values() for p in palavras]
+        )
+    )
+
+    # =========================================================
+    # CACHE DE VARREDURAS (por hash do texto normalizado)
+    # =========================================================
+    MAX_CACHE_VARREDURAS = 256
+
+    _lock = threading.Lock()
+    _varreduras: OrderedDict[str, VarreduraMatricula] = OrderedDict()
+    _hits = 0
+    _misses = 0
+
     # =========================================================
     # ENTRYPOINT
     # =========================================================
@@ -130,12 +194,15 @@ class MatriculaAnalysisService:
 
         texto_normalizado = MatriculaAnalysisService._normalizar_texto(texto)
 
+        # =========================================================
+        # VARREDURA ÚNICA DO TEXTO (cacheada por hash)
+        # =========================================================
+        varredura = MatriculaAnalysisService.varrer(texto_normalizado)
+
         # =========================================================
         # EXTRAÇÕES BASE
         # =========================================================
-        proprietarios_texto = MatriculaAnalysisService._extrair_proprietarios(
-            texto_normalizado
-        )
+        proprietarios_texto = [dict(p) for p in varredura.proprietarios]
 
         proprietarios_ocr = MatriculaAnalysisService._extrair_proprietarios_ocr(
             dados_ocr
@@ -146,17 +213,17 @@ class MatriculaAnalysisService:
             proprietarios_ocr,
         )
 
-        averbacoes = MatriculaAnalysisService._extrair_averbacoes(texto_normalizado)
-        registros = MatriculaAnalysisService._extrair_registros(texto_normalizado)
-        onus = MatriculaAnalysisService._extrair_onus(texto_normalizado)
-        riscos = MatriculaAnalysisService._extrair_riscos(texto_normalizado)
+        averbacoes = list(varredura.averbacoes)
+        registros = list(varredura.registros)
+        onus = list(varredura.onus)
+        riscos = list(varredura.riscos)
 
         # =========================================================
         # HISTÓRICO OCR + FALLBACK TEXTO
         # =========================================================
         historico = MatriculaAnalysisService._extrair_historico_ocr(
             dados_ocr=dados_ocr,
-            texto=texto_normalizado,
+            atos=varredura.atos,
         )
 
         # =========================================================
@@ -195,6 +262,7 @@ class MatriculaAnalysisService:
             "cadeia_registral": cadeia,
             "classificacao": classificacao,
             "score_juridico": score,
+            "hash_conteudo": varredura.hash_conteudo,
         }
 
     # =========================================================
@@ -202,17 +270,14 @@ class MatriculaAnalysisService:
     # =========================================================
     @staticmethod
     def _normalizar_texto(texto: str) -> str:
-        texto = texto.lower()
-        texto = re.sub(r"\s+", " ", texto)
-        return texto.strip()
+        return TextoCanonico.espacos(texto.lower())
 
     @staticmethod
     def _safe_text(valor: Any) -> Optional[str]:
         if valor is None:
             return None
 
-        texto = " ".join(str(valor).strip().split())
-        return texto or None
+        return TextoCanonico.espacos(str(valor)) or None
 
     @staticmethod
     def _normalizar_codigo_ato(valor: Any) -> Optional[str]:
@@ -223,8 +288,8 @@ class MatriculaAnalysisService:
 
         texto = texto.upper()
         texto = texto.replace("/", "-")
-        texto = re.sub(r"\s+", "", texto)
-        texto = re.sub(r"^(R|AV)(\d+)$", r"\1-\2", texto)
+        texto = "".join(texto.split())
+        texto = MatriculaAnalysisService._RE_CODIGO_SEM_HIFEN.sub(r"\1-\2", texto)
 
         return texto
 
@@ -257,12 +322,12 @@ class MatriculaAnalysisService:
         texto = MatriculaAnalysisService._safe_text(valor)
 
         if texto:
-            numeros = re.sub(r"\D", "", texto)
+            numeros = TextoCanonico.somente_digitos(texto)
             if numeros:
                 return numeros
 
         if codigo:
-            numeros = re.sub(r"\D", "", codigo)
+            numeros = TextoCanonico.somente_digitos(codigo)
             if numeros:
                 return numeros
 
@@ -300,8 +365,8 @@ class MatriculaAnalysisService:
             if not nome:
                 continue
 
-            cpf = re.search(MatriculaAnalysisService.REGEX_CPF, linha)
-            cnpj = re.search(MatriculaAnalysisService.REGEX_CNPJ, linha)
+            cpf = MatriculaAnalysisService._RE_CPF.search(linha)
+            cnpj = MatriculaAnalysisService._RE_CNPJ.search(linha)
 
             proprietarios.append(
                 {
@@ -341,7 +406,7 @@ class MatriculaAnalysisService:
             if not nome:
                 continue
 
-            somente_digitos = re.sub(r"\D", "", str(cpf_cnpj or ""))
+            somente_digitos = TextoCanonico.somente_digitos(cpf_cnpj)
 
             cpf = cpf_cnpj if len(somente_digitos) == 11 else None
             cnpj = cpf_cnpj if len(somente_digitos) == 14 else None
@@ -383,7 +448,7 @@ class MatriculaAnalysisService:
 
             chave = (
                 nome.upper(),
-                re.sub(r"\D", "", str(cpf_cnpj or "")),
+                TextoCanonico.somente_digitos(cpf_cnpj),
             )
 
             if chave in vistos:
@@ -395,95 +460,116 @@ class MatriculaAnalysisService:
         return resultado
 
     # =========================================================
-    # AVERBAÇÕES
+    # VARREDURA DE ATOS
     # =========================================================
     @staticmethod
-    def _extrair_averbacoes(texto: str) -> List[str]:
-        encontrados = re.findall(MatriculaAnalysisService.REGEX_AVERBACAO, texto)
-
-        vistos = set()
-        resultado: List[str] = []
-
-        for item in encontrados:
-            codigo = MatriculaAnalysisService._normalizar_codigo_ato(item)
-
-            if not codigo:
-                continue
+    def hash_conteudo(texto_normalizado: str) -> str:
+        return hashlib.sha256(texto_normalizado.encode("utf-8")).hexdigest()
 
-            if codigo not in vistos:
-                vistos.add(codigo)
-                resultado.append(codigo)
-
-        return resultado
-
-    # =========================================================
-    # REGISTROS
-    # =========================================================
     @staticmethod
-    def _extrair_registros(texto: str) -> List[str]:
-        encontrados = re.findall(MatriculaAnalysisService.REGEX_REGISTRO, texto)
-
-        vistos = set()
-        resultado: List[str] = []
+    def varrer(texto_normalizado: str) -> VarreduraMatricula:
+        """
+        Divide a matrícula em atos e classifica cada um (tipo jurídico,
+        ônus, riscos). Resultado cacheado pelo hash do texto.
+        """
+        chave = MatriculaAnalysisService.hash_conteudo(texto_normalizado)
+        cls = MatriculaAnalysisService
+
+        with cls._lock:
+            varredura = cls._varreduras.get(chave)
+            if varredura is not None:
+                cls._varreduras.move_to_end(chave)
+                cls._hits += 1
+                return varredura
+            cls._misses += 1
+
+        varredura = cls._varrer(texto_normalizado, chave)
+
+        with cls._lock:
+            cls._varreduras[chave] = varredura
+            while len(cls._varreduras) > cls.MAX_CACHE_VARREDURAS:
+                cls._varreduras.popitem(last=False)
+
+        return varredura
 
-        for item in encontrados:
-            codigo = MatriculaAnalysisService._normalizar_codigo_ato(item)
-
-            if not codigo:
-                continue
-
-            if codigo not in vistos:
-                vistos.add(codigo)
-                resultado.append(codigo)
-
-        return resultado
-
-    # =========================================================
-    # ÔNUS
-    # =========================================================
     @staticmethod
-    def _extrair_onus(texto: str) -> List[str]:
-        encontrados: List[str] = []
-
-        for palavra in MatriculaAnalysisService.PALAVRAS_ONUS:
-            if palavra in texto:
-                encontrados.append(palavra)
+    def _varrer(texto: str, chave: str) -> VarreduraMatricula:
+        marcadores = list(MatriculaAnalysisService._RE_ATO.finditer(texto))
+        inicios = [m.start() for m in marcadores]
 
-        return MatriculaAnalysisService._deduplicar_lista(encontrados)
+        # =========================================================
+        # PALAVRAS-CHAVE
+        # Primeiro no texto inteiro (str.find, em C); dentro de cada ato
+        # só se procuram as palavras que de fato ocorrem na matrícula.
+        # =========================================================
+        encontradas = [
+            palavra
+            for palavra in MatriculaAnalysisService.PALAVRAS_VARREDURA
+            if palavra in texto
+        ]
+
+        tipos = list(MatriculaAnalysisService.TIPOS_ATO_KEYWORDS)
+        ordem_tipo: Dict[str, int] = {}
+        for ordem, chaves in enumerate(MatriculaAnalysisService.TIPOS_ATO_KEYWORDS.values()):
+            for palavra in chaves:
+                ordem_tipo.setdefault(palavra, ordem)
+
+        atos: List[AtoMatricula] = []
+        averbacoes: Dict[str, None] = {}
+        registros: Dict[str, None] = {}
+
+        for indice, marcador in enumerate(marcadores):
+            tipo = marcador.group(1).upper()
+            numero = marcador.group(2)
+            fim = inicios[indice + 1] if indice + 1 < len(inicios) else len(texto)
+
+            trecho = texto[marcador.start():fim]
+            palavras = {p for p in encontradas if p in trecho}
+
+            # Primeiro tipo (na ordem de TIPOS_ATO_KEYWORDS) com palavra no ato
+            ordens = [ordem_tipo[p] for p in palavras if p in ordem_tipo]
+            classificacao = tipos[min(ordens)] if ordens else None
+
+            ato = AtoMatricula(
+                tipo=tipo,
+                numero=numero,
+                inicio=marcador.start(),
+                fim=fim,
+                classificacao=classificacao,
+                onus=tuple(p for p in MatriculaAnalysisService.PALAVRAS_ONUS if p in palavras),
+                riscos=tuple(p for p in MatriculaAnalysisService.PALAVRAS_RISCO if p in palavras),
+            )
+            atos.append(ato)
+
+            (registros if tipo == "R" else averbacoes).setdefault(ato.codigo, None)
+
+        return VarreduraMatricula(
+            hash_conteudo=chave,
+            atos=tuple(atos),
+            averbacoes=tuple(averbacoes),
+            registros=tuple(registros),
+            onus=tuple(p for p in MatriculaAnalysisService.PALAVRAS_ONUS if p in encontradas),
+            riscos=tuple(p for p in MatriculaAnalysisService.PALAVRAS_RISCO if p in encontradas),
+            proprietarios=tuple(MatriculaAnalysisService._extrair_proprietarios(texto)),
+        )
 
-    # =========================================================
-    # RISCOS
-    # =========================================================
     @staticmethod
-    def _extrair_riscos(texto: str) -> List[str]:
-        encontrados: List[str] = []
-
-        for palavra in MatriculaAnalysisService.PALAVRAS_RISCO:
-            if palavra in texto:
-                encontrados.append(palavra)
-
-        return MatriculaAnalysisService._deduplicar_lista(encontrados)
+    def estatisticas() -> Dict[str, int]:
+        cls = MatriculaAnalysisService
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "entradas": len(cls._varreduras),
+            }
 
     @staticmethod
-    def _deduplicar_lista(valores: List[str]) -> List[str]:
-        vistos = set()
-        resultado: List[str] = []
-
-        for valor in valores:
-            texto = MatriculaAnalysisService._safe_text(valor)
-
-            if not texto:
-                continue
-
-            chave = texto.lower()
-
-            if chave in vistos:
-                continue
-
-            vistos.add(chave)
-            resultado.append(texto)
-
-        return resultado
+    def limpar() -> None:
+        cls = MatriculaAnalysisService
+        with cls._lock:
+            cls._varreduras.clear()
+            cls._hits = 0
+            cls._misses = 0
 
     # =========================================================
     # HISTÓRICO REGISTRAL
@@ -491,7 +577,7 @@ class MatriculaAnalysisService:
     @staticmethod
     def _extrair_historico_ocr(
         dados_ocr: Optional[Dict[str, Any]] = None,
-        texto: Optional[str] = None,
+        atos: Optional[tuple[AtoMatricula, ...]] = None,
     ) -> List[Dict[str, Any]]:
 
         historico_final: List[Dict[str, Any]] = []
@@ -560,36 +646,29 @@ class MatriculaAnalysisService:
                     )
 
         # =========================================================
-        # 2. FALLBACK — TEXTO DA MATRÍCULA
+        # 2. FALLBACK — ATOS ENCONTRADOS NO TEXTO DA MATRÍCULA
         # =========================================================
-        if texto and isinstance(texto, str):
-            encontrados = re.findall(
-                r"\b(R|AV)[-/\s]?(\d+)\b",
-                texto,
-                flags=re.IGNORECASE,
+        for ato in atos or ():
+            historico_final.append(
+                {
+                    "tipo": ato.tipo,
+                    "numero": ato.numero,
+                    "codigo": ato.codigo,
+                    "descricao": None,
+                    "data": None,
+                    "protocolo": None,
+                    "valor": None,
+                    "envolvidos": [],
+                    "texto_original": None,
+                    "classificacao_ato": ato.classificacao,
+                    "onus": list(ato.onus),
+                    "riscos": list(ato.riscos),
+                    "offset_inicio": ato.inicio,
+                    "offset_fim": ato.fim,
+                    "origem": "texto",
+                }
             )
 
-            for tipo_raw, numero_raw in encontrados:
-                tipo = tipo_raw.upper()
-                numero = str(numero_raw)
-                codigo = f"{tipo}-{numero}"
-
-                historico_final.append(
-                    {
-                        "tipo": tipo,
-                        "numero": numero,
-                        "codigo": codigo,
-                        "descricao": None,
-                        "data": None,
-                        "protocolo": None,
-                        "valor": None,
-                        "envolvidos": [],
-                        "texto_original": None,
-                        "classificacao_ato": None,
-                        "origem": "texto",
-                    }
-                )
-
         return MatriculaAnalysisService._deduplicar_historico(historico_final)
 
     @staticmethod
@@ -680,7 +759,7 @@ class MatriculaAnalysisService:
             tipo = str(ato.get("tipo") or "").upper()
             numero = ato.get("numero")
 
-            numero_str = re.sub(r"\D", "", str(numero or ""))
+            numero_str = TextoCanonico.somente_digitos(numero)
 
             if not numero_str:
                 continue
@@ -18,6 +18,7 @@ from app.services.memorial_parser_service import MemorialParserService
 from app.services.memorial_service import MemorialService
 from app.services.geometria_service import GeometriaService
 from app.services.geometria_persistencia_service import GeometriaPersistenciaService
+from app.services.texto_canonico import TextoCanonico
 
 
 class MatriculaOcrProcessorService:
@@ -36,19 +37,16 @@ class MatriculaOcrProcessorService:
     def _normalizar_nome(valor: Any) -> str | None:
         if not valor:
             return None
-        return " ".join(str(valor).strip().split())
+        return TextoCanonico.espacos(str(valor))
 
     @staticmethod
     def _normalizar_cpf_cnpj(valor: Any) -> str | None:
         if not valor:
             return None
 
-        texto = re.sub(r"\D", "", str(valor))
-
-        if len(texto) == 11:
-            return f"{texto[:3]}.{texto[3:6]}.{texto[6:9]}-{texto[9:]}"
-        if len(texto) == 14:
-            return f"{texto[:2]}.{texto[2:5]}.{texto[5:8]}/{texto[8:12]}-{texto[12:]}"
+        formatado = TextoCanonico.formatar_cpf_cnpj(valor)
+        if formatado:
+            return formatado
 
         valor_str = str(valor).strip()
         return valor_str or None
@@ -63,7 +61,7 @@ class MatriculaOcrProcessorService:
         if texto in {"JURIDICA", "JURÍDICA", "PJ"}:
             return "JURIDICA"
 
-        numeros = re.sub(r"\D", "", str(cpf_cnpj or ""))
+        numeros = TextoCanonico.somente_digitos(cpf_cnpj)
 
         if len(numeros) == 14:
             return "JURIDICA"
@@ -192,7 +190,7 @@ class MatriculaOcrProcessorService:
 
             chave = (
                 nome.upper(),
-                re.sub(r"\D", "", str(cpf_cnpj or "")),
+                TextoCanonico.somente_digitos(cpf_cnpj),
                 tipo,
             )
 
@@ -262,7 +260,7 @@ class MatriculaOcrProcessorService:
             return
 
         def _somente_digitos(v: Any) -> str:
-            return re.sub(r"\D", "", str(v or ""))
+            return TextoCanonico.somente_digitos(v)
 
         for p in proprietarios:
             nome = MatriculaOcrProcessorService._normalizar_nome(p.get("nome"))
@@ -531,11 +529,17 @@ class MatriculaOcrProcessorService:
                     )
 
                     try:
-                        GeometriaPersistenciaService.persistir_estrutura(
+                        persistencia = GeometriaPersistenciaService.persistir_estrutura(
                             db=db,
                             geometria_id=geometria.id,
                             geojson=geojson,
                         )
+                        if persistencia:
+                            print(
+                                f"[INFO] Estrutura da geometria {geometria.id}: "
+                                f"{persistencia['linhas_escritas']} linhas em "
+                                f"{persistencia['tempo_ms']} ms"
+                            )
                     except Exception as e:
                         print(f"[ERRO] Persistência de geometria falhou: {str(e)}")
 
@@ -593,9 +597,7 @@ class MatriculaOcrProcessorService:
         def _limpar_texto(valor: Any) -> str | None:
             if not valor:
                 return None
-            texto = str(valor).strip()
-            texto = " ".join(texto.split())
-            return texto or None
+            return TextoCanonico.espacos(str(valor)) or None
 
         def _normalizar_matricula(valor: Any) -> str | None:
             if not valor:
@@ -869,21 +871,13 @@ class MatriculaOcrProcessorService:
             return texto or None
 
         def _somente_digitos(v: Any) -> str:
-            return re.sub(r"\D", "", str(v or ""))
+            return TextoCanonico.somente_digitos(v)
 
         def _normalizar_cpf_cnpj(v: Any) -> Optional[str]:
             if not v:
                 return None
 
-            numeros = _somente_digitos(v)
-
-            if len(numeros) == 11:
-                return f"{numeros[:3]}.{numeros[3:6]}.{numeros[6:9]}-{numeros[9:]}"
-            if len(numeros) == 14:
-                return f"{numeros[:2]}.{numeros[2:5]}.{numeros[5:8]}/{numeros[8:12]}-{numeros[12:]}"
-
-            texto = _safe(v)
-            return texto
+            return TextoCanonico.formatar_cpf_cnpj(v) or _safe(v)
 
         def _normalizar_tipo_pessoa(valor: Any, cpf_cnpj: Any = None) -> str:
             texto = str(valor or "").strip().upper()
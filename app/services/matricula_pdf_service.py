@@ -3,7 +3,6 @@ from __future__ import annotations
 import os
 from datetime import datetime
 from typing import Any, List, Optional
-import cairosvg
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -23,44 +22,80 @@ class MatriculaPdfService:
     # =========================================================
     @staticmethod
     def _gerar_croqui_png(imovel_id: int, dados: dict) -> Optional[str]:
+        """
+        PNG do croqui vindo do repositório de croquis: só rasteriza quando
+        geometria ou confrontantes mudaram.
+        """
         try:
             geojson = dados.get("geojson")
             if not geojson:
                 return None
 
-            from app.services.croqui_service import CroquiService
+            from app.services.croqui_artefato_service import CroquiArtefatoService
 
-            svg = CroquiService.gerar_svg(
-                geojson=geojson,
+            return CroquiArtefatoService.obter(
+                geojson,
                 confrontantes=dados.get("confrontantes") or [],
+                formato="png",
             )
 
-            pasta = f"{MatriculaPdfService.BASE_UPLOAD_DIR}/{imovel_id}/croqui"
-            os.makedirs(pasta, exist_ok=True)
+        except Exception as e:
+            return None
 
-            caminho_png = f"{pasta}/croqui.png"
+    @staticmethod
+    def _destino(imovel_id: int) -> str:
+        pasta = f"{MatriculaPdfService.BASE_UPLOAD_DIR}/{imovel_id}/matricula"
+        os.makedirs(pasta, exist_ok=True)
 
-            cairosvg.svg2png(
-                bytestring=svg.encode("utf-8"),
-                write_to=caminho_png,
-            )
+        timestamp = int(datetime.utcnow().timestamp())
+        return f"{pasta}/matricula_{timestamp}.pdf"
 
-            return caminho_png
+    @staticmethod
+    def _resultado(caminho: str) -> dict:
+        caminho_relativo = caminho.replace("app/", "") if "app/" in caminho else caminho
+        url = f"{MatriculaPdfService.BASE_URL}/{caminho_relativo}"
 
-        except Exception as e:
-            return None
+        return {
+            "arquivo_path": caminho,
+            "arquivo_url": url,
+        }
 
     @staticmethod
-    def gerar_pdf(imovel_id: int, dados: dict) -> dict:
+    def gerar_pdf_em_pool(imovel_id: int, dados: dict) -> dict:
+        """
+        Mesmo resultado de gerar_pdf, renderizado num worker do
+        PdfRenderService. O instante de geração vai impresso no PDF: ele é
+        fixado aqui, na requisição, e o tipo não passa pelo cache.
+        """
         if not isinstance(dados, dict):
             raise Exception("Dados inválidos para geração do PDF da matrícula.")
 
-        pasta = f"{MatriculaPdfService.BASE_UPLOAD_DIR}/{imovel_id}/matricula"
-        os.makedirs(pasta, exist_ok=True)
+        from app.services.pdf_render_service import PdfRenderService
 
-        timestamp = int(datetime.utcnow().timestamp())
-        nome = f"matricula_{timestamp}.pdf"
-        caminho = f"{pasta}/{nome}"
+        caminho = PdfRenderService.renderizar(
+            "matricula",
+            {
+                "imovel_id": imovel_id,
+                "dados": dados,
+                "gerado_em": datetime.utcnow().isoformat(),
+            },
+            MatriculaPdfService._destino(imovel_id),
+        )
+
+        return MatriculaPdfService._resultado(caminho)
+
+    @staticmethod
+    def gerar_pdf(
+        imovel_id: int,
+        dados: dict,
+        caminho: Optional[str] = None,
+        gerado_em: Optional[datetime] = None,
+    ) -> dict:
+        if not isinstance(dados, dict):
+            raise Exception("Dados inválidos para geração do PDF da matrícula.")
+
+        caminho = caminho or MatriculaPdfService._destino(imovel_id)
+        gerado_em = gerado_em or datetime.utcnow()
 
         c = canvas.Canvas(caminho, pagesize=A4)
         largura, altura = A4
@@ -226,7 +261,7 @@ class MatriculaPdfService:
             c.drawRightString(
                 margem_esquerda + largura_util - 6 * mm,
                 y - 18.2 * mm,
-                datetime.utcnow().strftime("Gerado em %d/%m/%Y às %H:%M:%S UTC"),
+                gerado_em.strftime("Gerado em %d/%m/%Y às %H:%M:%S UTC"),
             )
 
             y -= altura_header + 6 * mm
@@ -472,7 +507,7 @@ class MatriculaPdfService:
             )
 
             texto_esquerda = "GeoINCRA • Matrícula técnica gerada automaticamente pelo pipeline OCR + IA."
-            texto_direita = datetime.utcnow().strftime("%d/%m/%Y %H:%M:%S UTC")
+            texto_direita = gerado_em.strftime("%d/%m/%Y %H:%M:%S UTC")
 
             c.setFont("Helvetica", 7.5)
             c.setFillColor(colors.HexColor("#475569"))
@@ -1122,10 +1157,4 @@ class MatriculaPdfService:
         # =========================================================
         # URL FINAL
         # =========================================================
-        caminho_relativo = caminho.replace("app/", "") if "app/" in caminho else caminho
-        url = f"{MatriculaPdfService.BASE_URL}/{caminho_relativo}"
-
-        return {
-            "arquivo_path": caminho,
-            "arquivo_url": url,
-        }
\ No newline at end of file
+        return MatriculaPdfService._resultado(caminho)
\ No newline at end of file
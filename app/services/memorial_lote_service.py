@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Iterable, Iterator, Optional
+
+from app.core.config import settings
+from app.services.memorial_parser_service import MemorialParserService
+
+
+class MemorialLoteService:
+    """
+    Parse e fechamento de vários memoriais descritivos em paralelo.
+
+    O trabalho (regex + trigonometria) é CPU-bound, então os itens são
+    distribuídos num pool de processos reaproveitado entre requisições.
+    Lotes pequenos rodam na própria thread, sem custo de IPC.
+    """
+
+    # Abaixo disso o lote roda inline
+    LIMIAR_POOL = 4
+
+    # Acima disso o erro de fechamento vira aviso
+    AVISO_FECHAMENTO_METROS = 0.01
+
+    _lock = threading.Lock()
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    # =========================================================
+    # POOL
+    # =========================================================
+    @staticmethod
+    def _max_workers() -> int:
+        configurado = int(settings.MEMORIAL_LOTE_MAX_WORKERS or 0)
+        return configurado if configurado > 0 else (os.cpu_count() or 1)
+
+    @classmethod
+    def _executor(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._pool is None:
+                # spawn: não herda threads/conexões do processo do uvicorn
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=cls._max_workers(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return cls._pool
+
+    @classmethod
+    def encerrar(cls) -> None:
+        with cls._lock:
+            pool, cls._pool = cls._pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # =========================================================
+    # ITEM
+    # =========================================================
+    @staticmethod
+    def processar_item(
+        indice: int,
+        item_id: Optional[str],
+        texto: str,
+        incluir_segmentos: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Executado no processo do pool: nunca levanta exceção, o erro
+        volta no próprio item.
+        """
+        t0 = time.perf_counter()
+
+        resultado: dict[str, Any] = {
+            "indice": indice,
+            "id": item_id,
+            "ok": False,
+            "geojson": None,
+            "erro_fechamento_m": None,
+            "warnings": [],
+            "erro": None,
+        }
+
+        try:
+            gerado = MemorialParserService.gerar_geometria(texto)
+        except Exception as exc:
+            resultado["erro"] = str(exc)
+            resultado["tempo_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            return resultado
+
+        controle = gerado.get("controle") or {}
+        segmentos = gerado.get("segmentos") or []
+
+        erro_fechamento = float(controle.get("erro_fechamento_bruto_m") or 0.0)
+
+        warnings: list[str] = []
+
+        if erro_fechamento > MemorialLoteService.AVISO_FECHAMENTO_METROS:
+            warnings.append(
+                f"Erro de fechamento de {erro_fechamento:.3f} m distribuído entre os vértices"
+            )
+
+        sem_rotulo = sum(
+            1 for s in segmentos
+            if not s.get("vertice_inicial") or not s.get("vertice_final")
+        )
+        if sem_rotulo:
+            warnings.append(f"{sem_rotulo} segmento(s) sem rótulo de vértice")
+
+        resultado.update({
+            "ok": True,
+            "geojson": gerado.get("geojson"),
+            "erro_fechamento_m": erro_fechamento,
+            "area_m2": controle.get("area_m2"),
+            "perimetro_m": controle.get("perimetro_m"),
+            "total_segmentos": controle.get("total_segmentos"),
+            "warnings": warnings,
+        })
+
+        if incluir_segmentos:
+            resultado["segmentos"] = segmentos
+
+        resultado["tempo_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return resultado
+
+    # =========================================================
+    # LOTE
+    # =========================================================
+    @staticmethod
+    def _inline(
+        itens: Iterable[tuple[int, Optional[str], str]],
+        incluir_segmentos: bool,
+    ) -> Iterator[dict[str, Any]]:
+        for indice, item_id, texto in itens:
+            yield MemorialLoteService.processar_item(indice, item_id, texto, incluir_segmentos)
+
+    @classmethod
+    def processar(
+        cls,
+        itens: list[tuple[Optional[str], str]],
+        incluir_segmentos: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Gera um resultado por item, na ordem em que ficam prontos
+        (use "indice" para casar com a entrada).
+        """
+        limite = int(settings.MEMORIAL_LOTE_MAX_ITENS)
+        if len(itens) > limite:
+            raise ValueError(f"Lote excede o limite de {limite} memoriais")
+
+        numerados = [
+            (indice, item_id, texto)
+            for indice, (item_id, texto) in enumerate(itens)
+        ]
+
+        if len(numerados) < cls.LIMIAR_POOL or cls._max_workers() <= 1:
+            yield from cls._inline(numerados, incluir_segmentos)
+            return
+
+        pendentes: dict[Future, int] = {}
+        concluidos: set[int] = set()
+
+        try:
+            executor = cls._executor()
+            for item in numerados:
+                futuro = executor.submit(cls.processar_item, *item, incluir_segmentos)
+                pendentes[futuro] = item[0]
+
+            for futuro in as_completed(list(pendentes)):
+                resultado = futuro.result()
+                concluidos.add(pendentes.pop(futuro))
+                yield resultado
+
+        except BrokenProcessPool:
+            print("⚠️ Pool de memoriais interrompido; concluindo o lote na thread atual")
+            cls.encerrar()
+
+            pendentes.clear()
+            yield from cls._inline(
+                [item for item in numerados if item[0] not in concluidos],
+                incluir_segmentos,
+            )
+
+        finally:
+            # Cliente desconectou no meio do stream
+            for futuro in pendentes:
+                futuro.cancel()
@@ -3,39 +3,104 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
 from math import cos, radians, sin, sqrt
-from typing import Any
+from typing import Any, Optional
 
 from shapely.geometry import Polygon
 
 
+# =========================================================
+# GRAMÁTICA DO MEMORIAL (compilada uma única vez)
+# =========================================================
+# Todas as substituições são 1:1, então os offsets dos tokens valem
+# também para o texto original.
+_TRADUCAO_TEXTO = str.maketrans({
+    "–": "-",
+    "—": "-",
+    "−": "-",
+    "“": '"',
+    "”": '"',
+    "´": "'",
+    "`": "'",
+    "’": "'",
+    "″": '"',
+    "′": "'",
+    "º": "°",
+    "˚": "°",
+})
+
+# 1.234,56 | 1234,56 | 1234.56 | 1234
+_NUMERO = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?"
+
+_UNIDADE_METROS = r"(?:metros?|mts?|m)\b"
+
+
+def _dms(prefixo: str) -> str:
+    return (
+        rf"(?P<{prefixo}_g>\d{{1,3}})\s*°\s*"
+        rf"(?:(?P<{prefixo}_m>\d{{1,2}})\s*'?\s*"
+        rf"(?:(?P<{prefixo}_s>\d{{1,2}}(?:[.,]\d+)?)\s*\"?)?)?"
+    )
+
+
+_GRAMATICA = re.compile(
+    # Vértice/marco, opcionalmente como destino ("ao vértice P2", "até o marco M-03")
+    r"(?P<vertice>(?P<destino>\b(?:ao|at[eé])\s+(?:o\s+|ao\s+)?)?"
+    r"\b(?:v[eé]rtice|marco)\s*(?P<rotulo>[A-Z0-9.\-_/]*\d[A-Z0-9.\-_/]*))"
+    # Destino sem a palavra vértice ("até P2")
+    r"|(?P<vertice_solto>\b(?:ao|at[eé])\s+(?P<rotulo_solto>[A-Z]+[.\-_]?\d[A-Z0-9.\-_/]*))"
+    # Rumo quadrantal: N 45°30'20" E
+    r"|(?P<rumo>\b(?P<r_ns>[NS])\s*" + _dms("r") + r"\s*(?P<r_ew>[EW])\b)"
+    # Azimute em DMS ou decimal
+    r"|(?P<azimute>\bazimutes?\s*(?:de\s+)?(?:" + _dms("a") + r"|(?P<a_dec>\d{1,3}(?:[.,]\d+)?)\s*°?))"
+    # Distância com palavra-chave
+    r"|(?P<distancia>\bdist[aâ]ncia\s*(?:de\s+)?(?P<d_valor>" + _NUMERO + r")(?:\s*" + _UNIDADE_METROS + r")?)"
+    # Distância solta, só com a unidade ("100,00 m")
+    r"|(?P<metros>(?<![\d.,])(?P<m_valor>" + _NUMERO + r")\s*" + _UNIDADE_METROS + r")",
+    re.IGNORECASE,
+)
+
+_RE_RUMO = re.compile(r"(?P<r_ns>[NS])\s*" + _dms("r") + r"\s*(?P<r_ew>[EW])")
+_RE_AZIMUTE_DMS = re.compile(_dms("a"))
+_RE_NAO_NUMERICO = re.compile(r"[^\d.\-]")
+_RE_NAO_NUMERICO_DISTANCIA = re.compile(r"[^\d,.\-]")
+_RE_ROTULO_INVALIDO = re.compile(r"[^\w.\-_/]")
+_RE_QUADRANTE = re.compile(r"[NS].*[EW]")
+_RE_TEM_DMS = re.compile(r"\d{1,3}\s*[°]\s*\d{1,2}")
+
+
+@dataclass(frozen=True)
+class TokenMemorial:
+    """
+    Token reconhecido no memorial. `inicio`/`fim` são offsets no texto
+    recebido; `valor` é o texto do token já normalizado.
+    """
+
+    tipo: str           # vertice | rumo | azimute | azimute_decimal | distancia
+    valor: str
+    inicio: int
+    fim: int
+    numero: Optional[float] = None      # azimute (graus) ou distância (m)
+    destino: bool = False               # vértice precedido de "ao"/"até"
+
+
 class MemorialParserService:
 
     FECHAMENTO_TOLERANCIA_METROS = 2.0
     DISTANCIA_MINIMA_METROS = 0.01
 
+    # Máximo de caracteres entre a direção (rumo/azimute) e a distância
+    JANELA_DIRECAO_DISTANCIA = 200
+
     @staticmethod
     def _normalizar_espacos(texto: str) -> str:
         return " ".join(str(texto or "").strip().split())
 
     @staticmethod
     def _normalizar_texto_base(texto: str) -> str:
-        texto = str(texto or "")
-
-        return (
-            MemorialParserService._normalizar_espacos(texto)
-            .replace("–", "-")
-            .replace("—", "-")
-            .replace("−", "-")
-            .replace("“", '"')
-            .replace("”", '"')
-            .replace("´", "'")
-            .replace("`", "'")
-            .replace("’", "'")
-            .replace("″", '"')
-            .replace("′", "'")
-            .replace("º", "°")
-            .replace("˚", "°")
+        return MemorialParserService._normalizar_espacos(
+            str(texto or "").translate(_TRADUCAO_TEXTO)
         )
 
     @staticmethod
@@ -47,36 +112,17 @@ class MemorialParserService:
         return graus + (minutos / 60) + (segundos / 3600)
 
     @staticmethod
-    def _rumo_para_azimute(rumo: str) -> float:
-        rumo_normalizado = MemorialParserService._normalizar_texto_base(rumo).upper()
-
-        match = re.search(
-            r"([NS])\s*"
-            r"(\d{1,3})\s*[°]\s*"
-            r"(\d{1,2})?\s*'?\s*"
-            r"(\d{1,2}(?:\.\d+)?)?\s*\"?\s*"
-            r"([EW])",
-            rumo_normalizado,
-        )
-
-        if not match:
-            raise ValueError(f"Rumo inválido: {rumo}")
-
-        ns, g, m, s, ew = match.groups()
-
-        graus = float(g)
-        minutos = float(m or 0)
-        segundos = float(s or 0)
-
-        angulo = MemorialParserService._dms_para_decimal(
-            graus,
-            minutos,
-            segundos,
-        )
+    def _segundos(valor: Optional[str]) -> float:
+        return float((valor or "0").replace(",", "."))
 
+    @staticmethod
+    def _quadrante_para_azimute(ns: str, angulo: float, ew: str, rumo: str) -> float:
         if angulo < 0 or angulo > 90:
             raise ValueError(f"Rumo inválido fora do quadrante: {rumo}")
 
+        ns = ns.upper()
+        ew = ew.upper()
+
         if ns == "N" and ew == "E":
             return angulo
         if ns == "S" and ew == "E":
@@ -88,26 +134,41 @@ class MemorialParserService:
 
         raise ValueError(f"Rumo inválido: {rumo}")
 
+    @staticmethod
+    def _rumo_para_azimute(rumo: str) -> float:
+        rumo_normalizado = MemorialParserService._normalizar_texto_base(rumo).upper()
+
+        match = _RE_RUMO.search(rumo_normalizado)
+
+        if not match:
+            raise ValueError(f"Rumo inválido: {rumo}")
+
+        angulo = MemorialParserService._dms_para_decimal(
+            float(match.group("r_g")),
+            float(match.group("r_m") or 0),
+            MemorialParserService._segundos(match.group("r_s")),
+        )
+
+        return MemorialParserService._quadrante_para_azimute(
+            match.group("r_ns"),
+            angulo,
+            match.group("r_ew"),
+            rumo,
+        )
+
     @staticmethod
     def _azimute_dms_para_decimal(azimute: str) -> float:
         azimute_normalizado = MemorialParserService._normalizar_texto_base(azimute)
 
-        match = re.search(
-            r"(\d{1,3})\s*[°]\s*"
-            r"(\d{1,2})?\s*'?\s*"
-            r"(\d{1,2}(?:\.\d+)?)?\s*\"?",
-            azimute_normalizado,
-        )
+        match = _RE_AZIMUTE_DMS.search(azimute_normalizado)
 
         if not match:
             raise ValueError(f"Azimute inválido: {azimute}")
 
-        g, m, s = match.groups()
-
         decimal = MemorialParserService._dms_para_decimal(
-            float(g),
-            float(m or 0),
-            float(s or 0),
+            float(match.group("a_g")),
+            float(match.group("a_m") or 0),
+            MemorialParserService._segundos(match.group("a_s")),
         )
 
         if decimal < 0 or decimal > 360:
@@ -121,7 +182,7 @@ class MemorialParserService:
 
         # limpeza agressiva OCR-safe (sem quebrar casos válidos)
         texto = texto.replace(",", ".")
-        texto = re.sub(r"[^\d.\-]", "", texto)
+        texto = _RE_NAO_NUMERICO.sub("", texto)
 
         if not texto:
             raise ValueError(f"Azimute decimal inválido: {azimute}")
@@ -152,7 +213,7 @@ class MemorialParserService:
         # N45°30'20"E
         # S 12° E
         # =========================================================
-        if re.search(r"[NS].*[EW]", texto_upper):
+        if _RE_QUADRANTE.search(texto_upper):
             try:
                 return MemorialParserService._rumo_para_azimute(texto)
             except Exception:
@@ -165,7 +226,7 @@ class MemorialParserService:
         # 123°45'
         # 123° 45 20
         # =========================================================
-        if re.search(r"\d{1,3}\s*[°]\s*\d{1,2}", texto_upper):
+        if _RE_TEM_DMS.search(texto_upper):
             try:
                 return MemorialParserService._azimute_dms_para_decimal(texto)
             except Exception:
@@ -210,7 +271,7 @@ class MemorialParserService:
         texto = texto.strip()
 
         # remove lixo preservando dígitos, vírgula, ponto e sinal
-        texto = re.sub(r"[^\d,.\-]", "", texto)
+        texto = _RE_NAO_NUMERICO_DISTANCIA.sub("", texto)
 
         if not texto:
             raise ValueError(f"Distância inválida: {valor}")
@@ -279,6 +340,14 @@ class MemorialParserService:
             f"(acima da tolerância de {MemorialParserService.FECHAMENTO_TOLERANCIA_METROS} m)"
         )
 
+    @staticmethod
+    def _rotulo_vertice(rotulo: Optional[str]) -> Optional[str]:
+        if not rotulo:
+            return None
+
+        rotulo = _RE_ROTULO_INVALIDO.sub("", rotulo).strip(".-_/").upper()
+        return rotulo or None
+
     @staticmethod
     def _adicionar_segmento(
         segmentos: list[dict[str, Any]],
@@ -289,23 +358,25 @@ class MemorialParserService:
         ordem: int | None = None,
         vertice_inicial: str | None = None,
         vertice_final: str | None = None,
-    ) -> None:
+        offset_inicio: int | None = None,
+        offset_fim: int | None = None,
+    ) -> dict[str, Any] | None:
         try:
             dist = float(distancia)
         except Exception:
-            return
+            return None
 
         if dist <= 0:
-            return
+            return None
 
         try:
             az = float(azimute)
         except Exception:
-            return
+            return None
 
         # proteção adicional contra valores inválidos
         if az < 0 or az > 360:
-            return
+            return None
 
         rumo_normalizado = MemorialParserService._normalizar_texto_base(rumo_original)
 
@@ -322,315 +393,193 @@ class MemorialParserService:
             except Exception:
                 segmento["ordem"] = ordem
 
-        if vertice_inicial:
-            vi = MemorialParserService._normalizar_texto_base(vertice_inicial)
-            vi = re.sub(r"[^\w.\-_/]", "", vi).upper()
-            if vi:
-                segmento["vertice_inicial"] = vi
+        vi = MemorialParserService._rotulo_vertice(vertice_inicial)
+        if vi:
+            segmento["vertice_inicial"] = vi
+
+        vf = MemorialParserService._rotulo_vertice(vertice_final)
+        if vf:
+            segmento["vertice_final"] = vf
 
-        if vertice_final:
-            vf = MemorialParserService._normalizar_texto_base(vertice_final)
-            vf = re.sub(r"[^\w.\-_/]", "", vf).upper()
-            if vf:
-                segmento["vertice_final"] = vf
+        if offset_inicio is not None and offset_fim is not None:
+            segmento["offset_inicio"] = int(offset_inicio)
+            segmento["offset_fim"] = int(offset_fim)
 
         segmentos.append(segmento)
+        return segmento
 
+    # =========================================================
+    # TOKENIZAÇÃO (UMA PASSADA)
+    # =========================================================
     @staticmethod
-    def _deduplicar_segmentos(segmentos: list[dict[str, Any]]) -> list[dict[str, Any]]:
-        segmentos_unicos: list[dict[str, Any]] = []
-        vistos: set[tuple[str, float, float]] = set()
+    def _token(match: re.Match) -> TokenMemorial | None:
+        tipo = match.lastgroup
+        inicio, fim = match.span()
 
-        for seg in segmentos:
-            try:
-                rumo = str(seg.get("rumo", "")).strip().upper()
+        if tipo in ("vertice", "vertice_solto"):
+            rotulo = MemorialParserService._rotulo_vertice(
+                match.group("rotulo") or match.group("rotulo_solto")
+            )
+            if not rotulo:
+                return None
+
+            return TokenMemorial(
+                tipo="vertice",
+                valor=rotulo,
+                inicio=inicio,
+                fim=fim,
+                destino=tipo == "vertice_solto" or bool(match.group("destino")),
+            )
+
+        if tipo == "rumo":
+            angulo = MemorialParserService._dms_para_decimal(
+                float(match.group("r_g")),
+                float(match.group("r_m") or 0),
+                MemorialParserService._segundos(match.group("r_s")),
+            )
+            valor = MemorialParserService._normalizar_espacos(match.group("rumo")).upper()
+
+            return TokenMemorial(
+                tipo="rumo",
+                valor=valor,
+                inicio=inicio,
+                fim=fim,
+                numero=MemorialParserService._quadrante_para_azimute(
+                    match.group("r_ns"),
+                    angulo,
+                    match.group("r_ew"),
+                    valor,
+                ),
+            )
 
-                az = float(seg.get("azimute", 0.0))
-                dist = float(seg.get("distancia", 0.0))
+        if tipo == "azimute":
+            if match.group("a_g") is not None:
+                valor = match.string[match.start("a_g"):fim]
+                numero = MemorialParserService._dms_para_decimal(
+                    float(match.group("a_g")),
+                    float(match.group("a_m") or 0),
+                    MemorialParserService._segundos(match.group("a_s")),
+                )
+                tipo = "azimute"
+            else:
+                valor = match.group("a_dec")
+                numero = float(valor.replace(",", "."))
+                tipo = "azimute_decimal"
+
+            if numero < 0 or numero > 360:
+                return None
+
+            return TokenMemorial(
+                tipo=tipo,
+                valor=MemorialParserService._normalizar_espacos(valor),
+                inicio=inicio,
+                fim=fim,
+                numero=numero,
+            )
 
-                # arredondamento controlado (OCR gera pequenas variações)
-                az_round = round(az, 6)
-                dist_round = round(dist, 4)
+        if tipo in ("distancia", "metros"):
+            valor = match.group("d_valor") or match.group("m_valor")
 
-                chave = (rumo, az_round, dist_round)
+            return TokenMemorial(
+                tipo="distancia",
+                valor=valor,
+                inicio=inicio,
+                fim=fim,
+                numero=MemorialParserService._parse_distancia(valor),
+            )
 
-            except Exception:
-                continue
+        return None
 
-            if chave in vistos:
+    @staticmethod
+    def tokenizar(memorial_texto: str) -> list[TokenMemorial]:
+        """
+        Tokens do memorial em ordem de documento, numa única varredura
+        da gramática pré-compilada.
+        """
+        texto = str(memorial_texto or "").translate(_TRADUCAO_TEXTO)
+        tokens: list[TokenMemorial] = []
+
+        for match in _GRAMATICA.finditer(texto):
+            try:
+                token = MemorialParserService._token(match)
+            except ValueError:
                 continue
 
-            vistos.add(chave)
-            segmentos_unicos.append(seg)
+            if token is not None:
+                tokens.append(token)
 
-        # ordenação segura (mantendo comportamento atual)
-        try:
-            segmentos_unicos.sort(
-                key=lambda x: (
-                    0 if x.get("ordem") is not None else 1,
-                    x.get("ordem") if x.get("ordem") is not None else 999999,
-                )
-            )
-        except Exception:
-            pass
+        return tokens
 
-        return segmentos_unicos
-    
+    # =========================================================
+    # SEGMENTOS
+    # =========================================================
     @staticmethod
     def extrair_segmentos(memorial_texto: str) -> list[dict[str, Any]]:
+        """
+        Segmentos (direção + distância) em ordem de documento.
+
+        Cada rumo/azimute é ligado à próxima distância dentro de
+        JANELA_DIRECAO_DISTANCIA caracteres. Vértices: o último rótulo
+        visto é o inicial; um rótulo de destino ("ao vértice P2") ou o
+        primeiro rótulo após a distância é o final.
+        """
         if not memorial_texto or not memorial_texto.strip():
             raise ValueError("Memorial vazio")
 
-        texto = MemorialParserService._normalizar_texto_base(memorial_texto)
         segmentos: list[dict[str, Any]] = []
 
-        # =========================================================
-        # PADRÃO 1: "Rumo X Distância Y"
-        # =========================================================
-        pattern_rumo = re.compile(
-            r"Rumo\s*(.*?)\s*[—\-]?\s*Dist[aâ]ncia\s*(\d+(?:[.,]\d+)?)",
-            re.IGNORECASE,
-        )
-
-        for rumo, distancia in pattern_rumo.findall(texto):
-            try:
-                az = MemorialParserService._rumo_para_azimute(rumo)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="rumo",
-                    rumo_original=rumo,
-                    azimute=az,
-                    distancia=dist,
-                )
-            except Exception:
-                continue
-
-        # =========================================================
-        # PADRÃO 2: "azimute X distância Y"
-        # =========================================================
-        pattern_azimute_livre = re.compile(
-            r"azimute\s*(?:de)?\s*(\d+[°]\s*\d+'?\s*\d*(?:\.\d+)?\"?)"
-            r".{0,60}?"
-            r"dist[âa]ncia\s*(?:de)?\s*(\d+(?:[.,]\d+)?)",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        for az_str, distancia in pattern_azimute_livre.findall(texto):
-            try:
-                az = MemorialParserService._azimute_dms_para_decimal(az_str)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="azimute",
-                    rumo_original=az_str,
-                    azimute=az,
-                    distancia=dist,
-                )
-            except Exception:
-                continue
-
-        # =========================================================
-        # PADRÃO 3: TEXTO REAL DE CARTÓRIO
-        # =========================================================
-        pattern_cartorio = re.compile(
-            r"azimute\s*de\s*(\d+[°]\s*\d+'?\s*\d*(?:\.\d+)?\"?)"
-            r".{0,120}?"
-            r"dist[âa]ncia\s*de\s*(\d+(?:[.,]\d+)?)",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        for az_str, distancia in pattern_cartorio.findall(texto):
-            try:
-                az = MemorialParserService._azimute_dms_para_decimal(az_str)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="cartorio",
-                    rumo_original=az_str,
-                    azimute=az,
-                    distancia=dist,
-                )
-            except Exception:
-                continue
-
-        # =========================================================
-        # PADRÃO 4: VARIAÇÃO COM "na distância de"
-        # =========================================================
-        pattern_cartorio_na_distancia = re.compile(
-            r"azimute\s*de\s*(\d+[°]\s*\d+'?\s*\d*(?:\.\d+)?\"?)"
-            r".{0,140}?"
-            r"na\s+dist[âa]ncia\s*de\s*(\d+(?:[.,]\d+)?)",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        for az_str, distancia in pattern_cartorio_na_distancia.findall(texto):
-            try:
-                az = MemorialParserService._azimute_dms_para_decimal(az_str)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="cartorio_na_distancia",
-                    rumo_original=az_str,
-                    azimute=az,
-                    distancia=dist,
-                )
-            except Exception:
-                continue
-
-        # =========================================================
-        # PADRÃO 5: VARIAÇÃO COM "metros"
-        # =========================================================
-        pattern_cartorio_metros = re.compile(
-            r"azimute\s*de\s*(\d+[°]\s*\d+'?\s*\d*(?:\.\d+)?\"?)"
-            r".{0,160}?"
-            r"dist[âa]ncia\s*de\s*(\d+(?:[.,]\d+)?)\s*metros?",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        for az_str, distancia in pattern_cartorio_metros.findall(texto):
-            try:
-                az = MemorialParserService._azimute_dms_para_decimal(az_str)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="cartorio_metros",
-                    rumo_original=az_str,
-                    azimute=az,
-                    distancia=dist,
-                )
-            except Exception:
+        direcao: TokenMemorial | None = None
+        vertice_atual: str | None = None
+        vertice_destino: str | None = None
+        ultimo: dict[str, Any] | None = None
+
+        for token in MemorialParserService.tokenizar(memorial_texto):
+
+            if token.tipo == "vertice":
+                if ultimo is not None and "vertice_final" not in ultimo and direcao is None:
+                    # "... distância de 100 m até o vértice P2"
+                    ultimo["vertice_final"] = token.valor
+                    vertice_atual = token.valor
+                elif token.destino:
+                    # "do vértice P1 ao vértice P2, azimute ..."
+                    vertice_destino = token.valor
+                else:
+                    vertice_atual = token.valor
+                    vertice_destino = None
                 continue
 
-        # =========================================================
-        # PADRÃO 6: AZIMUTE DECIMAL
-        # =========================================================
-        pattern_azimute_decimal = re.compile(
-            r"azimute\s*(?:de)?\s*(\d+(?:[.,]\d+)?)"
-            r".{0,80}?"
-            r"dist[âa]ncia\s*(?:de)?\s*(\d+(?:[.,]\d+)?)",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        for az_str, distancia in pattern_azimute_decimal.findall(texto):
-            try:
-                az = MemorialParserService._azimute_decimal_para_float(az_str)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="azimute_decimal",
-                    rumo_original=az_str,
-                    azimute=az,
-                    distancia=dist,
-                )
-            except Exception:
+            if token.tipo != "distancia":
+                direcao = token
                 continue
 
-        # =========================================================
-        # PADRÃO 7: VÉRTICES + RUMO
-        # =========================================================
-        pattern_vertices_rumo = re.compile(
-            r"(?:v[eé]rtice|marco)\s*([A-Z0-9.\-_/]+)"
-            r".{0,80}?"
-            r"(?:ao|até|ate)\s*(?:v[eé]rtice|marco)?\s*([A-Z0-9.\-_/]+)"
-            r".{0,120}?"
-            r"rumo\s*(.*?)\s*"
-            r".{0,80}?"
-            r"dist[âa]ncia\s*(?:de)?\s*(\d+(?:[.,]\d+)?)",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        ordem_local = 1
-        for v1, v2, rumo, distancia in pattern_vertices_rumo.findall(texto):
-            try:
-                az = MemorialParserService._rumo_para_azimute(rumo)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="vertices_rumo",
-                    rumo_original=rumo,
-                    azimute=az,
-                    distancia=dist,
-                    ordem=ordem_local,
-                    vertice_inicial=v1,
-                    vertice_final=v2,
-                )
-                ordem_local += 1
-            except Exception:
+            if direcao is None:
                 continue
 
-        # =========================================================
-        # PADRÃO 8: VÉRTICES + AZIMUTE
-        # =========================================================
-        pattern_vertices_azimute = re.compile(
-            r"(?:v[eé]rtice|marco)\s*([A-Z0-9.\-_/]+)"
-            r".{0,80}?"
-            r"(?:ao|até|ate)\s*(?:v[eé]rtice|marco)?\s*([A-Z0-9.\-_/]+)"
-            r".{0,140}?"
-            r"azimute\s*(?:de)?\s*(\d+[°]\s*\d+'?\s*\d*(?:\.\d+)?\"?|\d+(?:[.,]\d+)?)"
-            r".{0,80}?"
-            r"dist[âa]ncia\s*(?:de)?\s*(\d+(?:[.,]\d+)?)",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        ordem_local = 1
-        for v1, v2, azimute_raw, distancia in pattern_vertices_azimute.findall(texto):
-            try:
-                az = MemorialParserService._parse_azimute_ou_rumo(azimute_raw)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="vertices_azimute",
-                    rumo_original=azimute_raw,
-                    azimute=az,
-                    distancia=dist,
-                    ordem=ordem_local,
-                    vertice_inicial=v1,
-                    vertice_final=v2,
-                )
-                ordem_local += 1
-            except Exception:
+            if token.inicio - direcao.fim > MemorialParserService.JANELA_DIRECAO_DISTANCIA:
+                direcao = None
                 continue
 
-        # =========================================================
-        # PADRÃO 9 (NOVO): RUMO + DISTÂNCIA SEM PALAVRAS-CHAVE
-        # =========================================================
-        pattern_rumo_solto = re.compile(
-            r"(N\s*\d+[°]\s*\d+'?\s*\d*(?:\.\d+)?\"?\s*[EW])"
-            r".{0,120}?"
-            r"(\d+(?:[.,]\d+)?)\s*(?:m|metros)?",
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        for rumo, distancia in pattern_rumo_solto.findall(texto):
-            try:
-                az = MemorialParserService._rumo_para_azimute(rumo)
-                dist = MemorialParserService._parse_distancia(distancia)
-
-                MemorialParserService._adicionar_segmento(
-                    segmentos=segmentos,
-                    tipo="rumo_solto",
-                    rumo_original=rumo,
-                    azimute=az,
-                    distancia=dist,
-                )
-            except Exception:
-                continue
+            segmento = MemorialParserService._adicionar_segmento(
+                segmentos=segmentos,
+                tipo=direcao.tipo,
+                rumo_original=direcao.valor,
+                azimute=direcao.numero,
+                distancia=token.numero,
+                ordem=len(segmentos) + 1,
+                vertice_inicial=vertice_atual,
+                vertice_final=vertice_destino,
+                offset_inicio=direcao.inicio,
+                offset_fim=token.fim,
+            )
 
-        segmentos_unicos = MemorialParserService._deduplicar_segmentos(segmentos)
+            direcao = None
+            vertice_destino = None
 
-        if not segmentos_unicos:
-            return []
+            if segmento is not None:
+                ultimo = segmento
+                vertice_atual = segmento.get("vertice_final")
 
-        return segmentos_unicos
+        return segmentos
 
     @staticmethod
     def gerar_geometria(memorial_texto: str) -> dict[str, Any]:
@@ -769,6 +718,8 @@ class MemorialParserService:
                 "vertices": len(coords),
                 "fechamento": True,
                 "erro_fechamento_m": erro_fechamento,
+                # erro antes da distribuição proporcional entre os vértices
+                "erro_fechamento_bruto_m": erro_total,
                 "area_m2": area_m2,
                 "perimetro_m": perimetro_m,
                 "distancia_minima_m": min(distancias_calculadas) if distancias_calculadas else None,
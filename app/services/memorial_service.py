@@ -9,10 +9,10 @@ from math import atan2, degrees, floor, sqrt
 from typing import Any, List, Optional, Tuple
 
 from fastapi import HTTPException
-from pyproj import CRS, Transformer
 from shapely.geometry import Polygon
 
 from app.services.geometria_service import GeometriaService
+from app.services.projecao_service import ProjecaoService
 
 
 @dataclass(frozen=True)
@@ -155,21 +155,19 @@ class MemorialService:
         lat = float(analise["centroid"]["y"])
         epsg_utm = MemorialService._utm_epsg_from_lonlat(lon, lat)
 
-        transformer = Transformer.from_crs(
-            CRS.from_epsg(epsg_origem),
-            CRS.from_epsg(epsg_utm),
-            always_xy=True,
+        projetadas = ProjecaoService.transformar_coords(
+            coords,
+            epsg_origem,
+            epsg_utm,
         )
 
-        pontos: List[_PontoPlano] = []
-
-        for x, y in coords:
-            X, Y = transformer.transform(float(x), float(y))
-
-            X = MemorialService._safe_float(X)
-            Y = MemorialService._safe_float(Y)
-
-            pontos.append(_PontoPlano(X, Y))
+        pontos: List[_PontoPlano] = [
+            _PontoPlano(
+                MemorialService._safe_float(X),
+                MemorialService._safe_float(Y),
+            )
+            for X, Y in projetadas
+        ]
 
         if len(pontos) < 4:
             raise HTTPException(status_code=400, detail="Geometria insuficiente após projeção.")
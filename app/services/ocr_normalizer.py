@@ -3,6 +3,101 @@ from __future__ import annotations
 import re
 from typing import Any, Dict, List, Optional
 from app.services.memorial_parser_service import MemorialParserService
+from app.services.texto_canonico import TextoCanonico
+
+
+_RE_PREFIXO_MATRICULA = re.compile(r"(?i)\bmatr[íi]cula\b[:\s\-#]*")
+_RE_PREFIXO_NUMERO = re.compile(r"(?i)\bn[ºo°]\b[:\s\-]*")
+_RE_NAO_NUMERO_MATRICULA = re.compile(r"[^\d./\-]")
+_RE_LOTE = re.compile(r"(?i)\blote\s+([a-z0-9.\-\/]+)")
+_RE_GLEBA = re.compile(r"(?i)\bgleba\s+([a-z0-9.\-\/]+)")
+
+
+# =========================================================
+# TABELAS DE CANONICALIZAÇÃO
+# =========================================================
+_MAPA_TIPO_PROPRIETARIO = {
+    "PROPRIETARIO": "PROPRIETARIO",
+    "PROPRIETARIA": "PROPRIETARIO",
+    "PROPRIETARIOS": "PROPRIETARIO",
+    "HERDEIRO": "HERDEIRO",
+    "HERDEIRA": "HERDEIRO",
+    "HERDEIROS": "HERDEIRO",
+    "ESPOLIO": "ESPOLIO",
+    "INVENTARIANTE": "INVENTARIANTE",
+    "COPROPRIETARIO": "COPROPRIETARIO",
+    "COPROPRIETARIA": "COPROPRIETARIO",
+    "CESSIONARIO": "CESSIONARIO",
+    "CESSIONARIA": "CESSIONARIO",
+    "PROMITENTE COMPRADOR": "PROMITENTE_COMPRADOR",
+    "PROMITENTE VENDEDOR": "PROMITENTE_VENDEDOR",
+    "NU PROPRIETARIO": "NU_PROPRIETARIO",
+    "USUFRUTUARIO": "USUFRUTUARIO",
+}
+
+_MAPA_UNIDADE_AREA = {
+    "HA": "ha",
+    "HECTARE": "ha",
+    "HECTARES": "ha",
+    "M2": "m2",
+    "M²": "m2",
+    "METRO QUADRADO": "m2",
+    "METROS QUADRADOS": "m2",
+    "KM2": "km2",
+    "KM²": "km2",
+    "QUILOMETRO QUADRADO": "km2",
+    "QUILOMETROS QUADRADOS": "km2",
+    "ALQUEIRE": "alqueire",
+    "ALQUEIRES": "alqueire",
+}
+
+_MAPA_DIRECAO = {
+    "N": "N",
+    "NORTE": "N",
+    "S": "S",
+    "SUL": "S",
+    "L": "E",
+    "LESTE": "E",
+    "E": "E",
+    "O": "W",
+    "OESTE": "W",
+    "W": "W",
+    "NE": "NE",
+    "NORDESTE": "NE",
+    "NO": "NW",
+    "NOROESTE": "NW",
+    "NW": "NW",
+    "SE": "SE",
+    "SUDESTE": "SE",
+    "SO": "SW",
+    "SUDOESTE": "SW",
+    "SW": "SW",
+}
+
+_MAPA_LADO_ORIGINAL = {
+    "N": "NORTE",
+    "NORTE": "NORTE",
+    "S": "SUL",
+    "SUL": "SUL",
+    "L": "LESTE",
+    "LESTE": "LESTE",
+    "E": "LESTE",
+    "O": "OESTE",
+    "OESTE": "OESTE",
+    "W": "OESTE",
+    "NE": "NORDESTE",
+    "NORDESTE": "NORDESTE",
+    "NO": "NOROESTE",
+    "NOROESTE": "NOROESTE",
+    "NW": "NOROESTE",
+    "SE": "SUDESTE",
+    "SUDESTE": "SUDESTE",
+    "SO": "SUDOESTE",
+    "SUDOESTE": "SUDOESTE",
+    "SW": "SUDOESTE",
+}
+
+_DIRECOES_CANONICAS = frozenset(_MAPA_DIRECAO.values())
 
 
 # =========================================================
@@ -17,63 +112,15 @@ def _is_blank(valor: Any) -> bool:
 
 
 def _normalizar_espacos(texto: str) -> str:
-    return " ".join(texto.strip().split())
+    return TextoCanonico.espacos(texto)
 
 
 def _normalizar_texto(valor: Any) -> Optional[str]:
-    if valor is None:
-        return None
-
-    if isinstance(valor, bool):
-        return None
-
-    if isinstance(valor, (int, float)):
-        valor = str(valor)
-
-    if not isinstance(valor, str):
-        return None
-
-    texto = _normalizar_espacos(valor)
-
-    if not texto:
-        return None
-
-    return texto
+    return TextoCanonico.texto(valor)
 
 
 def _normalizar_texto_upper_sem_acentos(valor: Any) -> Optional[str]:
-    texto = _normalizar_texto(valor)
-    if not texto:
-        return None
-
-    return (
-        texto.upper()
-        .replace("-", " ")
-        .replace("_", " ")
-        .replace("Ç", "C")
-        .replace("Ã", "A")
-        .replace("Á", "A")
-        .replace("À", "A")
-        .replace("Â", "A")
-        .replace("Ä", "A")
-        .replace("É", "E")
-        .replace("È", "E")
-        .replace("Ê", "E")
-        .replace("Ë", "E")
-        .replace("Í", "I")
-        .replace("Ì", "I")
-        .replace("Î", "I")
-        .replace("Ï", "I")
-        .replace("Ó", "O")
-        .replace("Ò", "O")
-        .replace("Ô", "O")
-        .replace("Õ", "O")
-        .replace("Ö", "O")
-        .replace("Ú", "U")
-        .replace("Ù", "U")
-        .replace("Û", "U")
-        .replace("Ü", "U")
-    )
+    return TextoCanonico.upper_sem_acentos(_normalizar_texto(valor))
 
 
 def _coalesce(*valores: Any) -> Any:
@@ -101,7 +148,7 @@ def _first_list(*valores: Any) -> Optional[List[Any]]:
 
 
 def _somente_digitos(valor: Any) -> str:
-    return re.sub(r"\D", "", str(valor or ""))
+    return TextoCanonico.somente_digitos(valor)
 
 
 def _to_float(valor: Any) -> Optional[float]:
@@ -150,10 +197,10 @@ def _normalizar_matricula(valor: Any) -> Optional[str]:
     if not texto:
         return None
 
-    texto = re.sub(r"(?i)\bmatr[íi]cula\b[:\s\-#]*", "", texto)
-    texto = re.sub(r"(?i)\bn[ºo°]\b[:\s\-]*", "", texto)
+    texto = _RE_PREFIXO_MATRICULA.sub("", texto)
+    texto = _RE_PREFIXO_NUMERO.sub("", texto)
     texto = texto.strip()
-    texto = re.sub(r"[^\d./\-]", "", texto)
+    texto = _RE_NAO_NUMERO_MATRICULA.sub("", texto)
 
     if not texto:
         return None
@@ -165,15 +212,7 @@ def _normalizar_cpf_cnpj(valor: Any) -> Optional[str]:
     if valor is None:
         return None
 
-    numeros = _somente_digitos(valor)
-
-    if len(numeros) == 11:
-        return f"{numeros[:3]}.{numeros[3:6]}.{numeros[6:9]}-{numeros[9:]}"
-    if len(numeros) == 14:
-        return f"{numeros[:2]}.{numeros[2:5]}.{numeros[5:8]}/{numeros[8:12]}-{numeros[12:]}"
-
-    texto = _normalizar_texto(valor)
-    return texto
+    return TextoCanonico.formatar_cpf_cnpj(valor) or _normalizar_texto(valor)
 
 
 def _normalizar_tipo_proprietario(valor: Any) -> Optional[str]:
@@ -181,26 +220,7 @@ def _normalizar_tipo_proprietario(valor: Any) -> Optional[str]:
     if not texto_upper:
         return None
 
-    mapa = {
-        "PROPRIETARIO": "PROPRIETARIO",
-        "PROPRIETARIA": "PROPRIETARIO",
-        "PROPRIETARIOS": "PROPRIETARIO",
-        "HERDEIRO": "HERDEIRO",
-        "HERDEIRA": "HERDEIRO",
-        "HERDEIROS": "HERDEIRO",
-        "ESPOLIO": "ESPOLIO",
-        "INVENTARIANTE": "INVENTARIANTE",
-        "COPROPRIETARIO": "COPROPRIETARIO",
-        "COPROPRIETARIA": "COPROPRIETARIO",
-        "CESSIONARIO": "CESSIONARIO",
-        "CESSIONARIA": "CESSIONARIO",
-        "PROMITENTE COMPRADOR": "PROMITENTE_COMPRADOR",
-        "PROMITENTE VENDEDOR": "PROMITENTE_VENDEDOR",
-        "NU PROPRIETARIO": "NU_PROPRIETARIO",
-        "USUFRUTUARIO": "USUFRUTUARIO",
-    }
-
-    return mapa.get(texto_upper, texto_upper.replace(" ", "_"))
+    return _MAPA_TIPO_PROPRIETARIO.get(texto_upper, texto_upper.replace(" ", "_"))
 
 
 def _normalizar_unidade_area(valor: Any) -> Optional[str]:
@@ -208,23 +228,7 @@ def _normalizar_unidade_area(valor: Any) -> Optional[str]:
     if not texto:
         return None
 
-    mapa = {
-        "HA": "ha",
-        "HECTARE": "ha",
-        "HECTARES": "ha",
-        "M2": "m2",
-        "M²": "m2",
-        "METRO QUADRADO": "m2",
-        "METROS QUADRADOS": "m2",
-        "KM2": "km2",
-        "KM²": "km2",
-        "QUILOMETRO QUADRADO": "km2",
-        "QUILOMETROS QUADRADOS": "km2",
-        "ALQUEIRE": "alqueire",
-        "ALQUEIRES": "alqueire",
-    }
-
-    return mapa.get(texto, texto.lower())
+    return _MAPA_UNIDADE_AREA.get(texto, texto.lower())
 
 
 def _converter_area_para_hectares(area: Optional[float], unidade: Optional[str]) -> Optional[float]:
@@ -252,30 +256,7 @@ def _normalizar_direcao(valor: Any) -> Optional[str]:
     if not texto:
         return None
 
-    mapa = {
-        "N": "N",
-        "NORTE": "N",
-        "S": "S",
-        "SUL": "S",
-        "L": "E",
-        "LESTE": "E",
-        "E": "E",
-        "O": "W",
-        "OESTE": "W",
-        "W": "W",
-        "NE": "NE",
-        "NORDESTE": "NE",
-        "NO": "NW",
-        "NOROESTE": "NW",
-        "NW": "NW",
-        "SE": "SE",
-        "SUDESTE": "SE",
-        "SO": "SW",
-        "SUDOESTE": "SW",
-        "SW": "SW",
-    }
-
-    return mapa.get(texto, texto if texto in mapa.values() else None)
+    return _MAPA_DIRECAO.get(texto, texto if texto in _DIRECOES_CANONICAS else None)
 
 
 def _normalizar_lado_original(valor: Any) -> Optional[str]:
@@ -283,30 +264,7 @@ def _normalizar_lado_original(valor: Any) -> Optional[str]:
     if not texto_upper:
         return None
 
-    mapa = {
-        "N": "NORTE",
-        "NORTE": "NORTE",
-        "S": "SUL",
-        "SUL": "SUL",
-        "L": "LESTE",
-        "LESTE": "LESTE",
-        "E": "LESTE",
-        "O": "OESTE",
-        "OESTE": "OESTE",
-        "W": "OESTE",
-        "NE": "NORDESTE",
-        "NORDESTE": "NORDESTE",
-        "NO": "NOROESTE",
-        "NOROESTE": "NOROESTE",
-        "NW": "NOROESTE",
-        "SE": "SUDESTE",
-        "SUDESTE": "SUDESTE",
-        "SO": "SUDOESTE",
-        "SUDOESTE": "SUDOESTE",
-        "SW": "SUDOESTE",
-    }
-
-    return mapa.get(texto_upper, texto_upper)
+    return _MAPA_LADO_ORIGINAL.get(texto_upper, texto_upper)
 
 
 def _normalizar_geojson(valor: Any) -> Optional[Dict[str, Any]]:
@@ -360,11 +318,11 @@ def _extrair_lote_gleba_de_texto(valor: Any) -> Dict[str, Optional[str]]:
     lote = None
     gleba = None
 
-    match_lote = re.search(r"(?i)\blote\s+([a-z0-9.\-\/]+)", texto)
+    match_lote = _RE_LOTE.search(texto)
     if match_lote:
         lote = match_lote.group(1).strip()
 
-    match_gleba = re.search(r"(?i)\bgleba\s+([a-z0-9.\-\/]+)", texto)
+    match_gleba = _RE_GLEBA.search(texto)
     if match_gleba:
         gleba = match_gleba.group(1).strip()
 
@@ -848,51 +806,39 @@ def _resolver_geometria(
     fonte: Optional[str] = None
     geojson: Optional[Dict[str, Any]] = geojson_existente
 
+    # O parse do memorial é o mesmo nos dois caminhos abaixo: gera uma vez
+    geometria_memorial: Optional[Dict[str, Any]] = None
+    erro_memorial: Optional[Exception] = None
+
+    if memorial_texto:
+        try:
+            geometria_memorial = MemorialParserService.gerar_geometria(memorial_texto)
+        except Exception as e:
+            erro_memorial = e
+
     # =========================================================
     # TENTAR GERAR GEOMETRIA A PARTIR DOS SEGMENTOS
     # =========================================================
     if segmentos_validos and len(segmentos_validos) >= 3:
-        try:
-            texto_base = memorial_texto or ""
-
-            geometria_gerada = MemorialParserService.gerar_geometria(texto_base)
-
-            if (
-                geometria_gerada
-                and isinstance(geometria_gerada, dict)
-                and geometria_gerada.get("geojson")
-            ):
-                novo_geojson = geometria_gerada.get("geojson")
-
-                if novo_geojson:
-                    geojson = novo_geojson
-                    segmentos_validos = geometria_gerada.get("segmentos") or segmentos_validos
-                    fonte = "segmentos_processados"
-
-        except Exception as e:
-            warnings.append(f"Falha ao gerar geometria via segmentos: {str(e)}")
+        if not memorial_texto:
+            warnings.append("Falha ao gerar geometria via segmentos: Memorial vazio")
+        elif erro_memorial is not None:
+            warnings.append(f"Falha ao gerar geometria via segmentos: {str(erro_memorial)}")
+        elif geometria_memorial and geometria_memorial.get("geojson"):
+            geojson = geometria_memorial.get("geojson")
+            segmentos_validos = geometria_memorial.get("segmentos") or segmentos_validos
+            fonte = "segmentos_processados"
 
     # =========================================================
     # FALLBACK: GERAR VIA MEMORIAL
     # =========================================================
     if not fonte and memorial_texto:
-        try:
-            geometria_gerada = MemorialParserService.gerar_geometria(memorial_texto)
-
-            if (
-                geometria_gerada
-                and isinstance(geometria_gerada, dict)
-                and geometria_gerada.get("geojson")
-            ):
-                novo_geojson = geometria_gerada.get("geojson")
-
-                if novo_geojson:
-                    geojson = novo_geojson
-                    segmentos_validos = geometria_gerada.get("segmentos") or segmentos_validos
-                    fonte = "memorial_processado"
-
-        except Exception as e:
-            warnings.append(f"Falha ao gerar geometria via memorial: {str(e)}")
+        if erro_memorial is not None:
+            warnings.append(f"Falha ao gerar geometria via memorial: {str(erro_memorial)}")
+        elif geometria_memorial and geometria_memorial.get("geojson"):
+            geojson = geometria_memorial.get("geojson")
+            segmentos_validos = geometria_memorial.get("segmentos") or segmentos_validos
+            fonte = "memorial_processado"
 
     # =========================================================
     # FALLBACK FINAL: GEOJSON EXISTENTE
@@ -1211,7 +1157,7 @@ def _resolver_historico(
     # 🔒 ordenação opcional (se tiver número)
     try:
         atos_normalizados.sort(
-            key=lambda x: int(re.sub(r"\D", "", x.get("numero") or "0"))
+            key=lambda x: int(_somente_digitos(x.get("numero") or "0"))
         )
     except Exception:
         pass
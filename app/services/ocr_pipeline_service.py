@@ -3,15 +3,20 @@ from __future__ import annotations
 import json
 import os
 import re
+import socket
 from datetime import datetime
 from math import cos, radians, sin, sqrt
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+from uuid import UUID
 
 from shapely.geometry import Polygon
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.database import SessionLocal
 from app.crud.documento_tecnico_crud import create_documento_tecnico
 from app.crud.sigef_export_crud import exportar_sigef_csv
+from app.models.automation_job import AutomationJob
 from app.models.document import Document
 from app.models.geometria import Geometria
 from app.models.imovel import Imovel
@@ -19,13 +24,21 @@ from app.models.matricula import Matricula
 from app.schemas.documento_tecnico import DocumentoTecnicoCreate
 from app.schemas.ocr_result_structured import OCRStructured
 from app.schemas.sigef_export import SigefCsvExportRequest
+from app.services.automation_queue_service import AutomationQueueService
 from app.services.cad_export_service import CadExportService
-from app.services.croqui_service import CroquiService
+from app.services.croqui_artefato_service import CroquiArtefatoService
 from app.services.geometria_service import GeometriaService
 from app.services.matricula_analysis_service import MatriculaAnalysisService
 from app.services.memorial_parser_service import MemorialParserService
 from app.services.memorial_service import MemorialService
 from app.services.ocr_normalizer import normalizar_dados_ocr
+from app.services.pipeline_cache_service import PipelineCacheService
+from app.services.project_recalculo_service import ProjectRecalculoService
+from app.services.pipeline_executor_service import (
+    ContextoPipeline,
+    EtapaPipeline,
+    PipelineExecutorService,
+)
 
 
 class OcrPipelineService:
@@ -63,6 +76,7 @@ class OcrPipelineService:
         ocr_result_id: int | None,
         prompt_categoria: str,
         dados_extraidos: dict[str, Any],
+        ao_concluir_etapa: Optional[Callable[[str, dict[str, Any]], None]] = None,
     ) -> dict[str, Any]:
         result: dict[str, Any] = {
             "success": False,
@@ -114,6 +128,8 @@ class OcrPipelineService:
                 document_id=document_id,
                 ocr_result_id=ocr_result_id,
                 dados=dados_normalizados,
+                hash_payload=PipelineCacheService.hash_payload(dados_normalizados),
+                ao_concluir_etapa=ao_concluir_etapa,
             )
 
         result["errors"].append(
@@ -121,6 +137,101 @@ class OcrPipelineService:
         )
         return result
 
+    # =========================================================
+    # EXECUÇÃO ASSÍNCRONA (AutomationJob)
+    # =========================================================
+    @staticmethod
+    def processar_job(db: Session, job: AutomationJob) -> dict[str, Any]:
+        """
+        Executa o pipeline de um job já reservado (PROCESSING), gravando
+        status e tempos de cada etapa em payload_json.
+
+        Retorna o desfecho ({"status", "error_message"}) sem alterar o
+        status do job — quem reservou decide como finalizá-lo.
+        """
+        job.payload_json = {**(job.payload_json or {}), "pipeline_stages": {}}
+        db.commit()
+
+        payload = dict(job.payload_json or {})
+        etapas: dict[str, Any] = {}
+
+        def _registrar_etapa(nome: str, registro: dict[str, Any]) -> None:
+            etapas[nome] = registro
+            job.payload_json = {
+                **(job.payload_json or {}),
+                "pipeline_stages": dict(etapas),
+            }
+            db.commit()
+
+        result = OcrPipelineService.executar_pipeline(
+            db=db,
+            document_id=int(payload["document_id"]),
+            ocr_result_id=payload.get("ocr_result_id"),
+            prompt_categoria=payload.get("categoria") or "",
+            dados_extraidos=payload.get("dados") or {},
+            ao_concluir_etapa=_registrar_etapa,
+        )
+
+        sucesso = bool(result.get("success"))
+        erros = result.get("errors") or []
+
+        job.payload_json = {
+            **(job.payload_json or {}),
+            "pipeline_stages": result.get("etapas") or etapas,
+            "pipeline_success": sucesso,
+            "pipeline_details": OcrPipelineService._json_safe(result),
+        }
+        db.commit()
+
+        return {
+            "status": "COMPLETED" if sucesso else "FAILED",
+            "error_message": "; ".join(str(e) for e in erros) or None,
+        }
+
+    @staticmethod
+    def executar_job(job_id: UUID) -> None:
+        """
+        Execução em background (sem worker): reserva o job PENDING com o
+        mesmo lease da fila e roda o pipeline em sessão própria. Se um
+        worker já o reservou, não faz nada.
+        """
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:background"
+        db = SessionLocal()
+
+        try:
+            job = AutomationQueueService.reservar(db, job_id, worker_id)
+            if not job:
+                return
+
+            with AutomationQueueService.manter_lease(job_id, worker_id):
+                desfecho = OcrPipelineService.processar_job(db, job)
+
+            AutomationQueueService.concluir(
+                db,
+                job_id,
+                worker_id,
+                status=desfecho["status"],
+                error_message=desfecho["error_message"],
+            )
+
+        except Exception as exc:
+            OcrPipelineService._rollback_safely(db)
+            print(f"❌ Falha no job de pipeline OCR {job_id}: {str(exc)}")
+
+            try:
+                AutomationQueueService.concluir(
+                    db,
+                    job_id,
+                    worker_id,
+                    status="FAILED",
+                    error_message=f"Erro ao executar pipeline OCR: {str(exc)}",
+                )
+            except Exception:
+                OcrPipelineService._rollback_safely(db)
+
+        finally:
+            db.close()
+
     @staticmethod
     def _normalizar_categoria(texto: str) -> str:
         mapa = str.maketrans(
@@ -129,43 +240,139 @@ class OcrPipelineService:
         )
         return texto.lower().strip().translate(mapa)
 
+    # =========================================================
+    # GRAFO DE ETAPAS DA MATRÍCULA
+    # =========================================================
+    @staticmethod
+    def _etapas_matricula() -> list[EtapaPipeline]:
+        """
+        Cada etapa declara apenas o que precisa. Os artefatos derivados
+        (memorial, croqui, CAD, TXT, DXF, SHP, SIGEF) dependem só da
+        Geometria persistida e rodam em paralelo após o commit dela.
+        """
+        skip_geometria = "{} não executado: geometria inexistente."
+
+        return [
+            EtapaPipeline(
+                nome="matricula",
+                rotulo="Matrícula",
+                executar=OcrPipelineService._etapa_matricula,
+                mensagem_falha="Falha ao persistir matrícula",
+            ),
+            EtapaPipeline(
+                nome="geometria",
+                rotulo="Geometria",
+                executar=OcrPipelineService._etapa_geometria,
+                mensagem_falha="Falha ao gerar geometria",
+            ),
+            EtapaPipeline(
+                nome="matricula_pdf",
+                rotulo="Matrícula PDF",
+                executar=OcrPipelineService._etapa_matricula_pdf,
+                depende_de=("matricula",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar PDF matrícula",
+                mensagem_skip="PDF da matrícula não executado: matrícula inexistente.",
+            ),
+            EtapaPipeline(
+                nome="analise_juridica",
+                rotulo="Analise juridica",
+                executar=OcrPipelineService._etapa_analise_juridica,
+                depende_de=("matricula",),
+                paralela=True,
+                mensagem_falha="Erro na análise jurídica",
+                mensagem_skip="Matrícula inexistente ou sem inteiro_teor para análise.",
+            ),
+            EtapaPipeline(
+                nome="confrontantes",
+                rotulo="Confrontantes",
+                executar=OcrPipelineService._etapa_confrontantes,
+                depende_de=("geometria",),
+                mensagem_falha="Falha ao processar confrontantes",
+                mensagem_skip=skip_geometria.format("Confrontantes"),
+            ),
+            EtapaPipeline(
+                nome="sigef_csv",
+                rotulo="SIGEF CSV",
+                executar=OcrPipelineService._etapa_sigef_csv,
+                depende_de=("geometria",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar SIGEF CSV",
+                mensagem_skip=skip_geometria.format("SIGEF CSV"),
+            ),
+            EtapaPipeline(
+                nome="cad",
+                rotulo="CAD",
+                executar=OcrPipelineService._etapa_cad,
+                depende_de=("geometria",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar CAD",
+                mensagem_skip=skip_geometria.format("CAD"),
+            ),
+            EtapaPipeline(
+                nome="txt",
+                rotulo="TXT",
+                executar=OcrPipelineService._etapa_txt,
+                depende_de=("geometria",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar TXT",
+                mensagem_skip=skip_geometria.format("TXT"),
+            ),
+            EtapaPipeline(
+                nome="shp",
+                rotulo="SHP",
+                executar=OcrPipelineService._etapa_shp,
+                depende_de=("geometria",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar SHP",
+                mensagem_skip=skip_geometria.format("SHP"),
+            ),
+            EtapaPipeline(
+                nome="memorial",
+                rotulo="Memorial",
+                executar=OcrPipelineService._etapa_memorial,
+                depende_de=("geometria",),
+                aguarda=("confrontantes",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar memorial",
+                mensagem_skip=skip_geometria.format("Memorial"),
+            ),
+            EtapaPipeline(
+                nome="croqui",
+                rotulo="Croqui",
+                executar=OcrPipelineService._etapa_croqui,
+                depende_de=("geometria",),
+                aguarda=("confrontantes",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar croqui",
+                mensagem_skip=skip_geometria.format("Croqui"),
+            ),
+            EtapaPipeline(
+                nome="dxf",
+                rotulo="DXF",
+                executar=OcrPipelineService._etapa_dxf,
+                depende_de=("geometria",),
+                aguarda=("confrontantes",),
+                paralela=True,
+                mensagem_falha="Falha ao gerar DXF",
+                mensagem_skip=skip_geometria.format("DXF"),
+            ),
+        ]
+
+    # =========================================================
+    # ORQUESTRAÇÃO
+    # =========================================================
     @staticmethod
     def _pipeline_matricula(
         db: Session,
         document_id: int,
         ocr_result_id: int | None,
         dados: dict[str, Any],
+        hash_payload: Optional[str] = None,
+        ao_concluir_etapa: Optional[Callable[[str, dict[str, Any]], None]] = None,
     ) -> dict[str, Any]:
         print(f"🔎 Iniciando pipeline de matrícula para documento {document_id}")
 
-        # 🔥 CORREÇÃO CRÍTICA — GARANTE QUE NUNCA QUEBRE O PIPELINE
-        confrontantes_db: list = []
-
-        result: dict[str, Any] = {
-            "success": False,
-            "document_id": document_id,
-            "ocr_result_id": ocr_result_id,
-            "pipeline": "MATRICULA",
-            "steps": {
-                "matricula": {},
-                "matricula_pdf": {},
-                "analise_juridica": {},
-                "geometria": {},
-                "confrontantes": {},
-                "sigef_validacao": {},
-                "memorial": {},
-                "croqui": {},
-                "cad": {},
-                "txt": {},
-                "dxf": {},
-                "shp": {},
-                "sigef_csv": {},
-            },
-            "errors": [],
-        }
-
-        base_url = "https://geoincra.escriturafacil.com"
-
         doc = db.query(Document).filter(Document.id == document_id).first()
         if not doc:
             raise Exception("Documento não encontrado")
@@ -178,1100 +385,1163 @@ class OcrPipelineService:
         if not imovel:
             raise Exception("Projeto não possui imóvel cadastrado")
 
-        matricula: Optional[Matricula] = None
+        ctx = ContextoPipeline(
+            document_id=document_id,
+            ocr_result_id=ocr_result_id,
+            dados=dados,
+            imovel_id=imovel.id,
+            base_url="https://geoincra.escriturafacil.com",
+            hash_payload=hash_payload,
+        )
 
-        # ================= MATRÍCULA =================
-        try:
-            matricula = OcrPipelineService._upsert_matricula(
+        # Cada etapa cria DocumentoTecnico: o status do projeto é
+        # recalculado uma única vez, ao fim do pipeline
+        with ProjectRecalculoService.adiar(db, imovel.project_id):
+            steps, execucao = PipelineExecutorService.executar(
                 db=db,
-                imovel=imovel,
-                dados=dados,
+                etapas=OcrPipelineService._etapas_matricula(),
+                ctx=ctx,
+                max_workers=settings.OCR_PIPELINE_MAX_WORKERS,
+                ao_concluir_etapa=ao_concluir_etapa,
             )
 
-            if matricula:
-                result["steps"]["matricula"] = {
-                    "success": True,
-                    "matricula_id": matricula.id,
-                    "numero_matricula": matricula.numero_matricula,
-                    "comarca": matricula.comarca,
-                    "arquivo_path": None,
-                    "arquivo_url": None,
-                }
+        # PDF da matrícula é anexado ao step da matrícula (contrato legado)
+        if steps["matricula_pdf"].get("success"):
+            steps["matricula"]["arquivo_path"] = steps["matricula_pdf"].get("arquivo_path")
+            steps["matricula"]["arquivo_url"] = steps["matricula_pdf"].get("arquivo_url")
+
+        ordem_steps = [
+            "matricula",
+            "matricula_pdf",
+            "analise_juridica",
+            "geometria",
+            "confrontantes",
+            "sigef_validacao",
+            "memorial",
+            "croqui",
+            "cad",
+            "txt",
+            "dxf",
+            "shp",
+            "sigef_csv",
+        ]
 
-                # ================= MATRÍCULA PDF =================
-                try:
-                    from app.services.matricula_pdf_service import MatriculaPdfService
-                    from app.services.matricula_ocr_processor_service import MatriculaOcrProcessorService
-
-                    payload = MatriculaOcrProcessorService.gerar_payload_documentos(
-                        db=db,
-                        matricula_id=matricula.id,
-                    )
-
-                    pdf = MatriculaPdfService.gerar_pdf(
-                        imovel_id=imovel.id,
-                        dados=payload,
-                    )
-
-                    doc_pdf = create_documento_tecnico(
-                        db=db,
-                        imovel_id=imovel.id,
-                        data=DocumentoTecnicoCreate(
-                            document_group_key="MATRICULA_PDF",
-                            tipo="Matrícula PDF",
-                            status_tecnico="EM_ANALISE",
-                            arquivo_path=pdf.get("arquivo_path"),
-                            metadata_json={
-                                "matricula_id": matricula.id,
-                                "numero_matricula": matricula.numero_matricula,
-                            },
-                            gerado_em=datetime.utcnow(),
-                        ),
-                    )
-
-                    url_pdf = OcrPipelineService._build_file_url(
-                        base_url,
-                        pdf.get("arquivo_path"),
-                    )
-
-                    result["steps"]["matricula_pdf"] = {
-                        "success": True,
-                        "documento_tecnico_id": doc_pdf.id,
-                        "arquivo_path": pdf.get("arquivo_path"),
-                        "arquivo_url": url_pdf,
-                        "message": "PDF da matrícula gerado.",
-                    }
+        result: dict[str, Any] = {
+            "success": False,
+            "document_id": document_id,
+            "ocr_result_id": ocr_result_id,
+            "pipeline": "MATRICULA",
+            "hash_payload": hash_payload,
+            "steps": {nome: steps.get(nome, {}) for nome in ordem_steps},
+            "etapas": execucao,
+            "etapas_reaproveitadas": [
+                nome for nome, step in steps.items() if step.get("reaproveitado")
+            ],
+            "errors": list(ctx.erros),
+        }
+
+        # =========================================================
+        # SUCESSO FINAL
+        # =========================================================
+        geometria_ok = bool(result["steps"]["geometria"].get("success"))
+        memorial_ok = bool(result["steps"]["memorial"].get("success"))
+        croqui_ok = bool(result["steps"]["croqui"].get("success"))
+        cad_ok = bool(result["steps"]["cad"].get("success"))
 
-                    result["steps"]["matricula"]["arquivo_path"] = pdf.get("arquivo_path")
-                    result["steps"]["matricula"]["arquivo_url"] = url_pdf
+        epsg_origem_atual = ctx.geometria.get("epsg_origem") if ctx.geometria else None
 
-                    print(f"✅ PDF matrícula gerado: {pdf.get('arquivo_path')}")
+        # 🔥 NOVO — QUALIDADE OCR (SEM QUEBRAR CONTRATO)
+        qualidade_ocr = dados.get("qualidade") if isinstance(dados, dict) else None
 
-                except Exception as exc_pdf:
-                    OcrPipelineService._rollback_safely(db)
-                    result["steps"]["matricula_pdf"] = {
-                        "success": False,
-                        "message": f"Falha ao gerar PDF matrícula: {str(exc_pdf)}",
-                    }
-                    result["errors"].append(f"Matrícula PDF: {str(exc_pdf)}")
-                    print(f"❌ Falha ao gerar PDF matrícula: {str(exc_pdf)}")
+        score_ocr = 0
+        confianca_geral = None
 
-            else:
-                result["steps"]["matricula"] = {
-                    "success": False,
-                    "message": "OCR não retornou matrícula.",
-                }
-                result["errors"].append("OCR não retornou matrícula")
+        if isinstance(qualidade_ocr, dict):
+            try:
+                score_ocr = int(qualidade_ocr.get("score", 0) or 0)
+            except Exception:
+                score_ocr = 0
 
-        except Exception as exc:
-            OcrPipelineService._rollback_safely(db)
-            result["steps"]["matricula"] = {
-                "success": False,
-                "message": f"Falha ao persistir matrícula: {str(exc)}",
-            }
-            result["errors"].append(f"Matrícula: {str(exc)}")
+            confianca_geral = qualidade_ocr.get("confianca_geral")
 
-        # ================= ANÁLISE =================
-        try:
-            if matricula and matricula.inteiro_teor:
-
-                dados_analise: dict[str, Any] = {
-                    "texto": matricula.inteiro_teor,
-                    "numero_matricula": matricula.numero_matricula,
-                    "comarca": matricula.comarca,
-                    "livro": matricula.livro,
-                    "folha": matricula.folha,
-                    "codigo_cartorio": matricula.codigo_cartorio,
-                    "dados_ocr": dados,
-                }
+        # 🔥 NOVO — CONTROLE DE SIGEF
+        sigef_obrigatorio = bool(
+            ctx.geometria
+            and epsg_origem_atual
+            and epsg_origem_atual > 0
+        )
 
-                # =========================================================
-                # PROPRIETÁRIOS
-                # =========================================================
-                try:
-                    proprietarios = dados.get("proprietarios")
-                    if isinstance(proprietarios, list):
-                        dados_analise["proprietarios"] = proprietarios
-                except Exception:
-                    pass
+        sigef_ok = bool(result["steps"]["sigef_csv"].get("success"))
 
-                # =========================================================
-                # CONFRONTANTES (BANCO)
-                # =========================================================
-                try:
-                    confrontantes_formatados = []
-
-                    if confrontantes_db:
-                        for c in confrontantes_db:
-                            confrontantes_formatados.append(
-                                {
-                                    "nome": getattr(c, "nome", None),
-                                    "descricao": getattr(c, "descricao", None),
-                                    "lado": getattr(c, "lado", None),
-                                    "lado_normalizado": getattr(c, "lado_normalizado", None),
-                                    "matricula": getattr(c, "matricula", None),
-                                    "identificacao": getattr(c, "identificacao", None),
-                                }
-                            )
-
-                    if confrontantes_formatados:
-                        dados_analise["confrontantes"] = confrontantes_formatados
+        # 🔥 NOVO — REGRAS DE SUCESSO
+        sucesso_base = (
+            geometria_ok
+            and memorial_ok
+            and croqui_ok
+            and cad_ok
+        )
 
-                except Exception:
-                    pass
+        if sigef_obrigatorio:
+            sucesso_base = sucesso_base and sigef_ok
 
-                # 🔥 CONSISTÊNCIA OCR vs DB
-                try:
-                    confrontantes_ocr = dados.get("confrontantes") or []
-                    if isinstance(confrontantes_ocr, list):
-                        if len(confrontantes_ocr) != len(confrontantes_db):
-                            print("⚠️ Divergência OCR vs Banco em confrontantes")
-                except Exception:
-                    pass
+        # 🔥 NOVO — VALIDAÇÃO DE QUALIDADE (SEM QUEBRAR FLUXO)
+        qualidade_minima_ok = score_ocr >= 60
 
-                analise = MatriculaAnalysisService.analisar(
-                    texto=matricula.inteiro_teor,
-                    dados_ocr=dados,
+        if not qualidade_minima_ok:
+            result["errors"].append(
+                f"Qualidade OCR insuficiente para sucesso final do pipeline (score={score_ocr})."
+            )
 
-                )
-                
+        result["success"] = sucesso_base and qualidade_minima_ok
 
+        # 🔥 NOVO — DEBUG E RASTREABILIDADE (CRÍTICO PARA PRODUÇÃO)
+        result["validacao_pipeline"] = {
+            "geometria_ok": geometria_ok,
+            "memorial_ok": memorial_ok,
+            "croqui_ok": croqui_ok,
+            "cad_ok": cad_ok,
+            "sigef_obrigatorio": sigef_obrigatorio,
+            "sigef_ok": sigef_ok,
+            "qualidade_score": score_ocr,
+            "qualidade_minima_ok": qualidade_minima_ok,
+            "confianca_geral": confianca_geral,
+        }
 
-                # 🔥 ENRIQUECIMENTO
-                if isinstance(analise, dict):
+        print("🏁 Pipeline OCR concluído")
+        return result
 
-                    classificacao = analise.get("classificacao") or {}
+    # =========================================================
+    # REAPROVEITAMENTO DE ARTEFATOS (CACHE POR CONTEÚDO)
+    # =========================================================
+    @staticmethod
+    def _impressao_geometria(ctx: ContextoPipeline, etapa: str, *entradas: Any) -> str:
+        """Impressão digital de uma etapa derivada da geometria persistida."""
+        return PipelineCacheService.impressao_etapa(
+            etapa,
+            ctx.geometria["id"],
+            ctx.geometria["hash_geojson"],
+            *entradas,
+        )
 
-                    if dados.get("proprietarios"):
-                        classificacao["proprietarios_identificados"] = True
+    @staticmethod
+    def _metadata_cache(ctx: ContextoPipeline, impressao: str) -> dict[str, Any]:
+        return {
+            PipelineCacheService.CHAVE_METADATA: impressao,
+            "hash_payload": ctx.hash_payload,
+        }
 
-                    if confrontantes_db:
-                        classificacao["tem_confrontantes"] = True
+    @staticmethod
+    def _step_reaproveitado(ctx: ContextoPipeline, doc: Any, **extras: Any) -> dict[str, Any]:
+        print(f"♻️ {doc.tipo} reaproveitado (versão {doc.versao}): entradas inalteradas")
+
+        return {
+            "success": True,
+            "reaproveitado": True,
+            "documento_tecnico_id": doc.id,
+            "arquivo_path": doc.arquivo_path,
+            "arquivo_url": OcrPipelineService._build_file_url(ctx.base_url, doc.arquivo_path),
+            "fonte": ctx.fonte_geom,
+            "message": f"{doc.tipo} reaproveitado: entradas inalteradas.",
+            **extras,
+        }
 
-                    analise["classificacao"] = classificacao
+    # =========================================================
+    # ETAPA — MATRÍCULA
+    # =========================================================
+    @staticmethod
+    def _etapa_matricula(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        imovel = db.query(Imovel).filter(Imovel.id == ctx.imovel_id).first()
 
-                    score = analise.get("score_juridico", 0)
+        matricula = OcrPipelineService._upsert_matricula(
+            db=db,
+            imovel=imovel,
+            dados=ctx.dados,
+        )
 
-                    if dados.get("proprietarios"):
-                        score += min(len(dados["proprietarios"]) * 3, 10)
+        if not matricula:
+            ctx.erros.append("OCR não retornou matrícula")
+            return {
+                "success": False,
+                "message": "OCR não retornou matrícula.",
+            }
 
-                    if confrontantes_db:
-                        score += min(len(confrontantes_db) * 2, 10)
+        ctx.matricula = {
+            "id": matricula.id,
+            "numero_matricula": matricula.numero_matricula,
+            "comarca": matricula.comarca,
+            "livro": matricula.livro,
+            "folha": matricula.folha,
+            "codigo_cartorio": matricula.codigo_cartorio,
+            "inteiro_teor": matricula.inteiro_teor,
+        }
 
-                    if matricula.livro and matricula.folha:
-                        score += 5
+        return {
+            "success": True,
+            "matricula_id": matricula.id,
+            "numero_matricula": matricula.numero_matricula,
+            "comarca": matricula.comarca,
+            "arquivo_path": None,
+            "arquivo_url": None,
+        }
 
-                    score = min(score, 100)
+    # =========================================================
+    # ETAPA — MATRÍCULA PDF
+    # =========================================================
+    @staticmethod
+    def _etapa_matricula_pdf(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        from app.services.matricula_pdf_service import MatriculaPdfService
+        from app.services.matricula_ocr_processor_service import MatriculaOcrProcessorService
 
-                    analise["score_juridico"] = score
+        payload = MatriculaOcrProcessorService.gerar_payload_documentos(
+            db=db,
+            matricula_id=ctx.matricula["id"],
+        )
 
-                result["steps"]["analise_juridica"] = analise
+        impressao = PipelineCacheService.impressao_etapa(
+            "matricula_pdf",
+            ctx.imovel_id,
+            payload,
+        )
 
-            else:
-                result["steps"]["analise_juridica"] = {
-                    "success": False,
-                    "message": "Matrícula inexistente ou sem inteiro_teor para análise.",
-                }
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "MATRICULA_PDF", impressao
+        )
+        if reaproveitado:
+            return OcrPipelineService._step_reaproveitado(ctx, reaproveitado)
 
-        except Exception as exc:
-            OcrPipelineService._rollback_safely(db)
-            result["steps"]["analise_juridica"] = {
-                "success": False,
-                "message": f"Erro na análise jurídica: {str(exc)}",
-            }
-            result["errors"].append(f"Analise juridica: {str(exc)}")
+        pdf = MatriculaPdfService.gerar_pdf_em_pool(
+            imovel_id=ctx.imovel_id,
+            dados=payload,
+        )
 
-        # ================= GEOMETRIA =================
-        geojson: Optional[str] = None
-        geometria: Optional[Geometria] = None
-        fonte_geom: Optional[str] = None
+        doc_pdf = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="MATRICULA_PDF",
+                tipo="Matrícula PDF",
+                status_tecnico="EM_ANALISE",
+                arquivo_path=pdf.get("arquivo_path"),
+                metadata_json={
+                    "matricula_id": ctx.matricula["id"],
+                    "numero_matricula": ctx.matricula["numero_matricula"],
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                gerado_em=datetime.utcnow(),
+            ),
+        )
 
-        try:
-            geojson = OcrPipelineService._resolver_geojson(dados)
+        url_pdf = OcrPipelineService._build_file_url(
+            ctx.base_url,
+            pdf.get("arquivo_path"),
+        )
 
-            # 🔥 NOVO — identificar fonte geométrica (sem quebrar legado)
-            try:
-                if isinstance(dados.get("geometria"), dict):
-                    fonte_geom = (
-                        dados.get("geometria", {}).get("fonte")
-                        or ("GEOJSON" if dados.get("geometria", {}).get("geojson") else None)
-                        or ("SEGMENTOS" if dados.get("geometria", {}).get("segmentos") else None)
-                        or ("MEMORIAL" if dados.get("geometria", {}).get("memorial_texto") else None)
-                    )
-            except Exception:
-                fonte_geom = None
+        print(f"✅ PDF matrícula gerado: {pdf.get('arquivo_path')}")
 
-        except Exception as exc:
-            OcrPipelineService._rollback_safely(db)
-            result["errors"].append(f"Resolver geojson: {str(exc)}")
+        return {
+            "success": True,
+            "documento_tecnico_id": doc_pdf.id,
+            "arquivo_path": pdf.get("arquivo_path"),
+            "arquivo_url": url_pdf,
+            "message": "PDF da matrícula gerado.",
+        }
 
-        if geojson:
-            try:
-                # 🔥 VALIDAÇÃO MÍNIMA DO GEOJSON
-                geojson_obj = None
-                try:
-                    geojson_obj = json.loads(geojson) if isinstance(geojson, str) else geojson
-                except Exception:
-                    geojson_obj = None
+    # =========================================================
+    # ETAPA — ANÁLISE JURÍDICA
+    # =========================================================
+    @staticmethod
+    def _etapa_analise_juridica(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        matricula = ctx.matricula
+        dados = ctx.dados
 
-                if not isinstance(geojson_obj, dict) or not geojson_obj.get("type"):
-                    raise Exception("GeoJSON inválido ou sem campo 'type'")
+        if not matricula.get("inteiro_teor"):
+            return {
+                "success": False,
+                "message": "Matrícula inexistente ou sem inteiro_teor para análise.",
+            }
 
-                analise_geo = GeometriaService.analisar_referencial(
-                    geojson=geojson,
-                    epsg_origem=4326,
-                )
+        analise = MatriculaAnalysisService.analisar(
+            texto=matricula["inteiro_teor"],
+            dados_ocr=dados,
+        )
 
-                tipo_referencial = str(analise_geo.get("tipo_referencial"))
-                epsg_origem = 0 if tipo_referencial == "LOCAL_CARTESIANA" else 4326
+        # 🔥 ENRIQUECIMENTO
+        if isinstance(analise, dict):
 
-                epsg_utm, area_ha, perimetro_m = GeometriaService.calcular_area_perimetro(
-                    geojson=geojson,
-                    epsg_origem=epsg_origem,
-                )
+            classificacao = analise.get("classificacao") or {}
 
-                geometria = Geometria(
-                    imovel_id=imovel.id,
-                    geojson=geojson,
-                    epsg_origem=epsg_origem,
-                    epsg_utm=epsg_utm,
-                    area_hectares=area_ha,
-                    perimetro_m=perimetro_m,
-                )
+            if dados.get("proprietarios"):
+                classificacao["proprietarios_identificados"] = True
 
-                db.add(geometria)
-                db.commit()
-                db.refresh(geometria)
+            analise["classificacao"] = classificacao
 
-                # ================= GEOJSON FILE =================
-                geo_file = GeometriaService.exportar_geojson(
-                    imovel_id=imovel.id,
-                    geojson=geometria.geojson,
-                )
+            score = analise.get("score_juridico", 0)
 
-                doc_geo = create_documento_tecnico(
-                    db=db,
-                    imovel_id=imovel.id,
-                    data=DocumentoTecnicoCreate(
-                        document_group_key="GEOMETRIA_GEOJSON",
-                        tipo="GeoJSON",
-                        status_tecnico="EM_ANALISE",
-                        arquivo_path=geo_file.get("arquivo_path"),
-                        metadata_json={
-                            "geometria_id": geometria.id,
-                            "epsg_origem": geometria.epsg_origem,
-                            "epsg_utm": geometria.epsg_utm,
-                            "fonte_geom": fonte_geom,
-                        },
-                        gerado_em=datetime.utcnow(),
-                    ),
-                )
+            if dados.get("proprietarios"):
+                score += min(len(dados["proprietarios"]) * 3, 10)
 
-                url_geo = OcrPipelineService._build_file_url(
-                    base_url,
-                    geo_file.get("arquivo_path"),
-                )
+            if matricula.get("livro") and matricula.get("folha"):
+                score += 5
 
-                result["steps"]["geometria"] = {
-                    "success": True,
-                    "geometria_id": geometria.id,
-                    "tipo_referencial": tipo_referencial,
-                    "epsg_origem": geometria.epsg_origem,
-                    "epsg_utm": geometria.epsg_utm,
-                    "area_hectares": geometria.area_hectares,
-                    "perimetro_m": geometria.perimetro_m,
-                    "arquivo_path": geo_file.get("arquivo_path"),
-                    "arquivo_url": url_geo,
-                    "documento_tecnico_id": doc_geo.id,
-                    "fonte": fonte_geom,
-                }
+            score = min(score, 100)
 
-                try:
-                    from app.services.confrontante_service import ConfrontanteService
-                    from app.models.confrontante import Confrontante
-
-                    confrontantes_raw = dados.get("confrontantes") or []
-
-                    confrontantes_processados = []
-
-                    if isinstance(confrontantes_raw, list):
-
-                        for index, c in enumerate(confrontantes_raw, start=1):
-
-                            if not isinstance(c, dict):
-                                continue
-
-                            lado = OcrPipelineService._normalizar_texto_simples(
-                                c.get("lado") or c.get("direcao")
-                            )
-                            lado_norm = OcrPipelineService._normalizar_texto_simples(
-                                c.get("lado_normalizado")
-                            )
-
-                            nome = OcrPipelineService._normalizar_texto_simples(
-                                c.get("nome")
-                            )
-                            descricao = OcrPipelineService._normalizar_texto_simples(
-                                c.get("descricao")
-                            )
-                            matricula_cft = OcrPipelineService._normalizar_texto_simples(
-                                c.get("matricula")
-                            )
-                            identificacao = OcrPipelineService._normalizar_texto_simples(
-                                c.get("identificacao")
-                            )
-                            cpf_cnpj = OcrPipelineService._normalizar_texto_simples(
-                                c.get("cpf_cnpj")
-                            )
-
-                            # 🔥 REGRA: precisa ter pelo menos alguma informação útil
-                            if not any([nome, descricao, matricula_cft, identificacao, cpf_cnpj]):
-                                continue
-
-                            confrontantes_processados.append(
-                                {
-                                    "lado": lado,
-                                    "lado_normalizado": lado_norm,
-                                    "nome": nome,
-                                    "descricao": descricao,
-                                    "matricula": matricula_cft,
-                                    "identificacao": identificacao,
-                                    "cpf_cnpj": cpf_cnpj,
-
-                                    # 🔥 NÃO PERDER DADOS DO NORMALIZER
-                                    "tipo": OcrPipelineService._normalizar_texto_simples(c.get("tipo")),
-                                    "lote": OcrPipelineService._normalizar_texto_simples(c.get("lote")),
-                                    "gleba": OcrPipelineService._normalizar_texto_simples(c.get("gleba")),
-                                }
-                            )
-
-                    if not confrontantes_processados:
-                        print("⚠️ Nenhum confrontante válido após normalização")
-
-                    # =========================================================
-                    # 🔥 PERSISTÊNCIA (OCR → BANCO)
-                    # =========================================================
-                    confrontantes = ConfrontanteService.processar_confrontantes(
-                        db=db,
-                        imovel=imovel,
-                        geometria=geometria,
-                        confrontantes_ocr=confrontantes_processados,
-                    )
-
-                    print(f"✅ Confrontantes processados: {len(confrontantes)}")
-
-                    # =========================================================
-                    # 🔥 BUSCA DO BANCO (FONTE OFICIAL)
-                    # =========================================================
-                    try:
-                        confrontantes_db = (
-                            db.query(Confrontante)
-                            .filter(Confrontante.imovel_id == imovel.id)
-                            .all()
-                        ) or []
-
-                        print(f"📦 Confrontantes carregados do banco: {len(confrontantes_db)}")
-
-                    except Exception as exc_db:
-                        confrontantes_db = []
-                        print(f"⚠️ Falha ao carregar confrontantes do banco: {str(exc_db)}")
-
-                    result["steps"]["confrontantes"] = {
-                        "success": True,
-                        "total": len(confrontantes),
-                        "normalizados": len(confrontantes_processados),
-                        "persistidos": len(confrontantes_db),
-                        "fonte_geom": fonte_geom,
-                    }
+            analise["score_juridico"] = score
 
-                except Exception as exc:
-                    OcrPipelineService._rollback_safely(db)
+        return analise
 
-                    confrontantes_db = []
+    # =========================================================
+    # ETAPA — GEOMETRIA
+    # =========================================================
+    @staticmethod
+    def _etapa_geometria(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        dados = ctx.dados
 
-                    result["steps"]["confrontantes"] = {
-                        "success": False,
-                        "message": f"Falha ao processar confrontantes: {str(exc)}",
-                    }
+        try:
+            geojson = OcrPipelineService._resolver_geojson(dados)
+        except Exception as exc:
+            ctx.erros.append(f"Resolver geojson: {str(exc)}")
+            geojson = None
 
-                    result["errors"].append(f"Confrontantes: {str(exc)}")
+        # 🔥 NOVO — identificar fonte geométrica (sem quebrar legado)
+        try:
+            if isinstance(dados.get("geometria"), dict):
+                ctx.fonte_geom = (
+                    dados.get("geometria", {}).get("fonte")
+                    or ("GEOJSON" if dados.get("geometria", {}).get("geojson") else None)
+                    or ("SEGMENTOS" if dados.get("geometria", {}).get("segmentos") else None)
+                    or ("MEMORIAL" if dados.get("geometria", {}).get("memorial_texto") else None)
+                )
+        except Exception:
+            ctx.fonte_geom = None
 
-                    print(f"❌ Falha confrontantes: {str(exc)}")
+        fonte_geom = ctx.fonte_geom
 
-            except Exception as exc:
-                OcrPipelineService._rollback_safely(db)
-                result["steps"]["geometria"] = {
-                    "success": False,
-                    "message": f"Falha ao gerar geometria: {str(exc)}",
-                    "fonte": fonte_geom,
-                }
-                result["errors"].append(f"Geometria: {str(exc)}")
-        else:
-            result["steps"]["geometria"] = {
+        if not geojson:
+            return {
                 "success": False,
                 "message": "Nenhuma fonte geométrica válida encontrada.",
                 "fonte": fonte_geom,
             }
 
-        # ================= MEMORIAL =================
-        if geometria:
-            try:
-                # =========================================================
-                # CONFRONTANTES DO BANCO → FORMATO DO MEMORIAL
-                # =========================================================
-                confrontantes_formatados = []
+        # 🔥 VALIDAÇÃO MÍNIMA DO GEOJSON
+        geojson_obj = None
+        try:
+            geojson_obj = json.loads(geojson) if isinstance(geojson, str) else geojson
+        except Exception:
+            geojson_obj = None
 
-                try:
-                    if isinstance(confrontantes_db, list) and confrontantes_db:
-                        for c in confrontantes_db:
-                            confrontantes_formatados.append(
-                                {
-                                    "nome": getattr(c, "nome", None),
-                                    "descricao": getattr(c, "descricao", None),
-                                    "lado": getattr(c, "lado", None),
-                                    "lado_normalizado": getattr(c, "lado_normalizado", None),
-                                    "matricula": getattr(c, "matricula", None),
-                                    "identificacao": getattr(c, "identificacao", None),
-
-                                    # 🔥 NOVO — NÃO PERDER DADOS
-                                    "cpf_cnpj": getattr(c, "cpf_cnpj", None),
-                                    "tipo": getattr(c, "tipo", None),
-                                    "lote": getattr(c, "lote", None),
-                                    "gleba": getattr(c, "gleba", None),
-                                }
-                            )
-                except Exception:
-                    confrontantes_formatados = []
+        if not isinstance(geojson_obj, dict) or not geojson_obj.get("type"):
+            raise Exception("GeoJSON inválido ou sem campo 'type'")
 
-                # =========================================================
-                # DADOS AUXILIARES DO IMÓVEL
-                # =========================================================
-                nome_imovel = None
+        hash_geojson = PipelineCacheService.hash_payload(geojson)
+        impressao = PipelineCacheService.impressao_etapa(
+            "geometria",
+            ctx.imovel_id,
+            hash_geojson,
+        )
 
-                try:
-                    nome_imovel = getattr(imovel, "nome", None)
-                except Exception:
-                    nome_imovel = None
-
-                memorial = MemorialService.gerar_memorial(
-                    geometria_id=geometria.id,
-                    geojson=geometria.geojson,
-                    epsg_origem=geometria.epsg_origem,
-                    area_hectares=geometria.area_hectares or 0,
-                    perimetro_m=geometria.perimetro_m or 0,
-                    imovel_id=imovel.id,
-                    confrontantes=confrontantes_formatados,
-                    nome_imovel=nome_imovel,
-                )
+        reaproveitado = OcrPipelineService._geometria_reaproveitada(
+            db, ctx, impressao, hash_geojson
+        )
+        if reaproveitado:
+            return reaproveitado
 
-                memorial_json = OcrPipelineService._json_safe(memorial)
-                memorial_texto = str(memorial.get("texto_preview") or "").strip()
-
-                if not memorial_texto:
-                    raise ValueError("Memorial gerado sem texto_preview.")
-
-                doc_memorial = create_documento_tecnico(
-                    db=db,
-                    imovel_id=imovel.id,
-                    data=DocumentoTecnicoCreate(
-                        document_group_key="MEMORIAL_DESCRITIVO",
-                        tipo="Memorial Descritivo",
-                        status_tecnico="EM_ANALISE",
-                        conteudo_texto=memorial_texto,
-                        conteudo_json=memorial_json,
-                        metadata_json={
-                            "geometria_id": geometria.id,
-                            "epsg_origem": geometria.epsg_origem,
-                            "epsg_utm": memorial.get("epsg_utm"),
-                            "tipo_referencial": memorial.get("tipo_referencial"),
-                            "arquivo_path": memorial.get("arquivo_path"),
-                            "arquivo_url": memorial.get("arquivo_url"),
-                            "fonte_geom": fonte_geom,
-                            "total_confrontantes": len(confrontantes_formatados),
-                            "nome_imovel": nome_imovel,
-                        },
-                        arquivo_path=memorial.get("arquivo_path"),
-                        arquivo_url=memorial.get("arquivo_url"),
-                        gerado_em=datetime.utcnow(),
-                    ),
-                )
+        analise_geo = GeometriaService.analisar_referencial(
+            geojson=geojson,
+            epsg_origem=4326,
+        )
 
-                result["steps"]["memorial"] = {
-                    "success": True,
-                    "documento_tecnico_id": doc_memorial.id,
-                    "texto_preview": memorial_texto[:4000],
-                    "arquivo_path": memorial.get("arquivo_path"),
-                    "arquivo_url": memorial.get("arquivo_url"),
-                    "tipo_referencial": memorial.get("tipo_referencial"),
-                    "epsg_utm": memorial.get("epsg_utm"),
-                    "fonte": fonte_geom,
-                    "total_confrontantes": len(confrontantes_formatados),
-                    "message": "Memorial gerado com arquivo.",
-                }
+        tipo_referencial = str(analise_geo.get("tipo_referencial"))
+        epsg_origem = 0 if tipo_referencial == "LOCAL_CARTESIANA" else 4326
 
-            except Exception as exc:
-                OcrPipelineService._rollback_safely(db)
-                result["steps"]["memorial"] = {
-                    "success": False,
-                    "message": f"Falha ao gerar memorial: {str(exc)}",
-                    "fonte": fonte_geom,
-                }
-                result["errors"].append(f"Memorial: {str(exc)}")
-        else:
-            result["steps"]["memorial"] = {
-                "success": False,
-                "skipped": True,
-                "message": "Memorial não executado: geometria inexistente.",
-                "fonte": fonte_geom,
-            }
+        epsg_utm, area_ha, perimetro_m = GeometriaService.calcular_area_perimetro(
+            geojson=geojson,
+            epsg_origem=epsg_origem,
+        )
 
-        # =========================================================
-        # CROQUI
-        # =========================================================
-        if geometria:
-            try:
-                # =========================================================
-                # CONFRONTANTES DO BANCO (PADRÃO CORRETO DO PIPELINE)
-                # =========================================================
-                confrontantes_formatados = []
+        geometria = Geometria(
+            imovel_id=ctx.imovel_id,
+            geojson=geojson,
+            epsg_origem=epsg_origem,
+            epsg_utm=epsg_utm,
+            area_hectares=area_ha,
+            perimetro_m=perimetro_m,
+        )
 
-                try:
-                    if isinstance(confrontantes_db, list) and confrontantes_db:
-                        for c in confrontantes_db:
-                            confrontantes_formatados.append(
-                                {
-                                    "nome": getattr(c, "nome", None),
-                                    "descricao": getattr(c, "descricao", None),
-                                    "lado": getattr(c, "lado", None),
-                                    "lado_normalizado": getattr(c, "lado_normalizado", None),
-                                    "matricula": getattr(c, "matricula", None),
-                                    "identificacao": getattr(c, "identificacao", None),
-
-                                    # 🔥 NOVO — CONSISTÊNCIA COM MEMORIAL
-                                    "cpf_cnpj": getattr(c, "cpf_cnpj", None),
-                                    "tipo": getattr(c, "tipo", None),
-                                    "lote": getattr(c, "lote", None),
-                                    "gleba": getattr(c, "gleba", None),
-                                }
-                            )
-                except Exception:
-                    confrontantes_formatados = []
+        db.add(geometria)
+        db.commit()
+        db.refresh(geometria)
+
+        ctx.geometria = {
+            "id": geometria.id,
+            "geojson": geometria.geojson,
+            "epsg_origem": geometria.epsg_origem,
+            "epsg_utm": geometria.epsg_utm,
+            "area_hectares": geometria.area_hectares,
+            "perimetro_m": geometria.perimetro_m,
+            "hash_geojson": hash_geojson,
+        }
 
-                svg = CroquiService.gerar_svg(
-                    geometria.geojson,
-                    confrontantes=confrontantes_formatados,
-                )
+        # ================= GEOJSON FILE =================
+        geo_file = GeometriaService.exportar_geojson(
+            imovel_id=ctx.imovel_id,
+            geojson=geometria.geojson,
+        )
 
-                folder = f"app/uploads/imoveis/{imovel.id}/croqui"
-                os.makedirs(folder, exist_ok=True)
-
-                path_svg = f"{folder}/croqui_{geometria.id}.svg"
-
-                with open(path_svg, "w", encoding="utf-8") as f:
-                    f.write(svg)
-
-                url_svg = OcrPipelineService._build_file_url(base_url, path_svg)
-
-                doc_croqui = create_documento_tecnico(
-                    db=db,
-                    imovel_id=imovel.id,
-                    data=DocumentoTecnicoCreate(
-                        document_group_key="CROQUI",
-                        tipo="Croqui",
-                        status_tecnico="EM_ANALISE",
-                        arquivo_path=path_svg,
-                        metadata_json={
-                            "geometria_id": geometria.id,
-                            "confrontantes_incluidos": bool(confrontantes_formatados),
-                            "total_confrontantes": len(confrontantes_formatados),
-                            "fonte_geom": fonte_geom,  # 🔥 NOVO
-                        },
-                        gerado_em=datetime.utcnow(),
-                    ),
-                )
+        doc_geo = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="GEOMETRIA_GEOJSON",
+                tipo="GeoJSON",
+                status_tecnico="EM_ANALISE",
+                arquivo_path=geo_file.get("arquivo_path"),
+                metadata_json={
+                    "geometria_id": ctx.geometria["id"],
+                    "epsg_origem": ctx.geometria["epsg_origem"],
+                    "epsg_utm": ctx.geometria["epsg_utm"],
+                    "fonte_geom": fonte_geom,
+                    "tipo_referencial": tipo_referencial,
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                gerado_em=datetime.utcnow(),
+            ),
+        )
 
-                result["steps"]["croqui"] = {
-                    "success": True,
-                    "arquivo_path": path_svg,
-                    "arquivo_url": url_svg,
-                    "documento_tecnico_id": doc_croqui.id,
-                    "confrontantes_incluidos": bool(confrontantes_formatados),
-                    "total_confrontantes": len(confrontantes_formatados),
-                    "fonte": fonte_geom,  # 🔥 NOVO
-                    "message": f"Croqui salvo: {path_svg}",
-                }
+        url_geo = OcrPipelineService._build_file_url(
+            ctx.base_url,
+            geo_file.get("arquivo_path"),
+        )
 
-                print(f"✅ Croqui salvo: {path_svg}")
+        return {
+            "success": True,
+            "geometria_id": ctx.geometria["id"],
+            "tipo_referencial": tipo_referencial,
+            "epsg_origem": ctx.geometria["epsg_origem"],
+            "epsg_utm": ctx.geometria["epsg_utm"],
+            "area_hectares": ctx.geometria["area_hectares"],
+            "perimetro_m": ctx.geometria["perimetro_m"],
+            "arquivo_path": geo_file.get("arquivo_path"),
+            "arquivo_url": url_geo,
+            "documento_tecnico_id": doc_geo.id,
+            "fonte": fonte_geom,
+        }
 
-            except Exception as exc:
-                OcrPipelineService._rollback_safely(db)
-                result["steps"]["croqui"] = {
-                    "success": False,
-                    "message": f"Falha ao gerar croqui: {str(exc)}",
-                }
-                result["errors"].append(f"Croqui: {str(exc)}")
-                print(f"❌ Falha ao gerar croqui: {str(exc)}")
-        else:
-            result["steps"]["croqui"] = {
-                "success": False,
-                "skipped": True,
-                "message": "Croqui não executado: geometria inexistente.",
-                "fonte": fonte_geom,
-            }
+    @staticmethod
+    def _geometria_reaproveitada(
+        db: Session,
+        ctx: ContextoPipeline,
+        impressao: str,
+        hash_geojson: str,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Mesmo GeoJSON já persistido para o imóvel: reaproveita a Geometria
+        (e, por consequência, o id que chaveia os artefatos derivados).
+        """
+        doc_geo = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "GEOMETRIA_GEOJSON", impressao
+        )
+        if not doc_geo:
+            return None
 
-        # =========================================================
-        # CAD / SCR
-        # =========================================================
-        if geometria:
-            try:
-                scr = CadExportService.gerar_scr(geometria.geojson)
+        metadata = doc_geo.metadata_json or {}
+
+        geometria = (
+            db.query(Geometria)
+            .filter(
+                Geometria.id == metadata.get("geometria_id"),
+                Geometria.imovel_id == ctx.imovel_id,
+            )
+            .first()
+        )
+
+        # Geometria editada depois da geração: não serve mais
+        if not geometria or PipelineCacheService.hash_payload(geometria.geojson) != hash_geojson:
+            return None
+
+        ctx.geometria = {
+            "id": geometria.id,
+            "geojson": geometria.geojson,
+            "epsg_origem": geometria.epsg_origem,
+            "epsg_utm": geometria.epsg_utm,
+            "area_hectares": geometria.area_hectares,
+            "perimetro_m": geometria.perimetro_m,
+            "hash_geojson": hash_geojson,
+        }
+
+        return OcrPipelineService._step_reaproveitado(
+            ctx,
+            doc_geo,
+            geometria_id=geometria.id,
+            tipo_referencial=metadata.get("tipo_referencial"),
+            epsg_origem=geometria.epsg_origem,
+            epsg_utm=geometria.epsg_utm,
+            area_hectares=geometria.area_hectares,
+            perimetro_m=geometria.perimetro_m,
+        )
 
-                path_scr = CadExportService.salvar_scr(
-                    imovel_id=imovel.id,
-                    scr=scr,
+    # =========================================================
+    # ETAPA — CONFRONTANTES
+    # =========================================================
+    @staticmethod
+    def _etapa_confrontantes(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        from app.services.confrontante_service import ConfrontanteService
+        from app.models.confrontante import Confrontante
+
+        confrontantes_raw = ctx.dados.get("confrontantes") or []
+
+        confrontantes_processados = []
+
+        if isinstance(confrontantes_raw, list):
+
+            for c in confrontantes_raw:
+
+                if not isinstance(c, dict):
+                    continue
+
+                lado = OcrPipelineService._normalizar_texto_simples(
+                    c.get("lado") or c.get("direcao")
+                )
+                lado_norm = OcrPipelineService._normalizar_texto_simples(
+                    c.get("lado_normalizado")
                 )
 
-                url_scr = OcrPipelineService._build_file_url(base_url, path_scr)
-
-                doc_cad = create_documento_tecnico(
-                    db=db,
-                    imovel_id=imovel.id,
-                    data=DocumentoTecnicoCreate(
-                        document_group_key="CAD_SCRIPT",
-                        tipo="Script CAD",
-                        status_tecnico="EM_ANALISE",
-                        arquivo_path=path_scr,
-                        metadata_json={
-                            "geometria_id": geometria.id,
-                            "formato": "SCR",
-                            "fonte_geom": fonte_geom,  # 🔥 NOVO
-                        },
-                        gerado_em=datetime.utcnow(),
-                    ),
+                nome = OcrPipelineService._normalizar_texto_simples(
+                    c.get("nome")
+                )
+                descricao = OcrPipelineService._normalizar_texto_simples(
+                    c.get("descricao")
+                )
+                matricula_cft = OcrPipelineService._normalizar_texto_simples(
+                    c.get("matricula")
+                )
+                identificacao = OcrPipelineService._normalizar_texto_simples(
+                    c.get("identificacao")
+                )
+                cpf_cnpj = OcrPipelineService._normalizar_texto_simples(
+                    c.get("cpf_cnpj")
                 )
 
-                result["steps"]["cad"] = {
-                    "success": True,
-                    "arquivo_path": path_scr,
-                    "arquivo_url": url_scr,
-                    "documento_tecnico_id": doc_cad.id,
-                    "fonte": fonte_geom,  # 🔥 NOVO
-                    "message": f"Script CAD salvo: {path_scr}",
-                }
+                # 🔥 REGRA: precisa ter pelo menos alguma informação útil
+                if not any([nome, descricao, matricula_cft, identificacao, cpf_cnpj]):
+                    continue
 
-                print(f"✅ Script CAD salvo: {path_scr}")
+                confrontantes_processados.append(
+                    {
+                        "lado": lado,
+                        "lado_normalizado": lado_norm,
+                        "nome": nome,
+                        "descricao": descricao,
+                        "matricula": matricula_cft,
+                        "identificacao": identificacao,
+                        "cpf_cnpj": cpf_cnpj,
+
+                        # 🔥 NÃO PERDER DADOS DO NORMALIZER
+                        "tipo": OcrPipelineService._normalizar_texto_simples(c.get("tipo")),
+                        "lote": OcrPipelineService._normalizar_texto_simples(c.get("lote")),
+                        "gleba": OcrPipelineService._normalizar_texto_simples(c.get("gleba")),
+                    }
+                )
 
-            except Exception as exc:
-                OcrPipelineService._rollback_safely(db)
-                result["steps"]["cad"] = {
-                    "success": False,
-                    "message": f"Falha ao gerar CAD: {str(exc)}",
-                }
-                result["errors"].append(f"CAD: {str(exc)}")
-                print(f"❌ Falha ao gerar CAD: {str(exc)}")
-        else:
-            result["steps"]["cad"] = {
-                "success": False,
-                "skipped": True,
-                "message": "CAD não executado: geometria inexistente.",
-                "fonte": fonte_geom,
-            }
+        if not confrontantes_processados:
+            print("⚠️ Nenhum confrontante válido após normalização")
+
+        imovel = db.query(Imovel).filter(Imovel.id == ctx.imovel_id).first()
+        geometria = db.query(Geometria).filter(Geometria.id == ctx.geometria["id"]).first()
 
         # =========================================================
-        # TXT (LISP / COORDENADAS)
+        # 🔥 PERSISTÊNCIA (OCR → BANCO)
         # =========================================================
-        if geometria:
-            try:
-                from app.services.txt_lisp_service import TxtLispService
+        confrontantes = ConfrontanteService.processar_confrontantes(
+            db=db,
+            imovel=imovel,
+            geometria=geometria,
+            confrontantes_ocr=confrontantes_processados,
+        )
 
-                txt = TxtLispService.gerar_txt(geometria.geojson)
+        print(f"✅ Confrontantes processados: {len(confrontantes)}")
 
-                path_txt = TxtLispService.salvar_txt(
-                    imovel_id=imovel.id,
-                    txt=txt,
-                )
+        # =========================================================
+        # 🔥 BUSCA DO BANCO (FONTE OFICIAL)
+        # =========================================================
+        confrontantes_db: list = []
+        try:
+            confrontantes_db = (
+                db.query(Confrontante)
+                .filter(Confrontante.imovel_id == ctx.imovel_id)
+                .all()
+            ) or []
+
+            print(f"📦 Confrontantes carregados do banco: {len(confrontantes_db)}")
+
+        except Exception as exc_db:
+            confrontantes_db = []
+            print(f"⚠️ Falha ao carregar confrontantes do banco: {str(exc_db)}")
+
+        ctx.confrontantes = OcrPipelineService._formatar_confrontantes(confrontantes_db)
+
+        return {
+            "success": True,
+            "total": len(confrontantes),
+            "normalizados": len(confrontantes_processados),
+            "persistidos": len(confrontantes_db),
+            "fonte_geom": ctx.fonte_geom,
+        }
 
-                url_txt = OcrPipelineService._build_file_url(base_url, path_txt)
-
-                doc_txt = create_documento_tecnico(
-                    db=db,
-                    imovel_id=imovel.id,
-                    data=DocumentoTecnicoCreate(
-                        document_group_key="COORDENADAS_TXT",
-                        tipo="TXT Coordenadas",
-                        status_tecnico="EM_ANALISE",
-                        arquivo_path=path_txt,
-                        metadata_json={
-                            "geometria_id": geometria.id,
-                            "formato": "TXT",
-                            "fonte_geom": fonte_geom,  # 🔥 NOVO
-                        },
-                        gerado_em=datetime.utcnow(),
-                    ),
-                )
+    @staticmethod
+    def _formatar_confrontantes(confrontantes_db: list) -> list[dict[str, Any]]:
+        """
+        Confrontantes do banco → formato consumido por memorial, croqui e DXF.
+        """
+        confrontantes_formatados = []
 
-                result["steps"]["txt"] = {
-                    "success": True,
-                    "arquivo_path": path_txt,
-                    "arquivo_url": url_txt,
-                    "documento_tecnico_id": doc_txt.id,
-                    "fonte": fonte_geom,  # 🔥 NOVO
-                    "message": f"TXT gerado: {path_txt}",
-                }
+        try:
+            for c in confrontantes_db or []:
+                confrontantes_formatados.append(
+                    {
+                        "nome": getattr(c, "nome", None),
+                        "descricao": getattr(c, "descricao", None),
+                        "lado": getattr(c, "lado", None),
+                        "lado_normalizado": getattr(c, "lado_normalizado", None),
+                        "matricula": getattr(c, "matricula", None),
+                        "identificacao": getattr(c, "identificacao", None),
+
+                        # 🔥 NOVO — NÃO PERDER DADOS
+                        "cpf_cnpj": getattr(c, "cpf_cnpj", None),
+                        "tipo": getattr(c, "tipo", None),
+                        "lote": getattr(c, "lote", None),
+                        "gleba": getattr(c, "gleba", None),
+                    }
+                )
+        except Exception:
+            confrontantes_formatados = []
 
-                print(f"✅ TXT gerado: {path_txt}")
+        return confrontantes_formatados
 
-            except Exception as exc:
-                OcrPipelineService._rollback_safely(db)
-                result["steps"]["txt"] = {
-                    "success": False,
-                    "message": f"Falha ao gerar TXT: {str(exc)}",
-                }
-                result["errors"].append(f"TXT: {str(exc)}")
-                print(f"❌ Falha ao gerar TXT: {str(exc)}")
-        else:
-            result["steps"]["txt"] = {
-                "success": False,
-                "skipped": True,
-                "message": "TXT não executado: geometria inexistente.",
-                "fonte": fonte_geom,
-            }
+    # =========================================================
+    # ETAPA — MEMORIAL
+    # =========================================================
+    @staticmethod
+    def _etapa_memorial(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        geometria = ctx.geometria
+        fonte_geom = ctx.fonte_geom
+        confrontantes_formatados = list(ctx.confrontantes)
 
         # =========================================================
-        # DXF
+        # DADOS AUXILIARES DO IMÓVEL
         # =========================================================
-        if geometria:
-            try:
-                from app.services.dxf_export_service import DxfExportService
+        nome_imovel = None
 
-                # =========================================================
-                # CONFRONTANTES DO BANCO (PADRÃO COMPLETO DO PIPELINE)
-                # =========================================================
-                confrontantes_formatados = []
+        try:
+            imovel = db.query(Imovel).filter(Imovel.id == ctx.imovel_id).first()
+            nome_imovel = getattr(imovel, "nome", None)
+        except Exception:
+            nome_imovel = None
 
-                try:
-                    if isinstance(confrontantes_db, list) and confrontantes_db:
-                        for c in confrontantes_db:
-                            confrontantes_formatados.append(
-                                {
-                                    "nome": getattr(c, "nome", None),
-                                    "descricao": getattr(c, "descricao", None),
-                                    "lado": getattr(c, "lado", None),
-                                    "lado_normalizado": getattr(c, "lado_normalizado", None),
-                                    "matricula": getattr(c, "matricula", None),
-                                    "identificacao": getattr(c, "identificacao", None),
-
-                                    # 🔥 NOVO — CONSISTÊNCIA TOTAL COM PIPELINE
-                                    "cpf_cnpj": getattr(c, "cpf_cnpj", None),
-                                    "tipo": getattr(c, "tipo", None),
-                                    "lote": getattr(c, "lote", None),
-                                    "gleba": getattr(c, "gleba", None),
-                                }
-                            )
-                except Exception:
-                    confrontantes_formatados = []
-
-                # =========================================================
-                # GERAÇÃO DO DXF COM CONTEXTO COMPLETO
-                # =========================================================
-                doc_dxf_file = DxfExportService.gerar_dxf(
-                    geometria.geojson,
-                    confrontantes=confrontantes_formatados,
-                )
+        impressao = OcrPipelineService._impressao_geometria(
+            ctx,
+            "memorial",
+            confrontantes_formatados,
+            nome_imovel,
+        )
 
-                path_dxf = DxfExportService.salvar_dxf(
-                    imovel_id=imovel.id,
-                    doc=doc_dxf_file,
-                )
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "MEMORIAL_DESCRITIVO", impressao
+        )
+        if reaproveitado:
+            metadata = reaproveitado.metadata_json or {}
+            return OcrPipelineService._step_reaproveitado(
+                ctx,
+                reaproveitado,
+                texto_preview=(reaproveitado.conteudo_texto or "")[:4000],
+                arquivo_url=metadata.get("arquivo_url"),
+                tipo_referencial=metadata.get("tipo_referencial"),
+                epsg_utm=metadata.get("epsg_utm"),
+                total_confrontantes=len(confrontantes_formatados),
+            )
 
-                url_dxf = OcrPipelineService._build_file_url(base_url, path_dxf)
-
-                doc_dxf = create_documento_tecnico(
-                    db=db,
-                    imovel_id=imovel.id,
-                    data=DocumentoTecnicoCreate(
-                        document_group_key="DXF",
-                        tipo="Arquivo DXF",
-                        status_tecnico="EM_ANALISE",
-                        arquivo_path=path_dxf,
-                        metadata_json={
-                            "geometria_id": geometria.id,
-                            "formato": "DXF",
-                            "total_confrontantes": len(confrontantes_formatados),
-                            "fonte_geom": fonte_geom,  # 🔥 NOVO
-                        },
-                        gerado_em=datetime.utcnow(),
-                    ),
-                )
+        memorial = MemorialService.gerar_memorial(
+            geometria_id=geometria["id"],
+            geojson=geometria["geojson"],
+            epsg_origem=geometria["epsg_origem"],
+            area_hectares=geometria["area_hectares"] or 0,
+            perimetro_m=geometria["perimetro_m"] or 0,
+            imovel_id=ctx.imovel_id,
+            confrontantes=confrontantes_formatados,
+            nome_imovel=nome_imovel,
+        )
 
-                result["steps"]["dxf"] = {
-                    "success": True,
-                    "arquivo_path": path_dxf,
-                    "arquivo_url": url_dxf,
-                    "documento_tecnico_id": doc_dxf.id,
+        memorial_json = OcrPipelineService._json_safe(memorial)
+        memorial_texto = str(memorial.get("texto_preview") or "").strip()
+
+        if not memorial_texto:
+            raise ValueError("Memorial gerado sem texto_preview.")
+
+        doc_memorial = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="MEMORIAL_DESCRITIVO",
+                tipo="Memorial Descritivo",
+                status_tecnico="EM_ANALISE",
+                conteudo_texto=memorial_texto,
+                conteudo_json=memorial_json,
+                metadata_json={
+                    "geometria_id": geometria["id"],
+                    "epsg_origem": geometria["epsg_origem"],
+                    "epsg_utm": memorial.get("epsg_utm"),
+                    "tipo_referencial": memorial.get("tipo_referencial"),
+                    "arquivo_path": memorial.get("arquivo_path"),
+                    "arquivo_url": memorial.get("arquivo_url"),
+                    "fonte_geom": fonte_geom,
                     "total_confrontantes": len(confrontantes_formatados),
-                    "fonte": fonte_geom,  # 🔥 NOVO
-                    "message": f"DXF gerado: {path_dxf}",
-                }
+                    "nome_imovel": nome_imovel,
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                arquivo_path=memorial.get("arquivo_path"),
+                arquivo_url=memorial.get("arquivo_url"),
+                gerado_em=datetime.utcnow(),
+            ),
+        )
 
-                print(f"✅ DXF gerado: {path_dxf}")
+        return {
+            "success": True,
+            "documento_tecnico_id": doc_memorial.id,
+            "texto_preview": memorial_texto[:4000],
+            "arquivo_path": memorial.get("arquivo_path"),
+            "arquivo_url": memorial.get("arquivo_url"),
+            "tipo_referencial": memorial.get("tipo_referencial"),
+            "epsg_utm": memorial.get("epsg_utm"),
+            "fonte": fonte_geom,
+            "total_confrontantes": len(confrontantes_formatados),
+            "message": "Memorial gerado com arquivo.",
+        }
 
-            except Exception as exc:
-                OcrPipelineService._rollback_safely(db)
-                result["steps"]["dxf"] = {
-                    "success": False,
-                    "message": f"Falha ao gerar DXF: {str(exc)}",
-                }
-                result["errors"].append(f"DXF: {str(exc)}")
-                print(f"❌ Falha ao gerar DXF: {str(exc)}")
-        else:
-            result["steps"]["dxf"] = {
-                "success": False,
-                "skipped": True,
-                "message": "DXF não executado: geometria inexistente.",
-                "fonte": fonte_geom,
-            }
+    # =========================================================
+    # ETAPA — CROQUI
+    # =========================================================
+    @staticmethod
+    def _etapa_croqui(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        geometria = ctx.geometria
+        fonte_geom = ctx.fonte_geom
+        confrontantes_formatados = list(ctx.confrontantes)
+
+        impressao = OcrPipelineService._impressao_geometria(
+            ctx,
+            "croqui",
+            confrontantes_formatados,
+        )
 
-        # =========================================================
-        # SHP (QGIS READY + VALIDAÇÃO TOPOLOGICA)
-        # =========================================================
-        if geometria:
-            try:
-                from app.services.shp_export_service import ShpExportService
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "CROQUI", impressao
+        )
+        if reaproveitado:
+            return OcrPipelineService._step_reaproveitado(
+                ctx,
+                reaproveitado,
+                confrontantes_incluidos=bool(confrontantes_formatados),
+                total_confrontantes=len(confrontantes_formatados),
+            )
 
-                gdf = ShpExportService.gerar_shp(geometria.geojson)
+        svg = CroquiArtefatoService.svg(
+            geometria["geojson"],
+            confrontantes=confrontantes_formatados,
+        )
 
-                path_folder = ShpExportService.salvar_shp(
-                    imovel_id=imovel.id,
-                    gdf=gdf,
-                )
+        folder = f"app/uploads/imoveis/{ctx.imovel_id}/croqui"
+        os.makedirs(folder, exist_ok=True)
 
-                # 🔥 proteção adicional
-                if not os.path.exists(path_folder):
-                    raise Exception("Pasta SHP não foi criada corretamente")
+        path_svg = f"{folder}/croqui_{geometria['id']}.svg"
 
-                arquivos = os.listdir(path_folder)
+        with open(path_svg, "w", encoding="utf-8") as f:
+            f.write(svg)
 
-                shp_file = next(
-                    (f for f in arquivos if f.lower().endswith(".shp")),
-                    None
-                )
+        url_svg = OcrPipelineService._build_file_url(ctx.base_url, path_svg)
 
-                if not shp_file:
-                    raise Exception("Arquivo .shp não encontrado na pasta gerada")
+        doc_croqui = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="CROQUI",
+                tipo="Croqui",
+                status_tecnico="EM_ANALISE",
+                arquivo_path=path_svg,
+                metadata_json={
+                    "geometria_id": geometria["id"],
+                    "confrontantes_incluidos": bool(confrontantes_formatados),
+                    "total_confrontantes": len(confrontantes_formatados),
+                    "fonte_geom": fonte_geom,  # 🔥 NOVO
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                gerado_em=datetime.utcnow(),
+            ),
+        )
 
-                arquivo_path = f"{path_folder}/{shp_file}"
+        print(f"✅ Croqui salvo: {path_svg}")
+
+        return {
+            "success": True,
+            "arquivo_path": path_svg,
+            "arquivo_url": url_svg,
+            "documento_tecnico_id": doc_croqui.id,
+            "confrontantes_incluidos": bool(confrontantes_formatados),
+            "total_confrontantes": len(confrontantes_formatados),
+            "fonte": fonte_geom,  # 🔥 NOVO
+            "message": f"Croqui salvo: {path_svg}",
+        }
 
-                arquivo_url = OcrPipelineService._build_file_url(
-                    base_url,
-                    arquivo_path,
-                )
+    # =========================================================
+    # ETAPA — CAD / SCR
+    # =========================================================
+    @staticmethod
+    def _etapa_cad(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        geometria = ctx.geometria
+        fonte_geom = ctx.fonte_geom
 
-                doc_shp = create_documento_tecnico(
-                    db=db,
-                    imovel_id=imovel.id,
-                    data=DocumentoTecnicoCreate(
-                        document_group_key="SHP",
-                        tipo="Shapefile",
-                        status_tecnico="EM_ANALISE",
-                        arquivo_path=arquivo_path,
-                        metadata_json={
-                            "geometria_id": geometria.id,
-                            "formato": "SHP",
-                            "pasta_path": path_folder,
-                            "fonte_geom": fonte_geom,  # 🔥 NOVO
-                        },
-                        gerado_em=datetime.utcnow(),
-                    ),
-                )
+        impressao = OcrPipelineService._impressao_geometria(ctx, "cad")
 
-                result["steps"]["shp"] = {
-                    "success": True,
-                    "pasta_path": path_folder,
-                    "arquivo_path": arquivo_path,
-                    "arquivo_url": arquivo_url,
-                    "documento_tecnico_id": doc_shp.id,
-                    "fonte": fonte_geom,  # 🔥 NOVO
-                    "message": f"SHP gerado: {arquivo_path}",
-                }
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "CAD_SCRIPT", impressao
+        )
+        if reaproveitado:
+            return OcrPipelineService._step_reaproveitado(ctx, reaproveitado)
 
-                print(f"✅ SHP gerado: {arquivo_path}")
+        scr = CadExportService.gerar_scr(geometria["geojson"])
 
-            except Exception as exc:
-                OcrPipelineService._rollback_safely(db)
+        path_scr = CadExportService.salvar_scr(
+            imovel_id=ctx.imovel_id,
+            scr=scr,
+        )
 
-                result["steps"]["shp"] = {
-                    "success": False,
-                    "message": f"Falha ao gerar SHP: {str(exc)}",
-                }
+        url_scr = OcrPipelineService._build_file_url(ctx.base_url, path_scr)
+
+        doc_cad = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="CAD_SCRIPT",
+                tipo="Script CAD",
+                status_tecnico="EM_ANALISE",
+                arquivo_path=path_scr,
+                metadata_json={
+                    "geometria_id": geometria["id"],
+                    "formato": "SCR",
+                    "fonte_geom": fonte_geom,  # 🔥 NOVO
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                gerado_em=datetime.utcnow(),
+            ),
+        )
 
-                result["errors"].append(f"SHP: {str(exc)}")
+        print(f"✅ Script CAD salvo: {path_scr}")
 
-                print(f"❌ Falha ao gerar SHP: {str(exc)}")
+        return {
+            "success": True,
+            "arquivo_path": path_scr,
+            "arquivo_url": url_scr,
+            "documento_tecnico_id": doc_cad.id,
+            "fonte": fonte_geom,  # 🔥 NOVO
+            "message": f"Script CAD salvo: {path_scr}",
+        }
 
-        else:
-            result["steps"]["shp"] = {
-                "success": False,
-                "skipped": True,
-                "message": "SHP não executado: geometria inexistente.",
-                "fonte": fonte_geom,
-            }
+    # =========================================================
+    # ETAPA — TXT (LISP / COORDENADAS)
+    # =========================================================
+    @staticmethod
+    def _etapa_txt(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        from app.services.txt_lisp_service import TxtLispService
 
-        # =========================================================
-        # SIGEF CSV
-        # =========================================================
-        if geometria:
-            if geometria.epsg_origem and geometria.epsg_origem > 0:
-                try:
-                    payload = SigefCsvExportRequest(
-                        geometria_id=geometria.id,
-                        prefixo_vertice="V",
-                        document_group_key="PLANILHA_SIGEF",
-                        tipo="Planilha SIGEF",
-                        observacoes_tecnicas=None,
-                        incluir_conteudo=False,
-                    )
-
-                    sigef_data = exportar_sigef_csv(db, payload)
-
-                    path_sigef = sigef_data.get("arquivo_path")
-                    documento_tecnico_id = sigef_data.get("documento_tecnico_id")
-
-                    url_sigef = OcrPipelineService._build_file_url(
-                        base_url,
-                        path_sigef,
-                    )
-
-                    if not documento_tecnico_id and path_sigef:
-                        doc_sigef = create_documento_tecnico(
-                            db=db,
-                            imovel_id=imovel.id,
-                            data=DocumentoTecnicoCreate(
-                                document_group_key="PLANILHA_SIGEF",
-                                tipo="Planilha SIGEF",
-                                status_tecnico="EM_ANALISE",
-                                arquivo_path=path_sigef,
-                                metadata_json={
-                                    "geometria_id": geometria.id,
-                                    "epsg_utm": sigef_data.get("epsg_utm"),
-                                    "epsg_origem": geometria.epsg_origem,
-                                    "fonte_geom": fonte_geom,  # 🔥 NOVO
-                                },
-                                gerado_em=datetime.utcnow(),
-                            ),
-                        )
-                        documento_tecnico_id = doc_sigef.id
-
-                    result["steps"]["sigef_csv"] = {
-                        "success": True,
-                        "documento_tecnico_id": documento_tecnico_id,
-                        "arquivo_path": path_sigef,
-                        "arquivo_url": url_sigef,
-                        "epsg_utm": sigef_data.get("epsg_utm"),
-                        "epsg_origem": geometria.epsg_origem,
-                        "fonte": fonte_geom,  # 🔥 NOVO
-                        "message": "Planilha SIGEF gerada com sucesso.",
-                    }
+        geometria = ctx.geometria
+        fonte_geom = ctx.fonte_geom
 
-                    print("✅ Planilha SIGEF gerada")
+        impressao = OcrPipelineService._impressao_geometria(ctx, "txt")
 
-                except Exception as exc:
-                    OcrPipelineService._rollback_safely(db)
-                    result["steps"]["sigef_csv"] = {
-                        "success": False,
-                        "message": f"Falha ao gerar SIGEF CSV: {str(exc)}",
-                    }
-                    result["errors"].append(f"SIGEF CSV: {str(exc)}")
-                    print(f"❌ Falha ao gerar SIGEF CSV: {str(exc)}")
-            else:
-                result["steps"]["sigef_csv"] = {
-                    "success": False,
-                    "skipped": True,
-                    "message": (
-                        "SIGEF CSV não executado: geometria local/cartesiana "
-                        "não é exportável como SIGEF oficial."
-                    ),
-                    "fonte": fonte_geom,
-                }
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "COORDENADAS_TXT", impressao
+        )
+        if reaproveitado:
+            return OcrPipelineService._step_reaproveitado(ctx, reaproveitado)
 
-                print("ℹ️ SIGEF CSV ignorado: geometria local/cartesiana")
-        else:
-            result["steps"]["sigef_csv"] = {
-                "success": False,
-                "skipped": True,
-                "message": "SIGEF CSV não executado: geometria inexistente.",
-                "fonte": fonte_geom,
-            }
+        txt = TxtLispService.gerar_txt(geometria["geojson"])
+
+        path_txt = TxtLispService.salvar_txt(
+            imovel_id=ctx.imovel_id,
+            txt=txt,
+        )
+
+        url_txt = OcrPipelineService._build_file_url(ctx.base_url, path_txt)
+
+        doc_txt = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="COORDENADAS_TXT",
+                tipo="TXT Coordenadas",
+                status_tecnico="EM_ANALISE",
+                arquivo_path=path_txt,
+                metadata_json={
+                    "geometria_id": geometria["id"],
+                    "formato": "TXT",
+                    "fonte_geom": fonte_geom,  # 🔥 NOVO
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                gerado_em=datetime.utcnow(),
+            ),
+        )
+
+        print(f"✅ TXT gerado: {path_txt}")
+
+        return {
+            "success": True,
+            "arquivo_path": path_txt,
+            "arquivo_url": url_txt,
+            "documento_tecnico_id": doc_txt.id,
+            "fonte": fonte_geom,  # 🔥 NOVO
+            "message": f"TXT gerado: {path_txt}",
+        }
+
+    # =========================================================
+    # ETAPA — DXF
+    # =========================================================
+    @staticmethod
+    def _etapa_dxf(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        from app.services.dxf_export_service import DxfExportService
+
+        geometria = ctx.geometria
+        fonte_geom = ctx.fonte_geom
+        confrontantes_formatados = list(ctx.confrontantes)
+
+        impressao = OcrPipelineService._impressao_geometria(
+            ctx,
+            "dxf",
+            confrontantes_formatados,
+        )
+
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "DXF", impressao
+        )
+        if reaproveitado:
+            return OcrPipelineService._step_reaproveitado(
+                ctx,
+                reaproveitado,
+                total_confrontantes=len(confrontantes_formatados),
+            )
 
         # =========================================================
-        # SUCESSO FINAL
+        # GERAÇÃO DO DXF COM CONTEXTO COMPLETO
         # =========================================================
-        geometria_ok = bool(result["steps"]["geometria"].get("success"))
-        memorial_ok = bool(result["steps"]["memorial"].get("success"))
-        croqui_ok = bool(result["steps"]["croqui"].get("success"))
-        cad_ok = bool(result["steps"]["cad"].get("success"))
+        doc_dxf_file = DxfExportService.gerar_dxf(
+            geometria["geojson"],
+            confrontantes=confrontantes_formatados,
+        )
 
-        epsg_origem_atual = geometria.epsg_origem if geometria else None
+        path_dxf = DxfExportService.salvar_dxf(
+            imovel_id=ctx.imovel_id,
+            doc=doc_dxf_file,
+        )
 
-        # 🔥 NOVO — QUALIDADE OCR (SEM QUEBRAR CONTRATO)
-        qualidade_ocr = dados.get("qualidade") if isinstance(dados, dict) else None
+        url_dxf = OcrPipelineService._build_file_url(ctx.base_url, path_dxf)
+
+        doc_dxf = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="DXF",
+                tipo="Arquivo DXF",
+                status_tecnico="EM_ANALISE",
+                arquivo_path=path_dxf,
+                metadata_json={
+                    "geometria_id": geometria["id"],
+                    "formato": "DXF",
+                    "total_confrontantes": len(confrontantes_formatados),
+                    "fonte_geom": fonte_geom,  # 🔥 NOVO
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                gerado_em=datetime.utcnow(),
+            ),
+        )
 
-        score_ocr = 0
-        confianca_geral = None
+        print(f"✅ DXF gerado: {path_dxf}")
 
-        if isinstance(qualidade_ocr, dict):
-            try:
-                score_ocr = int(qualidade_ocr.get("score", 0) or 0)
-            except Exception:
-                score_ocr = 0
+        return {
+            "success": True,
+            "arquivo_path": path_dxf,
+            "arquivo_url": url_dxf,
+            "documento_tecnico_id": doc_dxf.id,
+            "total_confrontantes": len(confrontantes_formatados),
+            "fonte": fonte_geom,  # 🔥 NOVO
+            "message": f"DXF gerado: {path_dxf}",
+        }
 
-            confianca_geral = qualidade_ocr.get("confianca_geral")
+    # =========================================================
+    # ETAPA — SHP (QGIS READY + VALIDAÇÃO TOPOLOGICA)
+    # =========================================================
+    @staticmethod
+    def _etapa_shp(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        from app.services.shp_export_service import ShpExportService
 
-        # 🔥 NOVO — CONTROLE DE SIGEF
-        sigef_obrigatorio = bool(
-            geometria
-            and epsg_origem_atual
-            and epsg_origem_atual > 0
+        geometria = ctx.geometria
+        fonte_geom = ctx.fonte_geom
+
+        impressao = OcrPipelineService._impressao_geometria(ctx, "shp")
+
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "SHP", impressao
         )
+        if reaproveitado:
+            return OcrPipelineService._step_reaproveitado(
+                ctx,
+                reaproveitado,
+                pasta_path=(reaproveitado.metadata_json or {}).get("pasta_path"),
+            )
 
-        sigef_ok = bool(result["steps"]["sigef_csv"].get("success"))
+        camada = ShpExportService.gerar_shp(geometria["geojson"])
 
-        # 🔥 NOVO — REGRAS DE SUCESSO
-        sucesso_base = (
-            geometria_ok
-            and memorial_ok
-            and croqui_ok
-            and cad_ok
+        path_folder = ShpExportService.salvar_shp(
+            imovel_id=ctx.imovel_id,
+            camada=camada,
         )
 
-        if sigef_obrigatorio:
-            sucesso_base = sucesso_base and sigef_ok
+        # 🔥 proteção adicional
+        if not os.path.exists(path_folder):
+            raise Exception("Pasta SHP não foi criada corretamente")
 
-        # 🔥 NOVO — VALIDAÇÃO DE QUALIDADE (SEM QUEBRAR FLUXO)
-        qualidade_minima_ok = score_ocr >= 60
+        arquivos = os.listdir(path_folder)
 
-        if not qualidade_minima_ok:
-            result["errors"].append(
-                f"Qualidade OCR insuficiente para sucesso final do pipeline (score={score_ocr})."
-            )
+        shp_file = next(
+            (f for f in arquivos if f.lower().endswith(".shp")),
+            None
+        )
 
-        result["success"] = sucesso_base and qualidade_minima_ok
+        if not shp_file:
+            raise Exception("Arquivo .shp não encontrado na pasta gerada")
 
-        # 🔥 NOVO — DEBUG E RASTREABILIDADE (CRÍTICO PARA PRODUÇÃO)
-        result["validacao_pipeline"] = {
-            "geometria_ok": geometria_ok,
-            "memorial_ok": memorial_ok,
-            "croqui_ok": croqui_ok,
-            "cad_ok": cad_ok,
-            "sigef_obrigatorio": sigef_obrigatorio,
-            "sigef_ok": sigef_ok,
-            "qualidade_score": score_ocr,
-            "qualidade_minima_ok": qualidade_minima_ok,
-            "confianca_geral": confianca_geral,
+        arquivo_path = f"{path_folder}/{shp_file}"
+
+        arquivo_url = OcrPipelineService._build_file_url(
+            ctx.base_url,
+            arquivo_path,
+        )
+
+        doc_shp = create_documento_tecnico(
+            db=db,
+            imovel_id=ctx.imovel_id,
+            data=DocumentoTecnicoCreate(
+                document_group_key="SHP",
+                tipo="Shapefile",
+                status_tecnico="EM_ANALISE",
+                arquivo_path=arquivo_path,
+                metadata_json={
+                    "geometria_id": geometria["id"],
+                    "formato": "SHP",
+                    "pasta_path": path_folder,
+                    "fonte_geom": fonte_geom,  # 🔥 NOVO
+                    **OcrPipelineService._metadata_cache(ctx, impressao),
+                },
+                gerado_em=datetime.utcnow(),
+            ),
+        )
+
+        print(f"✅ SHP gerado: {arquivo_path}")
+
+        return {
+            "success": True,
+            "pasta_path": path_folder,
+            "arquivo_path": arquivo_path,
+            "arquivo_url": arquivo_url,
+            "documento_tecnico_id": doc_shp.id,
+            "fonte": fonte_geom,  # 🔥 NOVO
+            "message": f"SHP gerado: {arquivo_path}",
         }
 
-        print("🏁 Pipeline OCR concluído")
-        return result
+    # =========================================================
+    # ETAPA — SIGEF CSV
+    # =========================================================
+    @staticmethod
+    def _etapa_sigef_csv(db: Session, ctx: ContextoPipeline) -> dict[str, Any]:
+        geometria = ctx.geometria
+        fonte_geom = ctx.fonte_geom
+
+        if not geometria["epsg_origem"] or geometria["epsg_origem"] <= 0:
+            print("ℹ️ SIGEF CSV ignorado: geometria local/cartesiana")
+            return {
+                "success": False,
+                "skipped": True,
+                "message": (
+                    "SIGEF CSV não executado: geometria local/cartesiana "
+                    "não é exportável como SIGEF oficial."
+                ),
+                "fonte": fonte_geom,
+            }
+
+        impressao = OcrPipelineService._impressao_geometria(ctx, "sigef_csv", "V")
+
+        reaproveitado = PipelineCacheService.artefato_vigente(
+            db, ctx.imovel_id, "PLANILHA_SIGEF", impressao
+        )
+        if reaproveitado:
+            return OcrPipelineService._step_reaproveitado(
+                ctx,
+                reaproveitado,
+                epsg_utm=(reaproveitado.metadata_json or {}).get("epsg_utm"),
+                epsg_origem=geometria["epsg_origem"],
+            )
+
+        payload = SigefCsvExportRequest(
+            geometria_id=geometria["id"],
+            prefixo_vertice="V",
+            document_group_key="PLANILHA_SIGEF",
+            tipo="Planilha SIGEF",
+            observacoes_tecnicas=None,
+            incluir_conteudo=False,
+        )
+
+        sigef_data = exportar_sigef_csv(db, payload)
+
+        path_sigef = sigef_data.get("arquivo_path")
+        documento_tecnico_id = sigef_data.get("documento_tecnico_id")
+
+        url_sigef = OcrPipelineService._build_file_url(
+            ctx.base_url,
+            path_sigef,
+        )
+
+        if not documento_tecnico_id and path_sigef:
+            doc_sigef = create_documento_tecnico(
+                db=db,
+                imovel_id=ctx.imovel_id,
+                data=DocumentoTecnicoCreate(
+                    document_group_key="PLANILHA_SIGEF",
+                    tipo="Planilha SIGEF",
+                    status_tecnico="EM_ANALISE",
+                    arquivo_path=path_sigef,
+                    metadata_json={
+                        "geometria_id": geometria["id"],
+                        "epsg_utm": sigef_data.get("epsg_utm"),
+                        "epsg_origem": geometria["epsg_origem"],
+                        "fonte_geom": fonte_geom,  # 🔥 NOVO
+                        **OcrPipelineService._metadata_cache(ctx, impressao),
+                    },
+                    gerado_em=datetime.utcnow(),
+                ),
+            )
+            documento_tecnico_id = doc_sigef.id
+
+        elif documento_tecnico_id:
+            PipelineCacheService.marcar(db, documento_tecnico_id, impressao)
+
+        print("✅ Planilha SIGEF gerada")
+
+        return {
+            "success": True,
+            "documento_tecnico_id": documento_tecnico_id,
+            "arquivo_path": path_sigef,
+            "arquivo_url": url_sigef,
+            "epsg_utm": sigef_data.get("epsg_utm"),
+            "epsg_origem": geometria["epsg_origem"],
+            "fonte": fonte_geom,  # 🔥 NOVO
+            "message": "Planilha SIGEF gerada com sucesso.",
+        }
 
     @staticmethod
     def _normalizar_texto_simples(valor: Any) -> Optional[str]:
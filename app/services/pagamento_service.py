@@ -9,7 +9,7 @@ from app.models.pagamento_evento import PagamentoEvento
 
 # NOVOS IMPORTS (workflow automático)
 from app.services.pagamento_automacao_service import PagamentoAutomacaoService
-from app.services.project_automacao_service import ProjectAutomacaoService
+from app.services.project_recalculo_service import ProjectRecalculoService
 
 
 class PagamentoService:
@@ -166,7 +166,7 @@ class PagamentoService:
         db.refresh(pagamento)
 
         # NOVO — recalcular status global do projeto automaticamente
-        ProjectAutomacaoService.aplicar_status_automatico(db, pagamento.project_id)
+        ProjectRecalculoService.marcar(db, pagamento.project_id, fluxo=False)
 
         return pagamento
 
@@ -210,11 +210,13 @@ class PagamentoService:
             },
         )
 
-        PagamentoService.recalcular_status_pagamento(db, pagamento.id)
+        # Recálculo do pagamento e automação: uma avaliação do projeto
+        with ProjectRecalculoService.adiar(db, pagamento.project_id):
+            PagamentoService.recalcular_status_pagamento(db, pagamento.id)
 
-        # NOVO — automação financeira e técnica
-        PagamentoAutomacaoService.avaliar_liberacao_pagamento(db, pagamento)
-        ProjectAutomacaoService.aplicar_status_automatico(db, pagamento.project_id)
+            # NOVO — automação financeira e técnica
+            PagamentoAutomacaoService.avaliar_liberacao_pagamento(db, pagamento)
+            ProjectRecalculoService.marcar(db, pagamento.project_id, fluxo=False)
 
         return parcela
 
@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from app.core.config import settings
+
+
+# Estado do processo do pool (preenchido por _inicializar_worker)
+_FONTES: Any = None
+
+
+class PdfRenderService:
+    """
+    Renderização de PDFs fora da thread da requisição.
+
+    - Pool de processos "quentes": cada worker importa WeasyPrint/
+      ReportLab e renderiza um documento de aquecimento na partida, então
+      Pango/fontconfig e a configuração de fontes já estão carregados
+      quando o primeiro PDF real chega.
+    - Cache endereçado por conteúdo: a chave é (tipo, versão do template,
+      hash dos dados). Documento repetido não é renderizado de novo, só
+      publicado (hardlink/cópia) no caminho de destino (exceto
+      TIPOS_SEM_CACHE).
+    - Jobs: submeter() devolve um id; o estado fica num manifesto em
+      disco, legível por qualquer worker do host (GET /pdf/jobs/{id}).
+    """
+
+    # Tipos que imprimem o instante da geração: o conteúdo nunca se
+    # repete, então vão direto para o destino, sem passar pelo cache
+    TIPOS_SEM_CACHE = frozenset({"matricula"})
+
+    # Incrementar quando o HTML/desenho do tipo mudar
+    VERSOES_TEMPLATE = {
+        "orcamento": 1,
+        "proposta": 1,
+        "contrato": 1,
+        "imovel": 1,
+        "matricula": 2,
+    }
+
+    PENDENTE = "PENDENTE"
+    PRONTO = "PRONTO"
+    ERRO = "ERRO"
+
+    HTML_AQUECIMENTO = (
+        "<html><head><meta charset='utf-8'></head>"
+        "<body style='font-family: Arial, Helvetica, sans-serif'>GeoINCRA</body></html>"
+    )
+
+    # Travas por chave em faixas fixas (memória constante)
+    FAIXAS_LOCK = 64
+
+    _lock = threading.Lock()
+    _pool: Optional[ProcessPoolExecutor] = None
+    _coordenador: Optional[ThreadPoolExecutor] = None
+    _locks_chave: tuple[threading.Lock, ...] = tuple(
+        threading.Lock() for _ in range(FAIXAS_LOCK)
+    )
+
+    # Varreduras do diretório (despejo do cache, manifestos antigos)
+    # rodam no máximo uma vez por intervalo em cada processo
+    INTERVALO_MANUTENCAO_SEGUNDOS = 60
+
+    # job_id -> futuro (só os criados neste processo)
+    _jobs: dict[str, Future] = {}
+    _jobs_limpos_em = 0.0
+    _cache_despejado_em = 0.0
+
+    _hits = 0
+    _misses = 0
+    _falhas = 0
+
+    # =========================================================
+    # POOL
+    # =========================================================
+    @staticmethod
+    def _max_workers() -> int:
+        return max(int(settings.PDF_RENDER_MAX_WORKERS or 0), 0)
+
+    @classmethod
+    def _executor(cls) -> Optional[ProcessPoolExecutor]:
+        """None quando PDF_RENDER_MAX_WORKERS = 0 (renderiza inline)."""
+        if cls._max_workers() <= 0:
+            return None
+
+        with cls._lock:
+            if cls._pool is None:
+                # spawn: não herda threads/conexões do processo do uvicorn
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=cls._max_workers(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=PdfRenderService._inicializar_worker,
+                )
+            return cls._pool
+
+    @classmethod
+    def _coordenacao(cls) -> ThreadPoolExecutor:
+        """Threads que esperam o pool, publicam o arquivo e fecham o job."""
+        with cls._lock:
+            if cls._coordenador is None:
+                cls._coordenador = ThreadPoolExecutor(
+                    max_workers=max(cls._max_workers(), 1) * 2,
+                    thread_name_prefix="pdf_render",
+                )
+            return cls._coordenador
+
+    @classmethod
+    def iniciar(cls) -> None:
+        """Sobe e aquece os workers no startup, fora do caminho da requisição."""
+        executor = cls._executor()
+        if executor is None:
+            return
+
+        for _ in range(cls._max_workers()):
+            executor.submit(os.getpid)
+
+    @classmethod
+    def _descartar_pool(cls) -> None:
+        with cls._lock:
+            pool, cls._pool = cls._pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def encerrar(cls) -> None:
+        with cls._lock:
+            coordenador, cls._coordenador = cls._coordenador, None
+
+        if coordenador is not None:
+            coordenador.shutdown(wait=False, cancel_futures=True)
+
+        cls._descartar_pool()
+
+    # =========================================================
+    # PROCESSO DO POOL
+    # =========================================================
+    @staticmethod
+    def _inicializar_worker() -> None:
+        global _FONTES
+
+        try:
+            from weasyprint import HTML
+            from weasyprint.text.fonts import FontConfiguration
+
+            _FONTES = FontConfiguration()
+            HTML(string=PdfRenderService.HTML_AQUECIMENTO).write_pdf(font_config=_FONTES)
+        except Exception as exc:
+            # Worker continua útil para ReportLab; WeasyPrint falha no job
+            print(f"⚠️ Worker de PDF sem WeasyPrint aquecido: {str(exc)}")
+
+        import reportlab.pdfgen.canvas  # noqa: F401
+
+    @staticmethod
+    def _renderizar(tipo: str, conteudo: Any, caminho: str) -> int:
+        """
+        Executado no pool (ou inline). Grava em caminho de forma atômica
+        e retorna o tamanho em bytes.
+        """
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            if tipo == "matricula":
+                from app.services.matricula_pdf_service import MatriculaPdfService
+
+                gerado_em = conteudo.get("gerado_em")
+                MatriculaPdfService.gerar_pdf(
+                    imovel_id=conteudo["imovel_id"],
+                    dados=conteudo["dados"],
+                    caminho=temporario,
+                    gerado_em=datetime.fromisoformat(gerado_em) if gerado_em else None,
+                )
+            else:
+                from weasyprint import HTML
+
+                HTML(string=conteudo).write_pdf(temporario, font_config=_FONTES)
+
+            os.replace(temporario, caminho)
+
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+        return os.path.getsize(caminho)
+
+    # =========================================================
+    # CACHE
+    # =========================================================
+    @classmethod
+    def chave(cls, tipo: str, conteudo: Any) -> str:
+        if tipo not in cls.VERSOES_TEMPLATE:
+            raise ValueError(f"Tipo de PDF não suportado: {tipo}")
+
+        canonico = json.dumps(
+            [tipo, cls.VERSOES_TEMPLATE[tipo], conteudo],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _raiz() -> str:
+        return settings.PDF_CACHE_DIR
+
+    @classmethod
+    def _caminho_cache(cls, chave: str) -> str:
+        return os.path.join(cls._raiz(), chave[:2], f"{chave}.pdf")
+
+    @classmethod
+    def _lock_chave(cls, chave: str) -> threading.Lock:
+        return cls._locks_chave[int(chave[:8], 16) % len(cls._locks_chave)]
+
+    @classmethod
+    def _renderizar_no_pool(cls, tipo: str, conteudo: Any, caminho: str) -> None:
+        executor = cls._executor()
+        if executor is None:
+            cls._renderizar(tipo, conteudo, caminho)
+            return
+
+        try:
+            executor.submit(cls._renderizar, tipo, conteudo, caminho).result(
+                timeout=settings.PDF_RENDER_TIMEOUT_SEGUNDOS
+            )
+        except BrokenProcessPool:
+            print("⚠️ Pool de PDF interrompido; renderizando na thread atual")
+            cls._descartar_pool()
+            cls._renderizar(tipo, conteudo, caminho)
+
+    @classmethod
+    def _obter_cache(cls, tipo: str, conteudo: Any) -> str:
+        """Caminho do PDF em cache, renderizado só se ainda não existir."""
+        chave = cls.chave(tipo, conteudo)
+        caminho = cls._caminho_cache(chave)
+
+        with cls._lock_chave(chave):
+            if os.path.exists(caminho):
+                with cls._lock:
+                    cls._hits += 1
+                try:
+                    os.utime(caminho)
+                except OSError:
+                    pass
+                return caminho
+
+            with cls._lock:
+                cls._misses += 1
+
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+            cls._renderizar_no_pool(tipo, conteudo, caminho)
+
+        cls._despejar_se_preciso()
+        return caminho
+
+    @classmethod
+    def _despejar_se_preciso(cls) -> None:
+        limite = int(settings.PDF_CACHE_MAX_BYTES)
+        if limite <= 0:
+            return
+
+        agora = time.monotonic()
+
+        # Uma varredura por intervalo: misses simultâneos não disputam
+        # o mesmo glob/stat do diretório inteiro
+        with cls._lock:
+            if agora - cls._cache_despejado_em < cls.INTERVALO_MANUTENCAO_SEGUNDOS:
+                return
+            cls._cache_despejado_em = agora
+
+        arquivos = []
+        for pasta in Path(cls._raiz()).glob("[0-9a-f][0-9a-f]"):
+            for arquivo in pasta.glob("*.pdf"):
+                try:
+                    info = arquivo.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((info.st_mtime, info.st_size, arquivo))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, arquivo in sorted(arquivos):
+            if total <= limite:
+                break
+            # Destinos publicados por hardlink continuam válidos
+            arquivo.unlink(missing_ok=True)
+            total -= tamanho
+
+    @staticmethod
+    def _publicar(origem: str, destino: str | Path) -> str:
+        destino = str(destino)
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+
+        temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(origem, temporario)
+        except OSError:
+            shutil.copyfile(origem, temporario)
+        os.replace(temporario, destino)
+
+        return destino
+
+    # =========================================================
+    # API
+    # =========================================================
+    @classmethod
+    def _executar(cls, tipo: str, conteudo: Any, destino: str | Path) -> str:
+        t0 = time.perf_counter()
+        try:
+            if tipo in cls.TIPOS_SEM_CACHE:
+                caminho = str(destino)
+                os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+                cls._renderizar_no_pool(tipo, conteudo, caminho)
+            else:
+                caminho = cls._publicar(cls._obter_cache(tipo, conteudo), destino)
+        except Exception:
+            with cls._lock:
+                cls._falhas += 1
+            raise
+
+        print(f"📄 PDF {tipo} pronto em {(time.perf_counter() - t0) * 1000:.0f}ms: {destino}")
+        return caminho
+
+    @classmethod
+    def submeter(cls, tipo: str, conteudo: Any, destino: str | Path) -> Future:
+        """
+        Agenda o PDF e retorna imediatamente. conteudo: HTML (WeasyPrint)
+        ou {"imovel_id", "dados", "gerado_em"} (matrícula, ReportLab).
+        """
+        if tipo not in cls.VERSOES_TEMPLATE:
+            raise ValueError(f"Tipo de PDF não suportado: {tipo}")
+        return cls._coordenacao().submit(cls._executar, tipo, conteudo, destino)
+
+    @staticmethod
+    def _espera_maxima() -> float:
+        """
+        Prazo de quem espera o resultado. O da renderização em si
+        (PDF_RENDER_TIMEOUT_SEGUNDOS) é aplicado no pool; este cobre
+        também a fila, então nunca fica abaixo do dobro daquele.
+        """
+        return max(
+            float(settings.PDF_RENDER_ESPERA_SEGUNDOS),
+            float(settings.PDF_RENDER_TIMEOUT_SEGUNDOS) * 2,
+        )
+
+    @classmethod
+    def renderizar(cls, tipo: str, conteudo: Any, destino: str | Path) -> str:
+        """Versão síncrona de submeter(): espera o arquivo em destino."""
+        return cls.submeter(tipo, conteudo, destino).result(timeout=cls._espera_maxima())
+
+    @classmethod
+    def renderizar_varios(cls, documentos: list[tuple[str, Any, str | Path]]) -> list[str]:
+        """[(tipo, conteudo, destino), ...] em paralelo; espera todos."""
+        futuros = [cls.submeter(*documento) for documento in documentos]
+
+        # Um prazo para o lote todo, não um por documento
+        prazo = time.monotonic() + cls._espera_maxima()
+        return [
+            futuro.result(timeout=max(prazo - time.monotonic(), 0))
+            for futuro in futuros
+        ]
+
+    # =========================================================
+    # JOBS
+    # =========================================================
+    @classmethod
+    def _caminho_job(cls, job_id: str) -> str:
+        return os.path.join(cls._raiz(), "jobs", f"{job_id}.json")
+
+    @classmethod
+    def _gravar_job(cls, job_id: str, dados: dict[str, Any]) -> None:
+        caminho = cls._caminho_job(job_id)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def criar_job(
+        cls,
+        tipo: str,
+        conteudo: Any,
+        destino: str | Path,
+        caminho_relativo: Optional[str] = None,
+        owner_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+    ) -> str:
+        """
+        Agenda o PDF e retorna o id do job. caminho_relativo é o que
+        volta no status (o mesmo usado em /files/pdf?path=); owner_id
+        fica no manifesto e só o dono consulta/baixa o job.
+        """
+        cls._limpar_jobs_antigos()
+
+        job_id = uuid.uuid4().hex
+        manifesto = {
+            "id": job_id,
+            "tipo": tipo,
+            "status": cls.PENDENTE,
+            "caminho": caminho_relativo,
+            "destino": str(destino),
+            "owner_id": owner_id,
+            "project_id": project_id,
+            "erro": None,
+            "criado_em": time.time(),
+        }
+        cls._gravar_job(job_id, manifesto)
+
+        futuro = cls.submeter(tipo, conteudo, destino)
+
+        with cls._lock:
+            cls._jobs[job_id] = futuro
+
+        def concluir(f: Future) -> None:
+            erro = f.exception() if not f.cancelled() else None
+            final = {
+                **manifesto,
+                "status": cls.ERRO if f.cancelled() or erro else cls.PRONTO,
+                "erro": "Cancelado" if f.cancelled() else (str(erro) if erro else None),
+                "concluido_em": time.time(),
+            }
+            try:
+                cls._gravar_job(job_id, final)
+            except Exception as exc:
+                print(f"⚠️ Falha ao registrar job de PDF {job_id}: {str(exc)}")
+
+            with cls._lock:
+                cls._jobs.pop(job_id, None)
+
+        futuro.add_done_callback(concluir)
+
+        return job_id
+
+    @classmethod
+    def status_job(cls, job_id: str) -> Optional[dict[str, Any]]:
+        try:
+            with open(cls._caminho_job(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @classmethod
+    def aguardar_job(cls, job_id: str, timeout: float) -> Optional[dict[str, Any]]:
+        """
+        Status do job após esperar até timeout segundos pela conclusão.
+        Jobs de outro worker são acompanhados pelo manifesto em disco.
+        """
+        with cls._lock:
+            futuro = cls._jobs.get(job_id)
+
+        if futuro is not None:
+            try:
+                futuro.result(timeout=timeout)
+            except Exception:
+                pass
+            # O callback pode ainda estar gravando o manifesto
+            prazo = time.monotonic() + 1.0
+        else:
+            prazo = time.monotonic() + timeout
+
+        while True:
+            status = cls.status_job(job_id)
+            if status is None or status["status"] != cls.PENDENTE:
+                return status
+            if time.monotonic() >= prazo:
+                return status
+            time.sleep(0.2)
+
+    @classmethod
+    def _limpar_jobs_antigos(cls) -> None:
+        ttl = int(settings.PDF_JOB_TTL_SEGUNDOS)
+        agora = time.time()
+
+        with cls._lock:
+            if agora - cls._jobs_limpos_em < cls.INTERVALO_MANUTENCAO_SEGUNDOS:
+                return
+            cls._jobs_limpos_em = agora
+
+        pasta = Path(cls._raiz()) / "jobs"
+        if not pasta.is_dir():
+            return
+
+        for manifesto in pasta.glob("*.json"):
+            try:
+                if agora - manifesto.stat().st_mtime > ttl:
+                    manifesto.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @classmethod
+    def estatisticas(cls) -> dict[str, Any]:
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "falhas": cls._falhas,
+                "jobs_em_andamento": len(cls._jobs),
+                "workers": cls._max_workers(),
+            }
+
+    @classmethod
+    def limpar(cls) -> None:
+        shutil.rmtree(cls._raiz(), ignore_errors=True)
+
+        with cls._lock:
+            cls._cache_despejado_em = 0.0
+            cls._hits = 0
+            cls._misses = 0
+            cls._falhas = 0
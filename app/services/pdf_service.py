@@ -3,7 +3,7 @@ from datetime import datetime
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 
-from weasyprint import HTML
+from app.services.pdf_render_service import PdfRenderService
 
 
 # =========================================================
@@ -62,13 +62,13 @@ def _brl(valor: float) -> str:
 # =========================================================
 # 📄 ORÇAMENTO (PROFISSIONAL - HTML + WEASYPRINT)
 # =========================================================
-def gerar_pdf_orcamento(
+def _preparar_orcamento(
     project_id: int | None,
     calculation,
     cliente: str = "",
     municipio: str = "",
     descricao: str = "",
-) -> str:
+) -> tuple[str, Path, Path]:
 
     base_root = _resolve_base()
     base = base_root / "orcamentos" / f"project_{project_id or 'preview'}"
@@ -513,43 +513,134 @@ def gerar_pdf_orcamento(
     </html>
     """
 
-    HTML(string=html).write_pdf(str(file_path))
+    return html, base_root, file_path
+
+
+def gerar_pdf_orcamento(
+    project_id: int | None,
+    calculation,
+    cliente: str = "",
+    municipio: str = "",
+    descricao: str = "",
+) -> str:
+    html, base_root, file_path = _preparar_orcamento(
+        project_id, calculation, cliente, municipio, descricao
+    )
+
+    PdfRenderService.renderizar("orcamento", html, file_path)
 
     return str(file_path.relative_to(base_root))
 
 
+def agendar_pdf_orcamento(
+    project_id: int | None,
+    calculation,
+    cliente: str = "",
+    municipio: str = "",
+    descricao: str = "",
+    owner_id: int | None = None,
+) -> tuple[str, str]:
+    """
+    Como gerar_pdf_orcamento, sem esperar a renderização.
+    Retorna (job_id, caminho relativo onde o PDF vai aparecer);
+    o job só é visível para owner_id.
+    """
+    html, base_root, file_path = _preparar_orcamento(
+        project_id, calculation, cliente, municipio, descricao
+    )
+    caminho_relativo = str(file_path.relative_to(base_root))
+
+    job_id = PdfRenderService.criar_job(
+        "orcamento",
+        html,
+        file_path,
+        caminho_relativo,
+        owner_id=owner_id,
+        project_id=project_id,
+    )
+
+    return job_id, caminho_relativo
+
+
 # =========================================================
-# 📄 PROPOSTA (AGORA CORRETA)
+# 📄 PROPOSTA / CONTRATO
 # =========================================================
-def gerar_pdf_proposta(project_id: int, html_simples: str) -> str:
+def _destino_proposta(project_id: int, prefixo: str) -> tuple[Path, Path]:
     base_root = _resolve_base()
     base = base_root / "propostas" / f"project_{project_id}"
     _ensure_dir(base)
 
-    filename = f"proposta_project_{project_id}_{int(datetime.utcnow().timestamp())}.pdf"
-    file_path = base / filename
+    filename = f"{prefixo}_project_{project_id}_{int(datetime.utcnow().timestamp())}.pdf"
+
+    return base_root, base / filename
 
-    HTML(string=html_simples).write_pdf(str(file_path))
+
+def gerar_pdf_proposta(project_id: int, html_simples: str) -> str:
+    base_root, file_path = _destino_proposta(project_id, "proposta")
+
+    PdfRenderService.renderizar("proposta", html_simples, file_path)
 
     return str(file_path.relative_to(base_root))
 
 
-# =========================================================
-# 📄 CONTRATO (AGORA CORRETO)
-# =========================================================
 def gerar_pdf_contrato(project_id: int, html_simples: str) -> str:
-    base_root = _resolve_base()
-    base = base_root / "propostas" / f"project_{project_id}"
-    _ensure_dir(base)
+    base_root, file_path = _destino_proposta(project_id, "contrato")
 
-    filename = f"contrato_project_{project_id}_{int(datetime.utcnow().timestamp())}.pdf"
-    file_path = base / filename
-
-    HTML(string=html_simples).write_pdf(str(file_path))
+    PdfRenderService.renderizar("contrato", html_simples, file_path)
 
     return str(file_path.relative_to(base_root))
 
 
+def gerar_pdfs_proposta_contrato(
+    project_id: int,
+    html_proposta: str,
+    html_contrato: str,
+    assincrono: bool = False,
+    owner_id: int | None = None,
+) -> dict:
+    """
+    Proposta e contrato renderizados em paralelo.
+
+    Retorna os caminhos relativos ("pdf_proposta", "pdf_contrato"); com
+    assincrono=True não espera a renderização e inclui "pdf_jobs"
+    (visíveis só para owner_id).
+    """
+    documentos = {
+        "proposta": (html_proposta, *_destino_proposta(project_id, "proposta")),
+        "contrato": (html_contrato, *_destino_proposta(project_id, "contrato")),
+    }
+
+    caminhos = {
+        tipo: str(file_path.relative_to(base_root))
+        for tipo, (_, base_root, file_path) in documentos.items()
+    }
+
+    resultado = {
+        "pdf_proposta": caminhos["proposta"],
+        "pdf_contrato": caminhos["contrato"],
+    }
+
+    if assincrono:
+        resultado["pdf_jobs"] = {
+            tipo: PdfRenderService.criar_job(
+                tipo,
+                html,
+                file_path,
+                caminhos[tipo],
+                owner_id=owner_id,
+                project_id=project_id,
+            )
+            for tipo, (html, _, file_path) in documentos.items()
+        }
+        return resultado
+
+    PdfRenderService.renderizar_varios(
+        [(tipo, html, file_path) for tipo, (html, _, file_path) in documentos.items()]
+    )
+
+    return resultado
+
+
 # =========================================================
 # 📄 PDF TÉCNICO COMPLETO (CROQUI + MEMORIAL)
 # =========================================================
@@ -669,6 +760,6 @@ def gerar_pdf_imovel(
     </html>
     """
 
-    HTML(string=html).write_pdf(str(file_path))
+    PdfRenderService.renderizar("imovel", html, file_path)
 
     return str(file_path.relative_to(base_root))
\ No newline at end of file
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Optional
+
+from sqlalchemy import and_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, lazyload
+
+from app.models.document import Document
+from app.models.documento_tecnico import DocumentoTecnico
+
+
+class PipelineCacheService:
+    """
+    Cache por conteúdo do pipeline de OCR.
+
+    Cada etapa calcula a impressão digital (SHA-256) das suas entradas e a
+    grava em metadata_json do DocumentoTecnico gerado. Reprocessar o mesmo
+    conteúdo (reenvio do OCR, upload repetido) reaproveita a versão atual
+    do artefato em vez de gerar outro arquivo e outra versão.
+    """
+
+    # Incrementar quando a geração de algum artefato mudar:
+    # invalida todas as impressões digitais anteriores.
+    VERSAO_ARTEFATOS = 1
+
+    CHAVE_METADATA = "hash_entrada"
+
+    # Coluna adicionada depois da criação da tabela documents
+    # (create_all não altera tabelas existentes).
+    DDL_DOCUMENTOS = [
+        "ALTER TABLE documents ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64)",
+        (
+            "CREATE INDEX IF NOT EXISTS ix_documents_project_sha256 "
+            "ON documents (project_id, sha256)"
+        ),
+    ]
+
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def garantir_schema(engine: Engine) -> None:
+        with engine.begin() as conn:
+            for ddl in PipelineCacheService.DDL_DOCUMENTOS:
+                conn.execute(text(ddl))
+
+    # =========================================================
+    # HASH
+    # =========================================================
+    @staticmethod
+    def hash_bytes(conteudo: bytes) -> str:
+        return hashlib.sha256(conteudo).hexdigest()
+
+    @staticmethod
+    def hash_payload(dados: Any) -> str:
+        """
+        SHA-256 da forma canônica (chaves ordenadas) do payload: a mesma
+        informação gera o mesmo hash independente da ordem dos campos.
+        """
+        canonico = json.dumps(
+            dados,
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def impressao_etapa(etapa: str, *entradas: Any) -> str:
+        return PipelineCacheService.hash_payload(
+            [PipelineCacheService.VERSAO_ARTEFATOS, etapa, list(entradas)]
+        )
+
+    # =========================================================
+    # ARTEFATOS (DocumentoTecnico)
+    # =========================================================
+    @classmethod
+    def artefato_vigente(
+        cls,
+        db: Session,
+        imovel_id: int,
+        document_group_key: str,
+        impressao: str,
+    ) -> Optional[DocumentoTecnico]:
+        """
+        Versão atual do grupo, se foi gerada a partir das mesmas entradas
+        e o arquivo ainda existe em disco.
+        """
+        # Sem os joins eager de imóvel/projeto/usuário: só o artefato importa
+        doc = (
+            db.query(DocumentoTecnico)
+            .options(lazyload("*"))
+            .filter(
+                and_(
+                    DocumentoTecnico.imovel_id == imovel_id,
+                    DocumentoTecnico.document_group_key == document_group_key,
+                    DocumentoTecnico.is_versao_atual.is_(True),
+                )
+            )
+            .first()
+        )
+
+        valido = bool(
+            doc
+            and (doc.metadata_json or {}).get(cls.CHAVE_METADATA) == impressao
+            and (not doc.arquivo_path or os.path.exists(doc.arquivo_path))
+        )
+
+        with cls._lock:
+            if valido:
+                cls._hits += 1
+            else:
+                cls._misses += 1
+
+        return doc if valido else None
+
+    @classmethod
+    def marcar(cls, db: Session, documento_tecnico_id: int, impressao: str) -> None:
+        """
+        Grava a impressão digital num artefato criado fora do pipeline
+        (ex.: exportação SIGEF, que cria o próprio DocumentoTecnico).
+        """
+        doc = (
+            db.query(DocumentoTecnico)
+            .options(lazyload("*"))
+            .filter(DocumentoTecnico.id == documento_tecnico_id)
+            .first()
+        )
+        if not doc:
+            return
+
+        doc.metadata_json = {**(doc.metadata_json or {}), cls.CHAVE_METADATA: impressao}
+        db.commit()
+
+    # =========================================================
+    # DOCUMENTOS ENVIADOS
+    # =========================================================
+    @staticmethod
+    def documento_por_hash(
+        db: Session,
+        project_id: int,
+        doc_type: str,
+        sha256: str,
+    ) -> Optional[Document]:
+        return (
+            db.query(Document)
+            .options(lazyload("*"))
+            .filter(
+                Document.project_id == project_id,
+                Document.doc_type == doc_type,
+                Document.sha256 == sha256,
+            )
+            .order_by(Document.id.desc())
+            .first()
+        )
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @classmethod
+    def estatisticas(cls) -> dict[str, int]:
+        with cls._lock:
+            return {"hits": cls._hits, "misses": cls._misses}
+
+    @classmethod
+    def limpar(cls) -> None:
+        with cls._lock:
+            cls._hits = 0
+            cls._misses = 0
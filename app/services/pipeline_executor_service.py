@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+
+# =========================================================
+# CONTEXTO COMPARTILHADO ENTRE ETAPAS
+# =========================================================
+@dataclass
+class ContextoPipeline:
+    """
+    Estado compartilhado entre as etapas do pipeline.
+
+    Etapas paralelas rodam em sessões próprias; por isso o contexto
+    carrega apenas ids e dicionários simples (nunca objetos ORM).
+    """
+
+    document_id: int
+    ocr_result_id: Optional[int]
+    dados: dict[str, Any]
+    imovel_id: int
+    base_url: str
+
+    matricula: dict[str, Any] = field(default_factory=dict)
+    geometria: dict[str, Any] = field(default_factory=dict)
+    fonte_geom: Optional[str] = None
+    confrontantes: list[dict[str, Any]] = field(default_factory=list)
+
+    # SHA-256 do payload normalizado do OCR
+    hash_payload: Optional[str] = None
+
+    erros: list[str] = field(default_factory=list)
+
+
+# =========================================================
+# DEFINIÇÃO DECLARATIVA DE ETAPA
+# =========================================================
+@dataclass(frozen=True)
+class EtapaPipeline:
+    nome: str
+    rotulo: str
+    executar: Callable[[Session, ContextoPipeline], dict[str, Any]]
+    depende_de: tuple[str, ...] = ()
+
+    # Dependências apenas de ordem: a etapa espera a conclusão,
+    # mas executa mesmo se elas falharem.
+    aguarda: tuple[str, ...] = ()
+
+    # Etapas paralelas rodam no pool, cada uma com sua própria sessão.
+    paralela: bool = False
+
+    mensagem_falha: Optional[str] = None
+    mensagem_skip: Optional[str] = None
+
+
+class PipelineExecutorService:
+    """
+    Executa um grafo de etapas respeitando as dependências declaradas.
+
+    Etapas sequenciais rodam na sessão do chamador, em ordem de declaração.
+    Etapas paralelas são distribuídas num ThreadPoolExecutor assim que todas
+    as suas dependências concluem com sucesso.
+    """
+
+    @staticmethod
+    def _agora() -> datetime:
+        return datetime.now(timezone.utc)
+
+    @staticmethod
+    def _rollback_safely(db: Session) -> None:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+
+    @staticmethod
+    def validar_grafo(etapas: list[EtapaPipeline]) -> None:
+        nomes = [e.nome for e in etapas]
+        if len(nomes) != len(set(nomes)):
+            raise ValueError("Etapas do pipeline com nomes duplicados.")
+
+        conhecidas: set[str] = set()
+        for etapa in etapas:
+            for dep in (*etapa.depende_de, *etapa.aguarda):
+                if dep not in nomes:
+                    raise ValueError(
+                        f"Etapa '{etapa.nome}' depende de etapa inexistente '{dep}'."
+                    )
+                if dep not in conhecidas:
+                    raise ValueError(
+                        f"Etapa '{etapa.nome}' declarada antes da dependência '{dep}'."
+                    )
+            conhecidas.add(etapa.nome)
+
+    # =========================================================
+    # EXECUÇÃO DE UMA ETAPA
+    # =========================================================
+    @staticmethod
+    def _executar_etapa(
+        db: Optional[Session],
+        etapa: EtapaPipeline,
+        ctx: ContextoPipeline,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        sessao_propria = db is None
+        sessao = SessionLocal() if sessao_propria else db
+
+        inicio = PipelineExecutorService._agora()
+        t0 = time.perf_counter()
+
+        try:
+            step = etapa.executar(sessao, ctx)
+            status = "COMPLETED" if step.get("success", True) else "FAILED"
+
+        except Exception as exc:
+            PipelineExecutorService._rollback_safely(sessao)
+
+            mensagem = etapa.mensagem_falha or f"Falha na etapa {etapa.rotulo}"
+            step = {
+                "success": False,
+                "message": f"{mensagem}: {str(exc)}",
+            }
+            ctx.erros.append(f"{etapa.rotulo}: {str(exc)}")
+            status = "FAILED"
+            print(f"❌ {mensagem}: {str(exc)}")
+
+        finally:
+            if sessao_propria:
+                sessao.close()
+
+        registro = {
+            "status": status,
+            "paralela": etapa.paralela,
+            "reaproveitada": bool(step.get("reaproveitado")),
+            "thread": threading.current_thread().name,
+            "iniciado_em": inicio.isoformat(),
+            "finalizado_em": PipelineExecutorService._agora().isoformat(),
+            "duracao_ms": round((time.perf_counter() - t0) * 1000, 2),
+        }
+
+        return step, registro
+
+    @staticmethod
+    def _registro_skip(etapa: EtapaPipeline, dependencia: str) -> dict[str, Any]:
+        agora = PipelineExecutorService._agora().isoformat()
+        return {
+            "status": "SKIPPED",
+            "paralela": etapa.paralela,
+            "dependencia": dependencia,
+            "iniciado_em": agora,
+            "finalizado_em": agora,
+            "duracao_ms": 0.0,
+        }
+
+    # =========================================================
+    # EXECUÇÃO DO GRAFO
+    # =========================================================
+    @staticmethod
+    def executar(
+        db: Session,
+        etapas: list[EtapaPipeline],
+        ctx: ContextoPipeline,
+        max_workers: int = 4,
+        ao_concluir_etapa: Optional[Callable[[str, dict[str, Any]], None]] = None,
+    ) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+        """
+        Retorna (steps, execucao):
+        - steps: resultado de negócio de cada etapa
+        - execucao: status e tempos de cada etapa
+        """
+        PipelineExecutorService.validar_grafo(etapas)
+
+        steps: dict[str, dict[str, Any]] = {}
+        execucao: dict[str, dict[str, Any]] = {}
+
+        pendentes: list[EtapaPipeline] = list(etapas)
+        em_execucao: dict[Future, EtapaPipeline] = {}
+
+        def _concluir(etapa: EtapaPipeline, step: dict, registro: dict) -> None:
+            steps[etapa.nome] = step
+            execucao[etapa.nome] = registro
+            if ao_concluir_etapa:
+                try:
+                    ao_concluir_etapa(etapa.nome, registro)
+                except Exception as exc:
+                    print(f"⚠️ Falha ao registrar etapa {etapa.nome}: {str(exc)}")
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix="pipeline",
+        ) as pool:
+            while pendentes or em_execucao:
+                progrediu = False
+
+                for etapa in list(pendentes):
+                    if any(
+                        dep not in steps
+                        for dep in (*etapa.depende_de, *etapa.aguarda)
+                    ):
+                        continue
+
+                    pendentes.remove(etapa)
+                    progrediu = True
+
+                    dep_falha = next(
+                        (
+                            dep
+                            for dep in etapa.depende_de
+                            if not steps[dep].get("success")
+                        ),
+                        None,
+                    )
+
+                    if dep_falha:
+                        mensagem = etapa.mensagem_skip or (
+                            f"{etapa.rotulo} não executado: "
+                            f"etapa '{dep_falha}' sem sucesso."
+                        )
+                        _concluir(
+                            etapa,
+                            {
+                                "success": False,
+                                "skipped": True,
+                                "message": mensagem,
+                                "fonte": ctx.fonte_geom,
+                            },
+                            PipelineExecutorService._registro_skip(etapa, dep_falha),
+                        )
+                        continue
+
+                    if etapa.paralela:
+                        # Etapas paralelas leem apenas dados já commitados.
+                        db.commit()
+                        futuro = pool.submit(
+                            PipelineExecutorService._executar_etapa,
+                            None,
+                            etapa,
+                            ctx,
+                        )
+                        em_execucao[futuro] = etapa
+                    else:
+                        step, registro = PipelineExecutorService._executar_etapa(
+                            db,
+                            etapa,
+                            ctx,
+                        )
+                        _concluir(etapa, step, registro)
+
+                        # Reavalia o grafo: etapas liberadas por esta
+                        # entram no pool antes da próxima sequencial.
+                        break
+
+                if progrediu:
+                    continue
+
+                if not em_execucao:
+                    raise RuntimeError("Grafo do pipeline sem etapas executáveis.")
+
+                concluidos, _ = wait(list(em_execucao), return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    etapa = em_execucao.pop(futuro)
+                    step, registro = futuro.result()
+                    _concluir(etapa, step, registro)
+
+        return steps, execucao
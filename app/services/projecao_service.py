@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+
+from app.core.config import settings
+
+
+class ProjecaoService:
+    """
+    Registro de CRS/Transformer compartilhado pelo processo.
+
+    Construir um Transformer é uma das etapas mais caras do caminho de
+    geometria; aqui cada par (EPSG origem, EPSG destino, always_xy) é
+    construído uma única vez e reaproveitado (LRU limitado).
+
+    Transformers do pyproj >= 3.1 podem ser usados por várias threads.
+    """
+
+    _lock = threading.Lock()
+
+    _crs: OrderedDict[int, CRS] = OrderedDict()
+    _transformers: OrderedDict[tuple[int, int, bool], Transformer] = OrderedDict()
+
+    _hits = 0
+    _misses = 0
+
+    # =========================================================
+    # CACHE
+    # =========================================================
+    @classmethod
+    def _limite(cls) -> int:
+        return max(int(settings.PROJECAO_CACHE_MAX_TRANSFORMERS), 1)
+
+    @classmethod
+    def obter_crs(cls, epsg: int) -> CRS:
+        epsg = int(epsg)
+
+        with cls._lock:
+            crs = cls._crs.get(epsg)
+            if crs is not None:
+                cls._crs.move_to_end(epsg)
+                return crs
+
+        crs = CRS.from_epsg(epsg)
+
+        with cls._lock:
+            cls._crs[epsg] = crs
+            cls._crs.move_to_end(epsg)
+            while len(cls._crs) > cls._limite():
+                cls._crs.popitem(last=False)
+
+        return crs
+
+    @classmethod
+    def obter_transformer(
+        cls,
+        epsg_origem: int,
+        epsg_destino: int,
+        always_xy: bool = True,
+    ) -> Transformer:
+        chave = (int(epsg_origem), int(epsg_destino), bool(always_xy))
+
+        with cls._lock:
+            transformer = cls._transformers.get(chave)
+            if transformer is not None:
+                cls._transformers.move_to_end(chave)
+                cls._hits += 1
+                return transformer
+            cls._misses += 1
+
+        # Construção fora do lock: outras threads seguem usando o cache
+        transformer = Transformer.from_crs(
+            cls.obter_crs(chave[0]),
+            cls.obter_crs(chave[1]),
+            always_xy=chave[2],
+        )
+
+        with cls._lock:
+            # Outra thread pode ter construído o mesmo par em paralelo
+            existente = cls._transformers.get(chave)
+            if existente is not None:
+                return existente
+
+            cls._transformers[chave] = transformer
+            while len(cls._transformers) > cls._limite():
+                cls._transformers.popitem(last=False)
+
+        return transformer
+
+    @classmethod
+    def estatisticas(cls) -> dict[str, int]:
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "transformers": len(cls._transformers),
+                "crs": len(cls._crs),
+                "limite": cls._limite(),
+            }
+
+    @classmethod
+    def limpar(cls) -> None:
+        with cls._lock:
+            cls._crs.clear()
+            cls._transformers.clear()
+            cls._hits = 0
+            cls._misses = 0
+
+    # =========================================================
+    # REPROJEÇÃO EM LOTE
+    # =========================================================
+    @staticmethod
+    def transformar(
+        xs: Any,
+        ys: Any,
+        epsg_origem: int,
+        epsg_destino: int,
+        always_xy: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Reprojeta arrays de coordenadas numa única chamada ao PROJ.
+        Pontos não projetáveis retornam inf/NaN; o chamador decide o filtro.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+
+        if int(epsg_origem) == int(epsg_destino):
+            return xs.copy(), ys.copy()
+
+        transformer = ProjecaoService.obter_transformer(
+            epsg_origem,
+            epsg_destino,
+            always_xy=always_xy,
+        )
+        X, Y = transformer.transform(xs, ys)
+
+        return np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64)
+
+    @staticmethod
+    def transformar_coords(
+        coords: Any,
+        epsg_origem: int,
+        epsg_destino: int,
+        always_xy: bool = True,
+    ) -> np.ndarray:
+        """Recebe e devolve um array (N, 2)."""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+        X, Y = ProjecaoService.transformar(
+            coords[:, 0],
+            coords[:, 1],
+            epsg_origem,
+            epsg_destino,
+            always_xy=always_xy,
+        )
+
+        return np.column_stack((X, Y))
+
+    @staticmethod
+    def transformar_geometrias(
+        geoms: Any,
+        epsg_origem: int,
+        epsg_destino: int,
+        always_xy: bool = True,
+    ) -> Any:
+        """
+        Reprojeta uma geometria shapely ou um array delas; todas as
+        coordenadas passam pelo PROJ numa única chamada.
+        """
+
+        def _transformar(coords: np.ndarray) -> np.ndarray:
+            return ProjecaoService.transformar_coords(
+                coords,
+                epsg_origem,
+                epsg_destino,
+                always_xy=always_xy,
+            )
+
+        return shapely.transform(geoms, _transformar)
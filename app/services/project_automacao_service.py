@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Sequence, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -102,10 +102,25 @@ class ProjectAutomacaoService:
         if not project:
             raise ValueError("Projeto não encontrado.")
 
+        return ProjectAutomacaoService.diagnosticar(
+            pag_bloq=ProjectAutomacaoService._pagamentos_bloqueadores(db, project_id),
+            docs=ProjectAutomacaoService._documentos_tecnicos_atuais_do_projeto(db, project_id),
+        )
+
+    @staticmethod
+    def diagnosticar(
+        pag_bloq: Sequence[Any],
+        docs: Sequence[Any],
+        now: Optional[datetime] = None,
+    ) -> Tuple[str, str, bool, Optional[str], List[_Motivo]]:
+        """
+        Regras sobre dados já carregados. Pagamentos: `status` e
+        `data_vencimento`; documentos: `status_tecnico` (modelos ou
+        linhas de consulta por colunas).
+        """
         motivos: List[_Motivo] = []
 
-        now = ProjectAutomacaoService._now_utc()
-        pag_bloq = ProjectAutomacaoService._pagamentos_bloqueadores(db, project_id)
+        now = now or ProjectAutomacaoService._now_utc()
 
         if pag_bloq:
             atrasados = []
@@ -140,8 +155,6 @@ class ProjectAutomacaoService:
                 motivos,
             )
 
-        docs = ProjectAutomacaoService._documentos_tecnicos_atuais_do_projeto(db, project_id)
-
         if not docs:
             motivos.append(_Motivo("SEM_DOCUMENTOS_TECNICOS", "Nenhum documento técnico encontrado."))
             return (
@@ -194,6 +207,13 @@ class ProjectAutomacaoService:
         if atual and (atual.status or "").upper().strip() == status_sugerido:
             return status_sugerido, False, motivos
 
+        ProjectAutomacaoService.registrar_status(db, project_id, status_sugerido, desc)
+
+        return status_sugerido, True, motivos
+
+    @staticmethod
+    def registrar_status(db: Session, project_id: int, status_sugerido: str, desc: str) -> None:
+        """Novo status automático + evento na timeline (commit do chamador)."""
         payload = ProjectStatusCreate(
             status=status_sugerido,
             descricao=desc,
@@ -213,5 +233,3 @@ class ProjectAutomacaoService:
             descricao=desc,
             status=status_sugerido,
         )
-
-        return status_sugerido, True, motivos
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List
+from typing import Any, List, Sequence
 
 from sqlalchemy.orm import Session
 
@@ -73,13 +73,27 @@ class ProjectFluxoService:
             .all()
         )
 
+        status, descricao = ProjectFluxoService.decidir_status(documentos)
+
+        return ProjectFluxoService._definir_status(
+            db=db,
+            project_id=project_id,
+            status=status,
+            descricao=descricao,
+            definido_por_usuario_id=definido_por_usuario_id,
+        )
+
+    @staticmethod
+    def decidir_status(documentos: Sequence[Any]) -> tuple[str, str]:
+        """
+        (status, descrição) a partir das versões atuais dos documentos
+        técnicos. Só lê `status_tecnico`: aceita modelos ou linhas de
+        consulta por colunas.
+        """
         if not documentos:
-            return ProjectFluxoService._definir_status(
-                db=db,
-                project_id=project_id,
-                status=ProjectFluxoService.STATUS_CADASTRADO,
-                descricao="Projeto cadastrado. Nenhum documento técnico anexado.",
-                definido_por_usuario_id=definido_por_usuario_id,
+            return (
+                ProjectFluxoService.STATUS_CADASTRADO,
+                "Projeto cadastrado. Nenhum documento técnico anexado.",
             )
 
         total = len(documentos)
@@ -104,47 +118,47 @@ class ProjectFluxoService:
                 em_analise += 1
 
         if reprovados > 0:
-            return ProjectFluxoService._definir_status(
-                db=db,
-                project_id=project_id,
-                status=ProjectFluxoService.STATUS_AJUSTES_SOLICITADOS,
-                descricao="Documentos técnicos reprovados. Ajustes obrigatórios.",
-                definido_por_usuario_id=definido_por_usuario_id,
+            return (
+                ProjectFluxoService.STATUS_AJUSTES_SOLICITADOS,
+                "Documentos técnicos reprovados. Ajustes obrigatórios.",
             )
 
         if corrigir > 0:
-            return ProjectFluxoService._definir_status(
-                db=db,
-                project_id=project_id,
-                status=ProjectFluxoService.STATUS_AJUSTES_SOLICITADOS,
-                descricao="Documentos técnicos pendentes de correção.",
-                definido_por_usuario_id=definido_por_usuario_id,
+            return (
+                ProjectFluxoService.STATUS_AJUSTES_SOLICITADOS,
+                "Documentos técnicos pendentes de correção.",
             )
 
         if em_analise > 0:
-            return ProjectFluxoService._definir_status(
-                db=db,
-                project_id=project_id,
-                status=ProjectFluxoService.STATUS_DOCUMENTOS_EM_ANALISE,
-                descricao="Documentos técnicos em análise.",
-                definido_por_usuario_id=definido_por_usuario_id,
+            return (
+                ProjectFluxoService.STATUS_DOCUMENTOS_EM_ANALISE,
+                "Documentos técnicos em análise.",
             )
 
         if aprovados == total:
-            return ProjectFluxoService._definir_status(
-                db=db,
-                project_id=project_id,
-                status=ProjectFluxoService.STATUS_APROVADO_TECNICAMENTE,
-                descricao="Todos os documentos técnicos foram aprovados.",
-                definido_por_usuario_id=definido_por_usuario_id,
+            return (
+                ProjectFluxoService.STATUS_APROVADO_TECNICAMENTE,
+                "Todos os documentos técnicos foram aprovados.",
             )
 
+        return (
+            ProjectFluxoService.STATUS_DOCUMENTOS_EM_ANALISE,
+            "Estado técnico indefinido. Revisão necessária.",
+        )
+
+    @staticmethod
+    def registrar_status(
+        db: Session,
+        project_id: int,
+        status: str,
+        descricao: str,
+    ) -> ProjectStatus:
         return ProjectFluxoService._definir_status(
             db=db,
             project_id=project_id,
-            status=ProjectFluxoService.STATUS_DOCUMENTOS_EM_ANALISE,
-            descricao="Estado técnico indefinido. Revisão necessária.",
-            definido_por_usuario_id=definido_por_usuario_id,
+            status=status,
+            descricao=descricao,
+            definido_por_usuario_id=None,
         )
 
     @staticmethod
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.documento_tecnico import DocumentoTecnico
+from app.models.imovel import Imovel
+from app.models.pagamento import Pagamento
+from app.models.project import Project
+from app.models.project_status import ProjectStatus
+from app.services.project_automacao_service import ProjectAutomacaoService
+from app.services.project_fluxo_service import ProjectFluxoService
+
+
+class ProjectRecalculoService:
+    """
+    Recálculo do status do projeto com coalescência de gatilhos.
+
+    Quem altera documentos técnicos ou pagamentos marca o projeto como
+    "sujo" (marcar). O projeto é avaliado uma única vez:
+    - ao sair do escopo adiar(), quando há um aberto para ele (pipeline
+      de OCR, webhook de pagamento), mesmo que as marcações venham de
+      outras threads/sessões do processo;
+    - ao fim da janela PROJETO_RECALCULO_DEBOUNCE_MS, quando configurada;
+    - imediatamente, caso contrário.
+
+    A avaliação carrega documentos, pagamentos e status ativo de todos os
+    projetos pendentes em uma consulta por tabela e grava no máximo uma
+    transição de status por projeto.
+    """
+
+    FLUXO = "fluxo"
+    AUTOMACAO = "automacao"
+
+    _lock = threading.Lock()
+
+    # project_id -> escopos adiar() abertos
+    _adiados: dict[int, int] = {}
+    # project_id -> avaliações pedidas (FLUXO / AUTOMACAO)
+    _pendentes: dict[int, set[str]] = {}
+    _timers: dict[int, threading.Timer] = {}
+
+    _marcacoes = 0
+    _avaliacoes = 0
+    _transicoes = 0
+
+    # =========================================================
+    # GATILHOS
+    # =========================================================
+    @staticmethod
+    def _debounce_segundos() -> float:
+        return max(int(settings.PROJETO_RECALCULO_DEBOUNCE_MS or 0), 0) / 1000.0
+
+    @classmethod
+    def marcar(
+        cls,
+        db: Session,
+        project_id: Optional[int],
+        fluxo: bool = True,
+        automacao: bool = True,
+    ) -> None:
+        """
+        fluxo: regras de ProjectFluxoService (documentos técnicos);
+        automacao: regras de ProjectAutomacaoService (pagamentos + documentos).
+        """
+        if not project_id:
+            return
+
+        avaliacoes = {cls.FLUXO} if fluxo else set()
+        if automacao:
+            avaliacoes.add(cls.AUTOMACAO)
+        if not avaliacoes:
+            return
+
+        project_id = int(project_id)
+        debounce = cls._debounce_segundos()
+
+        with cls._lock:
+            cls._marcacoes += 1
+
+            if cls._adiados.get(project_id) or debounce > 0:
+                cls._pendentes.setdefault(project_id, set()).update(avaliacoes)
+
+                if not cls._adiados.get(project_id) and project_id not in cls._timers:
+                    timer = threading.Timer(debounce, cls._disparar, args=(project_id,))
+                    timer.daemon = True
+                    cls._timers[project_id] = timer
+                    timer.start()
+                return
+
+        cls.avaliar(db, {project_id: avaliacoes})
+
+    @classmethod
+    @contextmanager
+    def adiar(cls, db: Session, project_id: Optional[int]) -> Iterator[None]:
+        """
+        Acumula as marcações do projeto até o fim do bloco e avalia uma
+        vez na saída (inclusive se o bloco falhar: o que foi commitado
+        continua valendo).
+        """
+        if not project_id:
+            yield
+            return
+
+        project_id = int(project_id)
+
+        with cls._lock:
+            cls._adiados[project_id] = cls._adiados.get(project_id, 0) + 1
+
+        try:
+            yield
+        finally:
+            with cls._lock:
+                restantes = cls._adiados.get(project_id, 1) - 1
+                if restantes > 0:
+                    cls._adiados[project_id] = restantes
+                    avaliacoes = None
+                else:
+                    cls._adiados.pop(project_id, None)
+                    avaliacoes = cls._pendentes.pop(project_id, None)
+                    timer = cls._timers.pop(project_id, None)
+                    if timer is not None:
+                        timer.cancel()
+
+            if avaliacoes:
+                cls.avaliar(db, {project_id: avaliacoes})
+
+    @classmethod
+    def _disparar(cls, project_id: int) -> None:
+        """Fim da janela de debounce: avalia numa sessão própria."""
+        with cls._lock:
+            cls._timers.pop(project_id, None)
+            if cls._adiados.get(project_id):
+                # Um escopo adiar() abriu depois da marcação: ele avalia
+                return
+            avaliacoes = cls._pendentes.pop(project_id, None)
+
+        if not avaliacoes:
+            return
+
+        db = SessionLocal()
+        try:
+            cls.avaliar(db, {project_id: avaliacoes})
+        finally:
+            db.close()
+
+    @classmethod
+    def processar_pendentes(cls, db: Session) -> int:
+        """
+        Avalia agora tudo que aguarda a janela de debounce (fora dos
+        escopos adiar() abertos). Retorna quantos projetos avaliou.
+        """
+        with cls._lock:
+            pendentes = {
+                project_id: cls._pendentes.pop(project_id)
+                for project_id in list(cls._pendentes)
+                if not cls._adiados.get(project_id)
+            }
+            for project_id in pendentes:
+                timer = cls._timers.pop(project_id, None)
+                if timer is not None:
+                    timer.cancel()
+
+        if pendentes:
+            cls.avaliar(db, pendentes)
+
+        return len(pendentes)
+
+    # =========================================================
+    # CARGA EM LOTE
+    # =========================================================
+    @staticmethod
+    def _carregar(db: Session, project_ids: list[int]) -> dict[int, dict[str, Any]]:
+        """
+        Estado de cada projeto: uma consulta por tabela para o lote todo,
+        só com as colunas que as regras leem (sem joins eager dos modelos).
+        """
+        estado: dict[int, dict[str, Any]] = {
+            project_id: {"docs": [], "pagamentos": [], "status_atual": None}
+            for (project_id,) in db.query(Project.id).filter(Project.id.in_(project_ids))
+        }
+
+        documentos = (
+            db.query(Imovel.project_id, DocumentoTecnico.status_tecnico)
+            .join(Imovel, Imovel.id == DocumentoTecnico.imovel_id)
+            .filter(
+                Imovel.project_id.in_(project_ids),
+                DocumentoTecnico.is_versao_atual.is_(True),
+            )
+        )
+        for doc in documentos:
+            if doc.project_id in estado:
+                estado[doc.project_id]["docs"].append(doc)
+
+        pagamentos = (
+            db.query(Pagamento.project_id, Pagamento.status, Pagamento.data_vencimento)
+            .filter(
+                Pagamento.project_id.in_(project_ids),
+                Pagamento.bloqueia_fluxo.is_(True),
+                Pagamento.status != "PAGO",
+                Pagamento.status != "CANCELADO",
+            )
+            .order_by(Pagamento.data_vencimento.asc())
+        )
+        for pagamento in pagamentos:
+            if pagamento.project_id in estado:
+                estado[pagamento.project_id]["pagamentos"].append(pagamento)
+
+        status_ativos = (
+            db.query(ProjectStatus.project_id, ProjectStatus.status)
+            .filter(
+                ProjectStatus.project_id.in_(project_ids),
+                ProjectStatus.ativo.is_(True),
+            )
+        )
+        for status in status_ativos:
+            if status.project_id in estado:
+                estado[status.project_id]["status_atual"] = status.status
+
+        return estado
+
+    # =========================================================
+    # AVALIAÇÃO
+    # =========================================================
+    @classmethod
+    def avaliar(cls, db: Session, pendentes: dict[int, set[str]]) -> dict[int, str]:
+        """
+        Avalia cada projeto uma vez e retorna {project_id: status final}.
+        Falhas não sobem: automações não podem derrubar quem as disparou.
+        """
+        if not pendentes:
+            return {}
+
+        try:
+            estado = cls._carregar(db, sorted(pendentes))
+        except Exception as exc:
+            cls._rollback(db)
+            print(f"⚠️ Falha ao carregar estado dos projetos {sorted(pendentes)}: {str(exc)}")
+            return {}
+
+        resultado: dict[int, str] = {}
+
+        for project_id, avaliacoes in sorted(pendentes.items()):
+            dados = estado.get(project_id)
+            if dados is None:
+                print(f"⚠️ Recálculo ignorado: projeto {project_id} não encontrado")
+                continue
+
+            try:
+                resultado[project_id] = cls._avaliar_projeto(db, project_id, avaliacoes, dados)
+            except Exception as exc:
+                cls._rollback(db)
+                print(f"⚠️ Falha ao recalcular status do projeto {project_id}: {str(exc)}")
+
+        with cls._lock:
+            cls._avaliacoes += len(resultado)
+
+        return resultado
+
+    @classmethod
+    def _avaliar_projeto(
+        cls,
+        db: Session,
+        project_id: int,
+        avaliacoes: set[str],
+        dados: dict[str, Any],
+    ) -> str:
+        # Antes, fluxo e automação gravavam em sequência e a automação
+        # sobrescrevia o fluxo: só a decisão final vira transição.
+        if cls.AUTOMACAO in avaliacoes:
+            status, descricao, *_ = ProjectAutomacaoService.diagnosticar(
+                pag_bloq=dados["pagamentos"],
+                docs=dados["docs"],
+            )
+            registrar = ProjectAutomacaoService.registrar_status
+        else:
+            status, descricao = ProjectFluxoService.decidir_status(dados["docs"])
+            registrar = ProjectFluxoService.registrar_status
+
+        atual = (dados["status_atual"] or "").upper().strip()
+        if atual == status:
+            return status
+
+        registrar(db, project_id, status, descricao)
+        db.commit()
+
+        with cls._lock:
+            cls._transicoes += 1
+
+        return status
+
+    @staticmethod
+    def _rollback(db: Session) -> None:
+        try:
+            db.rollback()
+        except Exception:
+            pass
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @classmethod
+    def estatisticas(cls) -> dict[str, int]:
+        with cls._lock:
+            return {
+                "marcacoes": cls._marcacoes,
+                "avaliacoes": cls._avaliacoes,
+                "transicoes": cls._transicoes,
+                "pendentes": len(cls._pendentes),
+                "adiados": len(cls._adiados),
+            }
+
+    @classmethod
+    def limpar(cls) -> None:
+        with cls._lock:
+            for timer in cls._timers.values():
+                timer.cancel()
+            cls._timers.clear()
+            cls._pendentes.clear()
+            cls._adiados.clear()
+            cls._marcacoes = 0
+            cls._avaliacoes = 0
+            cls._transicoes = 0
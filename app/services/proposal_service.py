@@ -10,7 +10,8 @@ from sqlalchemy.orm import Session
 from app.models.municipio import Municipio
 from app.schemas.calculation import ProposalRequest
 from app.services.calculation_service import CalculationService
-from app.services.pdf_service import gerar_pdf_proposta, gerar_pdf_contrato
+from app.services.pdf_service import gerar_pdfs_proposta_contrato
+from app.services.snapshot_cache_service import SnapshotCacheService
 
 
 TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates"
@@ -20,6 +21,18 @@ env = Environment(
 )
 
 
+def _carregar_vti_municipios(db: Session) -> dict[str, tuple[float | None, float | None]]:
+    vtis: dict[str, tuple[float | None, float | None]] = {}
+    linhas = (
+        db.query(Municipio.nome, Municipio.vti_min, Municipio.vtn_min)
+        .order_by(Municipio.id.asc())
+    )
+    for nome, vti_min, vtn_min in linhas:
+        if nome:
+            vtis.setdefault(nome.strip().lower(), (vti_min, vtn_min))
+    return vtis
+
+
 def _obter_vti_imovel_por_municipio(
     db: Session,
     municipio_nome: str | None,
@@ -28,15 +41,17 @@ def _obter_vti_imovel_por_municipio(
     if not municipio_nome or not area_ha or area_ha <= 0:
         return None
 
-    municipio = (
-        db.query(Municipio)
-        .filter(Municipio.nome.ilike(municipio_nome))
-        .first()
+    vtis = SnapshotCacheService.obter(
+        db,
+        SnapshotCacheService.MUNICIPIOS,
+        _carregar_vti_municipios,
     )
+    municipio = vtis.get(municipio_nome.strip().lower())
     if not municipio:
         return None
 
-    base_ha = max(municipio.vti_min or 0, municipio.vtn_min or 0)
+    vti_min, vtn_min = municipio
+    base_ha = max(vti_min or 0, vtn_min or 0)
     return base_ha * area_ha if base_ha > 0 else None
 
 
@@ -44,7 +59,8 @@ def generate_full_proposal(
     db: Session,
     payload: ProposalRequest,
     project_id: int,
-    user_id: int,  # reservado para auditoria futura
+    user_id: int,  # dono dos jobs de PDF (pdf_assincrono)
+    pdf_assincrono: bool = False,
 ) -> dict:
     # 1) VTI garantido
     vti_imovel = payload.vti_imovel
@@ -141,14 +157,18 @@ def generate_full_proposal(
         vti_imovel=dados["vti_imovel"],
     )
 
-    # 6) PDFs
-    pdf_proposta_path = gerar_pdf_proposta(project_id=project_id, html_simples=html_proposta)
-    pdf_contrato_path = gerar_pdf_contrato(project_id=project_id, html_simples=html_contrato)
+    # 6) PDFs (em paralelo; com pdf_assincrono, só agendados)
+    pdfs = gerar_pdfs_proposta_contrato(
+        project_id=project_id,
+        html_proposta=html_proposta,
+        html_contrato=html_contrato,
+        assincrono=pdf_assincrono,
+        owner_id=user_id,
+    )
 
     return {
         "dados": dados,  # ✅ frontend (BudgetWizard) usa result.dados.*
         "html_proposta": html_proposta,
         "html_contrato": html_contrato,
-        "pdf_proposta": pdf_proposta_path,
-        "pdf_contrato": pdf_contrato_path,
+        **pdfs,
     }
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Optional
+
+import numpy as np
+from shapely.geometry import MultiPolygon, Point, Polygon
+from shapely.geometry.polygon import orient
+
+
+@dataclass(frozen=True)
+class CampoDbf:
+    """
+    Campo da tabela DBF. Os tamanhos padrão são os mesmos que o driver
+    ESRI Shapefile do OGR usa quando o esquema não define largura.
+    """
+
+    nome: str
+    tipo: str               # "N" (número) ou "C" (texto)
+    tamanho: int
+    decimais: int = 0
+
+    @staticmethod
+    def inferir(nome: str, valor: Any) -> "CampoDbf":
+        # DBF limita nomes a 10 caracteres (o OGR trunca da mesma forma)
+        nome = str(nome)[:10]
+
+        if isinstance(valor, bool) or valor is None or isinstance(valor, str):
+            return CampoDbf(nome, "C", 80)
+        if isinstance(valor, (int, np.integer)):
+            return CampoDbf(nome, "N", 18)
+        if isinstance(valor, (float, np.floating)):
+            return CampoDbf(nome, "N", 24, 15)
+
+        return CampoDbf(nome, "C", 80)
+
+
+@dataclass
+class CamadaShp:
+    """
+    Feições (polígonos ou pontos + atributos) prontas para virar
+    .shp/.shx/.dbf/.prj.
+    """
+
+    geometrias: list[Polygon | MultiPolygon | Point]
+    atributos: list[dict[str, Any]]
+    epsg: int = 4326
+    campos: list[CampoDbf] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if len(self.geometrias) != len(self.atributos):
+            raise ValueError("Número de geometrias e de atributos não confere")
+
+        if not self.campos and self.atributos:
+            self.campos = [
+                CampoDbf.inferir(nome, valor)
+                for nome, valor in self.atributos[0].items()
+            ]
+
+
+class ShapefileEscritor:
+    """
+    Escrita direta de shapefiles de polígonos e pontos (ESRI Shapefile Technical
+    Description, 1998) a partir dos arrays de coordenadas, sem GeoPandas,
+    Fiona ou GDAL.
+
+    Segue as convenções do driver do OGR para que o resultado seja o
+    mesmo byte a byte: anel externo horário, furos anti-horários, DBF
+    em UTF-8 (com .cpg) e PRJ em WKT1 ESRI.
+    """
+
+    TIPO_PONTO = 1
+    TIPO_POLIGONO = 5
+    CODIGO_ARQUIVO = 9994
+    VERSAO = 1000
+
+    CPG = b"UTF-8"
+
+    # =========================================================
+    # GEOMETRIA
+    # =========================================================
+    @staticmethod
+    def _aneis(geom: Polygon | MultiPolygon) -> list[np.ndarray]:
+        poligonos = list(geom.geoms) if isinstance(geom, MultiPolygon) else [geom]
+
+        aneis: list[np.ndarray] = []
+        for poligono in poligonos:
+            if poligono.is_empty:
+                continue
+            # sign=-1: externo horário, internos anti-horários
+            orientado = orient(poligono, sign=-1.0)
+            aneis.append(np.asarray(orientado.exterior.coords, dtype="<f8")[:, :2])
+            aneis.extend(
+                np.asarray(interior.coords, dtype="<f8")[:, :2]
+                for interior in orientado.interiors
+            )
+
+        return aneis
+
+    @staticmethod
+    def _caixa(pontos: np.ndarray) -> tuple[float, float, float, float]:
+        if not len(pontos):
+            return 0.0, 0.0, 0.0, 0.0
+        minimo = pontos.min(axis=0)
+        maximo = pontos.max(axis=0)
+        return float(minimo[0]), float(minimo[1]), float(maximo[0]), float(maximo[1])
+
+    @classmethod
+    def _tipo(cls, geometrias: list[Polygon | MultiPolygon | Point]) -> int:
+        """Tipo da camada: um shapefile só guarda um tipo de geometria."""
+        pontos = [isinstance(geom, Point) for geom in geometrias]
+
+        if pontos and all(pontos):
+            return cls.TIPO_PONTO
+        if any(pontos):
+            raise ValueError("Camada mistura pontos e polígonos")
+
+        return cls.TIPO_POLIGONO
+
+    @classmethod
+    def _registro_ponto(cls, geom: Point) -> tuple[bytes, tuple[float, ...]]:
+        """Conteúdo de um registro Point e sua caixa envolvente."""
+        if geom.is_empty:
+            return struct.pack("<i", 0), ()
+
+        return struct.pack("<i2d", cls.TIPO_PONTO, geom.x, geom.y), (geom.x, geom.y, geom.x, geom.y)
+
+    @classmethod
+    def _registro(cls, geom: Polygon | MultiPolygon) -> tuple[bytes, tuple[float, ...]]:
+        """Conteúdo de um registro Polygon e sua caixa envolvente."""
+        aneis = cls._aneis(geom)
+
+        if not aneis:
+            # Null shape
+            return struct.pack("<i", 0), ()
+
+        pontos = np.concatenate(aneis)
+        caixa = cls._caixa(pontos)
+
+        inicios = np.cumsum([0] + [len(anel) for anel in aneis[:-1]]).astype("<i4")
+
+        conteudo = b"".join(
+            [
+                struct.pack("<i4d2i", cls.TIPO_POLIGONO, *caixa, len(aneis), len(pontos)),
+                inicios.tobytes(),
+                pontos.tobytes(),
+            ]
+        )
+
+        return conteudo, caixa
+
+    @classmethod
+    def _cabecalho(cls, tamanho_bytes: int, caixa: tuple[float, ...], tipo: int) -> bytes:
+        return b"".join(
+            [
+                struct.pack(">7i", cls.CODIGO_ARQUIVO, 0, 0, 0, 0, 0, tamanho_bytes // 2),
+                struct.pack("<2i", cls.VERSAO, tipo),
+                struct.pack("<8d", *(caixa or (0.0,) * 4), 0.0, 0.0, 0.0, 0.0),
+            ]
+        )
+
+    @classmethod
+    def gerar_shp_shx(
+        cls, geometrias: list[Polygon | MultiPolygon | Point]
+    ) -> tuple[bytes, bytes]:
+        tipo = cls._tipo(geometrias)
+        gerar_registro = cls._registro_ponto if tipo == cls.TIPO_PONTO else cls._registro
+
+        registros: list[bytes] = []
+        indices: list[bytes] = []
+        caixas: list[tuple[float, ...]] = []
+
+        deslocamento = 100
+        for numero, geom in enumerate(geometrias, start=1):
+            conteudo, caixa = gerar_registro(geom)
+            if caixa:
+                caixas.append(caixa)
+
+            registros.append(struct.pack(">2i", numero, len(conteudo) // 2) + conteudo)
+            indices.append(struct.pack(">2i", deslocamento // 2, len(conteudo) // 2))
+            deslocamento += 8 + len(conteudo)
+
+        caixa_total: tuple[float, ...] = ()
+        if caixas:
+            caixa_total = (
+                min(c[0] for c in caixas),
+                min(c[1] for c in caixas),
+                max(c[2] for c in caixas),
+                max(c[3] for c in caixas),
+            )
+
+        shp = cls._cabecalho(deslocamento, caixa_total, tipo) + b"".join(registros)
+        shx = cls._cabecalho(100 + 8 * len(indices), caixa_total, tipo) + b"".join(indices)
+
+        return shp, shx
+
+    # =========================================================
+    # DBF (dBASE III)
+    # =========================================================
+    @staticmethod
+    def _valor_dbf(campo: CampoDbf, valor: Any) -> bytes:
+        if valor is None:
+            texto = ""
+        elif campo.tipo == "N":
+            if campo.decimais:
+                texto = f"{float(valor):{campo.tamanho}.{campo.decimais}f}"
+            else:
+                texto = f"{int(valor):{campo.tamanho}d}"
+        else:
+            texto = str(valor)
+
+        dados = texto.encode("utf-8")[: campo.tamanho]
+
+        if campo.tipo == "N":
+            return dados.rjust(campo.tamanho, b" ")
+        return dados.ljust(campo.tamanho, b" ")
+
+    @classmethod
+    def gerar_dbf(
+        cls,
+        campos: list[CampoDbf],
+        atributos: list[dict[str, Any]],
+        data_arquivo: Optional[date] = None,
+    ) -> bytes:
+        data_arquivo = data_arquivo or date.today()
+
+        tamanho_cabecalho = 32 + 32 * len(campos) + 1
+        tamanho_registro = 1 + sum(campo.tamanho for campo in campos)
+
+        partes = [
+            struct.pack(
+                "<4BIHH20x",
+                0x03,
+                data_arquivo.year - 1900,
+                data_arquivo.month,
+                data_arquivo.day,
+                len(atributos),
+                tamanho_cabecalho,
+                tamanho_registro,
+            )
+        ]
+
+        for campo in campos:
+            partes.append(
+                struct.pack(
+                    "<11sc4xBB14x",
+                    campo.nome.encode("ascii", "replace"),
+                    campo.tipo.encode("ascii"),
+                    campo.tamanho,
+                    campo.decimais,
+                )
+            )
+
+        partes.append(b"\x0d")
+
+        # Campos na ordem das chaves do primeiro registro
+        chaves = list(atributos[0].keys()) if atributos else []
+        for registro in atributos:
+            partes.append(b" ")
+            partes.extend(
+                cls._valor_dbf(campo, registro.get(chave))
+                for campo, chave in zip(campos, chaves)
+            )
+
+        partes.append(b"\x1a")
+
+        return b"".join(partes)
+
+    # =========================================================
+    # PRJ
+    # =========================================================
+    @staticmethod
+    def gerar_prj(epsg: int) -> bytes:
+        from pyproj import CRS
+        from pyproj.enums import WktVersion
+
+        return CRS.from_epsg(int(epsg)).to_wkt(WktVersion.WKT1_ESRI).encode("utf-8")
+
+    # =========================================================
+    # CAMADA COMPLETA
+    # =========================================================
+    @classmethod
+    def gerar_arquivos(
+        cls,
+        camada: CamadaShp,
+        nome: str = "area",
+        data_arquivo: Optional[date] = None,
+    ) -> dict[str, bytes]:
+        """Componentes do shapefile: {"area.shp": ..., "area.dbf": ...}."""
+        shp, shx = cls.gerar_shp_shx(camada.geometrias)
+
+        return {
+            f"{nome}.cpg": cls.CPG,
+            f"{nome}.dbf": cls.gerar_dbf(camada.campos, camada.atributos, data_arquivo),
+            f"{nome}.prj": cls.gerar_prj(camada.epsg),
+            f"{nome}.shp": shp,
+            f"{nome}.shx": shx,
+        }
@@ -3,14 +3,19 @@ from __future__ import annotations
 import json
 import os
 from datetime import datetime
-
-import geopandas as gpd
+from typing import Any
 
 from shapely.geometry import Polygon
 from app.services.geometria_service import GeometriaService
+from app.services.shapefile_escritor import CamadaShp, ShapefileEscritor
 
 
 class ShpExportService:
+    """
+    Exportação SHP de parcela. O caminho padrão escreve os arquivos
+    direto das coordenadas (ShapefileEscritor); GeoPandas é opcional e
+    só é importado por gerar_gdf / salvar_shp com GeoDataFrame.
+    """
 
     # =========================================================
     # VALIDAÇÃO TOPOLOGICA (ROBUSTA)
@@ -25,38 +30,54 @@ class ShpExportService:
     # =========================================================
     # GERAR SHP PROFISSIONAL
     # =========================================================
+    @staticmethod
+    def _atributos(geom: Polygon) -> dict[str, Any]:
+        return {
+            "id": 1,
+            "area_m2": round(geom.area, 4),
+            "perimetro_m": round(geom.length, 4),
+            "data_geracao": datetime.utcnow().isoformat(),
+        }
+
     @staticmethod
     def gerar_shp(
         geojson: str,
         epsg: int = 4326,
+    ) -> CamadaShp:
+        geom = ShpExportService.validar_geometria(geojson)
+
+        return CamadaShp(
+            geometrias=[geom],
+            atributos=[ShpExportService._atributos(geom)],
+            epsg=epsg,
+        )
+
+    @staticmethod
+    def gerar_gdf(
+        geojson: str,
+        epsg: int = 4326,
     ):
+        """
+        Mesma camada como GeoDataFrame (exportações em massa / análise).
+        Exige geopandas instalado.
+        """
+        import geopandas as gpd
+
         geom = ShpExportService.validar_geometria(geojson)
 
-        area = geom.area
-        perimetro = geom.length
-
-        gdf = gpd.GeoDataFrame(
-            [
-                {
-                    "id": 1,
-                    "area_m2": round(area, 4),
-                    "perimetro_m": round(perimetro, 4),
-                    "data_geracao": datetime.utcnow().isoformat(),
-                }
-            ],
+        return gpd.GeoDataFrame(
+            [ShpExportService._atributos(geom)],
             geometry=[geom],
             crs=f"EPSG:{epsg}",
         )
 
-        return gdf
-
     # =========================================================
     # SALVAR SHP
     # =========================================================
     @staticmethod
     def salvar_shp(
         imovel_id: int,
-        gdf,
+        camada,
         base_dir: str = "app/uploads/imoveis",
     ) -> str:
 
@@ -65,13 +86,36 @@ class ShpExportService:
         folder = os.path.join(base_dir, str(imovel_id), "shp", str(ts))
         os.makedirs(folder, exist_ok=True)
 
+        if isinstance(camada, CamadaShp):
+            for nome, conteudo in ShapefileEscritor.gerar_arquivos(camada).items():
+                with open(os.path.join(folder, nome), "wb") as f:
+                    f.write(conteudo)
+
+            return folder
+
         path = os.path.join(folder, "area.shp")
 
-        # salvar com encoding e schema correto
-        gdf.to_file(
+        # GeoDataFrame (gerar_gdf): salvar com encoding e schema correto
+        camada.to_file(
             path,
             driver="ESRI Shapefile",
             encoding="utf-8",
         )
 
-        return folder
\ No newline at end of file
+        return folder
+
+    # =========================================================
+    # SHP EM MEMÓRIA (PACOTE ZIP)
+    # =========================================================
+    @staticmethod
+    def gerar_shp_arquivos(
+        geojson: str,
+        epsg: int = 4326,
+    ) -> dict[str, bytes]:
+        """
+        Conteúdo de cada componente (area.shp, .shx, .dbf, .prj, .cpg)
+        para quem empacota sem gravar na pasta do imóvel.
+        """
+        return ShapefileEscritor.gerar_arquivos(
+            ShpExportService.gerar_shp(geojson, epsg=epsg)
+        )
@@ -10,10 +10,10 @@ from math import atan2, degrees, floor, sqrt
 from typing import List, Tuple
 
 from fastapi import HTTPException
-from pyproj import CRS, Transformer
 from shapely.geometry import Polygon, shape
 
 from app.services.geometria_service import GeometriaService
+from app.services.projecao_service import ProjecaoService
 
 
 @dataclass(frozen=True)
@@ -86,18 +86,19 @@ class SigefExportService:
 
         epsg_utm = SigefExportService._utm_epsg_from_lonlat(lon, lat)
 
-        crs_src = CRS.from_epsg(epsg_origem)
-        crs_dst = CRS.from_epsg(epsg_utm)
-        transformer = Transformer.from_crs(crs_src, crs_dst, always_xy=True)
-
         coords = list(geom.exterior.coords)
         if coords[0] != coords[-1]:
             coords.append(coords[0])
 
-        pts: list[_PontoUTM] = []
-        for x, y in coords:
-            X, Y = transformer.transform(float(x), float(y))
-            pts.append(_PontoUTM(x=float(X), y=float(Y)))
+        projetadas = ProjecaoService.transformar_coords(
+            [(float(c[0]), float(c[1])) for c in coords],
+            epsg_origem,
+            epsg_utm,
+        )
+
+        pts: list[_PontoUTM] = [
+            _PontoUTM(x=float(X), y=float(Y)) for X, Y in projetadas
+        ]
 
         if len(pts) < 4:
             raise HTTPException(
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.schemas.calculation import CalculationBase
+from app.services.calculation_service import CalculationService
+
+
+class SimulacaoLoteService:
+    """
+    Orçamento de muitos imóveis de uma vez, com as mesmas regras de
+    CalculationService.calcular (resultado idêntico, valor a valor).
+
+    Os parâmetros são lidos uma única vez (um snapshot para o lote todo)
+    e as contas rodam em arrays numpy; só finalidade e ART, que dependem
+    de poucas combinações distintas, passam pelas regras originais, uma
+    vez por combinação. Nenhum PDF é gerado aqui.
+    """
+
+    COLUNAS = (
+        "indice",
+        "id",
+        "area_hectares",
+        "finalidade",
+        "partes",
+        "vti_imovel",
+        "valor_base",
+        "valor_variaveis_percentuais",
+        "valor_variaveis_fixas",
+        "valor_art",
+        "valor_cartorio",
+        "total_final",
+        "erro",
+    )
+
+    COLUNAS_VALOR = (
+        "valor_base",
+        "valor_variaveis_percentuais",
+        "valor_variaveis_fixas",
+        "valor_art",
+        "valor_cartorio",
+        "total_final",
+    )
+
+    # Mesmas faixas de CalculationService.calcular_valor_base
+    FAIXAS = (
+        (4, 8, "faixa_4_8"),
+        (8, 16, "faixa_8_16"),
+        (16, 25, "faixa_16_25"),
+        (25, 50, "faixa_25_50"),
+        (50, 100, "faixa_50_100"),
+    )
+
+    LINHAS_POR_BLOCO_CSV = 500
+
+    # =========================================================
+    # ENTRADA
+    # =========================================================
+    @staticmethod
+    def expandir(
+        base: CalculationBase,
+        variacoes: dict[str, list[Any]],
+    ) -> list[CalculationBase]:
+        """
+        Tabela de sensibilidade: produto cartesiano das variações sobre
+        um cenário base. {"area_hectares": [10, 20], "partes": [2, 4]}
+        -> 4 cenários, na ordem do produto.
+        """
+        campos = CalculationBase.model_fields
+
+        desconhecidos = [nome for nome in variacoes if nome not in campos]
+        if desconhecidos:
+            raise ValueError(f"Campos de variação inválidos: {', '.join(desconhecidos)}")
+
+        vazios = [nome for nome, valores in variacoes.items() if not valores]
+        if vazios:
+            raise ValueError(f"Variação sem valores: {', '.join(vazios)}")
+
+        if not variacoes:
+            return [base]
+
+        nomes = list(variacoes)
+        dados_base = base.model_dump()
+
+        return [
+            CalculationBase(**{**dados_base, **dict(zip(nomes, combinacao))})
+            for combinacao in itertools.product(*(variacoes[nome] for nome in nomes))
+        ]
+
+    @staticmethod
+    def contar_cenarios(variacoes: dict[str, list[Any]]) -> int:
+        total = 1
+        for valores in variacoes.values():
+            total *= max(len(valores), 1)
+        return total
+
+    # =========================================================
+    # CÁLCULO
+    # =========================================================
+    @staticmethod
+    def _por_combinacao(
+        db: Session,
+        chaves: Iterable[Any],
+        calcular: Any,
+    ) -> dict[Any, tuple[Any, Optional[str]]]:
+        """Aplica a regra original uma vez por combinação distinta."""
+        resultado: dict[Any, tuple[Any, Optional[str]]] = {}
+        for chave in chaves:
+            if chave in resultado:
+                continue
+            try:
+                resultado[chave] = (calcular(db, *chave), None)
+            except Exception as exc:
+                resultado[chave] = (None, str(exc))
+        return resultado
+
+    @classmethod
+    def calcular(
+        cls,
+        db: Session,
+        itens: list[CalculationBase],
+    ) -> dict[str, Any]:
+        """
+        Colunas do resultado ({nome: array/lista}, uma posição por item).
+        Itens inválidos ficam com os valores em NaN e a mensagem em "erro",
+        a mesma que CalculationService.calcular levantaria.
+        """
+        n = len(itens)
+        p = CalculationService.parametros(db)
+
+        def param(nome: str) -> float:
+            return float(p.get(nome, 0.0))
+
+        def coluna(campo: str, dtype: Any = "f8") -> np.ndarray:
+            return np.fromiter((getattr(item, campo) for item in itens), dtype=dtype, count=n)
+
+        area = coluna("area_hectares")
+        erros: list[Optional[str]] = [None] * n
+
+        # ---------------------------
+        # Valor base por faixa
+        # ---------------------------
+        base = np.full(n, np.nan)
+        for min_a, max_a, chave in cls.FAIXAS:
+            na_faixa = (area >= min_a) & (area < max_a)
+            base = np.where(
+                na_faixa,
+                np.maximum(param(f"{chave}_valor_por_ha") * area, param(f"{chave}_minimo")),
+                base,
+            )
+
+        for i in np.flatnonzero(np.isnan(base)):
+            erros[i] = (
+                "Área mínima para cálculo é 4 hectares."
+                if area[i] < 4
+                else "Área fora das faixas configuradas."
+            )
+
+        # ---------------------------
+        # Finalidade e ART (por combinação)
+        # ---------------------------
+        chaves_finalidade = [(item.finalidade, item.partes) for item in itens]
+        finalidades = cls._por_combinacao(
+            db, chaves_finalidade, CalculationService.calcular_finalidade
+        )
+        arts = cls._por_combinacao(
+            db, [(item.finalidade,) for item in itens], CalculationService.calcular_art
+        )
+
+        pct_finalidade = np.empty(n)
+        valor_art = np.empty(n)
+        for i, item in enumerate(itens):
+            valor, erro = finalidades[chaves_finalidade[i]]
+            pct_finalidade[i] = np.nan if erro else valor
+            if erro and erros[i] is None:
+                erros[i] = erro
+
+            art, erro = arts[(item.finalidade,)]
+            valor_art[i] = np.nan if erro else art[1]
+            if erro and erros[i] is None:
+                erros[i] = erro
+
+        # ---------------------------
+        # Percentuais (mesma ordem de soma de calcular)
+        # ---------------------------
+        percentuais = np.zeros(n)
+        percentuais = percentuais + np.where(coluna("confrontacao_rios", bool), param("confrontacao_rios"), 0.0)
+        percentuais = percentuais + np.where(coluna("proprietario_acompanha", bool), param("proprietario_acompanha"), 0.0)
+        percentuais = percentuais + np.where(coluna("mata_mais_50", bool), param("mata_mais_50"), 0.0)
+        percentuais = percentuais + pct_finalidade
+        valor_pct = base * (percentuais / 100)
+
+        # ---------------------------
+        # Fixos
+        # ---------------------------
+        fixos = np.zeros(n)
+        fixos = fixos + np.where(~coluna("ccir_atualizado", bool), param("ccir_nao_atualizado"), 0.0)
+        fixos = fixos + np.where(~coluna("itr_atualizado", bool), param("itr_nao_atualizado"), 0.0)
+        fixos = fixos + np.where(~coluna("certificado_digital", bool), param("certificado_digital_nao_possui"), 0.0)
+        fixos = fixos + coluna("estaqueamento_km") * param("estaqueamento_km")
+        fixos = fixos + coluna("notificacao_confrontantes") * param("notificacao_confrontante")
+
+        # ---------------------------
+        # Cartório / ITBI
+        # ---------------------------
+        vti = np.fromiter(
+            (np.nan if item.vti_imovel is None else item.vti_imovel for item in itens),
+            dtype="f8",
+            count=n,
+        )
+        itbi_pct = param("itbi_percentual")
+        itbi = (vti * itbi_pct) / 100.0 if itbi_pct else np.zeros(n)
+        cartorio_com_vti = (
+            param("cartorio_escritura_ate_28493")
+            + param("cartorio_registro_ate_28493")
+            + param("certidao_onus_reais")
+            + itbi
+        )
+        valor_cartorio = np.where(vti > 0, cartorio_com_vti, 0.0)
+
+        total = base + valor_pct + fixos + valor_art + valor_cartorio
+
+        invalidos = np.array([erro is not None for erro in erros], dtype=bool)
+        colunas: dict[str, Any] = {
+            "valor_base": base,
+            "valor_variaveis_percentuais": valor_pct,
+            "valor_variaveis_fixas": fixos,
+            "valor_art": valor_art,
+            "valor_cartorio": valor_cartorio,
+            "total_final": total,
+        }
+        for nome in cls.COLUNAS_VALOR:
+            colunas[nome] = np.where(invalidos, np.nan, colunas[nome])
+
+        colunas["erro"] = erros
+        return colunas
+
+    # =========================================================
+    # SAÍDA
+    # =========================================================
+    @classmethod
+    def linhas(
+        cls,
+        itens: list[CalculationBase],
+        colunas: dict[str, Any],
+        ids: Optional[list[Optional[str]]] = None,
+    ) -> Iterator[list[Any]]:
+        """Uma lista por item, na ordem de COLUNAS (NaN vira None)."""
+        valores = {nome: colunas[nome].tolist() for nome in cls.COLUNAS_VALOR}
+
+        for i, item in enumerate(itens):
+            erro = colunas["erro"][i]
+            yield [
+                i,
+                ids[i] if ids else None,
+                item.area_hectares,
+                item.finalidade,
+                item.partes,
+                item.vti_imovel,
+                *(None if erro else valores[nome][i] for nome in cls.COLUNAS_VALOR),
+                erro,
+            ]
+
+    @staticmethod
+    def resumo(colunas: dict[str, Any]) -> dict[str, Any]:
+        total = colunas["total_final"]
+        validos = total[~np.isnan(total)]
+        return {
+            "total": int(len(total)),
+            "sucesso": int(len(validos)),
+            "falhas": int(len(total) - len(validos)),
+            "soma_total_final": round(float(validos.sum()), 2) if len(validos) else 0.0,
+            "minimo_total_final": round(float(validos.min()), 2) if len(validos) else None,
+            "maximo_total_final": round(float(validos.max()), 2) if len(validos) else None,
+        }
+
+    @classmethod
+    def stream_csv(cls, linhas: Iterable[list[Any]]) -> Iterator[str]:
+        """CSV (separador ";", decimal "."), em blocos de linhas."""
+        saida = io.StringIO()
+        escritor = csv.writer(saida, delimiter=";", lineterminator="\n")
+
+        escritor.writerow(cls.COLUNAS)
+        for numero, linha in enumerate(linhas, start=1):
+            escritor.writerow(["" if valor is None else valor for valor in linha])
+            if numero % cls.LINHAS_POR_BLOCO_CSV == 0:
+                yield saida.getvalue()
+                saida.seek(0)
+                saida.truncate()
+
+        if saida.tell():
+            yield saida.getvalue()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.cache_versao import CacheVersao
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    nome: str
+    versao: int
+    dados: Any
+    carregado_em: float
+
+
+class SnapshotCacheService:
+    """
+    Snapshots em memória de tabelas pequenas e muito lidas, versionados
+    pela tabela cache_versoes.
+
+    - obter(): dentro da mesma transação não vai ao banco; fora dela,
+      uma consulta à versão (zero, se SNAPSHOT_VERSAO_TTL_SEGUNDOS > 0)
+      e a recarga completa só quando a versão mudou;
+    - incrementar(): chamado após cada escrita no conjunto; vale para
+      todos os workers, já que a versão mora no banco.
+    """
+
+    PARAMETROS_CALCULO = "calculation_parameters"
+    MUNICIPIOS = "municipios"
+
+    _lock = threading.Lock()
+    _snapshots: dict[str, Snapshot] = {}
+    _verificado_em: dict[str, float] = {}
+
+    _hits = 0
+    _verificacoes = 0
+    _recargas = 0
+
+    # =========================================================
+    # VERSÃO
+    # =========================================================
+    @staticmethod
+    def _versao_banco(db: Session, nome: str) -> int:
+        versao = (
+            db.query(CacheVersao.versao)
+            .filter(CacheVersao.nome == nome)
+            .scalar()
+        )
+        return int(versao or 0)
+
+    @classmethod
+    def incrementar(cls, db: Session, nome: str) -> None:
+        """Invalida o conjunto em todos os workers (commit incluso)."""
+        db.execute(
+            text(
+                "INSERT INTO cache_versoes (nome, versao) VALUES (:nome, 1) "
+                "ON CONFLICT (nome) DO UPDATE SET versao = cache_versoes.versao + 1"
+            ),
+            {"nome": nome},
+        )
+        db.commit()
+
+        with cls._lock:
+            cls._snapshots.pop(nome, None)
+            cls._verificado_em.pop(nome, None)
+
+        db.info.pop(cls._chave_sessao(nome), None)
+
+    # =========================================================
+    # LEITURA
+    # =========================================================
+    @staticmethod
+    def _chave_sessao(nome: str) -> tuple[str, str]:
+        return ("snapshot", nome)
+
+    @classmethod
+    def obter(
+        cls,
+        db: Session,
+        nome: str,
+        carregar: Callable[[Session], Any],
+    ) -> Any:
+        """
+        Dados do conjunto. `carregar` faz a consulta completa (uma só)
+        e só roda quando não há snapshot da versão atual.
+        """
+        chave = cls._chave_sessao(nome)
+
+        # Mesma transação: o snapshot já verificado continua valendo
+        memo: Optional[tuple[Any, Snapshot]] = db.info.get(chave)
+        if memo is not None and memo[0] is not None and memo[0] is db.get_transaction():
+            with cls._lock:
+                cls._hits += 1
+            return memo[1].dados
+
+        agora = time.monotonic()
+        ttl = float(settings.SNAPSHOT_VERSAO_TTL_SEGUNDOS or 0)
+
+        with cls._lock:
+            snapshot = cls._snapshots.get(nome)
+            confiavel = (
+                snapshot is not None
+                and ttl > 0
+                and agora - cls._verificado_em.get(nome, 0.0) < ttl
+            )
+            if confiavel:
+                cls._hits += 1
+
+        if not confiavel:
+            versao = cls._versao_banco(db, nome)
+
+            with cls._lock:
+                cls._verificacoes += 1
+
+            if snapshot is None or snapshot.versao != versao:
+                # A versão é lida antes dos dados: o snapshot pode ser mais
+                # novo que o rótulo (recarrega na próxima), nunca mais velho.
+                snapshot = Snapshot(
+                    nome=nome,
+                    versao=versao,
+                    dados=carregar(db),
+                    carregado_em=time.time(),
+                )
+
+                with cls._lock:
+                    cls._recargas += 1
+
+            with cls._lock:
+                cls._snapshots[nome] = snapshot
+                cls._verificado_em[nome] = agora
+
+        db.info[chave] = (db.get_transaction(), snapshot)
+
+        return snapshot.dados
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @classmethod
+    def estatisticas(cls) -> dict[str, Any]:
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "verificacoes": cls._verificacoes,
+                "recargas": cls._recargas,
+                "versoes": {nome: s.versao for nome, s in cls._snapshots.items()},
+            }
+
+    @classmethod
+    def limpar(cls) -> None:
+        with cls._lock:
+            cls._snapshots.clear()
+            cls._verificado_em.clear()
+            cls._hits = 0
+            cls._verificacoes = 0
+            cls._recargas = 0
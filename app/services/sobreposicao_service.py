@@ -4,6 +4,12 @@ from shapely.geometry import shape
 from fastapi import HTTPException
 import json
 
+import numpy as np
+import shapely
+
+from app.services.geometria_service import GeometriaService
+from app.services.projecao_service import ProjecaoService
+
 
 class SobreposicaoService:
 
@@ -37,4 +43,113 @@ class SobreposicaoService:
         return {
             "area_intersecao": area_intersecao,
             "percentual": percentual,
+            "geom_base": g1,
+            "geom_afetada": g2,
+            "intersecao": intersecao,
         }
+
+    # =========================================================
+    # MÉTRICAS EM UTM (VETORIZADO)
+    # =========================================================
+    @staticmethod
+    def _apenas_poligonos(geom):
+        """
+        Interseções podem vir como GeometryCollection com linhas/pontos
+        (bordas encostadas); só as partes poligonais contam.
+        """
+        if geom is None or geom.is_empty:
+            return shapely.Polygon()
+
+        if geom.geom_type in ("Polygon", "MultiPolygon"):
+            return geom
+
+        partes = [
+            p for p in shapely.get_parts(geom)
+            if p.geom_type in ("Polygon", "MultiPolygon")
+        ]
+        if not partes:
+            return shapely.Polygon()
+
+        return shapely.union_all(partes)
+
+    @staticmethod
+    def calcular_metricas_lote(
+        base_geom,
+        afetadas: list,
+        intersecoes: list,
+        epsg_origem: int = 4326,
+    ) -> dict:
+        """
+        Área (ha), percentuais sobre base e afetada e perímetro (m) de cada
+        interseção, reprojetando tudo de uma vez na zona UTM da base.
+
+        Geometrias LOCAL_CARTESIANA já estão em metros.
+        """
+        intersecoes = [SobreposicaoService._apenas_poligonos(i) for i in intersecoes]
+
+        geoms = np.array([base_geom, *afetadas, *intersecoes], dtype=object)
+        epsg_utm = None
+
+        # Mesma heurística de GeometriaService.analisar_referencial
+        if (
+            epsg_origem
+            and epsg_origem > 0
+            and GeometriaService._coordenadas_parecem_geograficas(base_geom)
+        ):
+            centroide = base_geom.centroid
+            epsg_utm = GeometriaService._utm_epsg_from_lonlat(centroide.x, centroide.y)
+            # Sem a projeção as áreas sairiam em graus; melhor falhar
+            try:
+                geoms = ProjecaoService.transformar_geometrias(geoms, epsg_origem, epsg_utm)
+            except Exception as exc:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"Não foi possível projetar as geometrias de EPSG:{epsg_origem} "
+                        f"para EPSG:{epsg_utm}: {str(exc)}"
+                    ),
+                ) from exc
+
+        areas = shapely.area(geoms)
+        perimetros = shapely.length(geoms)
+
+        n = len(afetadas)
+        area_base = float(areas[0])
+        areas_afetadas = areas[1:n + 1]
+        areas_intersecao = areas[n + 1:]
+        perimetros_intersecao = perimetros[n + 1:]
+
+        itens = []
+        for area_afetada, area_int, perimetro_int in zip(
+            areas_afetadas, areas_intersecao, perimetros_intersecao
+        ):
+            itens.append(
+                {
+                    "area_ha": float(area_int) / 10000.0,
+                    "percentual_base": (
+                        float(area_int) / area_base * 100 if area_base > 0 else 0.0
+                    ),
+                    "percentual_afetada": (
+                        float(area_int) / float(area_afetada) * 100
+                        if area_afetada > 0
+                        else 0.0
+                    ),
+                    "perimetro_m": float(perimetro_int),
+                }
+            )
+
+        return {
+            "epsg_utm": epsg_utm,
+            "area_base_ha": area_base / 10000.0,
+            "itens": itens,
+        }
+
+    @staticmethod
+    def calcular_metricas(base_geom, afetada_geom, intersecao, epsg_origem: int = 4326) -> dict:
+        lote = SobreposicaoService.calcular_metricas_lote(
+            base_geom=base_geom,
+            afetadas=[afetada_geom],
+            intersecoes=[intersecao],
+            epsg_origem=epsg_origem,
+        )
+        return {"epsg_utm": lote["epsg_utm"], **lote["itens"][0]}
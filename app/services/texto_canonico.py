@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Optional
+
+
+# =========================================================
+# TABELAS (compiladas uma única vez)
+# =========================================================
+_ACENTOS_MAIUSCULOS = {
+    "Ç": "C",
+    "Ã": "A", "Á": "A", "À": "A", "Â": "A", "Ä": "A",
+    "É": "E", "È": "E", "Ê": "E", "Ë": "E",
+    "Í": "I", "Ì": "I", "Î": "I", "Ï": "I",
+    "Ó": "O", "Ò": "O", "Ô": "O", "Õ": "O", "Ö": "O",
+    "Ú": "U", "Ù": "U", "Û": "U", "Ü": "U",
+}
+
+# Hífen e sublinhado viram espaço ("NOR-DESTE", "NU_PROPRIETARIO")
+_TABELA_UPPER_SEM_ACENTOS = str.maketrans({
+    **_ACENTOS_MAIUSCULOS,
+    "-": " ",
+    "_": " ",
+})
+
+_RE_NAO_DIGITO = re.compile(r"\D")
+
+# Valores curtos (nomes, comarcas, tipos, direções) se repetem muito
+# entre campos e documentos; textos longos não entram no memo.
+_MAX_MEMO = 4096
+
+
+@lru_cache(maxsize=_MAX_MEMO)
+def _espacos_memo(texto: str) -> str:
+    return " ".join(texto.split())
+
+
+@lru_cache(maxsize=_MAX_MEMO)
+def _upper_sem_acentos_memo(texto: str) -> str:
+    return texto.upper().translate(_TABELA_UPPER_SEM_ACENTOS)
+
+
+class TextoCanonico:
+    """
+    Camada única de canonicalização de texto de OCR: espaços, caixa
+    alta sem acentos e dígitos. Usada pelo normalizador de OCR e pelos
+    serviços de matrícula e confrontantes.
+    """
+
+    LIMITE_MEMO = 256
+
+    @staticmethod
+    def espacos(texto: str) -> str:
+        if len(texto) <= TextoCanonico.LIMITE_MEMO:
+            return _espacos_memo(texto)
+        return " ".join(texto.split())
+
+    @staticmethod
+    def texto(valor: Any) -> Optional[str]:
+        """
+        Texto com espaços normalizados; números viram texto, bool e
+        outros tipos viram None.
+        """
+        if valor is None or isinstance(valor, bool):
+            return None
+
+        if isinstance(valor, (int, float)):
+            valor = str(valor)
+
+        if not isinstance(valor, str):
+            return None
+
+        return TextoCanonico.espacos(valor) or None
+
+    @staticmethod
+    def upper_sem_acentos(texto: Optional[str]) -> Optional[str]:
+        if not texto:
+            return None
+
+        if len(texto) <= TextoCanonico.LIMITE_MEMO:
+            return _upper_sem_acentos_memo(texto)
+        return texto.upper().translate(_TABELA_UPPER_SEM_ACENTOS)
+
+    @staticmethod
+    def somente_digitos(valor: Any) -> str:
+        return _RE_NAO_DIGITO.sub("", str(valor or ""))
+
+    @staticmethod
+    def formatar_cpf_cnpj(valor: Any) -> Optional[str]:
+        """CPF/CNPJ com máscara; None se não tiver 11 ou 14 dígitos."""
+        numeros = TextoCanonico.somente_digitos(valor)
+
+        if len(numeros) == 11:
+            return f"{numeros[:3]}.{numeros[3:6]}.{numeros[6:9]}-{numeros[9:]}"
+        if len(numeros) == 14:
+            return f"{numeros[:2]}.{numeros[2:5]}.{numeros[5:8]}/{numeros[8:12]}-{numeros[12:]}"
+
+        return None
+
+    # =========================================================
+    # MANUTENÇÃO
+    # =========================================================
+    @staticmethod
+    def estatisticas() -> dict[str, int]:
+        espacos = _espacos_memo.cache_info()
+        upper = _upper_sem_acentos_memo.cache_info()
+
+        return {
+            "hits": espacos.hits + upper.hits,
+            "misses": espacos.misses + upper.misses,
+            "entradas": espacos.currsize + upper.currsize,
+        }
+
+    @staticmethod
+    def limpar() -> None:
+        _espacos_memo.cache_clear()
+        _upper_sem_acentos_memo.cache_clear()
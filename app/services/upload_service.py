@@ -0,0 +1,463 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from app.core.config import settings
+
+
+class UploadLimiteExcedido(Exception):
+    """Arquivo maior que UPLOAD_MAX_BYTES."""
+
+
+class UploadOffsetInvalido(Exception):
+    """Offset enviado não corresponde ao que já está gravado."""
+
+
+class UploadEmUso(Exception):
+    """Outro envio para a mesma sessão está em andamento."""
+
+
+class UploadMultipartInvalido(Exception):
+    """Corpo multipart malformado ou sem o campo do arquivo."""
+
+
+# =========================================================
+# SESSÃO DE UPLOAD RETOMÁVEL
+# =========================================================
+@dataclass
+class SessaoUpload:
+    """
+    Estado de um upload retomável (estilo tus), persistido em JSON ao
+    lado do arquivo parcial: qualquer worker do host pode continuar.
+    """
+
+    id: str
+    project_id: int
+    owner_id: int
+    doc_type: str
+    original_filename: str
+    content_type: Optional[str]
+    ext: str
+    tamanho_total: int
+    criado_em: float
+
+
+class UploadService:
+    """
+    Gravação de uploads em streaming: leitura em blocos, escrita fora do
+    event loop num arquivo temporário, SHA-256 incremental e rename
+    atômico para o destino final.
+    """
+
+    PASTA_SESSOES = "_sessoes"
+
+    # Boundaries e cabeçalhos das partes, além do próprio arquivo
+    MARGEM_MULTIPART = 64 * 1024
+
+    # sessao_id -> (offset já incluído no hash, hasher)
+    _hashers: dict[str, tuple[int, Any]] = {}
+    _lock = threading.Lock()
+
+    # =========================================================
+    # CONFIGURAÇÃO
+    # =========================================================
+    @staticmethod
+    def limite_bytes() -> int:
+        return int(settings.UPLOAD_MAX_BYTES)
+
+    @staticmethod
+    def tamanho_bloco() -> int:
+        return max(64 * 1024, int(settings.UPLOAD_CHUNK_BYTES))
+
+    # =========================================================
+    # ESCRITA EM STREAMING
+    # =========================================================
+    @staticmethod
+    def _temporario(destino: Path) -> Path:
+        return destino.with_name(f".{destino.name}.{uuid.uuid4().hex}.part")
+
+    @staticmethod
+    def _remover(caminho: Path) -> None:
+        try:
+            caminho.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    async def gravar_stream(
+        blocos: AsyncIterator[bytes],
+        destino: Path,
+        limite: Optional[int] = None,
+    ) -> tuple[int, str]:
+        """
+        Grava os blocos em destino (via arquivo temporário + rename) e
+        retorna (tamanho, sha256). O limite é checado a cada bloco: nada
+        além dele chega ao disco.
+        """
+        limite = UploadService.limite_bytes() if limite is None else limite
+
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = UploadService._temporario(destino)
+
+        hasher = hashlib.sha256()
+        tamanho = 0
+
+        arquivo = await run_in_threadpool(open, temporario, "wb")
+
+        try:
+            async for bloco in blocos:
+                if not bloco:
+                    continue
+
+                tamanho += len(bloco)
+                if tamanho > limite:
+                    raise UploadLimiteExcedido(
+                        f"Arquivo excede o limite de {limite} bytes."
+                    )
+
+                hasher.update(bloco)
+                await run_in_threadpool(arquivo.write, bloco)
+
+            await run_in_threadpool(arquivo.close)
+            await run_in_threadpool(os.replace, temporario, destino)
+
+        except BaseException:
+            await run_in_threadpool(arquivo.close)
+            await run_in_threadpool(UploadService._remover, temporario)
+            raise
+
+        return tamanho, hasher.hexdigest()
+
+    @staticmethod
+    async def limitar_stream(
+        blocos: AsyncIterator[bytes],
+        limite: int,
+    ) -> AsyncIterator[bytes]:
+        """Repassa o corpo cru da requisição, interrompendo acima do limite."""
+        total = 0
+        async for bloco in blocos:
+            total += len(bloco)
+            if total > limite:
+                raise UploadLimiteExcedido(f"Arquivo excede o limite de {limite} bytes.")
+            yield bloco
+
+    @staticmethod
+    async def ler_multipart(
+        headers: Headers,
+        blocos: AsyncIterator[bytes],
+        campo: str = "file",
+    ) -> tuple[UploadFile, Any]:
+        """
+        Faz o parse do multipart a partir do corpo cru, com o limite
+        aplicado ao stream (o Starlette não chega a receber mais que
+        UPLOAD_MAX_BYTES + margem). Retorna (arquivo, form); o chamador
+        fecha o form.
+        """
+        limite = UploadService.limite_bytes() + UploadService.MARGEM_MULTIPART
+
+        tamanho = headers.get("content-length")
+        if tamanho and tamanho.isdigit() and int(tamanho) > limite:
+            raise UploadLimiteExcedido(
+                f"Arquivo excede o limite de {UploadService.limite_bytes()} bytes."
+            )
+
+        parser = MultiPartParser(
+            headers,
+            UploadService.limitar_stream(blocos, limite),
+            max_files=1,
+            max_fields=16,
+        )
+
+        try:
+            form = await parser.parse()
+        except MultiPartException as exc:
+            raise UploadMultipartInvalido(exc.message)
+
+        arquivo = form.get(campo)
+        if not isinstance(arquivo, UploadFile):
+            await form.close()
+            raise UploadMultipartInvalido(f"Campo '{campo}' ausente.")
+
+        return arquivo, form
+
+    @staticmethod
+    async def blocos_upload(upload: Any) -> AsyncIterator[bytes]:
+        """Blocos de um UploadFile (multipart já recebido pelo Starlette)."""
+        tamanho_bloco = UploadService.tamanho_bloco()
+
+        while True:
+            bloco = await upload.read(tamanho_bloco)
+            if not bloco:
+                break
+            yield bloco
+
+    # =========================================================
+    # SESSÕES RETOMÁVEIS
+    # =========================================================
+    @staticmethod
+    def _pasta_sessoes(base_dir: Path) -> Path:
+        pasta = base_dir / UploadService.PASTA_SESSOES
+        pasta.mkdir(parents=True, exist_ok=True)
+        return pasta
+
+    @staticmethod
+    def _arquivos_sessao(base_dir: Path, sessao_id: str) -> tuple[Path, Path]:
+        pasta = UploadService._pasta_sessoes(base_dir)
+        return pasta / f"{sessao_id}.json", pasta / f"{sessao_id}.part"
+
+    @staticmethod
+    def criar_sessao(
+        base_dir: Path,
+        project_id: int,
+        owner_id: int,
+        doc_type: str,
+        original_filename: str,
+        content_type: Optional[str],
+        ext: str,
+        tamanho_total: int,
+    ) -> SessaoUpload:
+        limite = UploadService.limite_bytes()
+        if tamanho_total > limite:
+            raise UploadLimiteExcedido(f"Arquivo excede o limite de {limite} bytes.")
+
+        UploadService.limpar_expiradas(base_dir)
+
+        sessao = SessaoUpload(
+            id=uuid.uuid4().hex,
+            project_id=project_id,
+            owner_id=owner_id,
+            doc_type=doc_type,
+            original_filename=original_filename,
+            content_type=content_type,
+            ext=ext,
+            tamanho_total=tamanho_total,
+            criado_em=time.time(),
+        )
+
+        meta, parcial = UploadService._arquivos_sessao(base_dir, sessao.id)
+        parcial.touch()
+
+        temporario = meta.with_suffix(".json.tmp")
+        temporario.write_text(json.dumps(asdict(sessao)), encoding="utf-8")
+        os.replace(temporario, meta)
+
+        return sessao
+
+    @staticmethod
+    def obter_sessao(base_dir: Path, sessao_id: str) -> Optional[SessaoUpload]:
+        # Id vem da URL: só hex, nada de caminhos
+        if not sessao_id or any(c not in "0123456789abcdef" for c in sessao_id):
+            return None
+
+        meta, _ = UploadService._arquivos_sessao(base_dir, sessao_id)
+
+        try:
+            return SessaoUpload(**json.loads(meta.read_text(encoding="utf-8")))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def offset(base_dir: Path, sessao: SessaoUpload) -> int:
+        _, parcial = UploadService._arquivos_sessao(base_dir, sessao.id)
+        try:
+            return parcial.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _abrir_travado(parcial: Path, modo: str) -> Any:
+        """
+        Abre o arquivo parcial com trava exclusiva (flock, vale entre
+        processos e entre requisições do mesmo processo). Sem espera:
+        se outro envio está gravando, levanta UploadEmUso.
+        """
+        try:
+            arquivo = open(parcial, modo)
+        except FileNotFoundError:
+            raise UploadOffsetInvalido("Sessão de upload já concluída ou cancelada.")
+
+        try:
+            try:
+                fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadEmUso("Outro envio para esta sessão está em andamento.")
+
+            # Quem tinha a trava pode ter concluído (rename) a sessão
+            try:
+                mesmo = os.stat(parcial).st_ino == os.fstat(arquivo.fileno()).st_ino
+            except FileNotFoundError:
+                mesmo = False
+            if not mesmo:
+                raise UploadOffsetInvalido("Sessão de upload já concluída ou cancelada.")
+
+        except BaseException:
+            arquivo.close()
+            raise
+
+        return arquivo
+
+    @staticmethod
+    def _hasher_ate(parcial: Path, sessao_id: str, offset: int) -> Any:
+        """
+        Hasher com o conteúdo até offset. Reaproveita o estado em memória
+        quando o bloco anterior passou por este processo; senão relê o
+        arquivo parcial (outro worker ou reinício).
+        """
+        with UploadService._lock:
+            item = UploadService._hashers.pop(sessao_id, None)
+
+        if item and item[0] == offset:
+            return item[1]
+
+        hasher = hashlib.sha256()
+        tamanho_bloco = UploadService.tamanho_bloco()
+
+        with open(parcial, "rb") as f:
+            restante = offset
+            while restante > 0:
+                bloco = f.read(min(tamanho_bloco, restante))
+                if not bloco:
+                    break
+                hasher.update(bloco)
+                restante -= len(bloco)
+
+        return hasher
+
+    @staticmethod
+    async def anexar(
+        base_dir: Path,
+        sessao: SessaoUpload,
+        offset_cliente: int,
+        blocos: AsyncIterator[bytes],
+    ) -> int:
+        """
+        Anexa blocos ao arquivo parcial a partir de offset_cliente e
+        retorna o novo offset. Bytes além do tamanho declarado são recusados.
+        O offset é conferido com a trava da sessão já tomada: dois envios
+        simultâneos nunca gravam juntos.
+        """
+        _, parcial = UploadService._arquivos_sessao(base_dir, sessao.id)
+
+        arquivo = await run_in_threadpool(UploadService._abrir_travado, parcial, "ab")
+
+        try:
+            offset = os.fstat(arquivo.fileno()).st_size
+            if offset_cliente != offset:
+                raise UploadOffsetInvalido(
+                    f"Offset {offset_cliente} não confere com o gravado ({offset})."
+                )
+
+            hasher = await run_in_threadpool(
+                UploadService._hasher_ate, parcial, sessao.id, offset
+            )
+
+        except BaseException:
+            await run_in_threadpool(arquivo.close)
+            raise
+
+        try:
+            async for bloco in blocos:
+                if not bloco:
+                    continue
+
+                if offset + len(bloco) > sessao.tamanho_total:
+                    raise UploadLimiteExcedido(
+                        f"Conteúdo excede o tamanho declarado ({sessao.tamanho_total} bytes)."
+                    )
+
+                await run_in_threadpool(arquivo.write, bloco)
+                hasher.update(bloco)
+                offset += len(bloco)
+
+        finally:
+            # Conexão caiu no meio: o que já foi gravado vale como progresso
+            with UploadService._lock:
+                UploadService._hashers[sessao.id] = (offset, hasher)
+
+            # Fechar libera a trava
+            await run_in_threadpool(arquivo.close)
+
+        return offset
+
+    @staticmethod
+    def concluir_sessao(
+        base_dir: Path,
+        sessao: SessaoUpload,
+        destino: Path,
+    ) -> str:
+        """
+        Move o arquivo completo para o destino (rename atômico) e retorna
+        o SHA-256. A sessão deixa de existir. Roda com a trava da sessão:
+        só um envio conclui, os demais recebem UploadOffsetInvalido.
+        """
+        meta, parcial = UploadService._arquivos_sessao(base_dir, sessao.id)
+
+        with UploadService._abrir_travado(parcial, "rb") as arquivo:
+            offset = os.fstat(arquivo.fileno()).st_size
+            if offset != sessao.tamanho_total:
+                raise UploadOffsetInvalido(
+                    f"Upload incompleto: {offset} de {sessao.tamanho_total} bytes."
+                )
+
+            sha256 = UploadService._hasher_ate(parcial, sessao.id, offset).hexdigest()
+
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(parcial, destino)
+
+            UploadService._remover(meta)
+
+        return sha256
+
+    @staticmethod
+    def cancelar_sessao(base_dir: Path, sessao: SessaoUpload) -> None:
+        meta, parcial = UploadService._arquivos_sessao(base_dir, sessao.id)
+
+        with UploadService._lock:
+            UploadService._hashers.pop(sessao.id, None)
+
+        UploadService._remover(parcial)
+        UploadService._remover(meta)
+
+    @staticmethod
+    def limpar_expiradas(base_dir: Path) -> int:
+        ttl = float(settings.UPLOAD_SESSAO_TTL_HORAS) * 3600
+        limite = time.time() - ttl
+        removidas = 0
+
+        for meta in UploadService._pasta_sessoes(base_dir).glob("*.json"):
+            # O parcial é tocado a cada bloco recebido: mede a inatividade
+            parcial = meta.with_suffix(".part")
+            referencia = parcial if parcial.exists() else meta
+
+            try:
+                if referencia.stat().st_mtime >= limite:
+                    continue
+            except FileNotFoundError:
+                continue
+
+            sessao_id = meta.stem
+            UploadService._remover(parcial)
+            UploadService._remover(meta)
+
+            with UploadService._lock:
+                UploadService._hashers.pop(sessao_id, None)
+
+            removidas += 1
+
+        if removidas:
+            print(f"🧹 Sessões de upload expiradas removidas: {removidas}")
+
+        return removidas
@@ -0,0 +1,4 @@
+# app/workers/__init__.py
+"""
+Processos de background (fila de automações).
+"""
@@ -0,0 +1,320 @@
+# app/workers/automation_worker.py
+"""
+Worker de automações.
+
+Reserva jobs de automation_jobs em lote (FOR UPDATE SKIP LOCKED),
+mantém heartbeat dos leases, reprocessa com backoff e recupera jobs
+de workers mortos. Vários containers podem rodar este processo em
+paralelo sobre o mesmo banco.
+
+Uso:
+    python -m app.workers.automation_worker
+"""
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.automation_job import AutomationJob
+from app.services.automation_queue_service import AutomationQueueService
+
+
+# =========================================================
+# REGISTRO DOS MODELS
+# (mesma lista de main.py — relacionamentos precisam de todos)
+# =========================================================
+import app.models.user
+import app.models.project
+import app.models.project_status
+import app.models.project_marco
+import app.models.timeline
+import app.models.imovel
+import app.models.matricula
+import app.models.proprietario
+import app.models.municipio
+import app.models.cartorio
+import app.models.confrontante
+import app.models.document
+import app.models.documento_tecnico
+import app.models.documento_tecnico_checklist
+import app.models.geometria
+import app.models.sobreposicao
+import app.models.vertice
+import app.models.segmento
+import app.models.pagamento
+import app.models.parcela_pagamento
+import app.models.pagamento_evento
+import app.models.audit_log
+import app.models.profissional
+import app.models.proposta_profissional
+import app.models.projeto_profissional
+import app.models.profissional_selecao
+import app.models.profissional_ranking
+import app.models.avaliacao_profissional
+import app.models.visita_tecnica
+import app.models.calculation_parameter
+import app.models.proposal
+import app.models.ocr_result
+import app.models.template
+import app.models.external_credential
+import app.models.automation_job
+import app.models.automation_result
+
+
+# =========================================================
+# HANDLERS
+# =========================================================
+@dataclass(frozen=True)
+class HandlerJob:
+    tipo: str
+
+    # Retorna {"status": "COMPLETED" | "FAILED", "error_message": ...}.
+    # Exceções são tratadas como falhas transitórias (retry com backoff).
+    executar: Callable[[Session, AutomationJob], dict[str, Any]]
+
+    # Filtros extras na reserva (ex.: só jobs que este backend sabe executar)
+    filtros: Callable[[], list[Any]] = field(default=lambda: [])
+
+
+def _executar_ocr_pipeline(db: Session, job: AutomationJob) -> dict[str, Any]:
+    from app.services.ocr_pipeline_service import OcrPipelineService
+
+    return OcrPipelineService.processar_job(db, job)
+
+
+HANDLERS: dict[str, HandlerJob] = {
+    # Jobs OCR_DOCUMENT de create_ocr_job dependem do provedor OCR
+    # externo; aqui só rodam os agendados via /internal/ocr/pipeline/jobs.
+    "OCR_DOCUMENT": HandlerJob(
+        tipo="OCR_DOCUMENT",
+        executar=_executar_ocr_pipeline,
+        filtros=lambda: [
+            AutomationJob.payload_json["origem"].astext == "OCR_PIPELINE",
+        ],
+    ),
+}
+
+
+def parse_concorrencia(valor: str) -> dict[str, int]:
+    limites: dict[str, int] = {}
+
+    for item in (valor or "").split(","):
+        if "=" not in item:
+            continue
+
+        tipo, limite = item.split("=", 1)
+        tipo = tipo.strip().upper()
+
+        try:
+            limites[tipo] = max(int(limite.strip()), 0)
+        except ValueError:
+            continue
+
+    return limites
+
+
+# =========================================================
+# WORKER
+# =========================================================
+class AutomationWorker:
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        handlers: Optional[dict[str, HandlerJob]] = None,
+        limites: Optional[dict[str, int]] = None,
+    ) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers = handlers if handlers is not None else HANDLERS
+
+        limites = limites if limites is not None else parse_concorrencia(
+            settings.WORKER_CONCURRENCY
+        )
+        self.limites = {
+            tipo: limites.get(tipo, 1)
+            for tipo in self.handlers
+            if limites.get(tipo, 1) > 0
+        }
+
+        self._parar = threading.Event()
+
+        # Heartbeat continua até os jobs em execução terminarem
+        self._encerrado = threading.Event()
+        self._lock = threading.Lock()
+        self._em_execucao: dict[UUID, str] = {}
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(sum(self.limites.values()), 1),
+            thread_name_prefix="automation",
+        )
+
+    # =========================================================
+    # CICLO PRINCIPAL
+    # =========================================================
+    def executar(self) -> None:
+        AutomationQueueService.garantir_schema(engine)
+
+        heartbeat = threading.Thread(
+            target=self._loop_heartbeat,
+            name="automation-heartbeat",
+            daemon=True,
+        )
+        heartbeat.start()
+
+        print(f"🚀 Worker {self.worker_id} iniciado — limites: {self.limites}")
+
+        try:
+            while not self._parar.is_set():
+                reservados = 0
+
+                try:
+                    self._recuperar_leases()
+                    reservados = self._reservar_e_despachar()
+                except Exception as exc:
+                    print(f"⚠️ Falha no ciclo do worker: {str(exc)}")
+
+                if not reservados:
+                    self._parar.wait(settings.WORKER_POLL_INTERVAL_SECONDS)
+        finally:
+            print(f"⏳ Worker {self.worker_id} aguardando jobs em execução...")
+            self._pool.shutdown(wait=True)
+            self._encerrado.set()
+            print(f"🛑 Worker {self.worker_id} finalizado")
+
+    def parar(self, *_: Any) -> None:
+        self._parar.set()
+
+    def _vagas(self, tipo: str) -> int:
+        with self._lock:
+            ocupadas = sum(1 for t in self._em_execucao.values() if t == tipo)
+        return self.limites.get(tipo, 0) - ocupadas
+
+    def _recuperar_leases(self) -> None:
+        db = SessionLocal()
+        try:
+            total = AutomationQueueService.recuperar_leases_expirados(db)
+            if total:
+                print(f"♻️ {total} job(s) com lease expirado devolvidos à fila")
+        finally:
+            db.close()
+
+    def _reservar_e_despachar(self) -> int:
+        total = 0
+
+        for tipo, handler in self.handlers.items():
+            vagas = min(self._vagas(tipo), settings.WORKER_BATCH_SIZE)
+            if vagas <= 0:
+                continue
+
+            db = SessionLocal()
+            try:
+                jobs = AutomationQueueService.reservar_lote(
+                    db=db,
+                    worker_id=self.worker_id,
+                    tipo=tipo,
+                    limite=vagas,
+                    filtros=handler.filtros(),
+                )
+                job_ids = [job.id for job in jobs]
+            finally:
+                db.close()
+
+            for job_id in job_ids:
+                with self._lock:
+                    self._em_execucao[job_id] = tipo
+                self._pool.submit(self._executar_job, job_id, handler)
+
+            total += len(job_ids)
+
+        return total
+
+    # =========================================================
+    # EXECUÇÃO DE UM JOB
+    # =========================================================
+    def _executar_job(self, job_id: UUID, handler: HandlerJob) -> None:
+        db = SessionLocal()
+        inicio = time.perf_counter()
+
+        try:
+            job = db.query(AutomationJob).filter(AutomationJob.id == job_id).first()
+            if not job:
+                return
+
+            desfecho = handler.executar(db, job)
+
+            AutomationQueueService.concluir(
+                db=db,
+                job_id=job_id,
+                worker_id=self.worker_id,
+                status=desfecho.get("status") or "COMPLETED",
+                error_message=desfecho.get("error_message"),
+            )
+
+            print(
+                f"✅ Job {job_id} ({handler.tipo}) finalizado em "
+                f"{time.perf_counter() - inicio:.1f}s: {desfecho.get('status')}"
+            )
+
+        except Exception as exc:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+
+            try:
+                status = AutomationQueueService.falhar_com_retry(
+                    db=db,
+                    job_id=job_id,
+                    worker_id=self.worker_id,
+                    erro=f"{type(exc).__name__}: {str(exc)}",
+                )
+                print(f"❌ Job {job_id} ({handler.tipo}) falhou: {str(exc)} → {status}")
+            except Exception as exc_retry:
+                print(f"⚠️ Falha ao registrar erro do job {job_id}: {str(exc_retry)}")
+
+        finally:
+            db.close()
+            with self._lock:
+                self._em_execucao.pop(job_id, None)
+
+    # =========================================================
+    # HEARTBEAT
+    # =========================================================
+    def _loop_heartbeat(self) -> None:
+        while not self._encerrado.wait(settings.WORKER_HEARTBEAT_SECONDS):
+            with self._lock:
+                job_ids = list(self._em_execucao)
+
+            if not job_ids:
+                continue
+
+            db = SessionLocal()
+            try:
+                AutomationQueueService.renovar_leases(db, self.worker_id, job_ids)
+            except Exception as exc:
+                print(f"⚠️ Falha no heartbeat: {str(exc)}")
+            finally:
+                db.close()
+
+
+def main() -> None:
+    worker = AutomationWorker()
+
+    signal.signal(signal.SIGTERM, worker.parar)
+    signal.signal(signal.SIGINT, worker.parar)
+
+    worker.executar()
+
+
+if __name__ == "__main__":
+    main()
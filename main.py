@@ -8,6 +8,12 @@ from sqlalchemy.exc import OperationalError
 
 from app.core.config import settings
 from app.core.database import Base, engine
+from app.services.automation_queue_service import AutomationQueueService
+from app.services.memorial_lote_service import MemorialLoteService
+from app.services.exportacao_pacote_service import ExportacaoPacoteService
+from app.services.pdf_render_service import PdfRenderService
+from app.services.pipeline_cache_service import PipelineCacheService
+from app.crud.project_crud import garantir_indices_cards
 from app.routes.auth_routes import router as auth_router
 
 
@@ -52,6 +58,7 @@ import app.models.avaliacao_profissional
 import app.models.visita_tecnica
 
 import app.models.calculation_parameter
+import app.models.cache_versao
 import app.models.proposal
 import app.models.ocr_result
 import app.models.template
@@ -123,6 +130,35 @@ def startup_event():
     if not retries:
         raise RuntimeError("❌ Banco de dados não ficou disponível")
 
+    # AutomationJob mapeia as colunas de lease: sem elas, toda consulta falha
+    try:
+        AutomationQueueService.garantir_schema(engine)
+    except Exception as exc:
+        raise RuntimeError(f"❌ Falha ao garantir colunas da fila de automações: {str(exc)}") from exc
+
+    # Document mapeia documents.sha256: sem a coluna, toda consulta falha
+    try:
+        PipelineCacheService.garantir_schema(engine)
+    except Exception as exc:
+        raise RuntimeError(f"❌ Falha ao garantir colunas de hash de documentos: {str(exc)}") from exc
+
+    try:
+        garantir_indices_cards(engine)
+    except Exception as exc:
+        print(f"⚠️ Falha ao garantir índices dos cards de projetos: {str(exc)}")
+
+    try:
+        PdfRenderService.iniciar()
+    except Exception as exc:
+        print(f"⚠️ Falha ao iniciar workers de PDF: {str(exc)}")
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    MemorialLoteService.encerrar()
+    ExportacaoPacoteService.encerrar()
+    PdfRenderService.encerrar()
+
 # ============================================================
 # CORS
 # ============================================================
@@ -189,6 +225,7 @@ from app.routes.pagamento_routes import router as pagamento_router
 from app.routes.checkout_routes import router as checkout_router
 from app.routes.pagamento_webhook_routes import router as webhook_router
 from app.routes.orcamento_routes import router as orcamento_router
+from app.routes.pdf_job_routes import router as pdf_job_router
 
 from app.routes.profissional_routes import router as profissional_router
 from app.routes.proposta_profissional_routes import router as proposta_profissional_router
@@ -258,6 +295,7 @@ app.include_router(calculation_parameter_router, prefix="/api", tags=["Parâmetr
 app.include_router(proposal_router, prefix="/api", tags=["Propostas"])
 app.include_router(pagamento_router, prefix="/api", tags=["Pagamentos"])
 app.include_router(orcamento_router, prefix="/api", tags=["Orçamentos"])
+app.include_router(pdf_job_router, prefix="/api", tags=["PDF"])
 
 app.include_router(checkout_router, prefix="/api", tags=["Pagamentos"])
 app.include_router(webhook_router, prefix="/api", tags=["Pagamentos Webhook"])
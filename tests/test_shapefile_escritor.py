@@ -0,0 +1,64 @@
+"""
+ShapefileEscritor deve gerar os mesmos bytes que o driver ESRI Shapefile
+do OGR (via GeoPandas) para camadas de polígonos, multipolígonos e pontos.
+"""
+from datetime import date
+
+import pytest
+from shapely.geometry import MultiPolygon, Point, Polygon, box
+
+from app.services.shapefile_escritor import CamadaShp, ShapefileEscritor
+
+gpd = pytest.importorskip("geopandas")
+
+EPSG = 31983
+
+CAMADAS = {
+    "poligono": [
+        Polygon(
+            [(0, 0), (0, 10), (10, 10), (10, 0)],
+            [[(2, 2), (4, 2), (4, 4), (2, 4)]],
+        ),
+        box(20, 20, 25, 27),
+    ],
+    "multipoligono": [
+        MultiPolygon([box(0, 0, 1, 1), box(5, 5, 6, 8)]),
+        box(10, 10, 11, 11),
+    ],
+    "ponto": [
+        Point(1.5, 2.5),
+        Point(-3, 4),
+    ],
+}
+
+
+def _atributos(geometrias):
+    return [
+        {"id": i, "nome": f"vértice {i}", "area": float(geom.area) + 0.125}
+        for i, geom in enumerate(geometrias)
+    ]
+
+
+@pytest.mark.parametrize("tipo", sorted(CAMADAS))
+@pytest.mark.parametrize("extensao", ["shp", "shx", "dbf", "prj", "cpg"])
+def test_bytes_iguais_ao_geopandas(tmp_path, tipo, extensao):
+    geometrias = CAMADAS[tipo]
+    atributos = _atributos(geometrias)
+
+    gerados = ShapefileEscritor.gerar_arquivos(
+        CamadaShp(geometrias=geometrias, atributos=atributos, epsg=EPSG),
+        data_arquivo=date.today(),
+    )
+
+    gpd.GeoDataFrame(atributos, geometry=geometrias, crs=f"EPSG:{EPSG}").to_file(
+        tmp_path / "area.shp",
+        driver="ESRI Shapefile",
+        encoding="utf-8",
+    )
+
+    assert gerados[f"area.{extensao}"] == (tmp_path / f"area.{extensao}").read_bytes()
+
+
+def test_camada_mista_rejeitada():
+    with pytest.raises(ValueError):
+        ShapefileEscritor.gerar_shp_shx([box(0, 0, 1, 1), Point(0, 0)])